@@ -3,11 +3,16 @@ import asyncio
 from datetime import datetime, timezone, timedelta
 import time
 import asyncpg
+import json
 import os
 from typing import List, Optional
 from utils.logger import log
+from utils.rate_limiter import TokenBucket
+from ScriptDatabase.retention import has_timescaledb, ensure_daily_partitions, enforce_retention
+from ScriptDatabase.gap_index import find_gaps, missing_ranges
 
 from bpx.public import Public
+from utils.endpoints import api_url
 from config.settings import get_config
 
 
@@ -23,12 +28,113 @@ LIMIT_PER_REQUEST = 1000
 RETENTION_DAYS = config.database.retention_days
 MAX_RETRIES = 3
 RETRY_DELAY = 1
-API_RATE_LIMIT_DELAY = 0.2  # 200ms entre les requêtes
+BACKFILL_CONCURRENCY = config.database.backfill_concurrency
+CHECKPOINT_FILE = config.database.backfill_checkpoint_file
+LISTING_CACHE_FILE = config.database.listing_cache_file
+LISTING_SEARCH_DAYS = 365  # borne basse de la recherche dichotomique de la date de listing
+MIN_GAP_SECONDS = 5 * 60   # un trou de moins de 5 bougies 1m peut être une absence réelle de trades
 
-RSI_PERIOD_MINUTES = config.strategy.rsi_period * 24 * 60  # RSI en jours converti en minutes
+# Limiteur global partagé par tous les symboles backfillés en parallèle
+RATE_LIMITER = TokenBucket(config.database.backfill_requests_per_second, config.database.backfill_burst)
 
 public = Public()  # Instance du client public du SDK bpx-py
 
+class BackfillIncomplete(RuntimeError):
+    """Plage abandonnée après trop d'échecs consécutifs de l'API (à reprendre au prochain run)."""
+    def __init__(self, symbol: str, failed_at: int, inserted: int):
+        super().__init__(f"{symbol}: backfill interrompu à {timestamp_to_datetime_str(failed_at)}")
+        self.symbol = symbol
+        self.failed_at = failed_at
+        self.inserted = inserted
+
+class BackfillCheckpoint:
+    """
+    Checkpoint persistant par symbole (dernier timestamp inséré) pour reprendre un backfill interrompu.
+    L'écriture sur disque est atomique (fichier temporaire + os.replace) et limitée à une toutes les
+    `save_interval` secondes, plus un flush final.
+    """
+    def __init__(self, path: str = CHECKPOINT_FILE, save_interval: float = 5.0):
+        self.path = path
+        self.save_interval = save_interval
+        self.state = {}
+        self._last_save = 0.0
+        self._dirty = False
+        self._lock = asyncio.Lock()  # un seul flush à la fois : les workers partagent le même fichier .tmp
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        except FileNotFoundError:
+            self.state = {}
+        except Exception as e:
+            log(f"⚠️ Checkpoint backfill illisible ({self.path}): {e}, repart de zéro", level="WARNING")
+            self.state = {}
+
+    def get(self, symbol: str) -> Optional[int]:
+        entry = self.state.get(symbol)
+        return entry.get("last_ts") if entry else None
+
+    async def update(self, symbol: str, last_ts: int, done: bool = False):
+        self.state[symbol] = {"last_ts": int(last_ts), "done": done, "updated_at": int(time.time())}
+        self._dirty = True
+        if done or time.monotonic() - self._last_save >= self.save_interval:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._dirty:
+                return
+            snapshot = json.dumps(self.state)
+            self._dirty = False
+            self._last_save = time.monotonic()
+            await asyncio.to_thread(write_json_atomic, self.path, snapshot)
+
+    def is_done(self, symbol: str) -> bool:
+        entry = self.state.get(symbol)
+        return bool(entry and entry.get("done"))
+
+class ListingDateCache:
+    """
+    Cache persistant des dates de listing (symbol -> timestamp de la première bougie).
+    Une date de listing ne change pas : une fois trouvée elle n'est plus jamais recherchée.
+    """
+    def __init__(self, path: str = LISTING_CACHE_FILE):
+        self.path = path
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        except FileNotFoundError:
+            self.state = {}
+        except Exception as e:
+            log(f"⚠️ Cache des dates de listing illisible ({self.path}): {e}", level="WARNING")
+            self.state = {}
+        self._lock = asyncio.Lock()
+
+    def get(self, symbol: str) -> Optional[int]:
+        entry = self.state.get(symbol)
+        return entry.get("listing_ts") if entry else None
+
+    async def set(self, symbol: str, listing_ts: int, before_search_window: bool = False):
+        async with self._lock:
+            self.state[symbol] = {
+                "listing_ts": int(listing_ts),
+                "before_search_window": before_search_window,
+                "found_at": int(time.time()),
+            }
+            await asyncio.to_thread(write_json_atomic, self.path, json.dumps(self.state))
+
+def write_json_atomic(path: str, snapshot: str):
+    """Écrit un fichier JSON de façon atomique (fichier temporaire + os.replace)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(snapshot)
+    os.replace(tmp_path, path)
+
 def timestamp_to_datetime_str(ts: int) -> str:
     return datetime.fromtimestamp(ts, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
 
@@ -48,8 +154,11 @@ async def get_first_timestamp(conn, symbol: str) -> int | None:
         return None
     return int(row['timestamp'].timestamp())
 
-async def create_table_if_not_exists(conn, symbol: str):
+async def create_table_if_not_exists(conn, symbol: str, retention_days: int = RETENTION_DAYS):
     table_name = f"ohlcv__{symbol.lower().replace('_', '__')}"
+    timescale = await has_timescaledb(conn)
+    # Comme les tables 1s : hypertable ou partitions journalières, la rétention est un drop et non un DELETE
+    partition_clause = "" if timescale else " PARTITION BY RANGE (timestamp)"
     query = f"""
     CREATE TABLE IF NOT EXISTS {table_name} (
         timestamp TIMESTAMP WITH TIME ZONE PRIMARY KEY,
@@ -58,34 +167,80 @@ async def create_table_if_not_exists(conn, symbol: str):
         low FLOAT NOT NULL,
         close FLOAT NOT NULL,
         volume FLOAT NOT NULL
-    );
+    ){partition_clause};
     """
     await conn.execute(query)
+    if timescale:
+        try:
+            await conn.execute(f"SELECT create_hypertable('{table_name}', 'timestamp', if_not_exists => TRUE);")
+        except Exception as e:
+            log(f"⚠️ Erreur création hypertable pour {table_name}: {e}", level="ERROR")
+    else:
+        # Fenêtre de rétention entière : l'historique rechargé a sa partition au lieu de remplir DEFAULT
+        await ensure_daily_partitions(conn, table_name, days_back=retention_days)
+
+class ThroughputCounter:
+    """
+    Compteur de débit d'insertion (lignes/s) pour un symbole.
+    """
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.rows = 0
+        self.started_at = time.monotonic()
+
+    def add(self, rows: int):
+        self.rows += rows
+
+    @property
+    def elapsed(self) -> float:
+        return max(time.monotonic() - self.started_at, 1e-9)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed
+
+# Débit par symbole (symbol -> ThroughputCounter) pour le run en cours
+THROUGHPUT = {}
+
+OHLCV_INSERT_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
 
 async def insert_ohlcv_batch(conn, symbol: str, interval_sec: int, data: list) -> int:
-    table_name = f"ohlcv__{symbol.lower().replace('_', '__')}"
-    query = f"""
-    INSERT INTO {table_name} (timestamp, open, high, low, close, volume)
-    VALUES ($1, $2, $3, $4, $5, $6)
-    ON CONFLICT (timestamp) DO NOTHING
     """
-    count = 0
+    Insère une page de bougies en une seule transaction : COPY binaire dans une table
+    temporaire puis INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+    Retourne le nombre de lignes réellement insérées.
+    """
+    table_name = f"ohlcv__{symbol.lower().replace('_', '__')}"
+    staging_name = f"staging_{table_name}"
+
+    records = []
     for candle in data:
-        timestamp_ms = candle[0]
-        ts = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
         try:
-            await conn.execute(query, ts, float(candle[1]), float(candle[2]), float(candle[3]), float(candle[4]), float(candle[5]))
-            count += 1
-        except Exception as e:
-            log(f"[Erreur insertion candle {ts} pour {symbol}: {e}", level="ERROR")
-    return count
+            ts = datetime.fromtimestamp(candle[0] / 1000, tz=timezone.utc)
+            records.append((ts, float(candle[1]), float(candle[2]), float(candle[3]), float(candle[4]), float(candle[5])))
+        except (TypeError, ValueError, IndexError) as e:
+            log(f"[Erreur conversion candle {candle} pour {symbol}: {e}", level="ERROR")
+    if not records:
+        return 0
+
+    columns = ", ".join(OHLCV_INSERT_COLUMNS)
+    async with conn.transaction():
+        await conn.execute(f"CREATE TEMP TABLE {staging_name} (LIKE {table_name}) ON COMMIT DROP")
+        await conn.copy_records_to_table(staging_name, records=records, columns=OHLCV_INSERT_COLUMNS)
+        status = await conn.execute(f"""
+            INSERT INTO {table_name} ({columns})
+            SELECT {columns} FROM {staging_name}
+            ON CONFLICT (timestamp) DO NOTHING
+        """)
+
+    # status = "INSERT 0 <n>"
+    return int(status.split()[-1])
 
 async def clean_old_data(conn, symbol: str, retention_days: int):
     table_name = f"ohlcv__{symbol.lower().replace('_', '__')}"
-    cutoff_date = datetime.now(timezone.utc) - timedelta(days=retention_days)
-    query = f"DELETE FROM {table_name} WHERE timestamp < $1"
-    deleted = await conn.execute(query, cutoff_date)
-    log(f"Nettoyage: {deleted} lignes supprimées dans {table_name} avant {cutoff_date}", level="DEBUG")
+    # drop_chunks / DROP de partition si possible, DELETE seulement pour les tables classiques
+    method = await enforce_retention(conn, table_name, retention_days)
+    log(f"Nettoyage ({method}) dans {table_name} avant {retention_days} jours", level="DEBUG")
 
 def get_ohlcv_bpx_sdk(symbol: str, interval: str = "1m", limit: int = 21, startTime: int = None, endTime: int = 0):
     if startTime is None:
@@ -103,10 +258,11 @@ def get_ohlcv_bpx_sdk(symbol: str, interval: str = "1m", limit: int = 21, startT
         return None
 
 async def get_ohlcv_async(symbol: str, interval: str = "1m", limit: int = 21, startTime: int = None, endTime: int = 0):
+    await RATE_LIMITER.acquire()
     return await asyncio.to_thread(get_ohlcv_bpx_sdk, symbol, interval, limit, startTime, endTime)
 
 async def fetch_all_symbols() -> List[str]:
-    url = "https://api.backpack.exchange/api/v1/tickers"
+    url = api_url("api/v1/tickers")
     import aiohttp
     for attempt in range(MAX_RETRIES):
         try:
@@ -137,30 +293,65 @@ async def fetch_all_symbols() -> List[str]:
     log(f"Récupéré {len(symbols)} symboles PERP", level="DEBUG")
     return symbols
 
-async def get_symbol_listing_date(symbol: str) -> Optional[int]:
+async def _first_candle_in_window(symbol: str, start: int, window: int) -> Optional[int]:
+    """Timestamp de la première bougie dans [start, start + window], None si la fenêtre est vide."""
+    data = await get_ohlcv_async(symbol, interval=INTERVAL, limit=LIMIT_PER_REQUEST, startTime=start, endTime=start + window)
+    if data is None:
+        raise RuntimeError(f"Requête klines échouée pour {symbol}")
+    return data[0][0] // 1000 if data else None
+
+async def get_symbol_listing_date(symbol: str, cache: Optional[ListingDateCache] = None) -> Optional[int]:
+    """
+    Trouve la date de listing par dichotomie : une fenêtre de LIMIT_PER_REQUEST bougies contient
+    des données si et seulement si elle se termine après le listing. ~10 requêtes au lieu de
+    sonder des dates fixes, et le résultat est mis en cache par symbole.
+    """
+    if cache:
+        cached = cache.get(symbol)
+        if cached:
+            log(f"📌 Date de listing {symbol} depuis le cache: {timestamp_to_datetime_str(cached)}", level="DEBUG")
+            return cached
+
     now = int(time.time())
-    test_dates = [
-        now - 30 * 24 * 3600,
-        now - 90 * 24 * 3600,
-        now - 180 * 24 * 3600,
-        now - 365 * 24 * 3600,
-    ]
-
-    log(f"Now timestamp: {now} ({timestamp_to_datetime_str(now)})", level="INFO")
-    for test_date in test_dates:
-        log(f"Testing listing date candidate: {test_date} ({timestamp_to_datetime_str(test_date)})", level="INFO")
-        try:
-            data = await get_ohlcv_async(symbol, interval=INTERVAL, limit=1, startTime=test_date)
-            if data:
-                first_candle_ts = data[0][0] // 1000
-                log(f"Première bougie trouvée pour {symbol}: {timestamp_to_datetime_str(first_candle_ts)}", level="INFO")
-                return first_candle_ts
-            await asyncio.sleep(API_RATE_LIMIT_DELAY)
-        except Exception as e:
-            log(f"[DEBUG] Erreur test date {timestamp_to_datetime_str(test_date)} pour {symbol}: {e}", level="DEBUG")
-            continue
-    log(f"Impossible de déterminer la date de listing pour {symbol}", level="WARNING")
-    return None
+    window = LIMIT_PER_REQUEST * 60
+    lo = now - LISTING_SEARCH_DAYS * 24 * 3600
+    hi = now - window
+
+    try:
+        first = await _first_candle_in_window(symbol, lo, window)
+        if first is not None:
+            # Listé avant la borne basse de recherche : la rétention coupera de toute façon avant
+            log(f"Première bougie trouvée pour {symbol} dès la borne basse: {timestamp_to_datetime_str(first)}", level="INFO")
+            if cache:
+                await cache.set(symbol, first, before_search_window=True)
+            return first
+
+        if await _first_candle_in_window(symbol, hi, window) is None:
+            log(f"Aucune donnée récente pour {symbol}, date de listing introuvable", level="WARNING")
+            return None
+
+        # Invariant : la fenêtre qui commence à lo est vide, celle qui commence à hi contient des données
+        while hi - lo > window:
+            mid = (lo + hi) // 2
+            if await _first_candle_in_window(symbol, mid, window) is None:
+                lo = mid
+            else:
+                hi = mid
+
+        # hi < listing + window et la fenêtre lo est vide : la fenêtre hi contient la première bougie
+        first = await _first_candle_in_window(symbol, hi, window)
+    except Exception as e:
+        log(f"Erreur recherche date de listing pour {symbol}: {e}", level="WARNING")
+        return None
+
+    if first is None:
+        log(f"Impossible de déterminer la date de listing pour {symbol}", level="WARNING")
+        return None
+
+    log(f"Première bougie trouvée pour {symbol}: {timestamp_to_datetime_str(first)}", level="INFO")
+    if cache:
+        await cache.set(symbol, first)
+    return first
 
 # --- AJOUT : compter les jours avec des données dans la table ---
 async def count_days_with_data(conn, symbol: str) -> int:
@@ -178,108 +369,167 @@ async def count_days_with_data(conn, symbol: str) -> int:
         log(f"Erreur comptage jours avec données pour {symbol}: {e}", level="ERROR")
         return 0
 
-async def backfill_symbol(pool: asyncpg.Pool, symbol: str, days: int = RETENTION_DAYS) -> None:
+async def backfill_range(pool: asyncpg.Pool, symbol: str, start: int, end: int,
+                         throughput: ThroughputCounter, checkpoint: Optional[BackfillCheckpoint] = None) -> int:
+    """
+    Charge les bougies 1m de [start, end] par fenêtres de LIMIT_PER_REQUEST bougies.
+    Retourne le nombre de lignes insérées ; lève BackfillIncomplete après 5 échecs consécutifs
+    (le checkpoint reste alors au dernier lot inséré).
+    """
+    interval_sec = 60
+    inserted_total = 0
+    batch_start = start
+    consecutive_failures = 0
+
+    while batch_start <= end and consecutive_failures < 5:
+        batch_end = min(batch_start + (LIMIT_PER_REQUEST - 1) * interval_sec, end)
+        try:
+            data = await get_ohlcv_async(symbol, interval=INTERVAL, limit=LIMIT_PER_REQUEST,
+                                         startTime=batch_start, endTime=batch_end + interval_sec)
+            if data is None:
+                raise RuntimeError("réponse klines vide (erreur API)")
+        except Exception as e:
+            consecutive_failures += 1
+            log(f"❌ Erreur klines {symbol} à {timestamp_to_datetime_str(batch_start)} "
+                f"(tentatives échouées: {consecutive_failures}): {e}", level="ERROR")
+            await asyncio.sleep(RETRY_DELAY * consecutive_failures)
+            continue
+
+        consecutive_failures = 0
+        data = [d for d in data if batch_start <= d[0] // 1000 <= end]
+        if data:
+            async with pool.acquire() as conn:
+                inserted = await insert_ohlcv_batch(conn, symbol, interval_sec, data)
+            inserted_total += inserted
+            throughput.add(inserted)
+            log(f"📥 {symbol}: {inserted}/{len(data)} bougies insérées ({throughput.rows_per_sec:.0f} lignes/s)", level="DEBUG")
+            if checkpoint:
+                await checkpoint.update(symbol, max(checkpoint.get(symbol) or 0, data[-1][0] // 1000))
+        else:
+            log(f"📭 Pas de données pour {symbol} entre {timestamp_to_datetime_str(batch_start)} "
+                f"et {timestamp_to_datetime_str(batch_end)}", level="DEBUG")
+
+        batch_start = batch_end + interval_sec
+
+    if batch_start <= end:
+        raise BackfillIncomplete(symbol, batch_start, inserted_total)
+    return inserted_total
+
+async def backfill_symbol(pool: asyncpg.Pool, symbol: str, days: int = RETENTION_DAYS,
+                          checkpoint: Optional[BackfillCheckpoint] = None,
+                          listing_cache: Optional[ListingDateCache] = None) -> None:
+    """
+    Backfill incrémental : ne recharge que la tête manquante (depuis le listing / début de rétention),
+    les trous intérieurs détectés en SQL et la queue jusqu'à maintenant.
+    """
     log(f"🚀 Début backfill pour {symbol}", level="INFO")
 
     now = int(time.time())
     interval_sec = 60
-    total_inserted = 0
+    table_name = f"ohlcv__{symbol.lower().replace('_', '__')}"
+    throughput = THROUGHPUT[symbol] = ThroughputCounter(symbol)
+    retention_start = now - days * 24 * 3600
+    range_end = now - interval_sec  # dernière bougie 1m close
 
     async with pool.acquire() as conn:
-        await create_table_if_not_exists(conn, symbol)
+        await create_table_if_not_exists(conn, symbol, days)
         last_ts = await get_last_timestamp(conn, symbol)
         first_ts = await get_first_timestamp(conn, symbol)
-        days_with_data = await count_days_with_data(conn, symbol)
-
-        if last_ts and first_ts:
-            minutes_in_db = (last_ts - first_ts) // 60
-            log(f"Données en base pour {symbol}: {minutes_in_db} minutes disponibles, {days_with_data} jours avec données", level="INFO")
-        else:
-            minutes_in_db = 0
-            log(f"Aucune donnée en base pour {symbol}", level="INFO")
-
-        # Backfill complet si moins que RSI_PERIOD_MINUTES OU moins de 14 jours de données
-        if minutes_in_db < RSI_PERIOD_MINUTES or days_with_data < 14:
-            log(f"ℹ️ Historique insuffisant (< {RSI_PERIOD_MINUTES} min ou moins de 14 jours) pour {symbol}, backfill complet lancé", level="INFO")
-            listing_date = await get_symbol_listing_date(symbol)
-            if not listing_date:
-                log(f"❌ Impossible de déterminer la date de listing pour {symbol}, abandon backfill", level="ERROR")
-                return
-            retention_start = now - days * 24 * 3600
-            start = max(listing_date, retention_start)
-            log(f"📅 Backfill complet pour {symbol} depuis {timestamp_to_datetime_str(start)}", level="INFO")
+        if first_ts and first_ts < retention_start:
             await clean_old_data(conn, symbol, days)
-        else:
-            if last_ts < now:
-                start = last_ts + interval_sec
-                log(f"📈 Reprise backfill pour {symbol} depuis {timestamp_to_datetime_str(start)}", level="INFO")
-            else:
-                log(f"✅ Historique complet pour {symbol}, pas de backfill nécessaire")
-                return
-
-    if start >= now:
-        log(f"⚠️ Start timestamp {timestamp_to_datetime_str(start)} est dans le futur pour {symbol}", level="WARNING")
+            first_ts = await get_first_timestamp(conn, symbol)
+
+    if last_ts and first_ts:
+        log(f"Données en base pour {symbol}: {timestamp_to_datetime_str(first_ts)} → {timestamp_to_datetime_str(last_ts)}", level="INFO")
+    else:
+        log(f"Aucune donnée en base pour {symbol}", level="INFO")
+
+    listing_date = await get_symbol_listing_date(symbol, cache=listing_cache)
+    if listing_date:
+        range_start = max(listing_date, retention_start)
+    elif first_ts:
+        range_start = max(first_ts, retention_start)
+    else:
+        log(f"❌ Impossible de déterminer la date de listing pour {symbol}, abandon backfill", level="ERROR")
         return
 
-    current_start = start
-    consecutive_failures = 0
-
-    while current_start < now and consecutive_failures < 5:
-        current_end = min(current_start + CHUNK_SIZE_SECONDS, now - 60)
-        if current_end <= current_start:
-            log(f"⏹️ Chunk trop petit pour {symbol}, arrêt", level="INFO")
-            break
-        log(f"⏳ Traitement {symbol}: {timestamp_to_datetime_str(current_start)} → {timestamp_to_datetime_str(current_end)}", level="INFO")
-
-        batch_start = current_start
-        batch_success = False
-
-        while batch_start < current_end:
-            if batch_start >= now - 60:
-                log(f"⏭️ Approche du temps présent pour {symbol}, arrêt du batch", level="INFO")
-                break
-            try:
-                data = await get_ohlcv_async(symbol, interval=INTERVAL, limit=LIMIT_PER_REQUEST, startTime=batch_start)
-                if not data:
-                    log(f"📭 Pas de données pour {symbol} à partir de {timestamp_to_datetime_str(batch_start)}", level="WARNING")
-                    break
-
-                latest_data_ts = data[-1][0] // 1000
-                if latest_data_ts > now:
-                    log(f"⚠️ Données futures reçues pour {symbol}, filtrage nécessaire", level="WARNING")
-                    data = [d for d in data if d[0] // 1000 <= now]
+    gaps = []
+    if first_ts:
+        async with pool.acquire() as conn:
+            gaps = await find_gaps(
+                conn, table_name, interval_sec,
+                datetime.fromtimestamp(range_start, tz=timezone.utc),
+                datetime.fromtimestamp(range_end, tz=timezone.utc),
+                min_gap_sec=MIN_GAP_SECONDS,
+            )
+        # Trous déjà tentés lors d'un run terminé : l'exchange n'a pas de données pour ces plages
+        if checkpoint and checkpoint.is_done(symbol):
+            checked_until = checkpoint.get(symbol) or 0
+            gaps = [g for g in gaps if g[1] > checked_until]
+
+    ranges = missing_ranges(first_ts, last_ts, gaps, range_start, range_end, interval_sec)
+    if not ranges:
+        log(f"✅ Historique complet pour {symbol}, pas de backfill nécessaire", level="INFO")
+        return
 
-                if data:
-                    async with pool.acquire() as conn:
-                        inserted = await insert_ohlcv_batch(conn, symbol, interval_sec, data)
-                        total_inserted += inserted
+    missing_minutes = sum((end - start) // interval_sec + 1 for start, end in ranges)
+    log(f"📅 {symbol}: {len(ranges)} plages manquantes ({missing_minutes} minutes)", level="INFO")
 
-                batch_success = True
-                consecutive_failures = 0
+    total_inserted = 0
+    failed_ranges = 0
+    for start, end in ranges:
+        log(f"⏳ Traitement {symbol}: {timestamp_to_datetime_str(start)} → {timestamp_to_datetime_str(end)}", level="INFO")
+        try:
+            total_inserted += await backfill_range(pool, symbol, start, end, throughput, checkpoint)
+        except BackfillIncomplete as e:
+            total_inserted += e.inserted
+            failed_ranges += 1
+            log(f"⚠️ {e}, plage reprise au prochain run", level="WARNING")
+
+    if failed_ranges:
+        # Pas de done : les trous de cette plage doivent être retentés au prochain run
+        if checkpoint:
+            await checkpoint.update(symbol, checkpoint.get(symbol) or 0, done=False)
+        log(f"⚠️ Backfill incomplet pour {symbol} ({failed_ranges}/{len(ranges)} plages en échec), "
+            f"total inséré: {total_inserted}", level="WARNING")
+        return
 
-                last_ts_ms = data[-1][0]
-                last_ts_sec = last_ts_ms // 1000
-                batch_start = last_ts_sec + interval_sec
+    if checkpoint:
+        await checkpoint.update(symbol, max(checkpoint.get(symbol) or 0, range_end), done=True)
 
-                if len(data) < LIMIT_PER_REQUEST:
-                    log(f"📊 Fin des données disponibles pour {symbol}", level="INFO")
-                    break
+    log(f"✅ Backfill terminé pour {symbol}, total inséré: {total_inserted} "
+        f"({throughput.rows_per_sec:.0f} lignes/s sur {throughput.elapsed:.1f}s)", level="INFO")
 
-                await asyncio.sleep(API_RATE_LIMIT_DELAY)
+async def run_backfill_scheduler(pool: asyncpg.Pool, symbols: List[str], checkpoint: BackfillCheckpoint,
+                                 concurrency: int = BACKFILL_CONCURRENCY,
+                                 listing_cache: Optional[ListingDateCache] = None) -> None:
+    """
+    Backfill de `concurrency` symboles en parallèle. Les requêtes REST de tous les workers
+    passent par RATE_LIMITER, qui fixe le débit global.
+    """
+    queue = asyncio.Queue()
+    for i, symbol in enumerate(symbols, 1):
+        queue.put_nowait((i, symbol))
 
+    async def worker(worker_id: int):
+        while True:
+            try:
+                i, symbol = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            log(f"🔄 Progression: {i}/{len(symbols)} - Traitement de {symbol} (worker {worker_id})", level="INFO")
+            try:
+                await backfill_symbol(pool, symbol, RETENTION_DAYS, checkpoint=checkpoint, listing_cache=listing_cache)
             except Exception as e:
                 log(f"❌ Erreur lors du traitement de {symbol}: {e}", level="ERROR")
-                consecutive_failures += 1
-                await asyncio.sleep(RETRY_DELAY * consecutive_failures)
-                break
-
-        if not batch_success:
-            consecutive_failures += 1
-            log(f"⚠️ Échec batch pour {symbol}, tentatives échouées: {consecutive_failures}", level="WARNING")
+            finally:
+                queue.task_done()
 
-        current_start = current_end
-
-    log(f"✅ Backfill terminé pour {symbol}, total inséré: {total_inserted}", level="INFO")
+    started_at = time.monotonic()
+    await asyncio.gather(*(worker(w) for w in range(max(1, concurrency))))
+    elapsed = time.monotonic() - started_at
+    log(f"⏱️ {RATE_LIMITER.total_acquired:.0f} requêtes REST en {elapsed:.1f}s "
+        f"({RATE_LIMITER.total_acquired / max(elapsed, 1e-9):.1f} req/s)", level="INFO")
 
 async def main():
     log(f"🎯 Début du processus de backfill", level="INFO")
@@ -296,20 +546,16 @@ async def main():
             log(f"❌ Aucun symbole récupéré, arrêt.", level="ERROR")
             return
 
-        log(f"📋 Traitement de {len(symbols)} symboles", level="INFO")
+        log(f"📋 Traitement de {len(symbols)} symboles ({BACKFILL_CONCURRENCY} en parallèle)", level="INFO")
 
-        for i, symbol in enumerate(symbols, 1):
-            log(f"🔄 Progression: {i}/{len(symbols)} - Traitement de {symbol}", level="INFO")
-            try:
-                await backfill_symbol(pool, symbol, RETENTION_DAYS)
-                if i < len(symbols):
-                    await asyncio.sleep(1)
-            except Exception as e:
-                log(f"❌ Erreur lors du traitement de {symbol}: {e}", level="ERROR")
-                continue
+        checkpoint = BackfillCheckpoint()
+        listing_cache = ListingDateCache()
+        await run_backfill_scheduler(pool, symbols, checkpoint, BACKFILL_CONCURRENCY, listing_cache=listing_cache)
+        await checkpoint.flush()
 
         await pool.close()
-        log(f"🎉 Processus de backfill terminé", level="INFO")
+        total_rows = sum(c.rows for c in THROUGHPUT.values())
+        log(f"🎉 Processus de backfill terminé : {total_rows} lignes insérées sur {len(THROUGHPUT)} symboles", level="INFO")
 
     except Exception as e:
         log(f"💥 Erreur critique dans main(): {e}", level="ERROR")
@@ -0,0 +1,295 @@
+# ScriptDatabase/gap_index.py
+import asyncio
+import time
+from datetime import datetime, timezone, timedelta
+from utils.logger import log
+from utils.rate_limiter import TokenBucket
+import utils.endpoints  # URL de base du SDK bpx-py (config exchange)
+
+GAPS_TABLE = "ohlcv_gaps"
+
+# Les réparations partagent un petit budget REST pour ne pas gêner le reste du bot
+REPAIR_RATE_LIMITER = TokenBucket(rate=2, capacity=4)
+
+async def find_gaps(conn, table_name: str, interval_sec: int, start: datetime, end: datetime,
+                    min_gap_sec: int | None = None, where: str = "") -> list[tuple[int, int]]:
+    """
+    Détecte côté SQL (fonction fenêtre LEAD) les trous d'une série OHLCV entre start et end.
+
+    Retourne une liste de plages manquantes (début, fin) en secondes epoch, bornes incluses :
+    début = bougie précédant le trou + interval_sec, fin = bougie suivante - interval_sec.
+    Seuls les écarts strictement supérieurs à min_gap_sec (par défaut interval_sec) sont retenus.
+    """
+    threshold = min_gap_sec if min_gap_sec is not None else interval_sec
+    query = f"""
+        WITH ordered AS (
+            SELECT timestamp,
+                   LEAD(timestamp) OVER (ORDER BY timestamp) AS next_ts
+            FROM {table_name}
+            WHERE timestamp >= $1 AND timestamp <= $2
+            {where}
+        )
+        SELECT EXTRACT(EPOCH FROM timestamp)::bigint AS prev_ts,
+               EXTRACT(EPOCH FROM next_ts)::bigint AS next_ts
+        FROM ordered
+        WHERE next_ts IS NOT NULL
+          AND next_ts - timestamp > make_interval(secs => $3)
+        ORDER BY timestamp
+    """
+    rows = await conn.fetch(query, start, end, float(threshold))
+    gaps = [(r["prev_ts"] + interval_sec, r["next_ts"] - interval_sec) for r in rows]
+    if gaps:
+        log(f"🕳️ {len(gaps)} trous détectés dans {table_name} entre {start} et {end}", level="DEBUG")
+    return gaps
+
+def missing_ranges(first_ts: int | None, last_ts: int | None, gaps: list[tuple[int, int]],
+                   range_start: int, range_end: int, interval_sec: int) -> list[tuple[int, int]]:
+    """
+    Combine tête manquante, trous intérieurs et queue manquante en une liste ordonnée
+    de plages à (re)charger, bornées par [range_start, range_end].
+    """
+    if first_ts is None or last_ts is None:
+        return [(range_start, range_end)] if range_start < range_end else []
+
+    ranges = []
+    if range_start < first_ts:
+        ranges.append((range_start, first_ts - interval_sec))
+    ranges.extend(gaps)
+    if last_ts + interval_sec < range_end:
+        ranges.append((last_ts + interval_sec, range_end))
+
+    clipped = []
+    for start, end in ranges:
+        start, end = max(start, range_start), min(end, range_end)
+        if start <= end:
+            clipped.append((start, end))
+    return clipped
+
+async def ensure_gap_table(conn):
+    """
+    Index des trous des séries 1s : une ligne par plage manquante et par symbole.
+    gap_end NULL = connexion websocket actuellement coupée (trou en cours).
+    """
+    await conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {GAPS_TABLE} (
+            id BIGSERIAL PRIMARY KEY,
+            symbol TEXT NOT NULL,
+            gap_start TIMESTAMPTZ NOT NULL,
+            gap_end TIMESTAMPTZ,
+            source TEXT NOT NULL,
+            detected_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            repaired_at TIMESTAMPTZ,
+            repaired_rows INTEGER,
+            UNIQUE (symbol, gap_start, source)
+        );
+    """)
+    await conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS {GAPS_TABLE}_pending_idx
+        ON {GAPS_TABLE} (symbol, gap_end) WHERE repaired_at IS NULL;
+    """)
+
+async def open_gap(pool, symbol: str, gap_start: datetime, source: str = "reconnect"):
+    """Enregistre le début d'un trou (déconnexion websocket) ; la fin sera posée par close_gap."""
+    async with pool.acquire() as conn:
+        await conn.execute(f"""
+            INSERT INTO {GAPS_TABLE} (symbol, gap_start, source)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (symbol, gap_start, source) DO NOTHING
+        """, symbol, gap_start, source)
+    GAP_INDEX.record_open(symbol, gap_start.timestamp())
+    log(f"🕳️ Trou ouvert pour {symbol} depuis {gap_start}", level="INFO")
+
+async def close_gap(pool, symbol: str, gap_end: datetime):
+    """Ferme le trou en cours d'un symbole au premier trade reçu après reconnexion."""
+    async with pool.acquire() as conn:
+        await conn.execute(f"""
+            UPDATE {GAPS_TABLE} SET gap_end = $2
+            WHERE symbol = $1 AND gap_end IS NULL
+        """, symbol, gap_end)
+    GAP_INDEX.record_close(symbol, gap_end.timestamp())
+    log(f"🩹 Trou fermé pour {symbol} à {gap_end}", level="INFO")
+
+async def scan_ohlcv_gaps(pool, symbol: str, table_name: str, lookback_sec: int = 3600,
+                          min_gap_sec: int = 120) -> int:
+    """
+    Scanner SQL des trous d'une table 1s (fonction fenêtre LEAD) sur les lookback_sec dernières
+    secondes. Les trous trouvés sont ajoutés à l'index avec source='scan'.
+    """
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(seconds=lookback_sec)
+    async with pool.acquire() as conn:
+        gaps = await find_gaps(conn, table_name, 1, start, end, min_gap_sec=min_gap_sec, where="AND interval_sec = 1")
+        if not gaps:
+            return 0
+        await conn.executemany(f"""
+            INSERT INTO {GAPS_TABLE} (symbol, gap_start, gap_end, source)
+            VALUES ($1, $2, $3, 'scan')
+            ON CONFLICT (symbol, gap_start, source) DO NOTHING
+        """, [
+            (symbol, datetime.fromtimestamp(g_start, tz=timezone.utc), datetime.fromtimestamp(g_end, tz=timezone.utc))
+            for g_start, g_end in gaps
+        ])
+    for _, g_end in gaps:
+        GAP_INDEX.record_close(symbol, g_end)
+    return len(gaps)
+
+def _fetch_klines_1m(public, symbol: str, start: int, end: int):
+    return public.get_klines(symbol=symbol, interval="1m", start_time=start * 1000, end_time=end * 1000)
+
+async def repair_gap(pool, public, symbol: str, table_name: str, gap_start: datetime, gap_end: datetime) -> int:
+    """
+    Comble un trou depuis les klines REST. L'API ne fournit pas de bougies 1s : chaque kline 1m
+    entièrement comprise dans le trou est insérée comme une bougie 1s au début de sa minute,
+    ce qui correspond à ce qu'un symbole peu liquide produit déjà. Les minutes partiellement
+    couvertes ne sont pas réécrites pour ne pas compter deux fois leur volume.
+    """
+    start = int(gap_start.timestamp())
+    end = int(gap_end.timestamp())
+    inserted = 0
+    window = 1000 * 60
+    cursor = start - start % 60
+    while cursor < end:
+        await REPAIR_RATE_LIMITER.acquire()
+        data = await asyncio.to_thread(_fetch_klines_1m, public, symbol, cursor, min(cursor + window, end))
+        if not data:
+            cursor += window
+            continue
+        records = []
+        for candle in data:
+            minute = candle[0] // 1000
+            if minute >= start and minute + 60 <= end:
+                records.append((
+                    symbol, 1, datetime.fromtimestamp(minute, tz=timezone.utc),
+                    float(candle[1]), float(candle[2]), float(candle[3]), float(candle[4]), float(candle[5]),
+                ))
+        if records:
+            async with pool.acquire() as conn:
+                await conn.executemany(f"""
+                    INSERT INTO {table_name} (symbol, interval_sec, timestamp, open, high, low, close, volume)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                    ON CONFLICT (symbol, interval_sec, timestamp) DO NOTHING
+                """, records)
+            inserted += len(records)
+        cursor += window
+    return inserted
+
+_public = None
+
+def _get_public():
+    global _public
+    if _public is None:
+        from bpx.public import Public
+        _public = Public()
+    return _public
+
+async def repair_reconnect_gap(pool, symbol: str, table_name: str, gap_start: datetime, gap_end: datetime) -> int:
+    """
+    Backfill REST immédiat d'un trou de reconnexion, dès que l'abonnement est rétabli,
+    sans attendre le passage du worker de réparation.
+    """
+    rows = await repair_gap(pool, _get_public(), symbol, table_name, gap_start, gap_end)
+    async with pool.acquire() as conn:
+        await conn.execute(f"""
+            UPDATE {GAPS_TABLE} SET repaired_at = now(), repaired_rows = $3
+            WHERE symbol = $1 AND gap_start = $2 AND source = 'reconnect' AND repaired_at IS NULL
+        """, symbol, gap_start, rows)
+    GAP_INDEX.record_repaired(symbol, gap_end.timestamp())
+    log(f"🔧 Backfill après reconnexion pour {symbol} ({gap_start} → {gap_end}) : {rows} bougies", level="INFO")
+    return rows
+
+async def gap_repair_worker(pool, table_name_func, interval_sec: int = 60, batch_size: int = 20):
+    """
+    Répare en continu les trous fermés et non réparés de l'index, du plus récent au plus ancien.
+    """
+    public = _get_public()
+
+    while True:
+        try:
+            async with pool.acquire() as conn:
+                pending = await conn.fetch(f"""
+                    SELECT id, symbol, gap_start, gap_end
+                    FROM {GAPS_TABLE}
+                    WHERE repaired_at IS NULL AND gap_end IS NOT NULL
+                    ORDER BY gap_end DESC
+                    LIMIT $1
+                """, batch_size)
+
+            for gap in pending:
+                symbol = gap["symbol"]
+                try:
+                    rows = await repair_gap(pool, public, symbol, table_name_func(symbol), gap["gap_start"], gap["gap_end"])
+                except Exception as e:
+                    log(f"❌ Réparation du trou {gap['id']} ({symbol}) échouée: {e}", level="ERROR")
+                    continue
+                async with pool.acquire() as conn:
+                    await conn.execute(f"""
+                        UPDATE {GAPS_TABLE} SET repaired_at = now(), repaired_rows = $2 WHERE id = $1
+                    """, gap["id"], rows)
+                GAP_INDEX.record_repaired(symbol, gap["gap_end"].timestamp())
+                log(f"🔧 Trou réparé pour {symbol} ({gap['gap_start']} → {gap['gap_end']}) : {rows} bougies", level="INFO")
+        except Exception as e:
+            log(f"❌ Erreur dans le worker de réparation des trous : {e}", level="ERROR")
+
+        await asyncio.sleep(interval_sec)
+
+class GapIndex:
+    """
+    Vue mémoire de l'index des trous, interrogeable en O(1) :
+    is_complete(symbol, seconds) ne fait qu'une lecture de dict.
+
+    Dans l'ingester l'index est tenu à jour directement (open/close/réparation) ;
+    dans le bot, maybe_refresh le recharge depuis ohlcv_gaps en une requête pour tous les symboles.
+    """
+    def __init__(self):
+        self.open_since = {}          # symbol -> début du trou en cours (epoch s)
+        self.last_gap_end = {}        # symbol -> fin du dernier trou connu
+        self.last_unrepaired_end = {} # symbol -> fin du dernier trou non réparé
+        self.refreshed_at = 0.0
+
+    def record_open(self, symbol: str, start_ts: float):
+        self.open_since[symbol] = start_ts
+
+    def record_close(self, symbol: str, end_ts: float):
+        self.open_since.pop(symbol, None)
+        self.last_gap_end[symbol] = max(self.last_gap_end.get(symbol, 0.0), end_ts)
+        self.last_unrepaired_end[symbol] = max(self.last_unrepaired_end.get(symbol, 0.0), end_ts)
+
+    def record_repaired(self, symbol: str, end_ts: float):
+        if self.last_unrepaired_end.get(symbol, 0.0) <= end_ts:
+            self.last_unrepaired_end.pop(symbol, None)
+
+    def is_complete(self, symbol: str, seconds: float, allow_repaired: bool = True, now: float | None = None) -> bool:
+        """True si aucun trou (en cours ou passé) ne touche les `seconds` dernières secondes."""
+        if symbol in self.open_since:
+            return False
+        now = now if now is not None else time.time()
+        last_end = (self.last_unrepaired_end if allow_repaired else self.last_gap_end).get(symbol, 0.0)
+        return last_end < now - seconds
+
+    async def maybe_refresh(self, pool, max_age_sec: float = 30.0, lookback_sec: int = 24 * 3600):
+        if time.monotonic() - self.refreshed_at < max_age_sec:
+            return
+        self.refreshed_at = time.monotonic()
+        try:
+            async with pool.acquire() as conn:
+                rows = await conn.fetch(f"""
+                    SELECT symbol,
+                           MIN(EXTRACT(EPOCH FROM gap_start)) FILTER (WHERE gap_end IS NULL) AS open_since,
+                           MAX(EXTRACT(EPOCH FROM gap_end)) AS last_gap_end,
+                           MAX(EXTRACT(EPOCH FROM gap_end)) FILTER (WHERE repaired_at IS NULL) AS last_unrepaired_end
+                    FROM {GAPS_TABLE}
+                    WHERE gap_end IS NULL OR gap_end >= now() - make_interval(secs => $1)
+                    GROUP BY symbol
+                """, float(lookback_sec))
+        except Exception as e:
+            log(f"⚠️ Rafraîchissement de l'index des trous impossible : {e}", level="DEBUG")
+            return
+
+        self.open_since = {r["symbol"]: float(r["open_since"]) for r in rows if r["open_since"] is not None}
+        self.last_gap_end = {r["symbol"]: float(r["last_gap_end"]) for r in rows if r["last_gap_end"] is not None}
+        self.last_unrepaired_end = {
+            r["symbol"]: float(r["last_unrepaired_end"]) for r in rows if r["last_unrepaired_end"] is not None
+        }
+
+# Index partagé par le process courant
+GAP_INDEX = GapIndex()
@@ -0,0 +1,181 @@
+# ScriptDatabase/ingest_metrics.py
+import argparse
+import asyncio
+import math
+import time
+
+from aiohttp import web
+
+from utils.logger import log
+from utils.ws_supervisor import CONNECTION_STATS
+
+METRICS_PREFIX = "backpack_ingest"
+
+# (nom, type, aide, clé du snapshot, diviseur : ms -> s)
+SYMBOL_METRICS = (
+    ("trades_total", "counter", "Trades received", "trades_total", 1),
+    ("trades_per_second", "gauge", "Trades received per second", "trades_per_sec", 1),
+    ("candles_written_total", "counter", "1s candles committed", "candles_total", 1),
+    ("candles_per_second", "gauge", "1s candles committed per second", "candles_per_sec", 1),
+    ("commit_lag_seconds", "gauge", "End of the last committed candle to DB commit", "commit_lag_ms", 1000),
+    ("receive_lag_seconds", "gauge", "Trade event time to websocket receive", "receive_lag_ms", 1000),
+    ("last_trade_age_seconds", "gauge", "Age of the last received trade", "last_trade_age_ms", 1000),
+    ("write_queue_depth", "gauge", "Candles waiting to be written", "queue_depth", 1),
+    ("reconnects_total", "counter", "Websocket reconnections", "reconnects", 1),
+    ("connected", "gauge", "Websocket connected (1) or not (0)", "connected", 1),
+)
+
+class RateTracker:
+    """Débit d'un compteur sur une fenêtre glissante (un point de référence renouvelé toutes les `window` secondes)."""
+    def __init__(self, window: float = 10.0):
+        self.window = window
+        self._ref = {}   # clé -> (t, total)
+        self._rate = {}
+
+    def update(self, key, total: float, now: float | None = None) -> float:
+        now = now if now is not None else time.monotonic()
+        ref = self._ref.get(key)
+        if ref is None:
+            self._ref[key] = (now, total)
+            return 0.0
+        elapsed = now - ref[0]
+        if elapsed >= self.window:
+            self._rate[key] = (total - ref[1]) / elapsed
+            self._ref[key] = (now, total)
+        return self._rate.get(key, 0.0)
+
+RATES = RateTracker()
+
+def tracked_symbols() -> list[str]:
+    return [name[len("trade."):] for name in CONNECTION_STATS if name.startswith("trade.")]
+
+def collect_symbol_metrics(symbols, writer, rates: RateTracker = RATES, now: float | None = None) -> dict:
+    """
+    Snapshot par symbole des métriques d'ingestion du process courant
+    (compteurs websocket + écrivain de bougies). symbols=None : tous les abonnements connus.
+    """
+    now = now if now is not None else time.time()
+    if symbols is None:
+        symbols = tracked_symbols()
+    pending = writer.pending_by_symbol()
+    snapshot = {}
+    for symbol in symbols:
+        stats = CONNECTION_STATS.get(f"trade.{symbol}")
+        if stats is None:
+            continue
+        candles = writer.written_by_symbol.get(symbol, 0)
+        snapshot[symbol] = {
+            "trades_total": stats.trades,
+            "trades_per_sec": rates.update(("trades", symbol), stats.trades),
+            "candles_total": candles,
+            "candles_per_sec": rates.update(("candles", symbol), candles),
+            "commit_lag_ms": writer.commit_lag_ms.get(symbol),
+            "receive_lag_ms": stats.lag_ms,
+            "last_trade_age_ms": now * 1000 - stats.last_event_ms if stats.last_event_ms else None,
+            "queue_depth": pending.get(symbol, 0),
+            "reconnects": stats.reconnects,
+            "connected": 1 if stats.connected_since is not None else 0,
+        }
+    return snapshot
+
+def format_value(value) -> str:
+    """Valeur d'échantillon sans perte : entiers tels quels, flottants en repr (17 chiffres au besoin)."""
+    if isinstance(value, int):
+        return str(value)
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+def render_prometheus(snapshot: dict, extra: dict | None = None) -> str:
+    """Format texte Prometheus (exposition 0.0.4) d'un snapshot {symbol: métriques}."""
+    lines = []
+    for name, kind, help_text, key, divisor in SYMBOL_METRICS:
+        full_name = f"{METRICS_PREFIX}_{name}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        for symbol in sorted(snapshot):
+            value = snapshot[symbol].get(key)
+            if value is None:
+                continue
+            if divisor != 1:
+                value = value / divisor
+            lines.append(f'{full_name}{{symbol="{symbol}"}} {format_value(value)}')
+    for name, value in (extra or {}).items():
+        full_name = f"{METRICS_PREFIX}_{name}"
+        lines.append(f"# TYPE {full_name} gauge")
+        lines.append(f"{full_name} {format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+async def start_metrics_server(snapshot_func, host: str = "127.0.0.1", port: int = 9108):
+    """
+    Sert /metrics en local. snapshot_func() renvoie ({symbol: métriques}, {métrique globale: valeur}).
+    """
+    async def handle_metrics(request):
+        snapshot, extra = snapshot_func()
+        return web.Response(text=render_prometheus(snapshot, extra), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    log(f"📈 Métriques d'ingestion sur http://{host}:{port}/metrics", level="INFO")
+    return runner
+
+def parse_prometheus(text: str) -> dict:
+    """{symbol: {métrique: valeur}} à partir du texte exposé (métriques par symbole uniquement)."""
+    per_symbol = {}
+    prefix = f"{METRICS_PREFIX}_"
+    for line in text.splitlines():
+        if not line.startswith(prefix) or "{" not in line:
+            continue
+        name, rest = line[len(prefix):].split("{", 1)
+        labels, value = rest.rsplit("} ", 1)
+        symbol = labels.split('symbol="', 1)[1].split('"', 1)[0]
+        per_symbol.setdefault(symbol, {})[name] = float(value)
+    return per_symbol
+
+async def fetch_summary(url: str) -> dict:
+    import aiohttp
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as resp:
+            resp.raise_for_status()
+            return parse_prometheus(await resp.text())
+
+def print_summary(per_symbol: dict, sort_by: str = "last_trade_age_seconds", limit: int = 0):
+    from tabulate import tabulate
+
+    def fmt(value, pattern="{:.1f}"):
+        return "-" if value is None else pattern.format(value)
+
+    rows = []
+    for symbol, m in sorted(per_symbol.items(), key=lambda kv: kv[1].get(sort_by, 0), reverse=True):
+        rows.append([
+            symbol,
+            fmt(m.get("trades_per_second")),
+            fmt(m.get("candles_per_second")),
+            fmt(m.get("commit_lag_seconds"), "{:.2f}s"),
+            fmt(m.get("receive_lag_seconds"), "{:.3f}s"),
+            fmt(m.get("last_trade_age_seconds"), "{:.0f}s"),
+            fmt(m.get("write_queue_depth"), "{:.0f}"),
+            fmt(m.get("reconnects_total"), "{:.0f}"),
+            "✅" if m.get("connected") else "🔴",
+        ])
+    if limit:
+        rows = rows[:limit]
+    print(tabulate(rows, headers=["Symbol", "Trades/s", "Candles/s", "Commit lag", "Recv lag",
+                                  "Last trade", "Queue", "Reconnects", "WS"], tablefmt="grid"))
+    connected = sum(1 for m in per_symbol.values() if m.get("connected"))
+    total_trades = sum(m.get("trades_per_second", 0) for m in per_symbol.values())
+    print(f"{connected}/{len(per_symbol)} symbols connected, {total_trades:.1f} trades/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summary of a running ingester's /metrics endpoint")
+    parser.add_argument("--url", default="http://127.0.0.1:9108/metrics", help="Metrics endpoint")
+    parser.add_argument("--sort", default="last_trade_age_seconds", help="Metric used to sort symbols (descending)")
+    parser.add_argument("--limit", type=int, default=0, help="Show only the first N symbols")
+    args = parser.parse_args()
+    print_summary(asyncio.run(fetch_summary(args.url)), args.sort, args.limit)
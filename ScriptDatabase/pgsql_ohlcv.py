@@ -1,11 +1,27 @@
 # ScriptDatabase/pgsql_ohlcv.py
+import argparse
 import asyncio
 import json
 import websockets
 import asyncpg
+import time
+import numpy as np
 import pandas as pd
 from datetime import datetime, timezone, timedelta
 from utils.logger import log
+from utils.ws_supervisor import ReconnectBackoff, get_connection_stats, CONNECTION_STATS
+from config.settings import get_config
+from utils.endpoints import WS_URL, api_url
+from ScriptDatabase.retention import (
+    has_timescaledb, is_hypertable, ensure_daily_partitions,
+    setup_hypertable_policies, enforce_retention,
+)
+from ScriptDatabase.gap_index import (
+    ensure_gap_table, open_gap, close_gap, scan_ohlcv_gaps, gap_repair_worker, repair_reconnect_gap,
+)
+from ScriptDatabase.trade_tape import TRADE_TAPE_TABLE, TradeTapeWriter, ensure_tape_table
+from ScriptDatabase.trade_decoder import TradeDecoder
+from ScriptDatabase.ingest_metrics import collect_symbol_metrics, start_metrics_server
 import os
 
 PG_DSN = os.environ.get("PG_DSN")
@@ -16,26 +32,84 @@ INTERVAL_SEC = 1
 SYMBOLS_FILE = "symbol.lst"
 RETENTION_DAYS = 90
 
+config = get_config()
+COMPRESS_AFTER_HOURS = config.database.compress_after_hours
+GAP_SCAN_INTERVAL_SEC = config.database.gap_scan_interval_sec
+GAP_MIN_SEC = config.database.gap_min_sec
+TRADE_TAPE_ENABLED = config.database.trade_tape_enabled
+TRADE_TAPE_RETENTION_DAYS = config.database.trade_tape_retention_days
+WS_BACKOFF_BASE_SEC = config.database.ws_backoff_base_sec
+WS_BACKOFF_MAX_SEC = config.database.ws_backoff_max_sec
+WS_PING_INTERVAL_SEC = config.database.ws_ping_interval_sec
+WS_STALE_AFTER_SEC = config.database.ws_stale_after_sec
+METRICS_HOST = config.database.metrics_host
+METRICS_PORT = config.database.metrics_port
+
+# Décodeur des messages trade (msgspec / orjson si installés, json sinon)
+TRADE_DECODER = TradeDecoder(config.database.ws_decoder)
+
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# Ligne typée lue depuis PostgreSQL : timestamp epoch en ms + colonnes float8
+OHLCV_RECORD_DTYPE = np.dtype([
+    ("ts_ms", np.int64),
+    ("open", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("close", np.float64),
+    ("volume", np.float64),
+])
+
 def table_name_from_symbol(symbol: str) -> str:
     return "ohlcv_" + symbol.lower().replace("_", "__")
 
-async def fetch_ohlcv_1s(symbol: str, start_ts: datetime, end_ts: datetime, pool=None) -> pd.DataFrame:
+async def init_ohlcv_connection(conn):
     """
-    Récupère les bougies 1s de la base PostgreSQL entre start_ts et end_ts pour symbol donné.
+    Initialisation des connexions du pool : les colonnes NUMERIC (tables pas encore migrées)
+    sont décodées directement en float au lieu d'objets Decimal.
+    """
+    await conn.set_type_codec(
+        "numeric", encoder=str, decoder=float, schema="pg_catalog", format="text"
+    )
+
+def records_to_arrays(rows) -> np.ndarray:
+    """
+    Convertit les Records asyncpg (ts_ms, open, high, low, close, volume) en un tableau
+    NumPy structuré en une seule passe, sans DataFrame intermédiaire ni Decimal.
+    """
+    return np.fromiter((tuple(r) for r in rows), dtype=OHLCV_RECORD_DTYPE, count=len(rows))
+
+def arrays_to_dataframe(arr: np.ndarray) -> pd.DataFrame:
+    """
+    Construit le DataFrame OHLCV (colonne timestamp UTC + colonnes float64) à partir du tableau typé.
     """
-    table_name = "ohlcv_" + symbol.lower().replace("_", "__")
+    data = {"timestamp": pd.to_datetime(arr["ts_ms"], unit="ms", utc=True)}
+    for col in OHLCV_COLUMNS:
+        data[col] = arr[col]
+    return pd.DataFrame(data, copy=False)
 
-    query = f"""
-    SELECT timestamp, open, high, low, close, volume
+def ohlcv_select_query(table_name: str, where: str = "") -> str:
+    """
+    Requête de lecture des bougies 1s renvoyant le timestamp en epoch ms et les prix en float8.
+    """
+    return f"""
+    SELECT (EXTRACT(EPOCH FROM timestamp) * 1000)::bigint AS ts_ms,
+           open::float8, high::float8, low::float8, close::float8, volume::float8
     FROM {table_name}
     WHERE interval_sec = 1
-      AND timestamp >= $1
-      AND timestamp <= $2
+      {where}
     ORDER BY timestamp ASC
     """
 
+async def fetch_ohlcv_1s_arrays(symbol: str, start_ts: datetime, end_ts: datetime, pool=None) -> np.ndarray:
+    """
+    Récupère les bougies 1s entre start_ts et end_ts sous forme de tableau NumPy structuré.
+    """
+    table_name = table_name_from_symbol(symbol)
+    query = ohlcv_select_query(table_name, "AND timestamp >= $1 AND timestamp <= $2")
+
     if pool is None:
-        pool = await asyncpg.create_pool(dsn=PG_DSN)
+        pool = await asyncpg.create_pool(dsn=PG_DSN, init=init_ohlcv_connection)
         async with pool.acquire() as conn:
             rows = await conn.fetch(query, start_ts, end_ts)
         await pool.close()
@@ -43,55 +117,150 @@ async def fetch_ohlcv_1s(symbol: str, start_ts: datetime, end_ts: datetime, pool
         async with pool.acquire() as conn:
             rows = await conn.fetch(query, start_ts, end_ts)
 
-    if not rows:
+    return records_to_arrays(rows)
+
+async def fetch_ohlcv_1s(symbol: str, start_ts: datetime, end_ts: datetime, pool=None) -> pd.DataFrame:
+    """
+    Récupère les bougies 1s de la base PostgreSQL entre start_ts et end_ts pour symbol donné.
+    Les colonnes open/high/low/close/volume sont déjà en float64.
+    """
+    arr = await fetch_ohlcv_1s_arrays(symbol, start_ts, end_ts, pool=pool)
+    if arr.size == 0:
         return pd.DataFrame()
 
-    df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
-    return df
+    return arrays_to_dataframe(arr)
 
 async def create_table_if_not_exists(conn, symbol):
     table_name = table_name_from_symbol(symbol)
+    timescale = await has_timescaledb(conn)
+    # Sans TimescaleDB, la table est partitionnée par jour pour que la rétention soit un DROP de partition
+    partition_clause = "" if timescale else " PARTITION BY RANGE (timestamp)"
     await conn.execute(f"""
         CREATE TABLE IF NOT EXISTS {table_name} (
             symbol TEXT NOT NULL,
             interval_sec INTEGER NOT NULL,
             timestamp TIMESTAMPTZ NOT NULL,
-            open NUMERIC,
-            high NUMERIC,
-            low NUMERIC,
-            close NUMERIC,
-            volume NUMERIC,
+            open DOUBLE PRECISION,
+            high DOUBLE PRECISION,
+            low DOUBLE PRECISION,
+            close DOUBLE PRECISION,
+            volume DOUBLE PRECISION,
             PRIMARY KEY (symbol, interval_sec, timestamp)
-        );
+        ){partition_clause};
     """)
+    if timescale:
+        try:
+            await conn.execute(f"SELECT create_hypertable('{table_name}', 'timestamp', if_not_exists => TRUE);")
+        except Exception as e:
+            log(f"⚠️ Erreur création hypertable pour {table_name}: {e}", level="ERROR")
+    else:
+        # Fenêtre de rétention entière : les bougies rattrapées (trous, reconnexions) ont leur partition
+        await ensure_daily_partitions(conn, table_name, days_back=RETENTION_DAYS)
+
+async def setup_retention(conn, symbol, retention_days=RETENTION_DAYS, compress_after_hours=COMPRESS_AFTER_HOURS):
+    """
+    Enregistre compression + rétention côté TimescaleDB. À appeler après migrate_columns_to_float8 :
+    une fois la compression activée, le type des colonnes ne peut plus être modifié.
+    """
+    table_name = table_name_from_symbol(symbol)
+    if await is_hypertable(conn, table_name):
+        await setup_hypertable_policies(conn, table_name, retention_days, compress_after_hours, segment_by="symbol")
+
+async def numeric_ohlcv_columns(conn, table_name: str) -> list:
+    """Colonnes OHLCV encore en NUMERIC (ancien schéma) d'une table du schéma courant."""
+    rows = await conn.fetch("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = $1 AND data_type = 'numeric'
+    """, table_name)
+    return [r["column_name"] for r in rows if r["column_name"] in OHLCV_COLUMNS]
+
+async def migrate_columns_to_float8(conn, table_name: str):
+    """
+    Migre les colonnes OHLCV d'une table existante de NUMERIC vers DOUBLE PRECISION.
+    Sans effet si la table est déjà en float8. Réécrit toute la table sous verrou ACCESS EXCLUSIVE :
+    uniquement via la migration ponctuelle (--migrate-float8), jamais au démarrage de l'ingester.
+    """
+    cols = await numeric_ohlcv_columns(conn, table_name)
+    if not cols:
+        return
+
+    alters = ", ".join(f"ALTER COLUMN {c} TYPE DOUBLE PRECISION USING {c}::float8" for c in cols)
     try:
-        await conn.execute(f"SELECT create_hypertable('{table_name}', 'timestamp', if_not_exists => TRUE);")
+        await conn.execute(f"ALTER TABLE {table_name} {alters};")
+        log(f"🔧 Migration float8 de {table_name} : {cols}", level="INFO")
     except Exception as e:
-        log(f"⚠️ Erreur création hypertable pour {table_name}: {e}", level="ERROR")
+        log(f"⚠️ Erreur migration float8 pour {table_name}: {e}", level="ERROR")
 
 async def delete_old_data(conn, symbol, retention_days=RETENTION_DAYS):
     table_name = table_name_from_symbol(symbol)
-    
-    # Vérifier si la table existe avant de tenter la suppression
-    table_exists = await conn.fetchval("""
-        SELECT EXISTS (
-            SELECT 1 FROM information_schema.tables 
-            WHERE table_name = $1
-        )
-    """, table_name)
-    
-    if not table_exists:
-        log(f"⚠️ Table {table_name} n'existe pas, skip suppression", level="DEBUG")
-        return
-    
-    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
-    result = await conn.execute(f"DELETE FROM {table_name} WHERE timestamp < $1;", cutoff)
-    log(f"🗑️ Suppression données > {retention_days} jours dans {table_name} : {result}", level="INFO")
+    await enforce_retention(conn, table_name, retention_days)
+
+class CandleBatchWriter:
+    """
+    Regroupe les bougies terminées de tous les symboles et les écrit une fois par tour de boucle
+    asyncio (un executemany par table) au lieu d'un INSERT par bougie et par symbole.
+    """
+    def __init__(self):
+        self.pending = {}  # table -> [records]
+        self.pool = None
+        self.written = 0
+        self.dropped = 0
+        self.written_by_symbol = {}
+        self.commit_lag_ms = {}  # symbol -> fin de la dernière bougie écrite -> commit
+        self._scheduled = False
+        self._tasks = set()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(records) for records in self.pending.values())
+
+    def pending_by_symbol(self) -> dict:
+        return {records[0][0]: len(records) for records in self.pending.values() if records}
+
+    def add(self, pool, table_name: str, record: tuple):
+        self.pool = pool
+        self.pending.setdefault(table_name, []).append(record)
+        if not self._scheduled:
+            self._scheduled = True
+            # Le flush part au tour de boucle suivant : les trades déjà reçus sont traités avant
+            asyncio.get_running_loop().call_soon(self._start_flush)
+
+    def _start_flush(self):
+        task = asyncio.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        self._scheduled = False
+        if not self.pending:
+            return
+        batches, self.pending = self.pending, {}
+        for table_name, records in batches.items():
+            try:
+                async with self.pool.acquire() as conn:
+                    await conn.executemany(f"""
+                        INSERT INTO {table_name} (symbol, timestamp, interval_sec, open, high, low, close, volume)
+                        VALUES($1, $2, $3, $4, $5, $6, $7, $8)
+                        ON CONFLICT (symbol, interval_sec, timestamp) DO NOTHING
+                    """, records)
+                self.written += len(records)
+                symbol, bucket_start, interval_sec = records[-1][:3]
+                self.written_by_symbol[symbol] = self.written_by_symbol.get(symbol, 0) + len(records)
+                self.commit_lag_ms[symbol] = (time.time() - bucket_start.timestamp() - interval_sec) * 1000
+            except Exception as e:
+                self.dropped += len(records)
+                log(f"❌ Erreur insertion de {len(records)} bougies dans {table_name}: {e}", level="ERROR")
+        log(f"⏳ {sum(len(r) for r in batches.values())} bougies insérées ({len(batches)} tables)", level="DEBUG")
+
+# Écrivain partagé par tous les abonnements du process
+CANDLE_WRITER = CandleBatchWriter()
 
 class OHLCVAggregator:
-    def __init__(self, symbol, interval_sec):
+    def __init__(self, symbol, interval_sec, writer: CandleBatchWriter | None = None):
         self.symbol = symbol
         self.interval_sec = interval_sec
+        self.table_name = table_name_from_symbol(symbol)
+        self.writer = writer
         self.current_bucket = None
         self.open = None
         self.high = None
@@ -114,8 +283,10 @@ class OHLCVAggregator:
             self.close = price
             self.volume = size
         elif bucket == self.current_bucket:
-            self.high = max(self.high, price)
-            self.low = min(self.low, price)
+            if price > self.high:
+                self.high = price
+            elif price < self.low:
+                self.low = price
             self.close = price
             self.volume += size
         else:
@@ -131,24 +302,72 @@ class OHLCVAggregator:
         if bucket_start > 10**12:
             bucket_start = bucket_start // 1000
         dt = datetime.fromtimestamp(bucket_start, tz=timezone.utc)
+        record = (self.symbol, dt, self.interval_sec, self.open, self.high, self.low, self.close, self.volume)
+
+        if self.writer is not None:
+            self.writer.add(pool, self.table_name, record)
+            return
 
-        table_name = table_name_from_symbol(self.symbol)
         async with pool.acquire() as conn:
             await conn.execute(f"""
-                INSERT INTO {table_name} (symbol, timestamp, interval_sec, open, high, low, close, volume)
+                INSERT INTO {self.table_name} (symbol, timestamp, interval_sec, open, high, low, close, volume)
                 VALUES($1, $2, $3, $4, $5, $6, $7, $8)
                 ON CONFLICT (symbol, interval_sec, timestamp) DO NOTHING
-            """, self.symbol, dt, self.interval_sec, self.open, self.high, self.low, self.close, self.volume)
+            """, *record)
 
             log(f"⏳ Bougie insérée {dt} {self.symbol} O:{self.open} H:{self.high} L:{self.low} C:{self.close} V:{self.volume}", level="DEBUG")
 
-async def subscribe_and_aggregate(symbol: str, pool, stop_event: asyncio.Event):
-    ws_url = "wss://ws.backpack.exchange"
-    aggregator = OHLCVAggregator(symbol, INTERVAL_SEC)
+    async def flush(self, pool):
+        """Écrit la bougie en cours (coupure websocket) au lieu de la perdre."""
+        if self.current_bucket is None:
+            return
+        await self.insert_ohlcv(pool, self.current_bucket)
+        self.current_bucket = None
+
+async def _mark_disconnected(symbol: str, pool, last_trade_ms: int | None) -> datetime | None:
+    """Ouvre un trou dans l'index à partir du dernier trade reçu avant la coupure."""
+    gap_start = (
+        datetime.fromtimestamp(last_trade_ms / 1000, tz=timezone.utc)
+        if last_trade_ms else datetime.now(timezone.utc)
+    )
+    try:
+        await open_gap(pool, symbol, gap_start)
+    except Exception as e:
+        log(f"⚠️ Impossible d'enregistrer le trou pour {symbol}: {e}", level="ERROR")
+        return None
+    return gap_start
+
+# Backfills de reconnexion en cours : référence gardée pour que la tâche ne soit pas collectée en route
+RECONNECT_BACKFILL_TASKS = set()
+
+async def _backfill_after_reconnect(symbol: str, pool, gap_start: datetime, gap_end: datetime, stats):
+    try:
+        stats.backfilled_rows += await repair_reconnect_gap(
+            pool, symbol, table_name_from_symbol(symbol), gap_start, gap_end
+        )
+    except Exception as e:
+        log(f"❌ Backfill après reconnexion échoué pour {symbol}: {e}", level="ERROR")
+
+async def subscribe_and_aggregate(symbol: str, pool, stop_event: asyncio.Event, tape: TradeTapeWriter | None = None):
+    """
+    Abonnement trade.<symbol> supervisé : keepalive ping/pong, détection de flux muet,
+    reconnexion avec backoff exponentiel + jitter, écriture de la bougie en cours à la coupure
+    et backfill REST de la fenêtre manquée dès la reconnexion.
+    """
+    ws_url = WS_URL
+    aggregator = OHLCVAggregator(symbol, INTERVAL_SEC, writer=CANDLE_WRITER)
+    decode = TRADE_DECODER.decode
+    backoff = ReconnectBackoff(base=WS_BACKOFF_BASE_SEC, cap=WS_BACKOFF_MAX_SEC)
+    stats = get_connection_stats(f"trade.{symbol}")
+    last_trade_ms = None
+    gap_start = None
 
     while not stop_event.is_set():
+        error = None
         try:
-            async with websockets.connect(ws_url) as ws:
+            async with websockets.connect(
+                ws_url, ping_interval=WS_PING_INTERVAL_SEC, ping_timeout=WS_PING_INTERVAL_SEC
+            ) as ws:
                 sub_msg = {
                     "method": "SUBSCRIBE",
                     "params": [f"trade.{symbol}"],
@@ -156,32 +375,65 @@ async def subscribe_and_aggregate(symbol: str, pool, stop_event: asyncio.Event):
                 }
                 await ws.send(json.dumps(sub_msg))
                 log(f"✅ Subscribed to trade.{symbol}", level="INFO")
-
+                backoff.connected()
+                stats.on_connect()
+
+                # Abonnement rétabli : tous les trades sont de nouveau reçus, le trou se ferme ici
+                if gap_start is not None:
+                    gap_end = datetime.now(timezone.utc)
+                    await close_gap(pool, symbol, gap_end)
+                    task = asyncio.create_task(_backfill_after_reconnect(symbol, pool, gap_start, gap_end, stats))
+                    RECONNECT_BACKFILL_TASKS.add(task)
+                    task.add_done_callback(RECONNECT_BACKFILL_TASKS.discard)
+                    gap_start = None
+
+                last_message = time.monotonic()
                 while not stop_event.is_set():
                     try:
                         message = await asyncio.wait_for(ws.recv(), timeout=10)
                     except asyncio.TimeoutError:
+                        stats.ping_latency = ws.latency
+                        if WS_STALE_AFTER_SEC and time.monotonic() - last_message > WS_STALE_AFTER_SEC:
+                            stats.stale_reconnects += 1
+                            log(f"🧊 Aucun message sur trade.{symbol} depuis {WS_STALE_AFTER_SEC}s, reconnexion", level="WARNING")
+                            break
                         continue
-                    msg = json.loads(message)
-                    data = msg.get("data")
-                    if data and "p" in data and "q" in data and "T" in data:
-                        price = float(data["p"])
-                        size = float(data["q"])
-                        timestamp_ms = int(data["T"])
+                    last_message = time.monotonic()
+                    now = time.time()
+                    stats.last_message_at = now
+                    trade = decode(message)
+                    if trade is not None:
+                        price, size, timestamp_ms, is_buyer_maker, trade_id = trade
+                        last_trade_ms = timestamp_ms
+                        stats.last_event_ms = timestamp_ms
+                        stats.trades += 1
+                        stats.lag_ms = now * 1000 - timestamp_ms
+                        if tape is not None:
+                            tape.add(symbol, timestamp_ms, price, size, is_buyer_maker, trade_id)
                         await aggregator.process_trade(price, size, timestamp_ms, pool)
 
-        except (websockets.ConnectionClosed, asyncio.CancelledError):
-            log(f"🔴 WebSocket closed for {symbol}", level="ERROR")
-            if stop_event.is_set():
-                break
-            log(f"♻️ Tentative de reconnexion pour {symbol} dans 5 secondes...", level="DEBUG")
-            await asyncio.sleep(5)
+        except websockets.ConnectionClosed as e:
+            error = e
+            log(f"🔴 WebSocket closed for {symbol}: {e}", level="ERROR")
         except Exception as e:
+            error = e
             log(f"❌ Erreur websocket {symbol}: {e}", level="ERROR")
-            log(f"♻️ Tentative de reconnexion pour {symbol} dans 5 secondes...", level="DEBUG")
-            await asyncio.sleep(5)
 
-async def periodic_cleanup(pool, get_symbols_func, retention_days=RETENTION_DAYS):
+        stats.on_disconnect(error)
+        try:
+            await aggregator.flush(pool)
+        except Exception as e:
+            log(f"⚠️ Bougie en cours perdue pour {symbol}: {e}", level="ERROR")
+
+        if stop_event.is_set():
+            break
+        if gap_start is None:
+            gap_start = await _mark_disconnected(symbol, pool, last_trade_ms)
+        delay = backoff.next_delay()
+        log(f"♻️ Tentative de reconnexion pour {symbol} dans {delay:.1f} secondes (essai {backoff.attempts})...", level="DEBUG")
+        await asyncio.sleep(delay)
+
+async def periodic_cleanup(pool, get_symbols_func, retention_days=RETENTION_DAYS, tape_retention_days=None):
     while True:
         symbols = await get_symbols_func()
         async with pool.acquire() as conn:
@@ -190,12 +442,58 @@ async def periodic_cleanup(pool, get_symbols_func, retention_days=RETENTION_DAYS
                     await delete_old_data(conn, symbol, retention_days)
                 except Exception as e:
                     log(f"❌ Erreur lors du nettoyage de {symbol}: {e}", level="ERROR")
+            if tape_retention_days is not None:
+                try:
+                    await enforce_retention(conn, TRADE_TAPE_TABLE, tape_retention_days)
+                except Exception as e:
+                    log(f"❌ Erreur lors du nettoyage du tape: {e}", level="ERROR")
         await asyncio.sleep(24 * 3600)  # 24h
 
+async def periodic_gap_scan(pool, get_symbols_func, interval_sec=GAP_SCAN_INTERVAL_SEC):
+    """Scan SQL régulier des trous de la dernière période, en complément des trous de reconnexion."""
+    while True:
+        await asyncio.sleep(interval_sec)
+        symbols = await get_symbols_func()
+        total = 0
+        for symbol in symbols:
+            try:
+                total += await scan_ohlcv_gaps(
+                    pool, symbol, table_name_from_symbol(symbol),
+                    lookback_sec=interval_sec * 2, min_gap_sec=GAP_MIN_SEC,
+                )
+            except Exception as e:
+                log(f"❌ Erreur scan des trous pour {symbol}: {e}", level="ERROR")
+        log(f"🔎 Scan des trous terminé : {total} nouveaux trous sur {len(symbols)} symboles", level="INFO")
+
+async def periodic_connection_report(interval_sec=300):
+    """Résumé périodique des compteurs de reconnexion par connexion websocket."""
+    while True:
+        await asyncio.sleep(interval_sec)
+        stats = list(CONNECTION_STATS.values())
+        if not stats:
+            continue
+        connected = sum(1 for s in stats if s.connected_since is not None)
+        reconnects = sum(s.reconnects for s in stats)
+        worst = sorted(stats, key=lambda s: s.reconnects, reverse=True)[:5]
+        details = ", ".join(f"{s.name}={s.reconnects}" for s in worst if s.reconnects)
+        log(f"📡 Websockets : {connected}/{len(stats)} connectés, {reconnects} reconnexions"
+            + (f" (max : {details})" if details else ""), level="INFO")
+
+def ingest_metrics_snapshot(tape: TradeTapeWriter | None = None):
+    """Métriques du process pour /metrics : par symbole + totaux de l'écrivain."""
+    extra = {
+        "write_queue_depth_total": CANDLE_WRITER.queue_depth,
+        "candles_dropped_total": CANDLE_WRITER.dropped,
+    }
+    if tape is not None:
+        extra["tape_buffer_depth"] = len(tape.buffer)
+        extra["tape_trades_written_total"] = tape.written
+    return collect_symbol_metrics(None, CANDLE_WRITER), extra
+
 async def fetch_all_symbols() -> list[str]:
     import aiohttp
 
-    url = "https://api.backpack.exchange/api/v1/tickers"
+    url = api_url("api/v1/tickers")
     try:
         async with aiohttp.ClientSession() as session:
             async with session.get(url) as resp:
@@ -210,7 +508,20 @@ async def fetch_all_symbols() -> list[str]:
     symbols = [t["symbol"] for t in data if "_PERP" in t.get("symbol", "")]
     return symbols
 
-async def monitor_symbols(pool, get_symbols_func):
+async def prepare_symbol_tables(pool, symbols):
+    """Création / migration / politiques de rétention des tables 1s avant abonnement."""
+    async with pool.acquire() as conn:
+        for sym in symbols:
+            await create_table_if_not_exists(conn, sym)
+            table_name = table_name_from_symbol(sym)
+            if await numeric_ohlcv_columns(conn, table_name):
+                # Compression laissée de côté : elle empêcherait la migration des colonnes
+                log(f"⚠️ {table_name} a encore des colonnes NUMERIC : lancer "
+                    f"python3 ScriptDatabase/pgsql_ohlcv.py --migrate-float8 (ingester arrêté)", level="WARNING")
+                continue
+            await setup_retention(conn, sym)
+
+async def monitor_symbols(pool, get_symbols_func, tape: TradeTapeWriter | None = None):
     current_tasks = {}
     known_symbols = set()  # mémoriser TOUS les symboles vus
 
@@ -223,15 +534,13 @@ async def monitor_symbols(pool, get_symbols_func):
         to_start = known_symbols - current_tasks.keys()
 
         # Créer tables si nécessaire
-        async with pool.acquire() as conn:
-            for sym in to_start:
-                await create_table_if_not_exists(conn, sym)
+        await prepare_symbol_tables(pool, to_start)
 
         # Démarrer abonnements pour nouveaux symboles
         for sym in to_start:
             log(f"▶️ Démarrage abonnement {sym}", level="DEBUG")
             stop_event = asyncio.Event()
-            task = asyncio.create_task(subscribe_and_aggregate(sym, pool, stop_event))
+            task = asyncio.create_task(subscribe_and_aggregate(sym, pool, stop_event, tape))
             current_tasks[sym] = (task, stop_event)
 
         # Ici, pas d’arrêt d’abonnement automatique
@@ -246,15 +555,62 @@ def get_ohlcv_1s_sync(symbol: str, start_ts: datetime, end_ts: datetime) -> pd.D
 
 
 async def main():
-    pool = await asyncpg.create_pool(dsn=PG_DSN)
-
-    # Lance la surveillance du fichier et la purge
-    cleanup_task = asyncio.create_task(periodic_cleanup(pool, fetch_all_symbols))
-    monitor_task = asyncio.create_task(monitor_symbols(pool, fetch_all_symbols))
-    await asyncio.gather(cleanup_task, monitor_task)
+    pool = await asyncpg.create_pool(dsn=PG_DSN, init=init_ohlcv_connection)
+    async with pool.acquire() as conn:
+        await ensure_gap_table(conn)
+        if TRADE_TAPE_ENABLED:
+            await ensure_tape_table(conn, TRADE_TAPE_RETENTION_DAYS, COMPRESS_AFTER_HOURS)
+
+    tape = None
+    tasks = []
+    if TRADE_TAPE_ENABLED:
+        tape = TradeTapeWriter(
+            pool,
+            batch_size=config.database.trade_tape_batch_size,
+            flush_interval=config.database.trade_tape_flush_sec,
+        )
+        tasks.append(asyncio.create_task(tape.run()))
+        log(f"📼 Tape des trades activé (rétention {TRADE_TAPE_RETENTION_DAYS} jours)", level="INFO")
+
+    if METRICS_PORT:
+        await start_metrics_server(lambda: ingest_metrics_snapshot(tape), METRICS_HOST, METRICS_PORT)
+
+    # Lance la surveillance du fichier, la purge et la détection / réparation des trous
+    tape_retention = TRADE_TAPE_RETENTION_DAYS if TRADE_TAPE_ENABLED else None
+    tasks.append(asyncio.create_task(periodic_cleanup(pool, fetch_all_symbols, tape_retention_days=tape_retention)))
+    tasks.append(asyncio.create_task(monitor_symbols(pool, fetch_all_symbols, tape)))
+    tasks.append(asyncio.create_task(periodic_gap_scan(pool, fetch_all_symbols)))
+    tasks.append(asyncio.create_task(gap_repair_worker(pool, table_name_from_symbol)))
+    tasks.append(asyncio.create_task(periodic_connection_report()))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        await CANDLE_WRITER.flush()
+        if tape is not None:
+            await tape.flush()
+
+async def migrate_float8():
+    """Migration ponctuelle NUMERIC -> DOUBLE PRECISION de toutes les tables OHLCV du schéma courant."""
+    conn = await asyncpg.connect(dsn=PG_DSN)
+    try:
+        rows = await conn.fetch("""
+            SELECT DISTINCT table_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name LIKE 'ohlcv\\_%'
+              AND data_type = 'numeric' AND column_name = ANY($1::text[])
+            ORDER BY table_name
+        """, list(OHLCV_COLUMNS))
+        log(f"🔧 Migration float8 : {len(rows)} table(s) à réécrire", level="INFO")
+        for row in rows:
+            await migrate_columns_to_float8(conn, row["table_name"])
+    finally:
+        await conn.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="1s OHLCV ingester")
+    parser.add_argument("--migrate-float8", action="store_true",
+                        help="One-off rewrite of NUMERIC OHLCV columns to DOUBLE PRECISION, then exit (stop the ingester first)")
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(migrate_float8() if args.migrate_float8 else main())
     except KeyboardInterrupt:
         log(f"\n👋 Arrêt demandé, fin du programme.", level="INFO")
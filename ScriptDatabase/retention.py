@@ -0,0 +1,192 @@
+# ScriptDatabase/retention.py
+from datetime import datetime, timezone, timedelta
+from utils.logger import log
+
+# Cache de détection de l'extension TimescaleDB (une seule requête par process)
+_timescaledb_available = None
+
+async def has_timescaledb(conn) -> bool:
+    global _timescaledb_available
+    if _timescaledb_available is None:
+        _timescaledb_available = bool(await conn.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb')"
+        ))
+        log(f"🧩 TimescaleDB disponible : {_timescaledb_available}", level="DEBUG")
+    return _timescaledb_available
+
+async def is_hypertable(conn, table_name: str) -> bool:
+    if not await has_timescaledb(conn):
+        return False
+    return bool(await conn.fetchval("""
+        SELECT EXISTS (
+            SELECT 1 FROM timescaledb_information.hypertables
+            WHERE hypertable_name = $1
+        )
+    """, table_name))
+
+async def is_partitioned(conn, table_name: str) -> bool:
+    return bool(await conn.fetchval("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = $1
+        )
+    """, table_name))
+
+async def table_exists(conn, table_name: str) -> bool:
+    return bool(await conn.fetchval("""
+        SELECT EXISTS (
+            SELECT 1 FROM information_schema.tables
+            WHERE table_name = $1
+        )
+    """, table_name))
+
+async def setup_hypertable_policies(conn, table_name: str, retention_days: int,
+                                    compress_after_hours: int, segment_by: str | None = None):
+    """
+    Active la compression native et enregistre les politiques de compression / rétention
+    TimescaleDB. Idempotent : peut être appelé à chaque démarrage.
+    """
+    options = ["timescaledb.compress", "timescaledb.compress_orderby = 'timestamp DESC'"]
+    if segment_by:
+        options.append(f"timescaledb.compress_segmentby = '{segment_by}'")
+
+    # Le ALTER échoue dès que des chunks sont compressés : uniquement au premier démarrage
+    try:
+        compression_enabled = await conn.fetchval("""
+            SELECT compression_enabled FROM timescaledb_information.hypertables
+            WHERE hypertable_name = $1
+        """, table_name)
+        if not compression_enabled:
+            await conn.execute(f"ALTER TABLE {table_name} SET ({', '.join(options)});")
+    except Exception as e:
+        log(f"⚠️ Erreur activation compression pour {table_name}: {e}", level="ERROR")
+
+    # Politiques idempotentes (if_not_exists) : enregistrées à chaque démarrage, chacune indépendamment
+    policies = (
+        ("compression", f"SELECT add_compression_policy('{table_name}', INTERVAL '{int(compress_after_hours)} hours', if_not_exists => TRUE);"),
+        ("rétention", f"SELECT add_retention_policy('{table_name}', INTERVAL '{int(retention_days)} days', if_not_exists => TRUE);"),
+    )
+    for label, query in policies:
+        try:
+            await conn.execute(query)
+        except Exception as e:
+            log(f"⚠️ Erreur politique de {label} pour {table_name}: {e}", level="ERROR")
+    log(f"🗜️ Politiques TimescaleDB pour {table_name} : compression > {compress_after_hours}h, rétention {retention_days}j", level="DEBUG")
+
+def partition_name(table_name: str, day) -> str:
+    return f"{table_name}_p{day:%Y%m%d}"
+
+async def list_partitions(conn, table_name: str) -> set:
+    rows = await conn.fetch("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = $1
+    """, table_name)
+    return {row["relname"] for row in rows}
+
+async def create_day_partition(conn, table_name: str, day, has_default: bool):
+    """
+    Crée la partition d'un jour. Si la partition DEFAULT contient déjà des lignes de ce jour
+    (PostgreSQL refuserait alors CREATE ... PARTITION OF), elles sont déplacées dans une table
+    neuve qui est ensuite attachée comme partition du jour, dans une seule transaction.
+    """
+    name = partition_name(table_name, day)
+    lower = f"{day.isoformat()} 00:00:00+00"
+    upper = f"{(day + timedelta(days=1)).isoformat()} 00:00:00+00"
+    bounds = f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+
+    if not has_default or not await conn.fetchval(
+        f"SELECT EXISTS (SELECT 1 FROM {table_name}_default WHERE timestamp >= '{lower}' AND timestamp < '{upper}')"
+    ):
+        await conn.execute(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table_name} {bounds};")
+        return
+
+    async with conn.transaction():
+        await conn.execute(f"CREATE TABLE {name} (LIKE {table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS);")
+        moved = await conn.execute(f"""
+            WITH moved AS (
+                DELETE FROM {table_name}_default
+                WHERE timestamp >= '{lower}' AND timestamp < '{upper}'
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved;
+        """)
+        await conn.execute(f"ALTER TABLE {table_name} ATTACH PARTITION {name} {bounds};")
+    log(f"📦 {name} : lignes sorties de la partition DEFAULT ({moved})", level="INFO")
+
+async def ensure_daily_partitions(conn, table_name: str, days_ahead: int = 2, days_back: int = 0):
+    """
+    PostgreSQL sans TimescaleDB : crée les partitions journalières de days_back jours en arrière
+    (fenêtre de rétention, pour que les backfills ne tombent pas dans DEFAULT) jusqu'à days_ahead
+    jours en avant, plus une partition DEFAULT de secours.
+    """
+    if not await is_partitioned(conn, table_name):
+        return
+
+    existing = await list_partitions(conn, table_name)
+    has_default = f"{table_name}_default" in existing
+    today = datetime.now(timezone.utc).date()
+    for offset in range(-days_back, days_ahead + 1):
+        day = today + timedelta(days=offset)
+        if partition_name(table_name, day) in existing:
+            continue
+        try:
+            await create_day_partition(conn, table_name, day, has_default)
+        except Exception as e:
+            log(f"❌ Erreur création partition {partition_name(table_name, day)}: {e}", level="ERROR")
+
+    if not has_default:
+        await conn.execute(f"CREATE TABLE IF NOT EXISTS {table_name}_default PARTITION OF {table_name} DEFAULT;")
+
+async def drop_expired_partitions(conn, table_name: str, cutoff: datetime) -> int:
+    """
+    Supprime (DROP TABLE) les partitions journalières entièrement antérieures à cutoff.
+    """
+    prefix = f"{table_name}_p"
+    dropped = 0
+    for name in await list_partitions(conn, table_name):
+        if not name.startswith(prefix):
+            continue
+        try:
+            day = datetime.strptime(name[len(prefix):], "%Y%m%d").date()
+        except ValueError:
+            continue
+        if day + timedelta(days=1) <= cutoff.date():
+            await conn.execute(f"DROP TABLE IF EXISTS {name};")
+            dropped += 1
+
+    # DEFAULT ne reçoit que les lignes hors de la fenêtre partitionnée (antérieures à la rétention
+    # ou très en avance) : ensure_daily_partitions en sort les jours de la fenêtre, le reste expire ici
+    await conn.execute(f"DELETE FROM {table_name}_default WHERE timestamp < $1;", cutoff)
+    return dropped
+
+async def enforce_retention(conn, table_name: str, retention_days: int) -> str:
+    """
+    Applique la rétention sur une table OHLCV :
+    - hypertable TimescaleDB : drop_chunks (opération de métadonnées par chunk)
+    - table partitionnée : DROP des partitions expirées
+    - table classique (ancien schéma) : DELETE
+    """
+    if not await table_exists(conn, table_name):
+        log(f"⚠️ Table {table_name} n'existe pas, skip rétention", level="DEBUG")
+        return "missing"
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+
+    if await is_hypertable(conn, table_name):
+        chunks = await conn.fetch("SELECT drop_chunks($1::regclass, older_than => $2);", table_name, cutoff)
+        log(f"🗑️ drop_chunks > {retention_days} jours dans {table_name} : {len(chunks)} chunks", level="INFO")
+        return "drop_chunks"
+
+    if await is_partitioned(conn, table_name):
+        dropped = await drop_expired_partitions(conn, table_name, cutoff)
+        await ensure_daily_partitions(conn, table_name, days_back=retention_days)
+        log(f"🗑️ Partitions > {retention_days} jours supprimées dans {table_name} : {dropped}", level="INFO")
+        return "drop_partitions"
+
+    result = await conn.execute(f"DELETE FROM {table_name} WHERE timestamp < $1;", cutoff)
+    log(f"🗑️ Suppression données > {retention_days} jours dans {table_name} : {result}", level="INFO")
+    return "delete"
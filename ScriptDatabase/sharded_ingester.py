@@ -0,0 +1,245 @@
+# ScriptDatabase/sharded_ingester.py
+import argparse
+import asyncio
+import multiprocessing as mp
+import queue
+import time
+
+import asyncpg
+
+from utils.logger import log
+from utils.hash_ring import HashRing
+from ScriptDatabase.pgsql_ohlcv import (
+    PG_DSN, config, init_ohlcv_connection, subscribe_and_aggregate, prepare_symbol_tables,
+    fetch_all_symbols, periodic_cleanup, periodic_gap_scan, table_name_from_symbol,
+    CANDLE_WRITER, TRADE_TAPE_ENABLED, TRADE_TAPE_RETENTION_DAYS, COMPRESS_AFTER_HOURS,
+    METRICS_HOST, METRICS_PORT,
+)
+from ScriptDatabase.ingest_metrics import collect_symbol_metrics, start_metrics_server
+from ScriptDatabase.gap_index import ensure_gap_table, gap_repair_worker
+from ScriptDatabase.trade_tape import TradeTapeWriter, ensure_tape_table
+
+STATUS_INTERVAL_SEC = 5
+REBALANCE_INTERVAL_SEC = 60
+
+_NO_COMMAND = object()
+
+def _next_command(commands, timeout: float):
+    try:
+        return commands.get(True, timeout)
+    except queue.Empty:
+        return _NO_COMMAND
+
+# --- Processus worker ---
+
+def _shard_status(shard_id: int, running: dict, tape=None) -> dict:
+    return {
+        "shard": shard_id,
+        "ts": time.time(),
+        "symbols": collect_symbol_metrics(running, CANDLE_WRITER),
+        "queue_depth": CANDLE_WRITER.queue_depth,
+        "candles_written": CANDLE_WRITER.written,
+        "candles_dropped": CANDLE_WRITER.dropped,
+        "tape_buffer": len(tape.buffer) if tape is not None else 0,
+    }
+
+async def _shard_worker(shard_id: int, commands, status, pool_size: int):
+    pool = await asyncpg.create_pool(dsn=PG_DSN, init=init_ohlcv_connection, min_size=1, max_size=pool_size)
+    tape = None
+    tape_task = None
+    if TRADE_TAPE_ENABLED:
+        tape = TradeTapeWriter(
+            pool,
+            batch_size=config.database.trade_tape_batch_size,
+            flush_interval=config.database.trade_tape_flush_sec,
+        )
+        tape_task = asyncio.create_task(tape.run())
+
+    running = {}  # symbol -> (task, stop_event)
+    stopping = set()  # abonnements retirés qui terminent leur dernière bougie
+    last_status = 0.0
+    log(f"🧩 Shard {shard_id} démarré", level="INFO")
+    try:
+        while True:
+            assigned = await asyncio.to_thread(_next_command, commands, 1.0)
+            if assigned is None:
+                break
+
+            if assigned is not _NO_COMMAND:
+                for symbol in set(running) - assigned:
+                    task, stop_event = running.pop(symbol)
+                    stop_event.set()
+                    stopping.add(task)
+                    task.add_done_callback(stopping.discard)
+                for symbol in assigned - set(running):
+                    stop_event = asyncio.Event()
+                    task = asyncio.create_task(subscribe_and_aggregate(symbol, pool, stop_event, tape))
+                    running[symbol] = (task, stop_event)
+                log(f"🧩 Shard {shard_id} : {len(running)} symboles", level="INFO")
+
+            if time.monotonic() - last_status >= STATUS_INTERVAL_SEC:
+                last_status = time.monotonic()
+                status.put(_shard_status(shard_id, running, tape))
+    finally:
+        for task, stop_event in running.values():
+            stop_event.set()
+        await asyncio.gather(*stopping, *(task for task, _ in running.values()), return_exceptions=True)
+        await CANDLE_WRITER.flush()
+        if tape is not None:
+            tape_task.cancel()
+            await tape.flush()
+        await pool.close()
+        log(f"🧩 Shard {shard_id} arrêté", level="INFO")
+
+def shard_worker_main(shard_id: int, commands, status, pool_size: int):
+    """Point d'entrée d'un processus worker : ses websockets, agrégateurs et écrivains."""
+    try:
+        asyncio.run(_shard_worker(shard_id, commands, status, pool_size))
+    except KeyboardInterrupt:
+        pass
+
+# --- Superviseur ---
+
+class ShardSupervisor:
+    """
+    Répartit les symboles entre N processus workers par hachage cohérent, relance les workers
+    morts, rééquilibre quand des symboles apparaissent / disparaissent et agrège le lag par shard.
+    """
+    def __init__(self, shards: int, pool_size: int = 4):
+        self.shards = shards
+        self.pool_size = pool_size
+        self.ring = HashRing(range(shards))
+        self.ctx = mp.get_context("spawn")
+        self.status = self.ctx.Queue()
+        self.workers = {}      # shard -> (process, command queue)
+        self.assignment = {shard: set() for shard in range(shards)}
+        self.last_status = {}  # shard -> dernier statut reçu
+
+    def _start_worker(self, shard: int):
+        commands = self.ctx.Queue()
+        process = self.ctx.Process(
+            target=shard_worker_main, args=(shard, commands, self.status, self.pool_size),
+            name=f"ingester-shard-{shard}", daemon=True,
+        )
+        process.start()
+        self.workers[shard] = (process, commands)
+        commands.put(set(self.assignment[shard]))
+
+    def start(self):
+        for shard in range(self.shards):
+            self._start_worker(shard)
+
+    def check_workers(self):
+        for shard, (process, _) in list(self.workers.items()):
+            if not process.is_alive():
+                log(f"💀 Shard {shard} (pid {process.pid}) arrêté (code {process.exitcode}), relance", level="ERROR")
+                self._start_worker(shard)
+
+    def rebalance(self, symbols) -> int:
+        """Envoie à chaque shard sa nouvelle liste ; renvoie le nombre de symboles déplacés / ajoutés."""
+        new_assignment = self.ring.assign(symbols)
+        moved = 0
+        for shard in range(self.shards):
+            target = new_assignment.get(shard, set())
+            if target != self.assignment[shard]:
+                moved += len(target - self.assignment[shard])
+                self.assignment[shard] = target
+                self.workers[shard][1].put(set(target))
+        return moved
+
+    def drain_status(self):
+        while True:
+            try:
+                report = self.status.get_nowait()
+            except queue.Empty:
+                return
+            self.last_status[report["shard"]] = report
+
+    def report(self):
+        for shard in range(self.shards):
+            report = self.last_status.get(shard)
+            if report is None:
+                log(f"📊 Shard {shard} : pas encore de statut", level="INFO")
+                continue
+            lags = [(s["receive_lag_ms"], sym) for sym, s in report["symbols"].items() if s["receive_lag_ms"] is not None]
+            worst_lag, worst_symbol = max(lags) if lags else (0.0, "-")
+            disconnected = sum(1 for s in report["symbols"].values() if not s["connected"])
+            reconnects = sum(s["reconnects"] for s in report["symbols"].values())
+            log(f"📊 Shard {shard} : {len(report['symbols'])} symboles, lag max {worst_lag:.0f} ms ({worst_symbol}), "
+                f"{disconnected} déconnectés, {reconnects} reconnexions, file {report['queue_depth']}, "
+                f"statut il y a {time.time() - report['ts']:.0f}s", level="INFO")
+
+    async def run(self, pool, get_symbols_func, interval_sec: int = REBALANCE_INTERVAL_SEC):
+        self.start()
+        last_rebalance = 0.0
+        symbols = set()
+        while True:
+            self.check_workers()
+            if time.monotonic() - last_rebalance >= interval_sec:
+                last_rebalance = time.monotonic()
+                api_symbols = set(await get_symbols_func())
+                # Liste vide = API indisponible : on garde la répartition courante
+                if api_symbols and api_symbols != symbols:
+                    await prepare_symbol_tables(pool, api_symbols - symbols)
+                    moved = self.rebalance(api_symbols)
+                    log(f"⚖️ Répartition : {len(api_symbols)} symboles sur {self.shards} shards, "
+                        f"{moved} (ré)affectés, {len(symbols - api_symbols)} retirés", level="INFO")
+                    symbols = api_symbols
+                self.drain_status()
+                self.report()
+            else:
+                self.drain_status()
+            await asyncio.sleep(STATUS_INTERVAL_SEC)
+
+    def metrics_snapshot(self):
+        """Métriques fusionnées des derniers statuts des shards, pour /metrics."""
+        snapshot = {}
+        extra = {"shards_alive": sum(1 for process, _ in self.workers.values() if process.is_alive())}
+        for report in self.last_status.values():
+            snapshot.update(report["symbols"])
+            shard = report["shard"]
+            extra[f'shard_{shard}_write_queue_depth'] = report["queue_depth"]
+            extra[f'shard_{shard}_status_age_seconds'] = time.time() - report["ts"]
+        return snapshot, extra
+
+    def stop(self):
+        for process, commands in self.workers.values():
+            commands.put(None)
+        for process, _ in self.workers.values():
+            process.join(timeout=15)
+            if process.is_alive():
+                process.terminate()
+
+async def main(shards: int, pool_size: int):
+    pool = await asyncpg.create_pool(dsn=PG_DSN, init=init_ohlcv_connection)
+    async with pool.acquire() as conn:
+        await ensure_gap_table(conn)
+        if TRADE_TAPE_ENABLED:
+            await ensure_tape_table(conn, TRADE_TAPE_RETENTION_DAYS, COMPRESS_AFTER_HOURS)
+
+    # Le superviseur garde les tâches uniques (purge, scan et réparation des trous)
+    supervisor = ShardSupervisor(shards, pool_size)
+    if METRICS_PORT:
+        await start_metrics_server(supervisor.metrics_snapshot, METRICS_HOST, METRICS_PORT)
+    tape_retention = TRADE_TAPE_RETENTION_DAYS if TRADE_TAPE_ENABLED else None
+    tasks = [
+        asyncio.create_task(supervisor.run(pool, fetch_all_symbols)),
+        asyncio.create_task(periodic_cleanup(pool, fetch_all_symbols, tape_retention_days=tape_retention)),
+        asyncio.create_task(periodic_gap_scan(pool, fetch_all_symbols)),
+        asyncio.create_task(gap_repair_worker(pool, table_name_from_symbol)),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        await asyncio.to_thread(supervisor.stop)
+        await pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded 1s OHLCV ingester")
+    parser.add_argument("--shards", type=int, default=config.database.ingest_shards, help="Number of worker processes")
+    parser.add_argument("--pool-size", type=int, default=config.database.ingest_shard_pool_size, help="DB connections per worker")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.shards, args.pool_size))
+    except KeyboardInterrupt:
+        log(f"\n👋 Arrêt demandé, fin du programme.", level="INFO")
@@ -0,0 +1,87 @@
+# ScriptDatabase/trade_decoder.py
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+DECODER_BACKENDS = ("msgspec", "orjson", "json")
+
+if msgspec is not None:
+    class _TradeData(msgspec.Struct):
+        # Prix et quantité arrivent en chaînes : strict=False les convertit en float au décodage
+        p: float
+        q: float
+        T: int
+        m: bool = False
+        t: int | None = None
+
+    class _TradeMessage(msgspec.Struct):
+        data: _TradeData | None = None
+
+def _extract(data) -> tuple | None:
+    if not data or "p" not in data or "q" not in data or "T" not in data:
+        return None
+    trade_id = data.get("t")
+    return (
+        float(data["p"]),
+        float(data["q"]),
+        int(data["T"]),
+        bool(data.get("m")),
+        int(trade_id) if trade_id is not None else None,
+    )
+
+class TradeDecoder:
+    """
+    Décodage des messages trade.<symbol> en (price, size, timestamp_ms, is_buyer_maker, trade_id),
+    ou None pour les autres messages (acquittements, erreurs) et les trames illisibles.
+
+    :param backend: "auto" (msgspec, sinon orjson, sinon json) ou un backend de DECODER_BACKENDS
+    """
+    def __init__(self, backend: str = "auto"):
+        if backend == "auto":
+            backend = "msgspec" if msgspec is not None else "orjson" if orjson is not None else "json"
+        if backend not in DECODER_BACKENDS:
+            raise ValueError(f"Décodeur inconnu : {backend} (attendu : auto, {', '.join(DECODER_BACKENDS)})")
+        if backend == "msgspec" and msgspec is None:
+            raise ImportError("msgspec n'est pas installé")
+        if backend == "orjson" and orjson is None:
+            raise ImportError("orjson n'est pas installé")
+
+        self.backend = backend
+        if backend == "msgspec":
+            # Seuls les champs déclarés dans les Struct sont décodés, le reste du message est sauté
+            self._decoder = msgspec.json.Decoder(_TradeMessage, strict=False)
+            self.decode = self._decode_msgspec
+        elif backend == "orjson":
+            self.decode = self._decode_orjson
+        else:
+            self.decode = self._decode_json
+
+    def _decode_msgspec(self, message) -> tuple | None:
+        try:
+            data = self._decoder.decode(message).data
+        except msgspec.DecodeError:
+            # Couvre aussi ValidationError : une trame tronquée ne doit pas couper le websocket
+            return None
+        if data is None:
+            return None
+        return data.p, data.q, data.T, data.m, data.t
+
+    def _decode_orjson(self, message) -> tuple | None:
+        try:
+            return _extract(orjson.loads(message).get("data"))
+        except ValueError:
+            return None
+
+    def _decode_json(self, message) -> tuple | None:
+        try:
+            return _extract(json.loads(message).get("data"))
+        except ValueError:
+            return None
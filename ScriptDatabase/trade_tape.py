@@ -0,0 +1,213 @@
+# ScriptDatabase/trade_tape.py
+import asyncio
+import time
+import numpy as np
+from datetime import datetime, timezone
+from utils.logger import log
+from ScriptDatabase.retention import (
+    has_timescaledb, is_hypertable, ensure_daily_partitions, setup_hypertable_policies,
+)
+
+TRADE_TAPE_TABLE = "trade_tape"
+TAPE_COLUMNS = ("symbol", "timestamp", "price", "size", "is_buyer_maker", "trade_id")
+
+# Trade brut lu depuis la table : timestamp epoch en ms + prix / taille float8
+TAPE_DTYPE = np.dtype([
+    ("ts_ms", np.int64),
+    ("price", np.float64),
+    ("size", np.float64),
+    ("is_buyer_maker", np.bool_),
+    ("trade_id", np.int64),
+])
+
+BAR_DTYPE = np.dtype([
+    ("ts_ms", np.int64),
+    ("end_ts_ms", np.int64),
+    ("open", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("close", np.float64),
+    ("volume", np.float64),
+    ("dollar_volume", np.float64),
+    ("buy_volume", np.float64),
+    ("vwap", np.float64),
+    ("trades", np.int64),
+])
+
+BAR_KINDS = ("time", "tick", "volume", "dollar")
+
+async def ensure_tape_table(conn, retention_days: int, compress_after_hours: int):
+    """
+    Crée la table du tape (une seule table pour tous les symboles). Hypertable compressée
+    par symbole avec TimescaleDB, partitionnée par jour sinon.
+    """
+    timescale = await has_timescaledb(conn)
+    partition_clause = "" if timescale else " PARTITION BY RANGE (timestamp)"
+    await conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TRADE_TAPE_TABLE} (
+            symbol TEXT NOT NULL,
+            timestamp TIMESTAMPTZ NOT NULL,
+            price DOUBLE PRECISION NOT NULL,
+            size DOUBLE PRECISION NOT NULL,
+            is_buyer_maker BOOLEAN NOT NULL,
+            trade_id BIGINT
+        ){partition_clause};
+    """)
+    if timescale:
+        try:
+            await conn.execute(f"SELECT create_hypertable('{TRADE_TAPE_TABLE}', 'timestamp', if_not_exists => TRUE);")
+        except Exception as e:
+            log(f"⚠️ Erreur création hypertable pour {TRADE_TAPE_TABLE}: {e}", level="ERROR")
+    else:
+        await ensure_daily_partitions(conn, TRADE_TAPE_TABLE, days_back=retention_days)
+
+    await conn.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRADE_TAPE_TABLE}_symbol_ts_idx ON {TRADE_TAPE_TABLE} (symbol, timestamp DESC);"
+    )
+    if await is_hypertable(conn, TRADE_TAPE_TABLE):
+        await setup_hypertable_policies(
+            conn, TRADE_TAPE_TABLE, retention_days, compress_after_hours, segment_by="symbol"
+        )
+
+class TradeTapeWriter:
+    """
+    Tampon des trades bruts reçus par le websocket, écrit en base par COPY
+    dès que batch_size trades sont en attente ou toutes les flush_interval secondes.
+    """
+    def __init__(self, pool, batch_size: int = 5000, flush_interval: float = 1.0, max_buffer: int = 200_000):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.buffer = []
+        self.written = 0
+        self.dropped = 0
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+
+    def add(self, symbol: str, timestamp_ms: int, price: float, size: float,
+            is_buyer_maker: bool, trade_id: int | None = None):
+        """Ajoute un trade au tampon (non bloquant, appelé depuis la boucle websocket)."""
+        if len(self.buffer) >= self.max_buffer:
+            # Base indisponible depuis trop longtemps : on abandonne le lot le plus ancien
+            del self.buffer[:self.batch_size]
+            self.dropped += self.batch_size
+            log(f"⚠️ Tampon du tape plein, {self.dropped} trades abandonnés au total", level="WARNING")
+        self.buffer.append((symbol, timestamp_ms, price, size, is_buyer_maker, trade_id))
+        if len(self.buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self.buffer:
+                return 0
+            batch, self.buffer = self.buffer, []
+            records = [
+                (sym, datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc), price, size, maker, trade_id)
+                for sym, ts_ms, price, size, maker, trade_id in batch
+            ]
+            try:
+                async with self.pool.acquire() as conn:
+                    await conn.copy_records_to_table(TRADE_TAPE_TABLE, records=records, columns=TAPE_COLUMNS)
+            except Exception as e:
+                log(f"❌ Erreur écriture du tape ({len(batch)} trades) : {e}", level="ERROR")
+                # Les trades non écrits repassent en tête du tampon pour le prochain essai
+                self.buffer = batch + self.buffer
+                return 0
+
+            self.written += len(records)
+            log(f"📼 Tape : {len(records)} trades écrits (total {self.written})", level="DEBUG")
+            return len(records)
+
+    async def run(self):
+        """Boucle de vidage périodique du tampon."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+async def fetch_tape(pool, symbol: str, start_ts: datetime, end_ts: datetime) -> np.ndarray:
+    """
+    Récupère les trades de symbol entre start_ts et end_ts sous forme de tableau NumPy structuré.
+    """
+    query = f"""
+    SELECT (EXTRACT(EPOCH FROM timestamp) * 1000)::bigint AS ts_ms,
+           price, size, is_buyer_maker, COALESCE(trade_id, 0) AS trade_id
+    FROM {TRADE_TAPE_TABLE}
+    WHERE symbol = $1 AND timestamp >= $2 AND timestamp <= $3
+    ORDER BY timestamp ASC, trade_id ASC
+    """
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(query, symbol, start_ts, end_ts)
+    return np.fromiter((tuple(r) for r in rows), dtype=TAPE_DTYPE, count=len(rows))
+
+def _bar_keys(tape: np.ndarray, kind: str, size: float) -> np.ndarray:
+    if kind == "time":
+        # size en secondes
+        return tape["ts_ms"] // int(size * 1000)
+    if kind == "tick":
+        return np.arange(len(tape)) // int(size)
+    if kind == "volume":
+        flow = tape["size"]
+    elif kind == "dollar":
+        flow = tape["price"] * tape["size"]
+    else:
+        raise ValueError(f"Type de barre inconnu : {kind} (attendu : {', '.join(BAR_KINDS)})")
+    # Une barre se ferme sur le trade qui fait dépasser le seuil : le trade est rangé
+    # selon le volume cumulé AVANT lui
+    cum_before = np.cumsum(flow) - flow
+    return np.floor(cum_before / size).astype(np.int64)
+
+def build_bars(tape: np.ndarray, kind: str = "time", size: float = 60) -> np.ndarray:
+    """
+    Construit des barres à partir du tape (trié par timestamp) :
+    - time : size secondes
+    - tick : size trades
+    - volume : size unités de base échangées
+    - dollar : size unités de quote échangées
+    Renvoie un tableau structuré BAR_DTYPE (OHLC, volumes, VWAP, nombre de trades).
+    """
+    if size <= 0:
+        raise ValueError("size doit être > 0")
+    if len(tape) == 0:
+        return np.empty(0, dtype=BAR_DTYPE)
+
+    keys = _bar_keys(tape, kind, size)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    ends = np.append(starts[1:], len(tape)) - 1
+
+    price = tape["price"]
+    qty = tape["size"]
+    notional = price * qty
+    taker_buy = np.where(tape["is_buyer_maker"], 0.0, qty)
+
+    bars = np.empty(len(starts), dtype=BAR_DTYPE)
+    if kind == "time":
+        bars["ts_ms"] = keys[starts] * int(size * 1000)
+    else:
+        bars["ts_ms"] = tape["ts_ms"][starts]
+    bars["end_ts_ms"] = tape["ts_ms"][ends]
+    bars["open"] = price[starts]
+    bars["high"] = np.maximum.reduceat(price, starts)
+    bars["low"] = np.minimum.reduceat(price, starts)
+    bars["close"] = price[ends]
+    bars["volume"] = np.add.reduceat(qty, starts)
+    bars["dollar_volume"] = np.add.reduceat(notional, starts)
+    bars["buy_volume"] = np.add.reduceat(taker_buy, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bars["vwap"] = np.where(bars["volume"] > 0, bars["dollar_volume"] / bars["volume"], bars["close"])
+    bars["trades"] = ends - starts + 1
+    return bars
+
+async def fetch_bars(pool, symbol: str, start_ts: datetime, end_ts: datetime,
+                     kind: str = "time", size: float = 60) -> np.ndarray:
+    """Raccourci : lit le tape de symbol puis construit les barres demandées."""
+    started = time.perf_counter()
+    tape = await fetch_tape(pool, symbol, start_ts, end_ts)
+    bars = build_bars(tape, kind, size)
+    log(f"📊 {len(bars)} barres {kind}/{size} construites depuis {len(tape)} trades {symbol} "
+        f"en {time.perf_counter() - started:.3f}s", level="DEBUG")
+    return bars
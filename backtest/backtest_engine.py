@@ -9,6 +9,7 @@ import traceback
 from utils.logger import log
 from utils.position_utils import PositionTracker
 from utils.i18n import t
+from ScriptDatabase.pgsql_ohlcv import ohlcv_select_query, records_to_arrays, arrays_to_dataframe
 from importlib import import_module
 from datetime import datetime, timedelta, timezone
 
@@ -56,31 +57,16 @@ async def fetch_ohlcv_from_db(pool, symbol):
 
     async with pool.acquire() as conn:
         try:
-            query = f"""
-                SELECT timestamp, open, high, low, close, volume
-                FROM {table_name}
-                WHERE interval_sec = 1
-                ORDER BY timestamp ASC
-            """
-            rows = await conn.fetch(query)
+            rows = await conn.fetch(ohlcv_select_query(table_name))
 
             if not rows:
                 log(f"[{symbol}] {t('backtest', 'no_ohlcv_data')}")
                 return pd.DataFrame()
 
-            df = pd.DataFrame([dict(row) for row in rows])
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-
-            if df['timestamp'].dt.tz is None:
-                df['timestamp'] = df['timestamp'].dt.tz_localize('Europe/Paris').dt.tz_convert('UTC')
-            else:
-                df['timestamp'] = df['timestamp'].dt.tz_convert('UTC')
-
+            # Lecture typée : float8 -> NumPy directement, sans conversion ligne par ligne
+            df = arrays_to_dataframe(records_to_arrays(rows))
             df.set_index('timestamp', inplace=True)
 
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-
             return df
 
         except Exception as e:
@@ -88,6 +74,57 @@ async def fetch_ohlcv_from_db(pool, symbol):
             traceback.print_exc()
             return pd.DataFrame()
 
+async def run_backtest_on_df(symbol: str, df: pd.DataFrame, strategy_name: str) -> dict:
+    """
+    Rejoue la stratégie bougie par bougie sur un DataFrame OHLCV indexé par timestamp
+    (sans base de données, utilisé aussi par les benchmarks). Renvoie les statistiques des positions.
+    """
+    tracker = PositionTracker(symbol)
+    stats = {"total": 0, "win": 0, "loss": 0, "pnl": []}
+
+    get_combined_signal = get_signal_function(strategy_name)
+
+    for current_time in df.index:
+        current_df = df.loc[:current_time]
+        if len(current_df) < 100:
+            continue
+
+        result = get_combined_signal(current_df, symbol)
+        if asyncio.iscoroutine(result):
+            result = await result
+        if isinstance(result, tuple):
+            signal, indicators = result
+        else:
+            signal = result
+            indicators = {}
+        
+        debug_msg = f"[DEBUG] {symbol} | {current_time} | Signal={signal} | Prix={current_df.iloc[-1]['close']}"
+        if indicators:
+            debug_msg += " | " + " | ".join(f"{k}={v:.2f}" for k, v in indicators.items())
+        log(debug_msg, level="DEBUG")
+
+        current_price = current_df.iloc[-1]["close"]
+
+        # Ouvre position si signal et aucune position
+        if signal in ("BUY", "SELL") and not tracker.is_open():
+            tracker.open(signal, current_price, current_time)
+
+        # Met à jour trailing stop si position ouverte
+        if tracker.is_open():
+            tracker.update_trailing_stop(current_price, current_time)
+
+            # Ferme si stop touché
+            if tracker.should_close(current_price):
+                pnl = tracker.close(current_price, current_time)
+                stats["total"] += 1
+                stats["pnl"].append(pnl)
+                if pnl >= 0:
+                    stats["win"] += 1
+                else:
+                    stats["loss"] += 1
+
+    return stats
+
 async def run_backtest_async(symbol: str, interval, dsn: str, strategy_name: str):
     try:
         pool = await asyncpg.create_pool(dsn=dsn)
@@ -121,47 +158,7 @@ async def run_backtest_async(symbol: str, interval, dsn: str, strategy_name: str
 
         log(f"[{symbol}] {t('backtest', 'start', len(df))}")
 
-        tracker = PositionTracker(symbol)
-        stats = {"total": 0, "win": 0, "loss": 0, "pnl": []}
-
-        get_combined_signal = get_signal_function(strategy_name)
-
-        for current_time in df.index:
-            current_df = df.loc[:current_time]
-            if len(current_df) < 100:
-                continue
-
-            result = get_combined_signal(current_df)
-            if isinstance(result, tuple):
-                signal, indicators = result
-            else:
-                signal = result
-                indicators = {}
-            
-            debug_msg = f"[DEBUG] {symbol} | {current_time} | Signal={signal} | Prix={current_df.iloc[-1]['close']}"
-            if indicators:
-                debug_msg += " | " + " | ".join(f"{k}={v:.2f}" for k, v in indicators.items())
-            log(debug_msg, level="DEBUG")
-
-            current_price = current_df.iloc[-1]["close"]
-
-            # Ouvre position si signal et aucune position
-            if signal in ("BUY", "SELL") and not tracker.is_open():
-                tracker.open(signal, current_price, current_time)
-
-            # Met à jour trailing stop si position ouverte
-            if tracker.is_open():
-                tracker.update_trailing_stop(current_price, current_time)
-
-                # Ferme si stop touché
-                if tracker.should_close(current_price):
-                    pnl = tracker.close(current_price, current_time)
-                    stats["total"] += 1
-                    stats["pnl"].append(pnl)
-                    if pnl >= 0:
-                        stats["win"] += 1
-                    else:
-                        stats["loss"] += 1
+        stats = await run_backtest_on_df(symbol, df, strategy_name)
 
         log(f"[{symbol}] {t('backtest', 'end')}")
         
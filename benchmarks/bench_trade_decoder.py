@@ -0,0 +1,65 @@
+# benchmarks/bench_trade_decoder.py
+"""
+Microbenchmark du décodage des messages trade websocket : messages/s sur un cœur,
+pour chaque décodeur disponible (msgspec, orjson, json) et pour l'ancien chemin json.loads + dict.
+
+Usage : python benchmarks/bench_trade_decoder.py [--count 200000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tabulate import tabulate
+from ScriptDatabase.trade_decoder import TradeDecoder, DECODER_BACKENDS
+from benchmarks.synthetic import make_trade_messages
+
+def legacy_decode(message):
+    """Chemin d'origine de subscribe_and_aggregate."""
+    data = json.loads(message).get("data")
+    if data and "p" in data and "q" in data and "T" in data:
+        return float(data["p"]), float(data["q"]), int(data["T"])
+    return None
+
+def bench(decode, messages, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for message in messages:
+            decode(message)
+        best = min(best, time.perf_counter() - started)
+    return len(messages) / best
+
+def main():
+    parser = argparse.ArgumentParser(description="Trade decoder microbenchmark")
+    parser.add_argument("--count", type=int, default=200_000, help="Messages per run")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per decoder (best kept)")
+    args = parser.parse_args()
+
+    messages = make_trade_messages(args.count)
+    raw = [m.encode() for m in messages]
+
+    decoders = [("legacy json.loads", legacy_decode, messages)]
+    for backend in DECODER_BACKENDS:
+        try:
+            decoder = TradeDecoder(backend)
+        except ImportError:
+            print(f"⏭️ {backend} non installé, ignoré")
+            continue
+        decoders.append((f"{backend} (str)", decoder.decode, messages))
+        decoders.append((f"{backend} (bytes)", decoder.decode, raw))
+
+    baseline = None
+    rows = []
+    for name, decode, payload in decoders:
+        rate = bench(decode, payload, args.repeat)
+        baseline = baseline or rate
+        rows.append([name, f"{rate:,.0f}", f"{rate / baseline:.2f}x"])
+
+    print(tabulate(rows, headers=["Decoder", "Messages/s (1 core)", "vs legacy"], tablefmt="grid"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+# benchmarks/run_benchmarks.py
+"""
+Suite de benchmarks hors ligne (données synthétiques, sans base ni API) :
+indicateurs, stratégies, backtest et chemin d'ingestion. Les résultats sont écrits
+en JSON pour comparaison avec une exécution précédente.
+
+Usage :
+    python benchmarks/run_benchmarks.py [--quick] [--only strategy.] [--output results.json]
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import traceback
+from importlib import import_module
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Les modules d'indicateurs importent ScriptDatabase.pgsql_ohlcv, qui exige PG_DSN à l'import ;
+# aucune connexion n'est ouverte par les benchmarks.
+os.environ.setdefault("PG_DSN", "postgresql://offline/benchmarks")
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from benchmarks.synthetic import make_ohlcv, make_trade_messages, prime_rsi_cache
+
+SYMBOL = "BENCH_USDC_PERP"
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Stratégies appelées par la boucle live (voir live_engine.import_strategy_signal)
+STRATEGY_MODULES = {
+    "Default": "signals.macd_rsi_breakout",
+    "Trix": "signals.trix_only_signal",
+    "Combo": "signals.macd_rsi_bo_trix",
+    "Range": "signals.range_signal",
+    "RangeSoft": "signals.range_soft_signal",
+    "ThreeOutOfFour": "signals.three_out_of_four_conditions",
+    "TwoOutOfFourScalp": "signals.two_out_of_four_scalp",
+    "DynamicThreeTwo": "signals.dynamic_three_two_selector",
+}
+BACKTEST_STRATEGIES = ("Trix", "Default")
+
+# Tailles : fenêtre live (600 bougies 1s), 6h de 1s pour compute_all, backtest, messages ingérés,
+# symboles classés par le scoring de l'auto-sélection (6h de bougies 1m chacun)
+SIZES = {
+    "full": {"live_rows": 600, "long_rows": 21_600, "backtest_rows": 2_000, "messages": 200_000, "scoring_symbols": 300,
+             "number": 50, "repeat": 5},
+    "quick": {"live_rows": 600, "long_rows": 3_600, "backtest_rows": 500, "messages": 20_000, "scoring_symbols": 100,
+              "number": 10, "repeat": 3},
+}
+
+async def measure(func, number: int, repeat: int) -> float:
+    """Meilleur temps moyen par appel (secondes) sur `repeat` séries de `number` appels ; attend les coroutines."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            result = func()
+            if asyncio.iscoroutine(result):
+                await result
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+def rate_result(seconds_per_op: float, unit: str, ops: int = 1) -> dict:
+    return {"value": ops / seconds_per_op, "unit": unit, "ms_per_call": seconds_per_op * 1000}
+
+# --- Benchmarks ---
+
+async def bench_indicators(sizes: dict) -> dict:
+    from indicators.combined_indicators import compute_all
+    from indicators.live_indicators import ensure_indicators
+
+    results = {}
+    for rows in (sizes["live_rows"], sizes["long_rows"]):
+        df = make_ohlcv(rows)
+        seconds = await measure(lambda: compute_all(df, symbol=SYMBOL), sizes["number"], sizes["repeat"])
+        results[f"compute_all[{rows}]"] = rate_result(seconds, "calls/s")
+
+    df = make_ohlcv(sizes["live_rows"])
+    # ensure_indicators complète le DataFrame en place : une copie par appel, comme un nouveau fetch
+    seconds = await measure(lambda: ensure_indicators(df.copy(), SYMBOL), sizes["number"], sizes["repeat"])
+    results[f"ensure_indicators[{sizes['live_rows']}]"] = rate_result(seconds, "calls/s")
+    return results
+
+async def bench_strategies(sizes: dict) -> dict:
+    from indicators.live_indicators import ensure_indicators
+
+    df = await ensure_indicators(make_ohlcv(sizes["live_rows"]), SYMBOL)
+    results = {}
+    for name, module_name in STRATEGY_MODULES.items():
+        key = f"strategy.{name}[{sizes['live_rows']}]"
+        try:
+            get_combined_signal = import_module(module_name).get_combined_signal
+            seconds = await measure(lambda: get_combined_signal(df, SYMBOL), sizes["number"], sizes["repeat"])
+            results[key] = rate_result(seconds, "calls/s")
+        except Exception as e:
+            results[key] = {"error": f"{type(e).__name__}: {e}"}
+    return results
+
+async def bench_backtest(sizes: dict) -> dict:
+    from backtest.backtest_engine import run_backtest_on_df
+
+    rows = sizes["backtest_rows"]
+    df = make_ohlcv(rows)
+    results = {}
+    for strategy in BACKTEST_STRATEGIES:
+        key = f"backtest.{strategy}[{rows}]"
+        try:
+            seconds = await measure(lambda: run_backtest_on_df(SYMBOL, df, strategy), 1, 1)
+            results[key] = rate_result(seconds, "candles/s", rows)
+        except Exception as e:
+            results[key] = {"error": f"{type(e).__name__}: {e}"}
+    return results
+
+class _CountingWriter:
+    """Remplace CandleBatchWriter : compte les bougies terminées sans base de données."""
+    def __init__(self):
+        self.candles = 0
+
+    def add(self, pool, table_name: str, record: tuple):
+        self.candles += 1
+
+async def bench_ingester(sizes: dict) -> dict:
+    from ScriptDatabase.pgsql_ohlcv import OHLCVAggregator, TRADE_DECODER
+
+    messages = make_trade_messages(sizes["messages"])
+    decode = TRADE_DECODER.decode
+
+    async def ingest():
+        aggregator = OHLCVAggregator("SOL_USDC_PERP", 1, writer=_CountingWriter())
+        for message in messages:
+            trade = decode(message)
+            if trade is not None:
+                await aggregator.process_trade(trade[0], trade[1], trade[2], None)
+
+    seconds = await measure(ingest, 1, sizes["repeat"])
+    return {f"ingester.{TRADE_DECODER.backend}": rate_result(seconds, "msgs/s", len(messages))}
+
+async def bench_scoring(sizes: dict) -> dict:
+    from utils.symbol_scoring import SymbolScorer, MINUTE_BAR_DTYPE
+
+    count = sizes["scoring_symbols"]
+    scorer = SymbolScorer()
+    minutes = int(scorer.settings.lookback_hours * 60)
+    now_ms = 1_700_000_000_000
+    for i in range(count):
+        df = make_ohlcv(minutes, seed=i, volatility=0.0005 * (1 + i % 7), freq_sec=60)
+        bars = np.zeros(minutes, dtype=MINUTE_BAR_DTYPE)
+        bars["ts_ms"] = now_ms - now_ms % 60_000 - np.arange(minutes)[::-1] * 60_000
+        for col in ("open", "high", "low", "close", "volume"):
+            bars[col] = df[col].to_numpy()
+        bars["active_sec"] = 30
+        scorer._bars[f"SYM{i}_USDC_PERP"] = bars
+    seconds = await measure(lambda: scorer.score(now_ms=now_ms), sizes["number"], sizes["repeat"])
+    return {f"scoring[{count}x{minutes}]": rate_result(seconds, "calls/s")}
+
+async def bench_rounding(sizes: dict) -> dict:
+    from utils.market_cache import MarketFilters
+    from utils.order_validator import adjust_to_step, is_order_valid_for_market
+
+    # Même arrondi et même validation : pas entiers pré-calculés (MarketFilters) contre Decimal par appel
+    filters = MarketFilters(SYMBOL, "0.001", None, "0.01")
+    number = sizes["number"] * 100
+    integer = await measure(lambda: (filters.round_quantity(12.34567), filters.is_valid(12.345, 101.23)),
+                            number, sizes["repeat"])
+    decimal = await measure(lambda: (adjust_to_step(12.34567, "0.001"),
+                                     is_order_valid_for_market(12.345, 101.23, "0.001", "0.01")),
+                            number, sizes["repeat"])
+    return {"rounding.market_filters": rate_result(integer, "calls/s"),
+            "rounding.decimal": rate_result(decimal, "calls/s")}
+
+BENCHMARKS = (
+    ("indicators", bench_indicators),
+    ("strategies", bench_strategies),
+    ("backtest", bench_backtest),
+    ("ingester", bench_ingester),
+    ("scoring", bench_scoring),
+    ("rounding", bench_rounding),
+)
+
+# --- Résultats ---
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(RESULTS_DIR)).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+def compare_results(current: dict, baseline: dict, threshold: float = 0.10) -> list:
+    """
+    Lignes [nom, base, actuel, ratio, statut] ; statut "regression" si le débit baisse
+    de plus de `threshold`, "faster" s'il augmente d'autant, "error" si l'un des deux a échoué.
+    """
+    rows = []
+    for name in sorted(set(current) & set(baseline)):
+        old, new = baseline[name], current[name]
+        if "value" not in old or "value" not in new:
+            rows.append([name, old.get("value"), new.get("value"), None, "error"])
+            continue
+        ratio = new["value"] / old["value"] if old["value"] else float("inf")
+        status = "regression" if ratio < 1 - threshold else "faster" if ratio > 1 + threshold else "="
+        rows.append([name, old["value"], new["value"], ratio, status])
+    return rows
+
+def print_results(results: dict):
+    rows = []
+    for name, r in results.items():
+        if "error" in r:
+            rows.append([name, "-", "-", f"❌ {r['error']}"])
+        else:
+            rows.append([name, f"{r['value']:,.1f} {r['unit']}", f"{r['ms_per_call']:.3f}", ""])
+    print(tabulate(rows, headers=["Benchmark", "Throughput", "ms/call", ""], tablefmt="grid"))
+
+def print_comparison(rows: list):
+    table = [[name, "-" if old is None else f"{old:,.1f}", "-" if new is None else f"{new:,.1f}",
+              "-" if ratio is None else f"{ratio:.2f}x", status] for name, old, new, ratio, status in rows]
+    print(tabulate(table, headers=["Benchmark", "Baseline", "Current", "Ratio", "Status"], tablefmt="grid",
+                   disable_numparse=True))
+
+async def run(sizes: dict, only: str | None = None) -> dict:
+    prime_rsi_cache([SYMBOL, "SOL_USDC_PERP"])
+    results = {}
+    for group, bench in BENCHMARKS:
+        if only and not any(o in group for o in only.split(",")):
+            continue
+        print(f"⏱️ {group}...")
+        try:
+            results.update(await bench(sizes))
+        except Exception as e:
+            traceback.print_exc()
+            results[group] = {"error": f"{type(e).__name__}: {e}"}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite (synthetic OHLCV)")
+    parser.add_argument("--quick", action="store_true", help="Smaller datasets, fewer runs")
+    parser.add_argument("--only", type=str, default=None, help="Comma-separated groups: indicators,strategies,backtest,ingester,scoring,rounding")
+    parser.add_argument("--output", type=str, default=None, help="JSON results file (default: benchmarks/results/<date>_<commit>.json)")
+    parser.add_argument("--compare", type=str, default=None, help="Baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative throughput drop reported as a regression")
+    args = parser.parse_args()
+
+    mode = "quick" if args.quick else "full"
+    sizes = SIZES[mode]
+    env = environment()
+    results = asyncio.run(run(sizes, args.only))
+    print_results(results)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}_{env['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"environment": env, "mode": mode, "sizes": sizes, "results": results}, f, indent=2)
+    print(f"💾 Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("mode") != mode:
+            print(f"⚠️ Baseline mode is {baseline.get('mode')}, current mode is {mode}: sizes differ")
+        rows = compare_results(results, baseline["results"], args.threshold)
+        print_comparison(rows)
+        if any(status == "regression" for *_, status in rows):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/synthetic.py
+"""
+Données synthétiques reproductibles (graine fixe) pour les benchmarks hors ligne :
+bougies OHLCV 1s et messages trade websocket au format Backpack.
+"""
+import json
+import random
+
+import numpy as np
+import pandas as pd
+
+def make_ohlcv(rows: int, seed: int = 42, start_price: float = 100.0, volatility: float = 0.0005,
+               regime: int = 900, start: str = "2024-01-01", freq_sec: int = 1) -> pd.DataFrame:
+    """
+    Marche aléatoire log-normale alternant tendances haussières, baissières et range
+    (un régime toutes les `regime` bougies), indexée par timestamp UTC comme fetch_ohlcv_1s.
+    """
+    rng = np.random.default_rng(seed)
+    drift = np.repeat(rng.choice([-1.0, 0.0, 0.0, 1.0], size=rows // regime + 1) * volatility * 0.2, regime)[:rows]
+    close = start_price * np.exp(np.cumsum(rng.normal(drift, volatility)))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    wick = np.abs(rng.normal(0.0, volatility, rows)) * close
+    index = pd.date_range(start, periods=rows, freq=f"{freq_sec}s", tz="UTC", name="timestamp")
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + wick,
+        "low": np.minimum(open_, close) - wick,
+        "close": close,
+        "volume": rng.gamma(2.0, 5.0, rows),
+    }, index=index)
+
+def make_trade_messages(count: int, seed: int = 42, symbol: str = "SOL_USDC_PERP") -> list[str]:
+    """Messages du stream trade.<symbol> (champs et types de l'API Backpack)."""
+    rng = random.Random(seed)
+    ts = 1_700_000_000_000
+    messages = []
+    for i in range(count):
+        ts += rng.randint(0, 50)
+        messages.append(json.dumps({
+            "stream": f"trade.{symbol}",
+            "data": {
+                "e": "trade",
+                "E": ts * 1000,
+                "s": symbol,
+                "p": f"{rng.uniform(90, 110):.2f}",
+                "q": f"{rng.uniform(0.01, 50):.3f}",
+                "b": str(rng.getrandbits(60)),
+                "a": str(rng.getrandbits(60)),
+                "t": i,
+                "T": ts,
+                "m": rng.random() < 0.5,
+            },
+        }, separators=(",", ":")))
+    return messages
+
+def prime_rsi_cache(symbols, value: float = 50.0, interval: str = "5m"):
+    """
+    Place un RSI fixe dans le cache de get_cached_rsi, sans expiration (horodatage infini),
+    pour que compute_all / ensure_indicators / stratégies n'appellent pas l'API.
+    """
+    from indicators.rsi_calculator import _rsi_cache
+    for symbol in symbols:
+        _rsi_cache[f"{symbol}_{interval}"] = (float("inf"), value)
@@ -11,6 +11,7 @@ class PerformanceConfig(BaseSettings):
     dashboard_refresh_interval: int = 2
     symbols_check_interval: int = 30
     max_concurrent_symbols: int = 10
+    latency_report_interval: int = 300  # résumé des latences de la boucle live, 0 = désactivé
 
 class TradingConfig(BaseSettings):
     """Trading configuration settings"""
@@ -21,6 +22,20 @@ class TradingConfig(BaseSettings):
     min_pnl_for_trailing: float = Field(0.3, description="Minimum PnL % before activating trailing stop")
     fixed_stop_loss_pct: float = Field(-2.0, description="fixed stop lost")
     min_duration_for_stop_loss: float = Field(0.0, description="duration boefore close")
+    max_slippage_pct: float = Field(0.5, description="Maximum estimated slippage from the order book for a market order")
+    order_book_max_age_sec: float = Field(5.0, description="Order book older than this is ignored (REST ticker fallback)")
+    exchange_stops: bool = Field(False, description="Keep stop-loss / trailing stop as exchange-side trigger orders")
+    exchange_take_profit_pct: float = Field(0.0, description="Exchange-side take-profit in % (0 = none)")
+    stop_amend_min_interval_sec: float = Field(2.0, description="Minimum delay between two amends of one exchange stop")
+    stop_amend_rate_per_sec: float = Field(2.0, description="Global rate limit of exchange stop amends")
+    stop_amend_min_move_pct: float = Field(0.05, description="Trailing moves smaller than this (% of price) are not sent")
+    trailing_state_file: str = Field("state/trailing_state.sqlite", description="SQLite store of the trailing-stop state")
+    trailing_state_flush_sec: float = Field(1.0, description="Interval of the batched trailing-state writes")
+    execution_mode: str = Field("market", description="Opening orders: market, or post_only (maker limit at the touch; "
+                                "an opening can hold the sequential live loop up to limit_timeout_sec)")
+    limit_poll_sec: float = Field(0.25, description="Post-only order: fill / book check interval")
+    limit_reprice_sec: float = Field(1.0, description="Post-only order: minimum rest time before following the touch")
+    limit_timeout_sec: float = Field(10.0, description="Post-only order: market fallback for the remainder after this delay")
 
 class DatabaseConfig(BaseSettings):
     """Database configuration settings"""
@@ -28,6 +43,27 @@ class DatabaseConfig(BaseSettings):
     pool_min_size: int = Field(5, description="Minimum pool connections")
     pool_max_size: int = Field(20, description="Maximum pool connections")
     max_age_seconds: int = Field(600, description="Max age for fresh data in seconds")
+    compress_after_hours: int = Field(12, description="Compress hypertable chunks older than N hours")
+    backfill_concurrency: int = Field(8, description="Number of symbols backfilled concurrently")
+    backfill_requests_per_second: float = Field(10.0, description="Global REST request rate for backfill")
+    backfill_burst: int = Field(20, description="Maximum burst of backfill REST requests")
+    backfill_checkpoint_file: str = Field("state/backfill_checkpoint.json", description="Per-symbol backfill checkpoint file")
+    listing_cache_file: str = Field("state/listing_dates.json", description="Cache of symbol listing dates")
+    gap_scan_interval_sec: int = Field(600, description="Interval of the SQL gap scan on 1s tables")
+    gap_min_sec: int = Field(120, description="Minimum hole in a 1s series recorded as a gap")
+    trade_tape_enabled: bool = Field(False, description="Store raw trades in the trade_tape table")
+    trade_tape_retention_days: int = Field(7, description="Trade tape retention in days")
+    trade_tape_batch_size: int = Field(5000, description="Trades buffered before a COPY to the tape")
+    trade_tape_flush_sec: float = Field(1.0, description="Maximum delay before the tape buffer is flushed")
+    ws_backoff_base_sec: float = Field(1.0, description="First websocket reconnect delay ceiling (jittered)")
+    ws_backoff_max_sec: float = Field(60.0, description="Maximum websocket reconnect delay")
+    ws_ping_interval_sec: float = Field(20.0, description="Websocket ping interval and pong timeout")
+    ws_stale_after_sec: int = Field(900, description="Reconnect when a trade stream stays silent this long (0 = off)")
+    ws_decoder: str = Field("auto", description="Trade message decoder: auto, msgspec, orjson or json")
+    ingest_shards: int = Field(4, description="Worker processes of the sharded ingester")
+    ingest_shard_pool_size: int = Field(4, description="Database connections per ingester shard")
+    metrics_host: str = Field("127.0.0.1", description="Bind address of the ingester /metrics endpoint")
+    metrics_port: int = Field(9108, description="Port of the ingester /metrics endpoint (0 = disabled)")
 
 class ThreeOutOfFourConfig(BaseSettings):
     stop_loss_pct: float = Field(1.0, description="Stop loss percent for ThreeOutOfFour")
@@ -37,6 +73,17 @@ class TwoOutOfFourScalpConfig(BaseSettings):
     stop_loss_pct: float = Field(0.5, description="Stop loss percent for TwoOutOfFourScalp")
     take_profit_pct: float = Field(1.0, description="Take profit percent for TwoOutOfFourScalp")
 
+class SymbolScoringConfig(BaseSettings):
+    """Auto-select scoring on local 1s history aggregated to 1m bars"""
+    lookback_hours: float = Field(6.0, description="Local history used to score symbols, in hours")
+    min_bars: int = Field(60, description="Minimum 1m bars of local history for a symbol to be scored")
+    min_quote_volume: float = Field(1_000_000.0, description="Minimum 24h quote volume (USDC) of a candidate")
+    cache_ttl_sec: int = Field(60, description="Reuse the last ranking for this many seconds")
+    weights: Dict[str, float] = Field(
+        {"realized_vol": 1.0, "atr_pct": 1.0, "spread_pct": -1.0, "trade_count": 0.5, "trend_strength": 0.5},
+        description="Weights of the cross-sectional percentile ranks (negative = penalty)"
+    )
+
 class StrategyConfig(BaseSettings):
     """Strategy configuration settings"""
     default_strategy: str = Field("Default", description="Default trading strategy")
@@ -55,13 +102,25 @@ class StrategyConfig(BaseSettings):
     )
     three_out_of_four: ThreeOutOfFourConfig = ThreeOutOfFourConfig()
     two_out_of_four_scalp: TwoOutOfFourScalpConfig = TwoOutOfFourScalpConfig()
+    scoring: SymbolScoringConfig = SymbolScoringConfig()
 
 class RiskConfig(BaseSettings):
     """Risk management configuration"""
     max_daily_loss_pct: float = Field(10.0, description="Maximum daily loss percentage")
+    flatten_on_daily_loss: bool = Field(False, description="Close every open position when the daily loss limit is hit")
+    daily_loss_capital_usdc: float = Field(0.0, description="Capital base of the daily loss limit (0 = account net equity)")
+    daily_loss_state_file: str = Field("state/risk_state.json", description="Persisted daily PnL / circuit breaker state")
     max_correlation: float = Field(0.7, description="Maximum correlation between positions")
+    correlation_window_minutes: int = Field(120, description="Rolling window of 1m returns for position correlation")
+    correlation_min_periods: int = Field(30, description="Minimum common 1m observations before a correlation is used")
     position_sizing_method: str = Field("fixed", description="Position sizing method: fixed, percentage, kelly")
     risk_per_trade_pct: float = Field(2.0, description="Risk per trade as percentage of capital")
+    atr_period_minutes: int = Field(14, description="ATR period on local 1m candles for position sizing")
+    atr_stop_multiplier: float = Field(2.0, description="Stop distance used by sizing, in ATRs")
+    kelly_win_rate: float = Field(0.5, description="Win rate used by kelly sizing")
+    kelly_payoff_ratio: float = Field(1.5, description="Average win / average loss used by kelly sizing")
+    kelly_multiplier: float = Field(0.5, description="Fraction of the full Kelly risk actually taken")
+    sizing_cache_ttl_sec: float = Field(30.0, description="Cache duration of account equity and ATR for sizing")
 
 class LoggingConfig(BaseSettings):
     """Logging configuration"""
@@ -71,6 +130,11 @@ class LoggingConfig(BaseSettings):
     log_backup_count: int = Field(5, description="Number of log backup files")
     timezone: str = Field("Europe/Paris", description="Logging timezone")
 
+class ExchangeConfig(BaseSettings):
+    """Exchange endpoints (point them to simulator/ for offline tests)"""
+    api_url: str = Field("https://api.backpack.exchange", description="REST API base URL")
+    ws_url: str = Field("wss://ws.backpack.exchange", description="Websocket URL")
+
 class SymbolsConfig(BaseSettings):
     include: Optional[List[str]] = None
     exclude: Optional[List[str]] = None
@@ -84,6 +148,7 @@ class Config(BaseSettings):
     logging: LoggingConfig = LoggingConfig()
     symbols: SymbolsConfig = SymbolsConfig()
     performance: PerformanceConfig = PerformanceConfig()
+    exchange: ExchangeConfig = ExchangeConfig()
     
     bpx_bot_public_key: Optional[str] = Field(None, env="bpx_bot_public_key")
     bpx_bot_secret_key: Optional[str] = Field(None, env="bpx_bot_secret_key")
@@ -129,13 +194,47 @@ def save_default_config(config_path: str = "config/settings.yaml"):
             'leverage': 1,
             'trailing_stop_trigger': 0.5,
             'max_positions': 5,
-            'min_pnl_for_trailing': 0.3
+            'min_pnl_for_trailing': 0.3,
+            'max_slippage_pct': 0.5,
+            'order_book_max_age_sec': 5.0,
+            'exchange_stops': False,
+            'exchange_take_profit_pct': 0.0,
+            'stop_amend_min_interval_sec': 2.0,
+            'stop_amend_rate_per_sec': 2.0,
+            'stop_amend_min_move_pct': 0.05,
+            'trailing_state_file': 'state/trailing_state.sqlite',
+            'trailing_state_flush_sec': 1.0,
+            'execution_mode': 'market',
+            'limit_poll_sec': 0.25,
+            'limit_reprice_sec': 1.0,
+            'limit_timeout_sec': 10.0
         },
         'database': {
             'retention_days': 90,
             'pool_min_size': 5,
             'pool_max_size': 20,
-            'max_age_seconds': 600
+            'max_age_seconds': 600,
+            'compress_after_hours': 12,
+            'backfill_concurrency': 8,
+            'backfill_requests_per_second': 10.0,
+            'backfill_burst': 20,
+            'backfill_checkpoint_file': 'state/backfill_checkpoint.json',
+            'listing_cache_file': 'state/listing_dates.json',
+            'gap_scan_interval_sec': 600,
+            'gap_min_sec': 120,
+            'trade_tape_enabled': False,
+            'trade_tape_retention_days': 7,
+            'trade_tape_batch_size': 5000,
+            'trade_tape_flush_sec': 1.0,
+            'ws_backoff_base_sec': 1.0,
+            'ws_backoff_max_sec': 60.0,
+            'ws_ping_interval_sec': 20.0,
+            'ws_stale_after_sec': 900,
+            'ws_decoder': 'auto',
+            'ingest_shards': 4,
+            'ingest_shard_pool_size': 4,
+            'metrics_host': '127.0.0.1',
+            'metrics_port': 9108
         },
         'strategy': {
             'default_strategy': 'Default',
@@ -150,13 +249,37 @@ def save_default_config(config_path: str = "config/settings.yaml"):
                 'short': 20,
                 'medium': 50,
                 'long': 200
+            },
+            'scoring': {
+                'lookback_hours': 6.0,
+                'min_bars': 60,
+                'min_quote_volume': 1000000.0,
+                'cache_ttl_sec': 60,
+                'weights': {
+                    'realized_vol': 1.0,
+                    'atr_pct': 1.0,
+                    'spread_pct': -1.0,
+                    'trade_count': 0.5,
+                    'trend_strength': 0.5
+                }
             }
         },
         'risk': {
             'max_daily_loss_pct': 10.0,
+            'flatten_on_daily_loss': False,
+            'daily_loss_capital_usdc': 0.0,
+            'daily_loss_state_file': 'state/risk_state.json',
             'max_correlation': 0.7,
+            'correlation_window_minutes': 120,
+            'correlation_min_periods': 30,
             'position_sizing_method': 'fixed',
-            'risk_per_trade_pct': 2.0
+            'risk_per_trade_pct': 2.0,
+            'atr_period_minutes': 14,
+            'atr_stop_multiplier': 2.0,
+            'kelly_win_rate': 0.5,
+            'kelly_payoff_ratio': 1.5,
+            'kelly_multiplier': 0.5,
+            'sizing_cache_ttl_sec': 30.0
         },
         'logging': {
             'log_level': 'INFO',
@@ -164,6 +287,10 @@ def save_default_config(config_path: str = "config/settings.yaml"):
             'max_log_file_size_mb': 50,
             'log_backup_count': 5,
             'timezone': 'Europe/Paris'
+        },
+        'exchange': {
+            'api_url': 'https://api.backpack.exchange',
+            'ws_url': 'wss://ws.backpack.exchange'
         }
     }
     
@@ -7,9 +7,9 @@ import os
 public_key = os.environ.get("bpx_bot_public_key")
 secret_key = os.environ.get("bpx_bot_secret_key")
 
-async def open_position_async(symbol: str, usdc_amount: float, direction: str, dry_run: bool = False):
-    # Appel direct de la coroutine
-    return await open_position_coroutine(symbol, usdc_amount, direction, dry_run)
+async def open_position_async(symbol: str, usdc_amount: float, direction: str, dry_run: bool = False, plan=None):
+    # Appel direct de la coroutine ; plan = taille précalculée (execute.position_sizing)
+    return await open_position_coroutine(symbol, usdc_amount, direction, dry_run, plan=plan)
 
 async def close_position_percent_async(symbol: str, percent: float):
     # close_position_percent semble synchrone → ok d'utiliser run_in_executor
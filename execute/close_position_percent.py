@@ -1,18 +1,19 @@
 #execute/close_position_percent.py
 import os
+import time
 from tabulate import tabulate
 import asyncio
 
 from bpx.account import Account, OrderTypeEnum
-from bpx.public import Public
+import utils.endpoints  # URL de base du SDK bpx-py (config exchange)
+
+from utils.logger import log
+from utils.market_cache import MARKETS
+from execute.order_client import ORDER_CLIENT
 
 public_key = os.environ.get("bpx_bot_public_key")
 secret_key = os.environ.get("bpx_bot_secret_key")
 
-def get_step_size_decimals(market_info):
-    step_size = market_info.get("filters", {}).get("quantity", {}).get("stepSize", "1")
-    return len(step_size.split(".")[1].rstrip("0")) if '.' in step_size else 0
-
 async def get_open_positions():
     account = Account(public_key=public_key, secret_key=secret_key, window=5000, debug=False)
     positions = await asyncio.to_thread(account.get_open_positions)
@@ -25,15 +26,12 @@ async def close_position_percent(symbol: str, percent: float):
         raise ValueError("Invalid percentage. Must be between 0 and 100.")
 
     account = Account(public_key=public_key, secret_key=secret_key, window=5000, debug=False)
-    public = Public()
 
-    markets = await asyncio.to_thread(public.get_markets)
-    market_info = next((m for m in markets if m.get("symbol") == symbol), None)
-    if not market_info:
+    # Filtres du marché en cache (pas de rechargement de /api/v1/markets à chaque fermeture)
+    filters = await MARKETS.get(symbol)
+    if filters is None:
         raise ValueError(f"Market info for symbol '{symbol}' not found")
 
-    step_size_decimals = get_step_size_decimals(market_info)
-
     positions = await get_open_positions()
 
     headers = ["Symbol", "Side", "Order type", "Quantity Executed/Ordered", "Amount Executed/Ordered", "Status"]
@@ -48,19 +46,19 @@ async def close_position_percent(symbol: str, percent: float):
             raise ValueError(f"No open position found for symbol '{symbol}'.")
 
         side = "Ask" if net_qty > 0 else "Bid"
-        qty_to_close = round(abs(net_qty) * (percent / 100), step_size_decimals)
+        qty_to_close = filters.format_quantity(filters.round_quantity(abs(net_qty) * (percent / 100)))
 
         response = await asyncio.to_thread(
             account.execute_order,
             symbol=symbol,
             side=side,
             order_type=OrderTypeEnum.MARKET,
-            quantity=f"{qty_to_close:.{step_size_decimals}f}",
+            quantity=qty_to_close,
             reduce_only=True
         )
 
         executed_quantity = response.get("executedQuantity", "N/A")
-        quantity_ordered = response.get("quantity", f"{qty_to_close:.{step_size_decimals}f}")
+        quantity_ordered = response.get("quantity", qty_to_close)
         executed_quote_qty = response.get("executedQuoteQuantity", "N/A")
         quote_quantity = response.get("quoteQuantity", "N/A")
         status = response.get("status", "N/A")
@@ -75,3 +73,65 @@ async def close_position_percent(symbol: str, percent: float):
         return response
 
     raise ValueError(f"No position found for symbol '{symbol}'.")
+
+async def _close_one(client, position: dict, percent: float) -> dict:
+    symbol = position.get("symbol")
+    side = "Ask" if position.get("side") == "long" else "Bid"
+    result = {"symbol": symbol, "side": side, "quantity": None, "status": "Skipped",
+              "executed_quantity": 0.0, "executed_quote": 0.0, "latency_ms": None, "error": None}
+    filters = await MARKETS.get(symbol)
+    if filters is None:
+        result["error"] = "market filters unavailable"
+        return result
+    quantity = filters.round_quantity(float(position.get("amount", 0)) * percent / 100)
+    if quantity <= 0:
+        result["error"] = "nothing to close"
+        return result
+    result["quantity"] = filters.format_quantity(quantity)
+
+    started = time.perf_counter()
+    try:
+        response = await client.execute_order(
+            symbol=symbol,
+            side=side,
+            order_type=OrderTypeEnum.MARKET,
+            quantity=result["quantity"],
+            reduce_only=True
+        )
+        result["status"] = response.get("status", "UNKNOWN")
+        result["executed_quantity"] = float(response.get("executedQuantity") or 0)
+        result["executed_quote"] = float(response.get("executedQuoteQuantity") or 0)
+    except Exception as e:
+        result["status"] = "Failed"
+        result["error"] = str(e)
+    result["latency_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+async def close_positions_batch(positions: list, percent: float = 100.0, client=None) -> list:
+    """
+    Ferme plusieurs positions en même temps : un ordre market reduce-only par position, tous envoyés
+    en parallèle, à partir d'un instantané déjà récupéré (get_real_positions : symbol, side, amount)
+    et des filtres de marché en cache, sans relire marchés ni positions pour chaque ordre.
+    Retourne un résultat par position : statut, quantité exécutée, latence de l'ordre et erreur.
+    """
+    if percent <= 0 or percent > 100:
+        raise ValueError("Invalid percentage. Must be between 0 and 100.")
+    positions = [p for p in positions if p and p.get("symbol")]
+    if not positions:
+        return []
+    client = client or ORDER_CLIENT
+    await MARKETS.get(positions[0]["symbol"])  # un seul rechargement des filtres si le cache est froid
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(_close_one(client, p, percent) for p in positions))
+    total_ms = (time.perf_counter() - started) * 1000
+
+    table = [[r["symbol"], r["side"], r["quantity"], f"{r['executed_quantity']} / {r['quantity']}", r["status"],
+              f"{r['latency_ms']:.0f}" if r["latency_ms"] is not None else "-", r["error"] or ""] for r in results]
+    print(tabulate(table, headers=["Symbol", "Side", "Quantity", "Executed/Ordered", "Status", "Latency ms", "Error"],
+                   tablefmt="grid"))
+    filled = sum(1 for r in results if r["status"] == "Filled")
+    latencies = [r["latency_ms"] for r in results if r["latency_ms"] is not None]
+    log(f"⚡ Batch close: {filled}/{len(results)} filled in {total_ms:.0f} ms "
+        f"(slowest order {max(latencies, default=0):.0f} ms)", level="WARNING" if filled < len(results) else "INFO")
+    return results
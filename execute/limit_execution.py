@@ -0,0 +1,291 @@
+#execute/limit_execution.py
+import asyncio
+import time
+from collections import deque
+
+import aiohttp
+from bpx.account import OrderTypeEnum
+
+from utils.logger import log
+from config.settings import get_config
+from live.order_book import ORDER_BOOKS
+from execute.order_client import ORDER_CLIENT, OrderRejected
+
+config = get_config()
+
+CANCEL_ATTEMPTS = 3
+# Erreurs de transport : la requête a pu être traitée par l'exchange sans que la réponse arrive
+TRANSPORT_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+class OrderStateUnknown(Exception):
+    """Ordre introuvable après une annulation perdue en route : exécuté ou annulé, impossible à dire."""
+    def __init__(self, order_id: str, cause: Exception):
+        super().__init__(f"order {order_id} is gone after a failed cancel ({cause}), fill unknown")
+        self.order_id = order_id
+
+def passive_price(book, side: str, filters) -> float | None:
+    """Prix maker au meilleur bid (achat) / ask (vente), aligné au tick sans jamais traverser le spread."""
+    price = book.best_bid if side == "Bid" else book.best_ask
+    if not price:
+        return None
+    return filters.round_price(price) if side == "Bid" else filters.ceil_price(price)
+
+class ExecutionReport:
+    """Résultat d'une exécution post-only : remplissage maker / taker, slippage réalisé, délai de remplissage."""
+    __slots__ = ("symbol", "side", "quantity", "arrival_price", "executed", "quote", "maker_quantity",
+                 "orders", "reprices", "fallback", "started", "time_to_fill_ms", "error")
+
+    def __init__(self, symbol: str, side: str, quantity: float, arrival_price: float):
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.arrival_price = arrival_price
+        self.executed = 0.0
+        self.quote = 0.0
+        self.maker_quantity = 0.0
+        self.orders = 0
+        self.reprices = 0
+        self.fallback = False
+        self.started = time.monotonic()
+        self.time_to_fill_ms = None
+        self.error = None
+
+    @property
+    def avg_price(self) -> float | None:
+        return self.quote / self.executed if self.executed else None
+
+    @property
+    def slippage_pct(self) -> float | None:
+        """Écart au mid d'arrivée, positif = coût (achat plus cher / vente moins chère)."""
+        if not self.executed or not self.arrival_price:
+            return None
+        sign = 1 if self.side == "Bid" else -1
+        return sign * (self.avg_price - self.arrival_price) / self.arrival_price * 100
+
+    def add_fill(self, quantity: float, quote: float, maker: bool):
+        self.executed += quantity
+        self.quote += quote
+        if maker:
+            self.maker_quantity += quantity
+
+    def __repr__(self) -> str:
+        slippage = self.slippage_pct
+        return (f"{self.symbol} {self.side} {self.executed:g}/{self.quantity:g} @ {self.avg_price} | "
+                f"slippage {'n/a' if slippage is None else f'{slippage:+.4f}%'} | maker {self.maker_quantity:g} | "
+                f"{self.orders} order(s), {self.reprices} reprice(s){', market fallback' if self.fallback else ''} | "
+                f"fill {self.time_to_fill_ms if self.time_to_fill_ms is None else f'{self.time_to_fill_ms:.0f} ms'}"
+                f"{f' | error: {self.error}' if self.error else ''}")
+
+class PostOnlyExecutor:
+    """
+    Ouverture par ordres limit post-only au meilleur bid / ask (frais maker, pas d'impact) :
+    le carnet local est relu toutes les limit_poll_sec et l'ordre suit le touch quand celui-ci s'éloigne
+    (après limit_reprice_sec de repos au minimum). Passé limit_timeout_sec, le reliquat part au marché.
+    Chaque exécution produit un ExecutionReport (slippage réalisé vs mid d'arrivée, délai de remplissage).
+    execute() dure jusqu'à limit_timeout_sec : appelée depuis la boucle live séquentielle, elle retarde
+    d'autant la gestion (trailing stops) des autres symboles.
+    """
+    def __init__(self, client=None, books=ORDER_BOOKS, settings=None, history: int = 200):
+        self.client = client or ORDER_CLIENT
+        self.books = books
+        self.settings = settings or config.trading
+        self.reports = deque(maxlen=history)
+
+    def _book(self, symbol: str):
+        return self.books.get(symbol, max_age=self.settings.order_book_max_age_sec)
+
+    async def _place(self, symbol: str, side: str, quantity: str, price: float, filters) -> str | None:
+        try:
+            order = await self.client.execute_order(
+                symbol=symbol,
+                side=side,
+                order_type=OrderTypeEnum.LIMIT,
+                quantity=quantity,
+                price=filters.format_price(price),
+                post_only=True
+            )
+        except OrderRejected as e:
+            # Le touch a bougé pendant l'envoi : l'ordre aurait pris la liquidité
+            log(f"[{symbol}] Post-only {side} at {price} rejected: {e}", level="DEBUG")
+            return None
+        return order["id"]
+
+    async def _cancel(self, symbol: str, order_id: str) -> dict | None:
+        """
+        Annule l'ordre et renvoie son état final, None s'il n'était plus ouvert (entièrement exécuté).
+        Sur une autre erreur (rate limit, 5xx, réseau), l'ordre est relu : s'il est encore ouvert,
+        l'annulation est retentée, puis l'erreur est relancée plutôt que de compter l'ordre comme exécuté.
+        Après une erreur réseau, un ordre disparu a pu être annulé par la requête perdue : OrderStateUnknown.
+        """
+        uncertain = False
+        for attempt in range(1, CANCEL_ATTEMPTS + 1):
+            try:
+                return await self.client.cancel_order(symbol, order_id=order_id)
+            except OrderRejected as e:
+                if e.status == 404 or e.code == "RESOURCE_NOT_FOUND":
+                    if uncertain:
+                        raise OrderStateUnknown(order_id, e)
+                    return None
+                error = e
+            except TRANSPORT_ERRORS as e:
+                uncertain, error = True, e
+            log(f"⚠️ [{symbol}] Cancel of {order_id} failed ({attempt}/{CANCEL_ATTEMPTS}): {error!r}", level="WARNING")
+            if attempt == CANCEL_ATTEMPTS:
+                raise error
+            try:
+                still_open = await self.client.get_open_order(symbol, order_id) is not None
+            except (OrderRejected, *TRANSPORT_ERRORS) as e:
+                log(f"[{symbol}] Status of order {order_id} unavailable: {e!r}", level="DEBUG")
+                still_open = True  # état inconnu : nouvelle tentative d'annulation
+            if not still_open:
+                if uncertain:
+                    raise OrderStateUnknown(order_id, error)
+                return None
+            await asyncio.sleep(self.settings.limit_poll_sec)
+
+    @staticmethod
+    def _add_cancelled(report: ExecutionReport, final: dict | None, order_qty: float, price: float):
+        """Remplissage d'un ordre annulé : état final renvoyé par l'exchange, ou ordre entier s'il n'était plus ouvert."""
+        if final is None:
+            report.add_fill(order_qty, order_qty * price, maker=True)
+        else:
+            report.add_fill(float(final.get("executedQuantity") or 0),
+                            float(final.get("executedQuoteQuantity") or 0), maker=True)
+
+    async def execute(self, symbol: str, side: str, quantity: float, filters) -> dict | None:
+        """
+        Exécute quantity (déjà arrondie au pas) côté side ("Bid" / "Ask").
+        Renvoie une réponse au format d'un ordre market (executedQuantity, executedQuoteQuantity, status),
+        ou None sans carnet exploitable (l'appelant passe alors au marché). Une erreur de l'exchange en cours
+        d'exécution ne fait pas perdre le remplissage partiel : la réponse porte la quantité exécutée connue,
+        l'erreur et, si l'annulation n'a pas abouti, l'ordre qui peut encore être au repos (openOrderId).
+        """
+        book = self._book(symbol)
+        if book is None or book.mid is None:
+            return None
+        settings = self.settings
+        report = ExecutionReport(symbol, side, quantity, book.mid)
+        deadline = report.started + settings.limit_timeout_sec
+        order_id, order_qty, price, placed_at = None, 0.0, None, 0.0
+
+        error = None
+        try:
+            while True:
+                remaining = filters.round_quantity(quantity - report.executed - order_qty)
+                if order_id is None and remaining < filters.min_qty:
+                    break
+                if time.monotonic() >= deadline:
+                    break
+                book = self._book(symbol)
+                target = passive_price(book, side, filters) if book is not None else None
+
+                if order_id is None:
+                    if target is not None:
+                        order_id = await self._place(symbol, side, filters.format_quantity(remaining), target, filters)
+                        if order_id is not None:
+                            order_qty, price, placed_at = remaining, target, time.monotonic()
+                            report.orders += 1
+                    await asyncio.sleep(settings.limit_poll_sec)
+                    continue
+
+                try:
+                    state = await self.client.get_open_order(symbol, order_id)
+                except Exception as e:
+                    # Erreur passagère (rate limit, réseau) : on relit au tour suivant, le délai reste borné
+                    log(f"⚠️ [{symbol}] Status of order {order_id} unavailable: {e}", level="WARNING")
+                    await asyncio.sleep(settings.limit_poll_sec)
+                    continue
+                if state is None:
+                    # Plus ouvert : exécuté en maker au prix limite
+                    report.add_fill(order_qty, order_qty * price, maker=True)
+                    order_id, order_qty = None, 0.0
+                    continue
+
+                if target is not None and target != price and time.monotonic() - placed_at >= settings.limit_reprice_sec:
+                    try:
+                        final = await self._cancel(symbol, order_id)
+                    except OrderStateUnknown:
+                        order_id, order_qty = None, 0.0  # plus dans le carnet
+                        raise
+                    self._add_cancelled(report, final, order_qty, price)
+                    if final is not None:
+                        report.reprices += 1
+                    order_id, order_qty = None, 0.0
+                    continue
+                await asyncio.sleep(settings.limit_poll_sec)
+        except Exception as e:
+            # Exchange injoignable ou annulation refusée : ce qui a été exécuté reste acquis
+            error = e
+        finally:
+            # Délai écoulé, exception ou annulation de la tâche : aucun ordre ne reste au repos dans le carnet
+            if order_id is not None:
+                try:
+                    self._add_cancelled(report, await self._cancel(symbol, order_id), order_qty, price)
+                    order_id = None
+                except OrderStateUnknown as e:
+                    error, order_id = error or e, None
+                except Exception as e:
+                    error = error or e
+                    log(f"❌ [{symbol}] Order {order_id} could not be cancelled, it may still rest in the book: {e!r}",
+                        level="ERROR")
+
+        remaining = filters.round_quantity(quantity - report.executed)
+        if error is not None:
+            # Remplissage incertain : pas de market sur un reliquat qui pourrait encore s'exécuter
+            report.error = str(error)
+            log(f"❌ [{symbol}] Post-only execution interrupted: {error!r}", level="ERROR")
+        elif remaining >= filters.min_qty:
+            report.fallback = True
+            try:
+                order = await self.client.execute_order(
+                    symbol=symbol,
+                    side=side,
+                    order_type=OrderTypeEnum.MARKET,
+                    quantity=filters.format_quantity(remaining),
+                    reduce_only=False
+                )
+                report.add_fill(float(order.get("executedQuantity") or 0),
+                                float(order.get("executedQuoteQuantity") or 0), maker=False)
+            except (OrderRejected, *TRANSPORT_ERRORS) as e:
+                report.error = str(e)
+                log(f"❌ [{symbol}] Market fallback failed: {e!r}", level="ERROR")
+
+        if report.executed > 0:
+            report.time_to_fill_ms = (time.monotonic() - report.started) * 1000
+        self.reports.append(report)
+        log(f"[{symbol}] 🎯 Post-only execution: {report}", level="INFO")
+
+        filled = report.executed >= quantity - filters.step_size / 2
+        return {
+            "symbol": symbol,
+            "side": side,
+            "status": "Filled" if filled else ("PartiallyFilled" if report.executed else "Cancelled"),
+            "executedQuantity": filters.format_quantity(report.executed),
+            "executedQuoteQuantity": f"{report.quote:.8f}",
+            "slippagePct": report.slippage_pct,
+            "timeToFillMs": report.time_to_fill_ms,
+            "error": report.error,
+            "openOrderId": order_id,
+        }
+
+    def summary(self) -> dict:
+        """Moyennes des exécutions récentes (slippage, délai de remplissage, part maker, recours au marché)."""
+        filled = [r for r in self.reports if r.executed > 0]
+        if not filled:
+            return {}
+        return {
+            "executions": len(filled),
+            "avg_slippage_pct": sum(r.slippage_pct for r in filled) / len(filled),
+            "avg_time_to_fill_ms": sum(r.time_to_fill_ms for r in filled) / len(filled),
+            "maker_ratio": sum(r.maker_quantity for r in filled) / sum(r.executed for r in filled),
+            "fallbacks": sum(1 for r in filled if r.fallback),
+        }
+
+    def log_summary(self):
+        stats = self.summary()
+        if stats:
+            log(f"🎯 Post-only executions: {stats['executions']} | avg slippage {stats['avg_slippage_pct']:+.4f}% | "
+                f"avg fill {stats['avg_time_to_fill_ms']:.0f} ms | maker {stats['maker_ratio']:.0%} | "
+                f"market fallbacks {stats['fallbacks']}", level="INFO")
+
+LIMIT_EXECUTOR = PostOnlyExecutor()
@@ -1,28 +1,33 @@
 #execute/open_position_usdc.py
-import math
 import os
 from tabulate import tabulate
 import asyncio
 
 from bpx.account import Account
 from bpx.public import Public
+import utils.endpoints  # URL de base du SDK bpx-py (config exchange)
 
 from utils.logger import log
-from utils.order_validator import is_order_valid_for_market, adjust_to_step
 from utils.i18n import t
+from config.settings import get_config
+from live.order_book import ORDER_BOOKS
+from utils.market_cache import MARKETS
+from execute.limit_execution import LIMIT_EXECUTOR
 
 public_key = os.environ.get("bpx_bot_public_key")
 secret_key = os.environ.get("bpx_bot_secret_key")
 
-def round_to_step(value: float, step: float) -> float:
-    return math.floor(value / step) * step
-
-def get_decimal_places(number_str):
-    if "." not in number_str:
-        return 0
-    return len(number_str.split(".")[1].rstrip("0"))
-
-async def open_position(symbol: str, usdc_amount: float, direction: str, dry_run: bool = False):
+trading_config = get_config().trading
+
+async def open_position(symbol: str, usdc_amount: float, direction: str, dry_run: bool = False, plan=None):
+    """
+    Ordre market d'ouverture. `plan` (execute.position_sizing.SizingPlan) fournit la quantité déjà
+    arrondie au pas et contrôlée : aucun appel REST n'est alors nécessaire avant l'envoi de l'ordre.
+    Avec trading.execution_mode = post_only, l'ordre est passé en limit maker au touch
+    (execute.limit_execution), le marché ne servant qu'au reliquat après limit_timeout_sec.
+    """
+    if plan is not None:
+        usdc_amount = plan.usdc_amount
     if direction.lower() not in ["long", "short"]:
         log(t("order.invalid_direction"))
         return
@@ -37,33 +42,43 @@ async def open_position(symbol: str, usdc_amount: float, direction: str, dry_run
     headers = ["Symbol", "Order type", "Quantity Executed/Ordered", "Amount Executed/Ordered", "Status"]
     table = []
 
-    markets = await asyncio.to_thread(public.get_markets)
-    if not isinstance(markets, list):
-        log(t("order.market_list_failed"))
-        return
-
-    market_info = next((m for m in markets if m.get("symbol") == symbol), None)
-    if not market_info:
+    # Filtres du marché en cache (un rechargement de /api/v1/markets par heure au lieu d'un par ordre)
+    filters = plan.filters if plan is not None and plan.filters is not None else await MARKETS.get(symbol)
+    if filters is None:
         log(t("order.symbol_not_found", symbol))
         return
 
-    ticker = await asyncio.to_thread(public.get_ticker, symbol)
-    mark_price = float(ticker.get("lastPrice", 0))
+    # Carnet L2 local si synchronisé : prix du côté consommé + contrôle du slippage, sans appel REST
+    book = ORDER_BOOKS.get(symbol, max_age=trading_config.order_book_max_age_sec)
+    if book is not None:
+        book_side = "buy" if direction.lower() == "long" else "sell"
+        mark_price = book.best_ask if book_side == "buy" else book.best_bid
+        slippage = book.slippage_pct(book_side, usdc_amount)
+        log(f"[{symbol}] 📚 Book: bid {book.best_bid} / ask {book.best_ask} | spread {book.spread_pct:.4f}% | "
+            f"estimated slippage {slippage if slippage is None else f'{slippage:.4f}%'}", level="DEBUG")
+        if slippage is None or slippage > trading_config.max_slippage_pct:
+            log(f"[WARNING] [{symbol}] ❌ Order skipped — insufficient liquidity for {usdc_amount:.2f} USDC "
+                f"(slippage {slippage}, max {trading_config.max_slippage_pct}%)", level="WARNING")
+            return None
+    elif plan is not None and plan.price:
+        mark_price = plan.price
+    else:
+        ticker = await asyncio.to_thread(public.get_ticker, symbol)
+        mark_price = float(ticker.get("lastPrice", 0))
     if mark_price == 0:
         log(t("order.invalid_price"))
         return
 
-    quantity_filter = market_info.get("filters", {}).get("quantity", {})
-    step_size = float(quantity_filter.get("stepSize", "1"))
-    min_qty = float(quantity_filter.get("minQty", "0.000001"))
-    tick_size = float(market_info.get("filters", {}).get("price", {}).get("tickSize", "0.01"))
+    step_size = filters.step_size
+    min_qty = filters.min_qty
 
-    raw_quantity = usdc_amount / mark_price
-    quantity = round_to_step(raw_quantity, step_size) if step_size < 1 else int(raw_quantity // step_size * step_size)
+    if plan is not None and plan.valid:
+        quantity = plan.quantity
+    else:
+        quantity = filters.round_quantity(usdc_amount / mark_price)
 
-    quantity_decimals = get_decimal_places(quantity_filter.get("stepSize", "1"))
-    tick_decimals = get_decimal_places(market_info.get("filters", {}).get("tickSize", "0.01"))
-    quantity_str = f"{quantity:.{quantity_decimals}f}" if step_size < 1 else str(int(quantity))
+    tick_decimals = filters.price_decimals
+    quantity_str = filters.format_quantity(quantity)
 
     log(t("order.market_info", symbol), level="DEBUG")
     log(f"   - markPrice: {mark_price:.{tick_decimals}f}", level="DEBUG")
@@ -76,11 +91,11 @@ async def open_position(symbol: str, usdc_amount: float, direction: str, dry_run
         log(t("order.increase_amount"), level="DEBUG")
         return
 
-    valid_qty, valid_price = is_order_valid_for_market(quantity, mark_price, step_size, tick_size)
+    valid_qty, valid_price = filters.is_valid(quantity, mark_price)
     if not valid_qty:
-        quantity = adjust_to_step(quantity, step_size)
+        quantity = filters.round_quantity(quantity)
     if not valid_price:
-        mark_price = adjust_to_step(mark_price, tick_size)
+        mark_price = filters.round_price(mark_price)
 
     side = "Bid" if direction.lower() == "long" else "Ask"
     order_type = "Market"
@@ -89,20 +104,26 @@ async def open_position(symbol: str, usdc_amount: float, direction: str, dry_run
         log(t("order.dry_run", order_type, side, symbol, usdc_amount, quantity_str))
         return
 
-    # Exécution de l'ordre
-    response = await asyncio.to_thread(
-        account.execute_order,
-        symbol=symbol,
-        side=side,
-        order_type=order_type,
-        quantity=quantity,
-        reduce_only=False
-    )
+    # Exécution de l'ordre : limit post-only si le carnet local le permet, sinon market
+    response = None
+    if trading_config.execution_mode == "post_only":
+        response = await LIMIT_EXECUTOR.execute(symbol, side, quantity, filters)
+        if response is not None:
+            order_type = "PostOnly"
+    if response is None:
+        response = await asyncio.to_thread(
+            account.execute_order,
+            symbol=symbol,
+            side=side,
+            order_type=order_type,
+            quantity=quantity,
+            reduce_only=False
+        )
 
     executed_quantity = float(response.get("executedQuantity", 0))
     executed_quote_quantity = float(response.get("executedQuoteQuantity", 0))
     status = response.get("status", "UNKNOWN")
-    table.append([symbol, side, f"{executed_quantity:.6f} / {quantity_str}",
+    table.append([symbol, f"{side} {order_type}", f"{executed_quantity:.6f} / {quantity_str}",
                   f"{executed_quote_quantity:.2f} / {usdc_amount:.2f}", status])
     print(tabulate(table, headers=headers, tablefmt="grid"))
 
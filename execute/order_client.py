@@ -0,0 +1,82 @@
+#execute/order_client.py
+import os
+import time
+
+from bpx.base.base_account import BaseAccount
+import utils.endpoints  # URL de base du SDK bpx-py (config exchange)
+
+from utils.http_client import get_session
+from config.settings import get_config
+
+config = get_config()
+
+class OrderRejected(Exception):
+    """Order refused by the exchange (HTTP error status, or a payload without an order id)."""
+    def __init__(self, code: str, message: str, status: int | None = None):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+        self.message = message
+        self.status = status
+
+class AsyncOrderClient:
+    """
+    Order requests signed by the bpx-py SDK (BaseAccount builds url, headers and body) but sent on
+    the shared aiohttp session: kept-alive connections and truly concurrent orders, instead of one
+    blocking `requests` call (new TCP/TLS connection) per order in a worker thread.
+    """
+    def __init__(self, public_key: str | None = None, secret_key: str | None = None, window: int = 5000,
+                 api_url: str | None = None):
+        self.public_key = public_key or config.bpx_bot_public_key or os.environ.get("bpx_bot_public_key")
+        self.secret_key = secret_key or config.bpx_bot_secret_key or os.environ.get("bpx_bot_secret_key")
+        self.window = window
+        self.api_url = api_url
+        self.last_latency_ms = 0.0
+        self._signer = None
+
+    @property
+    def signer(self) -> BaseAccount:
+        if self._signer is None:
+            self._signer = BaseAccount(self.public_key, self.secret_key, self.window, False)
+            if self.api_url:
+                self._signer.BPX_API_URL = f"{self.api_url.rstrip('/')}/"
+        return self._signer
+
+    async def _send(self, method: str, request_config):
+        started = time.perf_counter()
+        async with get_session().request(method, request_config.url, headers=request_config.headers,
+                                         params=request_config.params or None, json=request_config.data) as resp:
+            try:
+                payload = await resp.json(content_type=None)
+            except ValueError:
+                payload = await resp.text()
+        self.last_latency_ms = (time.perf_counter() - started) * 1000
+        if resp.status >= 400:
+            if isinstance(payload, dict):
+                raise OrderRejected(payload.get("code", str(resp.status)), payload.get("message", ""), resp.status)
+            raise OrderRejected(str(resp.status), str(payload), resp.status)
+        return payload
+
+    async def execute_order(self, **order) -> dict:
+        """Same keyword arguments as bpx Account.execute_order (symbol, side, order_type, quantity, ...)."""
+        response = await self._send("POST", self.signer.execute_order(**order))
+        if not isinstance(response, dict) or "id" not in response:
+            raise OrderRejected("INVALID_RESPONSE", str(response))
+        return response
+
+    async def cancel_order(self, symbol: str, order_id: str | None = None, client_id: int | None = None) -> dict:
+        return await self._send("DELETE", self.signer.cancel_order(symbol, order_id=order_id, client_id=client_id))
+
+    async def get_open_order(self, symbol: str, order_id: str) -> dict | None:
+        """Ordre encore ouvert, None s'il ne l'est plus (exécuté ou annulé)."""
+        try:
+            return await self._send("GET", self.signer.get_open_order(symbol, order_id=order_id))
+        except OrderRejected as e:
+            if e.status == 404 or e.code == "RESOURCE_NOT_FOUND":
+                return None
+            raise
+
+    async def get_open_orders(self, symbol: str | None = None) -> list:
+        orders = await self._send("GET", self.signer.get_open_orders(symbol=symbol))
+        return orders if isinstance(orders, list) else []
+
+ORDER_CLIENT = AsyncOrderClient()
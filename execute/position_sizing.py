@@ -0,0 +1,147 @@
+#execute/position_sizing.py
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.logger import log
+from config.settings import get_config
+from utils.public import format_table_name
+from utils.market_cache import MARKETS
+from utils.position_utils import get_net_equity
+from utils.symbol_scoring import MINUTE_MS, MINUTE_BAR_DTYPE, minute_bars_query
+
+config = get_config()
+
+def atr_pct(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> float | None:
+    """ATR des `period` dernières bougies (moyenne simple du true range) rapporté au dernier prix, en %."""
+    if len(close) < 2:
+        return None
+    previous = close[:-1]
+    true_range = np.maximum(high[1:] - low[1:], np.maximum(np.abs(high[1:] - previous), np.abs(low[1:] - previous)))
+    atr = float(true_range[-period:].mean())
+    return atr / float(close[-1]) * 100 if close[-1] > 0 else None
+
+def kelly_fraction(win_rate: float, payoff_ratio: float) -> float:
+    """Fraction de Kelly f* = W - (1 - W) / R, nulle si l'avantage est négatif."""
+    if payoff_ratio <= 0:
+        return 0.0
+    return max(0.0, win_rate - (1 - win_rate) / payoff_ratio)
+
+class SizingPlan:
+    """Taille d'ordre précalculée pour un symbole : montant, quantité arrondie au pas et contrôle du minimum."""
+    __slots__ = ("symbol", "method", "price", "usdc_amount", "quantity", "quantity_str", "filters",
+                 "stop_pct", "valid", "reason", "created_at")
+
+    def __init__(self, symbol, method, price, usdc_amount, quantity, filters, stop_pct, reason=None):
+        self.symbol = symbol
+        self.method = method
+        self.price = price
+        self.usdc_amount = usdc_amount
+        self.quantity = quantity
+        self.filters = filters
+        self.quantity_str = filters.format_quantity(quantity) if filters else str(quantity)
+        self.stop_pct = stop_pct
+        self.valid = reason is None
+        self.reason = reason
+        self.created_at = time.monotonic()
+
+    def __repr__(self) -> str:
+        return (f"SizingPlan({self.symbol}, {self.method}, {self.usdc_amount:.2f} USDC, qty {self.quantity_str}"
+                f"{'' if self.valid else f', invalid: {self.reason}'})")
+
+class PositionSizer:
+    """
+    Taille des nouvelles positions selon risk.position_sizing_method :
+    - fixed : trading.position_amount_usdc ;
+    - percentage : risque de risk_per_trade_pct du capital sur un stop à atr_stop_multiplier × ATR ;
+    - kelly : même calcul avec le risque donné par la fraction de Kelly (kelly_win_rate, kelly_payoff_ratio)
+      réduite par kelly_multiplier.
+    Le notionnel est plafonné à capital × levier / max_positions. Capital, ATR et filtres de marché sont
+    gardés en cache : prepare() tourne à chaque cycle live et l'ordre réutilise le plan sans appel REST.
+    """
+    def __init__(self, settings=None, trading=None, markets=MARKETS):
+        self.settings = settings or config.risk
+        self.trading = trading or config.trading
+        self.markets = markets
+        self.plans = {}  # symbol -> SizingPlan
+        self._equity = None
+        self._equity_at = 0.0
+        self._atr = {}  # symbol -> (monotonic, atr %)
+
+    # --- Entrées en cache ---
+
+    async def equity(self) -> float:
+        """Capital du compte (netEquity) mis en cache sizing_cache_ttl_sec ; repli sur taille × max_positions."""
+        if self._equity is None or time.monotonic() - self._equity_at >= self.settings.sizing_cache_ttl_sec:
+            equity = await get_net_equity()
+            if equity and equity > 0:
+                self._equity = equity
+            elif self._equity is None:
+                self._equity = self.trading.position_amount_usdc * self.trading.max_positions
+            self._equity_at = time.monotonic()
+        return self._equity
+
+    async def atr(self, symbol: str, pool) -> float | None:
+        """ATR % sur les bougies 1m locales (agrégées depuis les bougies 1s), mis en cache sizing_cache_ttl_sec."""
+        cached = self._atr.get(symbol)
+        if cached and time.monotonic() - cached[0] < self.settings.sizing_cache_ttl_sec:
+            return cached[1]
+        period = self.settings.atr_period_minutes
+        now_ms = int(time.time() * 1000)
+        since = datetime.fromtimestamp((now_ms - now_ms % MINUTE_MS - (period + 1) * MINUTE_MS) / 1000, tz=timezone.utc)
+        value = None
+        if pool is not None:
+            try:
+                async with pool.acquire() as conn:
+                    rows = await conn.fetch(minute_bars_query(format_table_name(symbol)), since)
+                bars = np.fromiter((tuple(r) for r in rows), dtype=MINUTE_BAR_DTYPE, count=len(rows))
+                value = atr_pct(bars["high"], bars["low"], bars["close"], period)
+            except Exception as e:
+                log(f"⚠️ [{symbol}] ATR unavailable for sizing: {e}", level="WARNING")
+        self._atr[symbol] = (time.monotonic(), value)
+        return value
+
+    # --- Calcul ---
+
+    def usdc_amount(self, equity: float, atr: float | None) -> tuple[float, float]:
+        """(notionnel USDC, distance du stop en %) selon la méthode configurée."""
+        method = self.settings.position_sizing_method.lower()
+        stop_pct = self.settings.atr_stop_multiplier * atr if atr else abs(self.trading.fixed_stop_loss_pct)
+        if method == "percentage":
+            risk_pct = self.settings.risk_per_trade_pct
+        elif method == "kelly":
+            risk_pct = kelly_fraction(self.settings.kelly_win_rate, self.settings.kelly_payoff_ratio) \
+                * self.settings.kelly_multiplier * 100
+        else:
+            return self.trading.position_amount_usdc, stop_pct
+        amount = equity * risk_pct / 100 / (stop_pct / 100) if stop_pct > 0 else 0.0
+        cap = equity * self.trading.leverage / max(1, self.trading.max_positions)
+        return min(amount, cap), stop_pct
+
+    def build_plan(self, symbol: str, price: float, equity: float, atr: float | None, filters) -> SizingPlan:
+        method = self.settings.position_sizing_method.lower()
+        usdc_amount, stop_pct = self.usdc_amount(equity, atr)
+        if filters is None:
+            return SizingPlan(symbol, method, price, usdc_amount, 0.0, None, stop_pct, "unknown market filters")
+        if not price or price <= 0:
+            return SizingPlan(symbol, method, price, usdc_amount, 0.0, filters, stop_pct, "no price")
+        quantity = filters.round_quantity(usdc_amount / price)
+        reason = None if quantity >= filters.min_qty else f"quantity below minimum {filters.min_qty}"
+        return SizingPlan(symbol, method, price, usdc_amount, quantity, filters, stop_pct, reason)
+
+    async def prepare(self, symbol: str, price: float, pool=None) -> SizingPlan:
+        """Recalcule le plan d'un symbole au dernier prix (valeurs en cache, aucun appel REST hors expiration)."""
+        if self.settings.position_sizing_method.lower() == "fixed":
+            equity, atr = 0.0, None
+        else:
+            equity, atr = await self.equity(), await self.atr(symbol, pool)
+        plan = self.build_plan(symbol, price, equity, atr, await self.markets.get(symbol))
+        self.plans[symbol] = plan
+        return plan
+
+    def drop(self, symbol: str):
+        self.plans.pop(symbol, None)
+        self._atr.pop(symbol, None)
+
+POSITION_SIZER = PositionSizer()
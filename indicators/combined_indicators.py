@@ -5,6 +5,7 @@ from datetime import datetime, timezone, timedelta
 from utils.logger import log
 from ScriptDatabase.pgsql_ohlcv import fetch_ohlcv_1s
 from bpx.public import Public
+import utils.endpoints  # URL de base du SDK bpx-py (config exchange)
 from indicators.rsi_calculator import get_cached_rsi
 
 public = Public()
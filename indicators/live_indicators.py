@@ -0,0 +1,46 @@
+# indicators/live_indicators.py
+from utils.logger import log
+from utils.i18n import t
+from indicators.rsi_calculator import get_cached_rsi
+
+async def ensure_indicators(df, symbol):
+    required_cols = ["EMA20", "EMA50", "EMA200", "RSI", "MACD"]
+    for period, col in [(20,"EMA20"),(50,"EMA50"),(200,"EMA200")]:
+        if col not in df.columns:
+            df[col] = df['close'].ewm(span=period, adjust=False).mean()
+
+    try:
+        rsi_value = await get_cached_rsi(symbol, interval="5m")
+        df['RSI'] = rsi_value
+        log(t("live_engine.indicators.rsi_retrieved", symbol=symbol, rsi=rsi_value), level="DEBUG")
+    except Exception as e:
+        log(t("live_engine.indicators.rsi_error_fallback", symbol=symbol, error=e), level="WARNING")
+        try:
+            from indicators.rsi_calculator import calculate_rsi
+            rsi_value = calculate_rsi(df['close'], period=14)
+            df['RSI'] = rsi_value
+            log(t("live_engine.indicators.rsi_calculated", symbol=symbol, rsi=rsi_value.iloc[-1]), level="DEBUG")
+        except Exception as e2:
+            df['RSI'] = 50
+            log(t("live_engine.indicators.rsi_failed", symbol=symbol, error=e2), level="ERROR")
+
+    if 'MACD' not in df.columns or 'MACD_signal' not in df.columns:
+        short_window, long_window, signal_window = 12,26,9
+        ema_short = df['close'].ewm(span=short_window, adjust=False).mean()
+        ema_long = df['close'].ewm(span=long_window, adjust=False).mean()
+        df['MACD'] = ema_short - ema_long
+        df['MACD_signal'] = df['MACD'].ewm(span=signal_window, adjust=False).mean()
+        df['MACD_hist'] = df['MACD'] - df['MACD_signal']
+        log(t("live_engine.indicators.macd_calculated", symbol=symbol), level="DEBUG")
+
+    missing = [c for c in required_cols if c not in df.columns]
+    if missing:
+        log(t("live_engine.indicators.missing", symbol=symbol, missing=missing), level="WARNING")
+        return None
+
+    for col in required_cols:
+        if col != 'RSI' and df[col].isna().any():
+            log(t("live_engine.indicators.nan_detected", symbol=symbol, column=col), level="WARNING")
+            return None
+
+    return df
@@ -5,6 +5,7 @@ import asyncio
 from datetime import datetime, timezone
 from utils.logger import log
 from bpx.public import Public
+import utils.endpoints  # URL de base du SDK bpx-py (config exchange)
 
 public = Public()
 
@@ -160,4 +161,9 @@ async def get_cached_rsi(symbol: str, interval: str = "5m") -> float:
     rsi = await get_current_rsi(symbol, interval)
     _rsi_cache[cache_key] = (current_time, rsi)
     
-    return rsi
\ No newline at end of file
+    return rsi
+
+def drop_cached_rsi(symbol: str):
+    """Retire du cache les RSI d'un symbole (toutes périodes), par exemple quand il quitte l'univers."""
+    for cache_key in [k for k in _rsi_cache if k.rsplit("_", 1)[0] == symbol]:
+        del _rsi_cache[cache_key]
\ No newline at end of file
@@ -0,0 +1,178 @@
+#live/correlation.py
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.logger import log
+from config.settings import get_config
+from utils.public import format_table_name
+from utils.symbol_scoring import MINUTE_MS, MINUTE_BAR_DTYPE, minute_bars_query, build_matrices, forward_fill
+
+config = get_config()
+
+class CorrelationMatrix:
+    """
+    Corrélation glissante des rendements log 1m entre les symboles actifs.
+
+    Les rendements des `window` dernières minutes sont gardés dans un tampon circulaire (window × N)
+    avec leurs sommes, le produit croisé RᵀR et le nombre d'observations communes par paire :
+    chaque minute close coûte O(N²) (ajout / retrait d'un produit extérieur) au lieu d'un
+    DataFrame.corr complet. Une minute sans prix compte comme un rendement nul (prix inchangé)
+    mais pas comme une observation. L'historique est rechargé depuis les bougies 1s locales
+    quand la liste des symboles change.
+    """
+    def __init__(self, window: int | None = None, min_periods: int | None = None):
+        self.window = window or config.risk.correlation_window_minutes
+        self.min_periods = min_periods or config.risk.correlation_min_periods
+        self.symbols = []
+        self.index = {}
+        self._reset(0)
+
+    def _reset(self, n: int):
+        self._returns = np.zeros((self.window, n))
+        self._valid = np.zeros((self.window, n))
+        self._sum = np.zeros(n)
+        self._cross = np.zeros((n, n))
+        self._pairs = np.zeros((n, n))
+        self._pos = 0
+        self._count = 0
+        self._since_rebuild = 0
+        self._minute = None
+        self._last_close = np.full(n, np.nan)
+        self._prev_close = np.full(n, np.nan)
+
+    # --- Mise à jour ---
+
+    def load_closes(self, symbols: list, closes: np.ndarray, last_minute_ms: int | None = None):
+        """Initialise le tampon à partir de clôtures 1m alignées (symboles × minutes, NaN = pas de trade)."""
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._reset(len(self.symbols))
+        if closes.size == 0 or closes.shape[1] < 2:
+            self._minute = last_minute_ms
+            return
+        filled = forward_fill(closes)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            returns = np.diff(np.log(filled), axis=1).T[-self.window:]
+        valid = (~np.isnan(closes[:, 1:]) & ~np.isnan(filled[:, :-1])).T[-self.window:]
+        rows = len(returns)
+        self._returns[:rows] = np.where(valid, np.nan_to_num(returns), 0.0)
+        self._valid[:rows] = valid
+        self._count = rows
+        self._pos = rows % self.window
+        self._rebuild()
+        self._prev_close = filled[:, -1].copy()
+        self._minute = last_minute_ms
+
+    def _rebuild(self):
+        """Recalcule les sommes depuis le tampon (dérive numérique des ajouts / retraits successifs)."""
+        rows = self._returns[:self._count] if self._count < self.window else self._returns
+        valid = self._valid[:self._count] if self._count < self.window else self._valid
+        self._sum = rows.sum(axis=0)
+        self._cross = rows.T @ rows
+        self._pairs = valid.T @ valid
+        self._since_rebuild = 0
+
+    def push_returns(self, returns: np.ndarray, valid: np.ndarray):
+        """Ajoute une minute de rendements (un par symbole) ; retire la plus ancienne si le tampon est plein."""
+        returns = np.where(valid, returns, 0.0)
+        valid = valid.astype(np.float64)
+        if self._count == self.window:
+            old, old_valid = self._returns[self._pos], self._valid[self._pos]
+            self._sum -= old
+            self._cross -= np.outer(old, old)
+            self._pairs -= np.outer(old_valid, old_valid)
+        else:
+            self._count += 1
+        self._returns[self._pos] = returns
+        self._valid[self._pos] = valid
+        self._sum += returns
+        self._cross += np.outer(returns, returns)
+        self._pairs += np.outer(valid, valid)
+        self._pos = (self._pos + 1) % self.window
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window:
+            self._rebuild()
+
+    def update_price(self, symbol: str, price: float, ts_ms: int | None = None):
+        """Dernier prix d'un symbole ; le passage à une nouvelle minute clôt la précédente pour tous les symboles."""
+        i = self.index.get(symbol)
+        if i is None or not price or price <= 0:
+            return
+        ts_ms = ts_ms or int(time.time() * 1000)
+        minute = ts_ms - ts_ms % MINUTE_MS
+        if self._minute is None:
+            self._minute = minute
+        elif minute > self._minute:
+            self._close_minute()
+            self._minute = minute
+        elif minute < self._minute:
+            return
+        self._last_close[i] = price
+
+    def _close_minute(self):
+        traded = ~np.isnan(self._last_close)
+        valid = traded & ~np.isnan(self._prev_close)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            returns = np.log(self._last_close / self._prev_close)
+        self.push_returns(np.nan_to_num(returns), valid)
+        self._prev_close = np.where(traded, self._last_close, self._prev_close)
+        self._last_close = np.full(len(self.symbols), np.nan)
+
+    # --- Lecture ---
+
+    def matrix(self) -> np.ndarray:
+        """Matrice de corrélation N × N (NaN si moins de min_periods observations communes ou variance nulle)."""
+        n = len(self.symbols)
+        if self._count < 2 or n == 0:
+            return np.full((n, n), np.nan)
+        mean = self._sum / self._count
+        cov = self._cross / self._count - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = cov / np.outer(std, std)
+        corr[(self._pairs < self.min_periods) | ~np.isfinite(corr)] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+    def correlation(self, a: str, b: str) -> float | None:
+        i, j = self.index.get(a), self.index.get(b)
+        if i is None or j is None or self._count < 2:
+            return None
+        mean_i, mean_j = self._sum[i] / self._count, self._sum[j] / self._count
+        cov = self._cross[i, j] / self._count - mean_i * mean_j
+        var_i = self._cross[i, i] / self._count - mean_i ** 2
+        var_j = self._cross[j, j] / self._count - mean_j ** 2
+        if self._pairs[i, j] < self.min_periods or var_i <= 0 or var_j <= 0:
+            return None
+        return float(max(-1.0, min(1.0, cov / np.sqrt(var_i * var_j))))
+
+    # --- Synchronisation avec la base ---
+
+    async def set_symbols(self, pool, symbols):
+        """Recharge la fenêtre depuis les bougies 1s locales si la liste des symboles a changé."""
+        if set(symbols) == set(self.symbols):
+            return
+        symbols = list(symbols)
+        now_ms = int(time.time() * 1000)
+        last_minute = now_ms - now_ms % MINUTE_MS - MINUTE_MS  # dernière minute complète
+        since = datetime.fromtimestamp((last_minute - self.window * MINUTE_MS) / 1000, tz=timezone.utc)
+
+        async def load(symbol):
+            try:
+                async with pool.acquire() as conn:
+                    rows = await conn.fetch(minute_bars_query(format_table_name(symbol)), since)
+                return symbol, np.fromiter((tuple(r) for r in rows), dtype=MINUTE_BAR_DTYPE, count=len(rows))
+            except Exception as e:
+                log(f"⚠️ [{symbol}] Correlation history unavailable: {e}", level="WARNING")
+                return symbol, np.zeros(0, dtype=MINUTE_BAR_DTYPE)
+
+        started = time.perf_counter()
+        bars = dict(await asyncio.gather(*(load(symbol) for symbol in symbols)))
+        ordered, matrices = build_matrices(bars, last_minute, self.window + 1)
+        self.load_closes(ordered, matrices["close"], last_minute)
+        log(f"🔗 Correlation matrix rebuilt for {len(ordered)} symbols ({self._count} minutes, "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms)", level="DEBUG")
+
+CORRELATIONS = CorrelationMatrix()
@@ -0,0 +1,237 @@
+#live/exchange_stops.py
+import asyncio
+import math
+import time
+
+from bpx.account import OrderTypeEnum
+
+from utils.logger import log
+from config.settings import get_config
+from utils.rate_limiter import TokenBucket
+from utils.market_cache import MARKETS
+from execute.order_client import ORDER_CLIENT
+
+config = get_config()
+
+def trigger_for_pnl(side: str, entry_price: float, pnl_pct: float) -> float:
+    """Price at which a position's PnL reaches pnl_pct (same % as get_position_trailing_stop)."""
+    if side == "long":
+        return entry_price * (1 + pnl_pct / 100)
+    return entry_price * (1 - pnl_pct / 100)
+
+def align_trigger(price: float, tick_size: float, side: str) -> float:
+    """Tick-aligned trigger, rounded away from the market (long stop down, short stop up)."""
+    steps = price / tick_size
+    steps = math.floor(steps + 1e-9) if side == "long" else math.ceil(steps - 1e-9)
+    return steps * tick_size
+
+class ExchangeStop:
+    """Exchange-side protection of one position: stop-loss trigger order, optional take-profit."""
+    __slots__ = ("symbol", "side", "entry_price", "quantity", "order_id", "trigger_price", "tp_order_id",
+                 "desired", "last_sent", "task")
+
+    def __init__(self, symbol: str, side: str, entry_price: float, quantity: str):
+        self.symbol = symbol
+        self.side = side
+        self.entry_price = entry_price
+        self.quantity = quantity
+        self.order_id = None
+        self.trigger_price = None
+        self.tp_order_id = None
+        self.desired = None
+        self.last_sent = 0.0
+        self.task = None
+
+class ExchangeStopManager:
+    """
+    Stop-loss / take-profit held by the exchange as reduce-only trigger orders, so positions stay
+    protected when the bot stalls or crashes. The stop is ratcheted as the trailing stop of
+    get_position_trailing_stop moves (it never loosens). Amends are coalesced per symbol: at most one
+    every stop_amend_min_interval_sec, always to the latest requested trigger. A global token bucket
+    caps the amend rate, and moves below stop_amend_min_move_pct are ignored. An amend places the
+    new stop before cancelling the old one, so the position is never left unprotected.
+    """
+    def __init__(self, client=None, markets=MARKETS, settings=None, limiter: TokenBucket | None = None):
+        self.client = client or ORDER_CLIENT
+        self.markets = markets
+        self.settings = settings or config.trading
+        self.limiter = limiter or TokenBucket(self.settings.stop_amend_rate_per_sec,
+                                              max(1, int(self.settings.stop_amend_rate_per_sec * 2)))
+        self.stops = {}  # symbol -> ExchangeStop
+        self._found = {}  # symbol -> trigger orders found on the exchange at load(), adopted by ensure()
+        self.amends_requested = 0
+        self.amends_sent = 0
+        self._loaded = False
+
+    # --- Orders ---
+
+    async def _trigger_order(self, stop: ExchangeStop, trigger: float, filters) -> str:
+        response = await self.client.execute_order(
+            symbol=stop.symbol,
+            side="Ask" if stop.side == "long" else "Bid",
+            order_type=OrderTypeEnum.MARKET,
+            quantity=stop.quantity,
+            trigger_price=f"{trigger:.{filters.price_decimals}f}",
+            reduce_only=True
+        )
+        return response["id"]
+
+    async def _cancel_order(self, symbol: str, order_id: str | None):
+        if not order_id:
+            return
+        try:
+            await self.client.cancel_order(symbol, order_id=order_id)
+        except Exception as e:
+            # Already triggered or cancelled: nothing left to protect
+            log(f"[{symbol}] Stop order {order_id} not cancelled: {e}", level="DEBUG")
+
+    async def place(self, symbol: str, side: str, entry_price: float, quantity: float, stop_pct: float | None = None):
+        """Places the initial stop (and take-profit if configured) right after a position is opened."""
+        filters = await self.markets.get(symbol)
+        if filters is None or entry_price <= 0 or quantity <= 0:
+            log(f"⚠️ [{symbol}] Exchange stop not placed: no market filters or position data", level="WARNING")
+            return None
+        stop_pct = stop_pct if stop_pct else abs(self.settings.fixed_stop_loss_pct)
+        stop = ExchangeStop(symbol, side, entry_price, filters.format_quantity(quantity))
+        trigger = align_trigger(trigger_for_pnl(side, entry_price, -stop_pct), filters.tick_size, side)
+        try:
+            stop.order_id = await self._trigger_order(stop, trigger, filters)
+            stop.trigger_price = trigger
+            stop.last_sent = time.monotonic()
+            take_profit_pct = self.settings.exchange_take_profit_pct
+            if take_profit_pct > 0:
+                tp_side = "short" if side == "long" else "long"  # rounded toward the entry
+                tp = align_trigger(trigger_for_pnl(side, entry_price, take_profit_pct), filters.tick_size, tp_side)
+                stop.tp_order_id = await self._trigger_order(stop, tp, filters)
+        except Exception as e:
+            log(f"❌ [{symbol}] Exchange stop placement failed: {e}", level="ERROR")
+            if stop.order_id is None:
+                return None
+        self.stops[symbol] = stop
+        log(f"🛡️ [{symbol}] Exchange stop at {trigger} ({-stop_pct:.2f}%) for {stop.quantity} {side.upper()}",
+            level="INFO")
+        return stop
+
+    async def load(self):
+        """
+        Collects the reduce-only trigger orders already on the exchange (restart), so that ensure()
+        adopts them instead of duplicating them.
+        """
+        self._loaded = True
+        try:
+            orders = await self.client.get_open_orders()
+        except Exception as e:
+            log(f"⚠️ Cannot load open stop orders: {e}", level="WARNING")
+            return
+        for order in orders:
+            if not order.get("triggerPrice") or not order.get("reduceOnly") or order.get("symbol") in self.stops:
+                continue
+            self._found.setdefault(order["symbol"], []).append(order)
+
+    def _adopt(self, symbol: str, side: str, entry_price: float, reference: float, orders: list) -> list:
+        """
+        Sorts the found trigger orders of a position into stop and take-profit: with both pending, the
+        stop sits on the losing side of the mark price and the take-profit on the winning side.
+        Adopts the closest of each and returns the order ids that were not adopted.
+        """
+        closing = "Ask" if side == "long" else "Bid"
+        orders = [o for o in orders if o.get("side") == closing]
+        below = sorted((o for o in orders if float(o["triggerPrice"]) < reference), key=lambda o: float(o["triggerPrice"]))
+        above = sorted((o for o in orders if float(o["triggerPrice"]) >= reference), key=lambda o: float(o["triggerPrice"]))
+        stops, take_profits = (below[::-1], above) if side == "long" else (above, below[::-1])
+        if not stops:
+            return [o.get("id") for o in orders]
+
+        stop = ExchangeStop(symbol, side, entry_price, stops[0].get("quantity"))
+        stop.order_id = stops[0].get("id")
+        stop.trigger_price = float(stops[0]["triggerPrice"])
+        if take_profits:
+            stop.tp_order_id = take_profits[0].get("id")
+        self.stops[symbol] = stop
+        log(f"🛡️ [{symbol}] Adopted exchange stop {stop.order_id} at {stop.trigger_price}"
+            f"{f', take-profit {stop.tp_order_id}' if stop.tp_order_id else ''}", level="INFO")
+        return [o.get("id") for o in stops[1:] + take_profits[1:]]
+
+    async def ensure(self, symbol: str, side: str, entry_price: float, quantity: float, stop_pct: float | None = None,
+                     mark_price: float | None = None):
+        """
+        Makes sure an open position has its exchange stop (positions opened before a restart).
+        mark_price tells an adopted stop from an adopted take-profit (entry price when unknown).
+        """
+        if not self._loaded:
+            await self.load()
+        found = self._found.pop(symbol, None)
+        if found and symbol not in self.stops:
+            leftovers = self._adopt(symbol, side, entry_price, mark_price or entry_price, found)
+            # Take-profit without its stop, duplicates: replaced by a fresh stop / take-profit pair
+            await asyncio.gather(*(self._cancel_order(symbol, order_id) for order_id in leftovers))
+        if symbol not in self.stops:
+            await self.place(symbol, side, entry_price, quantity, stop_pct)
+        elif not self.stops[symbol].entry_price:
+            self.stops[symbol].entry_price = entry_price
+
+    # --- Trailing ratchet ---
+
+    def request_trailing(self, symbol: str, trailing_pct: float):
+        """Asks for the stop to follow the trailing stop (in PnL %); only tighter triggers are kept."""
+        stop = self.stops.get(symbol)
+        if stop is None or not stop.entry_price:
+            return
+        target = trigger_for_pnl(stop.side, stop.entry_price, trailing_pct)
+        reference = stop.desired if stop.desired is not None else stop.trigger_price
+        if reference is not None:
+            move_pct = (target - reference) / reference * 100 * (1 if stop.side == "long" else -1)
+            if move_pct < self.settings.stop_amend_min_move_pct:
+                return
+        stop.desired = target
+        self.amends_requested += 1
+        if stop.task is None or stop.task.done():
+            stop.task = asyncio.create_task(self._flush(stop))
+
+    async def _flush(self, stop: ExchangeStop):
+        wait = stop.last_sent + self.settings.stop_amend_min_interval_sec - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        await self.limiter.acquire()
+        desired, stop.desired = stop.desired, None
+        if desired is None or self.stops.get(stop.symbol) is not stop:
+            return
+        filters = await self.markets.get(stop.symbol)
+        if filters is None:
+            return
+        trigger = align_trigger(desired, filters.tick_size, stop.side)
+        if trigger == stop.trigger_price:
+            return
+        try:
+            new_id = await self._trigger_order(stop, trigger, filters)
+        except Exception as e:
+            log(f"❌ [{stop.symbol}] Stop amend to {trigger} failed: {e}", level="ERROR")
+            return
+        old_id, old_trigger = stop.order_id, stop.trigger_price
+        stop.order_id, stop.trigger_price, stop.last_sent = new_id, trigger, time.monotonic()
+        self.amends_sent += 1
+        await self._cancel_order(stop.symbol, old_id)
+        log(f"🔼 [{stop.symbol}] Exchange stop {old_trigger} → {trigger}", level="INFO")
+
+    # --- Teardown ---
+
+    async def cancel(self, symbol: str):
+        """Cancels the exchange orders of a position closed by the bot."""
+        stop = self.stops.pop(symbol, None)
+        if stop is None:
+            return
+        if stop.task is not None and not stop.task.done():
+            stop.task.cancel()
+        await asyncio.gather(self._cancel_order(symbol, stop.order_id), self._cancel_order(symbol, stop.tp_order_id))
+
+    def on_positions(self, raw_positions: list):
+        """POSITION_LISTENERS hook: forgets stops whose position is gone (stop or take-profit filled)."""
+        open_symbols = {p.get("symbol") for p in raw_positions if float(p.get("netQuantity") or 0) != 0}
+        for symbol in [s for s in self.stops if s not in open_symbols]:
+            log(f"🛡️ [{symbol}] Position closed, dropping its exchange stop", level="INFO")
+            try:
+                asyncio.get_running_loop().create_task(self.cancel(symbol))
+            except RuntimeError:
+                self.stops.pop(symbol, None)
+
+EXCHANGE_STOPS = ExchangeStopManager()
@@ -6,20 +6,27 @@ import os
 import inspect
 import asyncio
 import json
-import hashlib
 
 from utils.position_utils import position_already_open, get_real_pnl, get_open_positions, safe_float
 from utils.logger import log
 from utils.public import check_table_and_fresh_data
 from execute.async_wrappers import open_position_async, close_position_percent_async
-from execute.close_position_percent import close_position_percent
+from execute.close_position_percent import close_position_percent, close_positions_batch
 from ScriptDatabase.pgsql_ohlcv import fetch_ohlcv_1s
+from ScriptDatabase.gap_index import GAP_INDEX
 from signals.strategy_selector import get_strategy_for_market
 from config.settings import get_config
-from indicators.rsi_calculator import get_cached_rsi
+from indicators.live_indicators import ensure_indicators
+from indicators.rsi_calculator import get_cached_rsi, drop_cached_rsi
 from utils.table_display import handle_existing_position_with_table
-from utils.position_utils import PositionTracker, get_real_positions
+from utils.position_utils import PositionTracker, get_real_positions, fetch_real_positions, POSITION_LISTENERS
 from utils.i18n import t
+from utils.latency import LATENCY
+from live.correlation import CORRELATIONS
+from live.risk_engine import RISK_ENGINE
+from execute.position_sizing import POSITION_SIZER
+from live.exchange_stops import EXCHANGE_STOPS
+from live.trailing_store import TRAILING_STORE
 
 trackers = {}  # symbol -> PositionTracker
 
@@ -35,21 +42,44 @@ MIN_PNL_FOR_TRAILING = trading_config.min_pnl_for_trailing
 
 MAX_PNL_TRACKER = {}  # Tracker for max PnL per symbol
 
-# ✅ CORRECTION: Stockage amélioré avec hash stable
-TRAILING_STOPS = {}  # {position_hash: {'value': float, 'max_pnl': float, 'active': bool, 'symbol': str, 'side': str}}
+# Daily PnL fed by every position list the bot already fetches
+POSITION_LISTENERS.append(RISK_ENGINE.on_positions)
+# Exchange-side stops of positions closed by a trigger are forgotten
+POSITION_LISTENERS.append(EXCHANGE_STOPS.on_positions)
+
+# Trailing state per exchange position ("SYMBOL:side"), persisted in TRAILING_STORE
+TRAILING_STOPS = {}  # {position_key: {'value': float, 'max_pnl': float, 'active': bool, 'symbol': str, 'side': str}}
 
 public_key = config.bpx_bot_public_key or os.environ.get("bpx_bot_public_key")
 secret_key = config.bpx_bot_secret_key or os.environ.get("bpx_bot_secret_key")
 
-def get_position_hash(symbol, side, entry_price, amount):
+def get_position_hash(symbol, side, entry_price=None, amount=None):
     """
-    Génère un hash unique et stable pour chaque position.
-    Utilise des arrondis pour éviter les variations de précision flottante.
+    Clé stable d'une position : identité de la position sur l'exchange (un seul sens par symbole).
+    entry_price / amount ne font plus partie de la clé, un remplissage partiel ou un renfort
+    ne remet donc plus le max PnL à zéro.
     """
-    rounded_entry = round(float(entry_price), 8)
-    rounded_amount = round(float(amount), 6)
-    position_data = f"{symbol}_{side}_{rounded_entry}_{rounded_amount}"
-    return hashlib.md5(position_data.encode()).hexdigest()[:16]
+    return f"{symbol}:{side.lower()}"
+
+def load_trailing_state():
+    """Recharge l'état des trailing stops persisté (démarrage) ; les positions disparues seront évincées."""
+    TRAILING_STOPS.update(TRAILING_STORE.load())
+    if TRAILING_STOPS:
+        log(f"♻️ Restored {len(TRAILING_STOPS)} trailing tracker(s) from {TRAILING_STORE.path}", level="INFO")
+
+def evict_trailing_state(raw_positions):
+    """POSITION_LISTENERS hook: forgets the trailing state of positions no longer open on the exchange."""
+    open_keys = set()
+    for p in raw_positions:
+        net = safe_float(p.get("netQuantity"))
+        if net != 0:
+            open_keys.add(get_position_hash(p.get("symbol"), "long" if net > 0 else "short"))
+    for key in [k for k in TRAILING_STOPS if k not in open_keys]:
+        log(f"🧹 [{TRAILING_STOPS[key].get('symbol')}] Position gone, evicting trailing state {key}", level="INFO")
+        del TRAILING_STOPS[key]
+        TRAILING_STORE.delete(key)
+
+POSITION_LISTENERS.append(evict_trailing_state)
 
 async def get_position_trailing_stop(symbol, side, entry_price, mark_price, amount, current_pnl_pct):
     """
@@ -87,20 +117,28 @@ async def get_position_trailing_stop(symbol, side, entry_price, mark_price, amou
                 'entry_price': entry_price,
                 'amount': amount
             }
-            log(f"🆕 [{symbol}] New trailing tracker | Hash:{position_hash[:8]} | Initial PnL: {pnl_pct:.2f}%", level="INFO")
+            TRAILING_STORE.put(position_hash, TRAILING_STOPS[position_hash])
+            log(f"🆕 [{symbol}] New trailing tracker | Key:{position_hash} | Initial PnL: {pnl_pct:.2f}%", level="INFO")
         
         tracker = TRAILING_STOPS[position_hash]
+        # Entrée / quantité suivent la position (renfort, remplissage partiel) sans réinitialiser le tracker
+        if (tracker['entry_price'], tracker['amount']) != (entry_price, amount):
+            tracker['entry_price'] = entry_price
+            tracker['amount'] = amount
+            TRAILING_STORE.put(position_hash, tracker)
         
         # ✅ CORRECTION: Mettre à jour max PnL UNIQUEMENT si supérieur
         if pnl_pct > tracker['max_pnl']:
             old_max = tracker['max_pnl']
             tracker['max_pnl'] = pnl_pct
-            log(f"📈 [{symbol}] Hash:{position_hash[:8]} | Max PnL: {old_max:.2f}% → {pnl_pct:.2f}%", level="INFO")
+            TRAILING_STORE.put(position_hash, tracker)
+            log(f"📈 [{symbol}] Key:{position_hash} | Max PnL: {old_max:.2f}% → {pnl_pct:.2f}%", level="INFO")
         
         # ✅ ACTIVATION: Déclencher le trailing à MIN_PNL_FOR_TRAILING (défaut: 1.0%)
         if not tracker['active'] and pnl_pct >= MIN_PNL_FOR_TRAILING:
             tracker['active'] = True
             tracker['value'] = tracker['max_pnl'] - TRAILING_STOP_TRIGGER
+            TRAILING_STORE.put(position_hash, tracker)
             log(f"🟢 [{symbol}] TRAILING ACTIVATED! | PnL: {pnl_pct:.2f}% ≥ {MIN_PNL_FOR_TRAILING}% | "
                 f"Trailing set to: {tracker['value']:.2f}% | Trigger distance: {TRAILING_STOP_TRIGGER}%", 
                 level="WARNING")
@@ -114,6 +152,7 @@ async def get_position_trailing_stop(symbol, side, entry_price, mark_price, amou
             if new_trailing > (tracker['value'] or -999):
                 old_trailing = tracker['value']
                 tracker['value'] = new_trailing
+                TRAILING_STORE.put(position_hash, tracker)
                 log(f"🔼 [{symbol}] Trailing updated | {old_trailing:.2f}% → {new_trailing:.2f}% | "
                     f"Max PnL: {tracker['max_pnl']:.2f}%", level="INFO")
             
@@ -173,11 +212,7 @@ async def scan_symbol(pool, symbol):
         if df is None or df.empty:
             return symbol, "No data"
 
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        if df['timestamp'].dt.tz is None:
-            df['timestamp'] = df['timestamp'].dt.tz_localize('UTC')
         df.set_index('timestamp', inplace=True)
-        df[['open','high','low','close','volume']] = df[['open','high','low','close','volume']].astype(float)
 
         df_checked = await ensure_indicators(df, symbol)
         if df_checked is None:
@@ -207,48 +242,6 @@ def import_strategy_signal(strategy):
         from signals.macd_rsi_breakout import get_combined_signal
     return get_combined_signal
 
-async def ensure_indicators(df, symbol):
-    required_cols = ["EMA20", "EMA50", "EMA200", "RSI", "MACD"]
-    for period, col in [(20,"EMA20"),(50,"EMA50"),(200,"EMA200")]:
-        if col not in df.columns:
-            df[col] = df['close'].ewm(span=period, adjust=False).mean()
-
-    try:
-        rsi_value = await get_cached_rsi(symbol, interval="5m")
-        df['RSI'] = rsi_value
-        log(t("live_engine.indicators.rsi_retrieved", symbol=symbol, rsi=rsi_value), level="DEBUG")
-    except Exception as e:
-        log(t("live_engine.indicators.rsi_error_fallback", symbol=symbol, error=e), level="WARNING")
-        try:
-            from indicators.rsi_calculator import calculate_rsi
-            rsi_value = calculate_rsi(df['close'], period=14)
-            df['RSI'] = rsi_value
-            log(t("live_engine.indicators.rsi_calculated", symbol=symbol, rsi=rsi_value.iloc[-1]), level="DEBUG")
-        except Exception as e2:
-            df['RSI'] = 50
-            log(t("live_engine.indicators.rsi_failed", symbol=symbol, error=e2), level="ERROR")
-
-    if 'MACD' not in df.columns or 'MACD_signal' not in df.columns:
-        short_window, long_window, signal_window = 12,26,9
-        ema_short = df['close'].ewm(span=short_window, adjust=False).mean()
-        ema_long = df['close'].ewm(span=long_window, adjust=False).mean()
-        df['MACD'] = ema_short - ema_long
-        df['MACD_signal'] = df['MACD'].ewm(span=signal_window, adjust=False).mean()
-        df['MACD_hist'] = df['MACD'] - df['MACD_signal']
-        log(t("live_engine.indicators.macd_calculated", symbol=symbol), level="DEBUG")
-
-    missing = [c for c in required_cols if c not in df.columns]
-    if missing:
-        log(t("live_engine.indicators.missing", symbol=symbol, missing=missing), level="WARNING")
-        return None
-
-    for col in required_cols:
-        if col != 'RSI' and df[col].isna().any():
-            log(t("live_engine.indicators.nan_detected", symbol=symbol, column=col), level="WARNING")
-            return None
-
-    return df
-
 def should_close_position(pnl_pct, trailing_stop, side, duration_sec, symbol="UNKNOWN", strategy=None):
     """
     ✅ CORRECTION MAJEURE: Logique de fermeture avec logs détaillés et vérifications strictes.
@@ -319,41 +312,62 @@ def should_close_position(pnl_pct, trailing_stop, side, duration_sec, symbol="UN
     return False
 
 async def handle_live_symbol(symbol: str, pool, real_run: bool, dry_run: bool, args=None):
+    timer = None
     try:
+        # Latence par étape (histogrammes par symbole et stratégie, voir utils/latency.py)
+        timer = LATENCY.start_cycle(symbol, None if args.strategie == "Auto" else args.strategie)
         log(t("live_engine.data.loading", symbol=symbol, interval=INTERVAL), level="DEBUG")
-        if not await check_table_and_fresh_data(pool, symbol, max_age_seconds=config.database.max_age_seconds):
+        with timer.stage("freshness_check"):
+            fresh = await check_table_and_fresh_data(pool, symbol, max_age_seconds=config.database.max_age_seconds)
+        if not fresh:
             log(t("live_engine.data.no_recent", symbol=symbol), level="ERROR")
             return
 
         end_ts = datetime.now(timezone.utc)
         start_ts = end_ts - timedelta(seconds=600)
-        df = await fetch_ohlcv_1s(symbol, start_ts, end_ts, pool=pool)
+        with timer.stage("fetch_ohlcv"):
+            df = await fetch_ohlcv_1s(symbol, start_ts, end_ts, pool=pool)
         if df is None or df.empty:
             log(t("live_engine.data.no_1s_data", symbol=symbol), level="ERROR")
             return
 
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        if df['timestamp'].dt.tz is None:
-            df['timestamp'] = df['timestamp'].dt.tz_localize('UTC')
-        df.set_index('timestamp', inplace=True)
-        df[['open','high','low','close','volume']] = df[['open','high','low','close','volume']].astype(float)
-
-        if args.strategie == "Auto":
-            market_condition, selected_strategy = get_strategy_for_market(df)
-            log(t("live_engine.strategy.market_detected", symbol=symbol, condition=market_condition.upper(), strategy=selected_strategy), level="DEBUG")
-        else:
-            selected_strategy = args.strategie
-            log(t("live_engine.strategy.manual_selected", symbol=symbol, strategy=selected_strategy), level="DEBUG")
+        with timer.stage("dataframe"):
+            # Dernier prix pour la matrice de corrélation des positions (minute close = mise à jour O(N²))
+            CORRELATIONS.update_price(symbol, float(df['close'].iloc[-1]), df['timestamp'].iloc[-1].value // 1_000_000)
+            # Même prix pour le PnL latent du disjoncteur de perte journalière
+            RISK_ENGINE.on_price(symbol, float(df['close'].iloc[-1]))
+            df.set_index('timestamp', inplace=True)
+
+            # Complétude de la fenêtre 1s (trous de reconnexion de l'ingester), lecture O(1)
+            await GAP_INDEX.maybe_refresh(pool)
+            df.attrs['complete'] = GAP_INDEX.is_complete(symbol, 600)
+        if not df.attrs['complete']:
+            log(f"🕳️ [{symbol}] Window of the last 600s contains a gap in 1s data", level="WARNING")
+
+        if real_run:
+            with timer.stage("sizing"):
+                # Order size precomputed at the last price: opening needs no REST call afterwards
+                await POSITION_SIZER.prepare(symbol, float(df['close'].iloc[-1]), pool)
+
+        with timer.stage("strategy_select"):
+            if args.strategie == "Auto":
+                market_condition, selected_strategy = get_strategy_for_market(df)
+                log(t("live_engine.strategy.market_detected", symbol=symbol, condition=market_condition.upper(), strategy=selected_strategy), level="DEBUG")
+            else:
+                selected_strategy = args.strategie
+                log(t("live_engine.strategy.manual_selected", symbol=symbol, strategy=selected_strategy), level="DEBUG")
 
-        get_combined_signal = import_strategy_signal(selected_strategy)
-        
-        df_result = await ensure_indicators(df, symbol)
+            get_combined_signal = import_strategy_signal(selected_strategy)
+        timer.strategy = selected_strategy
         
-        if asyncio.iscoroutine(df_result):
-            log(t("live_engine.debug.awaiting_coroutine", symbol=symbol), level="DEBUG")
-            df = await df_result
-        else:
-            df = df_result
+        with timer.stage("indicators"):
+            df_result = await ensure_indicators(df, symbol)
+            
+            if asyncio.iscoroutine(df_result):
+                log(t("live_engine.debug.awaiting_coroutine", symbol=symbol), level="DEBUG")
+                df = await df_result
+            else:
+                df = df_result
             
         if df is None:
             log(t("live_engine.indicators.calculation_failed", symbol=symbol), level="ERROR")
@@ -368,12 +382,13 @@ async def handle_live_symbol(symbol: str, pool, real_run: bool, dry_run: bool, a
             return
 
         try:
-            if inspect.iscoroutinefunction(get_combined_signal):
-                log(t("live_engine.strategy.calling_async", symbol=symbol), level="DEBUG")
-                result = await get_combined_signal(df, symbol)
-            else:
-                log(t("live_engine.strategy.calling_sync", symbol=symbol), level="DEBUG")
-                result = get_combined_signal(df, symbol)
+            with timer.stage("signal"):
+                if inspect.iscoroutinefunction(get_combined_signal):
+                    log(t("live_engine.strategy.calling_async", symbol=symbol), level="DEBUG")
+                    result = await get_combined_signal(df, symbol)
+                else:
+                    log(t("live_engine.strategy.calling_sync", symbol=symbol), level="DEBUG")
+                    result = get_combined_signal(df, symbol)
                 
             log(t("live_engine.strategy.returned", symbol=symbol, type=type(result), result=result), level="DEBUG")
             
@@ -391,19 +406,22 @@ async def handle_live_symbol(symbol: str, pool, real_run: bool, dry_run: bool, a
         log(t("live_engine.signals.detected", symbol=symbol, signal=signal, details=details), level="DEBUG")
 
         # ✅ CORRECTION: UN SEUL APPEL à position_already_open
-        position_exists = await position_already_open(symbol)
+        with timer.stage("position_check"):
+            position_exists = await position_already_open(symbol)
         log(f"[MAIN LOOP] {symbol} position_already_open: {position_exists}", level="INFO")
         
         if position_exists:
             # ✅ CORRECTION: Appel direct à la fonction corrigée
             from utils.table_display import handle_existing_position_with_table
-            await handle_existing_position_with_table(symbol, real_run, dry_run)
+            with timer.stage("manage_position"):
+                await handle_existing_position_with_table(symbol, real_run, dry_run)
             # ✅ Alternative si vous voulez garder l'affichage tableau
             # await handle_existing_position_with_table(symbol, real_run, dry_run)
             return
 
         if signal in ["BUY","SELL"]:
-            await handle_new_position(symbol, signal, real_run, dry_run)
+            with timer.stage("open_position"):
+                await handle_new_position(symbol, signal, real_run, dry_run)
             log(t("live_engine.signals.try_open", symbol=symbol, signal=signal), level="DEBUG")
         else:
             log(t("live_engine.signals.no_actionable", symbol=symbol, signal=signal), level="DEBUG")
@@ -411,6 +429,9 @@ async def handle_live_symbol(symbol: str, pool, real_run: bool, dry_run: bool, a
     except Exception as e:
         log(t("live_engine.errors.generic", symbol=symbol, error=e), level="ERROR")
         traceback.print_exc()
+    finally:
+        if timer is not None:
+            timer.finish()
 
 def parse_position(pos):
     """Convertit la position en dict si JSON valide, sinon None."""
@@ -434,13 +455,25 @@ def cleanup_trailing_stop(symbol, side, entry_price, amount):
         position_hash = get_position_hash(symbol, side, entry_price, amount)
         if position_hash in TRAILING_STOPS:
             tracker = TRAILING_STOPS[position_hash]
-            log(f"🧹 [{symbol}] Cleaning trailing data | Hash: {position_hash[:8]} | "
+            log(f"🧹 [{symbol}] Cleaning trailing data | Key: {position_hash} | "
                 f"Final Max PnL: {tracker.get('max_pnl', 'N/A')}%", level="INFO")
             del TRAILING_STOPS[position_hash]
+            TRAILING_STORE.delete(position_hash)
         else:
             log(f"🧹 [{symbol}] No trailing data to clean", level="DEBUG")
     except Exception as e:
         log(f"❌ [{symbol}] Error cleaning trailing stop: {e}", level="ERROR")
+
+async def sync_exchange_stop(symbol, side, entry_price, amount, trailing_stop, mark_price=None):
+    """
+    Stop côté exchange : posé si absent, resserré quand le trailing monte (amends regroupés).
+    Appelé à chaque passage de la boucle sur une position ouverte (real_run uniquement).
+    """
+    if not config.trading.exchange_stops:
+        return
+    await EXCHANGE_STOPS.ensure(symbol, side, entry_price, amount, mark_price=mark_price)
+    if trailing_stop is not None:
+        EXCHANGE_STOPS.request_trailing(symbol, trailing_stop)
         
 async def handle_existing_position(symbol, real_run=True, dry_run=False):
     """
@@ -501,6 +534,10 @@ async def handle_existing_position(symbol, real_run=True, dry_run=False):
             current_pnl_pct=pnl_pct  # ← Le PnL déjà calculé
         )
 
+        # 6b. Stop côté exchange : posé si absent, resserré quand le trailing monte (amends regroupés)
+        if real_run:
+            await sync_exchange_stop(symbol, side, entry_price, amount, trailing_stop, mark_price)
+
         # 7. Log détaillé avec précision
         log(f"📊 [{symbol}] {side.upper()} | Entry: ${entry_price:.4f} | Mark: ${mark_price:.4f} | "
             f"PnL: {pnl_pct:+.2f}% (${pnl_usdc:+.2f}) | Trailing: {trailing_stop if trailing_stop else 'None'} | "
@@ -533,6 +570,7 @@ async def handle_existing_position(symbol, real_run=True, dry_run=False):
                     
                     # Nettoyage du tracker
                     cleanup_trailing_stop(symbol, side, entry_price, amount)
+                    await EXCHANGE_STOPS.cancel(symbol)
                     
                 except Exception as close_error:
                     log(f"❌ [{symbol}] CLOSE FAILED | Error: {close_error}", level="ERROR")
@@ -551,17 +589,35 @@ async def handle_existing_position(symbol, real_run=True, dry_run=False):
 
 async def handle_new_position(symbol: str, signal: str, real_run: bool, dry_run: bool):
     direction = "long" if signal=="BUY" else "short"
+
+    if real_run and not RISK_ENGINE.can_open():
+        log(f"🛑 [{symbol}] {direction.upper()} skipped: daily loss limit reached "
+            f"({RISK_ENGINE.day_pnl:+.2f} USDC on {RISK_ENGINE.day})", level="WARNING")
+        return
     
     if real_run and not await check_position_limit():
         log(t("live_engine.positions.limit_reached", symbol=symbol, max=trading_config.max_positions), level="WARNING")
         return
 
+    if real_run and not await check_correlation_limit(symbol, direction):
+        return
+
     if dry_run:
         log(t("live_engine.positions.opening_dry", symbol=symbol, direction=direction.upper()), level="DEBUG")
     elif real_run:
         log(t("live_engine.positions.opening_real", symbol=symbol, direction=direction.upper()), level="DEBUG")
+        plan = POSITION_SIZER.plans.get(symbol)
+        if plan is not None and not plan.valid:
+            log(f"📏 [{symbol}] {direction.upper()} skipped: {plan}", level="WARNING")
+            return
         try:
-            await open_position_async(symbol, POSITION_AMOUNT_USDC, direction)
+            response = await open_position_async(symbol, POSITION_AMOUNT_USDC, direction, plan=plan)
+            if response and config.trading.exchange_stops:
+                executed = safe_float(response.get("executedQuantity"))
+                if executed > 0:
+                    entry_price = safe_float(response.get("executedQuoteQuantity")) / executed
+                    await EXCHANGE_STOPS.place(symbol, direction, entry_price, executed,
+                                               plan.stop_pct if plan is not None else None)
             MAX_PNL_TRACKER[symbol] = 0.0
             log(t("live_engine.positions.opened_success", symbol=symbol), level="DEBUG")
         except Exception as e:
@@ -569,6 +625,32 @@ async def handle_new_position(symbol: str, signal: str, real_run: bool, dry_run:
     else:
         log(t("live_engine.positions.neither_run_mode", symbol=symbol), level="ERROR")
 
+async def warm_symbol_state(symbol: str):
+    """Precomputes the per-symbol state of a symbol entering the universe (5m RSI cache)."""
+    try:
+        await get_cached_rsi(symbol, interval="5m")
+        log(f"🔥 [{symbol}] Symbol state warmed", level="DEBUG")
+    except Exception as e:
+        log(f"⚠️ [{symbol}] Could not warm symbol state: {e}", level="WARNING")
+
+def release_symbol_state(symbol: str):
+    """Drops the per-symbol state of a symbol leaving the universe, unless a trailing stop still tracks it."""
+    drop_cached_rsi(symbol)
+    POSITION_SIZER.drop(symbol)
+    if any(data.get('symbol') == symbol for data in TRAILING_STOPS.values()):
+        log(f"🧹 [{symbol}] Left the universe with a tracked position, keeping its trackers", level="INFO")
+        return
+    trackers.pop(symbol, None)
+    MAX_PNL_TRACKER.pop(symbol, None)
+    log(f"🧹 [{symbol}] Symbol state released", level="DEBUG")
+
+async def on_universe_change(snapshot):
+    """SymbolUniverse listener: warms added symbols and tears down removed ones."""
+    for symbol in snapshot.removed:
+        release_symbol_state(symbol)
+    if snapshot.added:
+        await asyncio.gather(*(warm_symbol_state(symbol) for symbol in snapshot.added))
+
 async def check_position_limit() -> bool:
     try:
         positions = await get_open_positions()
@@ -578,6 +660,60 @@ async def check_position_limit() -> bool:
         log(t("live_engine.errors.position_limit", error=e), level="WARNING")
         return True
 
+async def check_correlation_limit(symbol: str, direction: str) -> bool:
+    """
+    Rejects a new position whose return correlation with an open one exceeds risk.max_correlation.
+    The correlation is signed by the relative direction: a long and a short on two correlated
+    symbols hedge each other and are accepted. Unknown correlations (short history) are accepted.
+    """
+    max_correlation = config.risk.max_correlation
+    try:
+        positions = await get_real_positions()
+    except Exception as e:
+        log(f"⚠️ [{symbol}] Correlation check skipped, positions unavailable: {e}", level="WARNING")
+        return True
+
+    for pos in positions:
+        other = pos.get("symbol")
+        if not other or other == symbol:
+            continue
+        corr = CORRELATIONS.correlation(symbol, other)
+        if corr is None:
+            continue
+        exposure = corr if pos.get("side") == direction else -corr
+        if exposure > max_correlation:
+            log(f"🔗 [{symbol}] {direction.upper()} rejected: correlation {corr:+.2f} with open "
+                f"{pos.get('side', '?').upper()} {other} (max {max_correlation})", level="WARNING")
+            return False
+    return True
+
+async def enforce_daily_loss_limit(real_run: bool):
+    """
+    Daily loss circuit breaker step of each loop iteration: makes sure the day's capital base is
+    known and, once the limit is hit with risk.flatten_on_daily_loss, closes every open position once.
+    """
+    await RISK_ENGINE.ensure_equity()
+    if not (RISK_ENGINE.halted and config.risk.flatten_on_daily_loss and real_run) or RISK_ENGINE.flattened:
+        return
+    try:
+        positions = await fetch_real_positions()
+    except Exception as e:
+        # Positions inconnues : rien n'est marqué comme fermé, nouvel essai à l'itération suivante
+        log(f"❌ Daily loss flatten postponed, cannot fetch positions: {e}", level="ERROR")
+        return
+    if not positions:
+        RISK_ENGINE.mark_flattened()
+        return
+    log(f"🛑 Daily loss limit reached, flattening {len(positions)} position(s)", level="ERROR")
+    results = await close_positions_batch(positions)
+    for result in results:
+        if result["status"] == "Filled":
+            trackers.pop(result["symbol"], None)
+            MAX_PNL_TRACKER.pop(result["symbol"], None)
+            await EXCHANGE_STOPS.cancel(result["symbol"])
+    if results and all(result["status"] == "Filled" for result in results):
+        RISK_ENGINE.mark_flattened()
+
 async def get_position_stats() -> dict:
     try:
         positions = await get_open_positions()
@@ -607,7 +743,7 @@ def debug_trailing_stops():
         side = data.get('side', 'unknown')
         max_pnl = data.get('max_pnl', 0)
         trailing_val = data.get('value', 'N/A')
-        log(f"  {status} [{symbol}] {side.upper()} Hash:{hash_key[:8]} | "
+        log(f"  {status} [{symbol}] {side.upper()} Key:{hash_key} | "
             f"Max PnL: {max_pnl:.2f}% | Trailing: {trailing_val}", level="INFO")
 
 async def scan_and_trade_all_symbols(pool, symbols, real_run: bool, dry_run: bool, args=None):
@@ -0,0 +1,337 @@
+#live/order_book.py
+import asyncio
+import json
+import time
+from bisect import bisect_left, bisect_right
+
+import aiohttp
+import websockets
+
+from utils.logger import log
+from utils.ws_supervisor import ReconnectBackoff, get_connection_stats
+from utils.endpoints import WS_URL, api_url
+
+DEPTH_URL = api_url("api/v1/depth")
+
+# Nombre de niveaux conservés dans le cache de profondeur cumulée
+DEPTH_CACHE_LEVELS = 50
+
+class OrderBook:
+    """
+    Carnet L2 d'un symbole : quantités par prix + listes de prix triées.
+    Meilleur bid / ask et spread en O(1), profondeur cumulée recalculée au plus une fois par mise à jour.
+    """
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = {}
+        self.asks = {}
+        self._bid_prices = []  # croissant, meilleur bid en fin de liste
+        self._ask_prices = []  # croissant, meilleur ask en tête de liste
+        self.last_update_id = None
+        self.updated_at = 0.0
+        self._depth_cache = None
+
+    # --- mise à jour ---
+
+    @staticmethod
+    def _set_level(levels: dict, prices: list, price: float, qty: float):
+        if qty <= 0:
+            if levels.pop(price, None) is not None:
+                del prices[bisect_left(prices, price)]
+        else:
+            if price not in levels:
+                prices.insert(bisect_left(prices, price), price)
+            levels[price] = qty
+
+    def load_snapshot(self, bids, asks, last_update_id: int):
+        self.bids.clear()
+        self.asks.clear()
+        self._bid_prices.clear()
+        self._ask_prices.clear()
+        self.apply(bids, asks, last_update_id)
+
+    def apply(self, bids, asks, update_id: int | None = None):
+        """Applique un diff ([prix, quantité] ; quantité nulle = niveau supprimé)."""
+        for price, qty in bids:
+            self._set_level(self.bids, self._bid_prices, float(price), float(qty))
+        for price, qty in asks:
+            self._set_level(self.asks, self._ask_prices, float(price), float(qty))
+        if update_id is not None:
+            self.last_update_id = update_id
+        self.updated_at = time.time()
+        self._depth_cache = None
+
+    # --- lectures ---
+
+    @property
+    def best_bid(self) -> float | None:
+        return self._bid_prices[-1] if self._bid_prices else None
+
+    @property
+    def best_ask(self) -> float | None:
+        return self._ask_prices[0] if self._ask_prices else None
+
+    @property
+    def mid(self) -> float | None:
+        if not self._bid_prices or not self._ask_prices:
+            return None
+        return (self._bid_prices[-1] + self._ask_prices[0]) / 2
+
+    @property
+    def spread(self) -> float | None:
+        if not self._bid_prices or not self._ask_prices:
+            return None
+        return self._ask_prices[0] - self._bid_prices[-1]
+
+    @property
+    def spread_pct(self) -> float | None:
+        mid = self.mid
+        return (self.spread / mid) * 100 if mid else None
+
+    def age(self, now: float | None = None) -> float:
+        return (now or time.time()) - self.updated_at
+
+    def is_ready(self) -> bool:
+        return self.last_update_id is not None and bool(self._bid_prices) and bool(self._ask_prices)
+
+    def _depth(self):
+        """Prix + quantités / notionnels cumulés des N meilleurs niveaux de chaque côté."""
+        if self._depth_cache is None:
+            cache = {}
+            for side, prices in (("ask", self._ask_prices[:DEPTH_CACHE_LEVELS]),
+                                 ("bid", self._bid_prices[::-1][:DEPTH_CACHE_LEVELS])):
+                levels = self.asks if side == "ask" else self.bids
+                cum_qty, cum_notional = [], []
+                total_qty = total_notional = 0.0
+                for price in prices:
+                    total_qty += levels[price]
+                    total_notional += levels[price] * price
+                    cum_qty.append(total_qty)
+                    cum_notional.append(total_notional)
+                cache[side] = (prices, cum_qty, cum_notional)
+            self._depth_cache = cache
+        return self._depth_cache
+
+    def depth(self, side: str, levels: int = 10) -> tuple[float, float]:
+        """(quantité, notionnel) disponibles sur les `levels` meilleurs niveaux du côté 'bid' ou 'ask'."""
+        _, cum_qty, cum_notional = self._depth()[side]
+        if not cum_qty:
+            return 0.0, 0.0
+        i = min(levels, len(cum_qty)) - 1
+        return cum_qty[i], cum_notional[i]
+
+    def impact_price(self, side: str, quantity: float) -> float | None:
+        """
+        Prix moyen d'exécution d'un ordre au marché de `quantity` :
+        side='buy' consomme les asks, side='sell' les bids. None si la profondeur en cache ne suffit pas.
+        """
+        prices, cum_qty, cum_notional = self._depth()["ask" if side == "buy" else "bid"]
+        if not cum_qty or quantity <= 0 or quantity > cum_qty[-1]:
+            return None
+        i = bisect_left(cum_qty, quantity)
+        prev_qty = cum_qty[i - 1] if i else 0.0
+        prev_notional = cum_notional[i - 1] if i else 0.0
+        return (prev_notional + (quantity - prev_qty) * prices[i]) / quantity
+
+    def quantity_for_notional(self, side: str, notional: float) -> float | None:
+        """Quantité obtenue en dépensant `notional` (quote) au marché, None si profondeur insuffisante."""
+        prices, cum_qty, cum_notional = self._depth()["ask" if side == "buy" else "bid"]
+        if not cum_notional or notional <= 0 or notional > cum_notional[-1]:
+            return None
+        i = bisect_right(cum_notional, notional)
+        if i and cum_notional[i - 1] == notional:
+            return cum_qty[i - 1]
+        prev_qty = cum_qty[i - 1] if i else 0.0
+        prev_notional = cum_notional[i - 1] if i else 0.0
+        return prev_qty + (notional - prev_notional) / prices[i]
+
+    def slippage_pct(self, side: str, notional: float) -> float | None:
+        """Écart (%) entre le prix moyen d'un ordre au marché de `notional` et le meilleur prix du côté consommé."""
+        quantity = self.quantity_for_notional(side, notional)
+        if quantity is None:
+            return None
+        best = self.best_ask if side == "buy" else self.best_bid
+        avg = notional / quantity
+        return abs(avg - best) / best * 100
+
+class OrderBookManager:
+    """
+    Maintient un carnet L2 par symbole actif à partir du flux depth.<symbol> :
+    snapshot REST, puis application des diffs dans l'ordre des update ids (resynchronisation sur trou).
+    """
+    def __init__(self, ws_url: str = WS_URL, depth_url: str = DEPTH_URL,
+                 snapshot_retry_base: float = 0.5, snapshot_retry_cap: float = 30.0):
+        self.ws_url = ws_url
+        self.depth_url = depth_url
+        self.books = {}
+        self.symbols = set()
+        self._pending = {}  # symbol -> diffs reçus avant le snapshot
+        self._ws = None
+        self._session = None
+        self._changed = asyncio.Event()
+        self._tasks = set()  # resynchronisations en cours (référence gardée jusqu'à la fin)
+        self.last_message_at = 0.0
+        self.backoff = ReconnectBackoff()
+        self.snapshot_retry_base = snapshot_retry_base
+        self.snapshot_retry_cap = snapshot_retry_cap
+        self.stats = get_connection_stats("depth")
+
+    def get(self, symbol: str, max_age: float | None = None) -> OrderBook | None:
+        """Carnet synchronisé de symbol, ou None s'il n'est pas prêt / trop ancien."""
+        book = self.books.get(symbol)
+        if book is None or not book.is_ready():
+            return None
+        # Un carnet sans diff récent reste valide tant que le flux est vivant
+        if max_age is not None and time.time() - max(book.updated_at, self.last_message_at) > max_age:
+            return None
+        return book
+
+    def set_symbols(self, symbols):
+        """Déclare la liste des symboles à suivre ; les (dés)abonnements sont faits par run()."""
+        symbols = set(symbols)
+        if symbols != self.symbols:
+            self.symbols = symbols
+            self._changed.set()
+
+    async def _fetch_snapshot(self, symbol: str):
+        async with self._session.get(self.depth_url, params={"symbol": symbol}) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    def _schedule_resync(self, symbol: str):
+        """
+        Lance une resynchronisation, sauf si une est déjà en cours : les diffs suivants sont mis en
+        attente dès maintenant, une rafale de diffs hors séquence ne lance donc qu'un snapshot.
+        """
+        if symbol in self._pending:
+            return
+        self._pending[symbol] = []
+        # Carnet désynchronisé : plus servi jusqu'au prochain snapshot
+        self.books.pop(symbol, None)
+        task = asyncio.create_task(self._resync(symbol))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resync(self, symbol: str):
+        """
+        Recharge le snapshot REST puis rejoue les diffs mis en attente pendant la requête.
+        Un snapshot en échec est retenté après un délai exponentiel (ReconnectBackoff), les diffs
+        restant en attente entre-temps : pas de rafale de requêtes REST tant que l'API est indisponible.
+        """
+        self._pending.setdefault(symbol, [])
+        backoff = ReconnectBackoff(base=self.snapshot_retry_base, cap=self.snapshot_retry_cap)
+        while True:
+            try:
+                snapshot = await self._fetch_snapshot(symbol)
+                break
+            except Exception as e:
+                delay = backoff.next_delay()
+                log(f"❌ [{symbol}] Depth snapshot failed: {e}, retry in {delay:.1f}s", level="ERROR")
+                self.books.pop(symbol, None)
+            if symbol not in self.symbols:
+                self._pending.pop(symbol, None)
+                return
+            # Les diffs reçus pendant la requête ratée précèdent le prochain snapshot
+            self._pending[symbol] = []
+            await asyncio.sleep(delay)
+
+        if symbol not in self.symbols:
+            self._pending.pop(symbol, None)
+            return
+
+        book = self.books.setdefault(symbol, OrderBook(symbol))
+        last_id = int(snapshot.get("lastUpdateId", 0))
+        book.load_snapshot(snapshot.get("bids", []), snapshot.get("asks", []), last_id)
+
+        for event in self._pending.pop(symbol, []):
+            if not self._apply_event(symbol, event):
+                # Trou juste après le snapshot : le carnet n'est pas cohérent, nouveau snapshot
+                self._schedule_resync(symbol)
+                return
+        log(f"📚 [{symbol}] Order book synced | bid {book.best_bid} / ask {book.best_ask}", level="DEBUG")
+
+    def _apply_event(self, symbol: str, data: dict) -> bool:
+        """Applique un diff ; renvoie False si une discontinuité impose une resynchronisation."""
+        if symbol in self._pending:
+            self._pending[symbol].append(data)
+            return True
+
+        book = self.books.get(symbol)
+        if book is None or book.last_update_id is None:
+            return False
+
+        first_id = int(data.get("U", 0))
+        last_id = int(data.get("u", 0))
+        if last_id <= book.last_update_id:
+            return True  # déjà contenu dans le snapshot
+        if first_id > book.last_update_id + 1:
+            log(f"⚠️ [{symbol}] Depth sequence gap ({book.last_update_id} -> {first_id}), resync", level="WARNING")
+            return False
+
+        book.apply(data.get("b", []), data.get("a", []), last_id)
+        return True
+
+    async def _update_subscriptions(self, subscribed: set) -> set:
+        to_add = self.symbols - subscribed
+        to_remove = subscribed - self.symbols
+        if to_remove:
+            await self._ws.send(json.dumps({
+                "method": "UNSUBSCRIBE", "params": [f"depth.{s}" for s in to_remove]
+            }))
+            for symbol in to_remove:
+                self.books.pop(symbol, None)
+                self._pending.pop(symbol, None)
+        if to_add:
+            await self._ws.send(json.dumps({
+                "method": "SUBSCRIBE", "params": [f"depth.{s}" for s in to_add]
+            }))
+            for symbol in to_add:
+                self._schedule_resync(symbol)
+            log(f"📚 Subscribed to depth for {sorted(to_add)}", level="INFO")
+        return set(self.symbols)
+
+    async def run(self, stop_event: asyncio.Event | None = None):
+        """Boucle de consommation du flux depth, avec reconnexion."""
+        self._session = aiohttp.ClientSession()
+        try:
+            while stop_event is None or not stop_event.is_set():
+                try:
+                    async with websockets.connect(self.ws_url, ping_interval=20, ping_timeout=20) as ws:
+                        self._ws = ws
+                        self.backoff.connected()
+                        self.stats.on_connect()
+                        subscribed = await self._update_subscriptions(set())
+                        while stop_event is None or not stop_event.is_set():
+                            if self._changed.is_set():
+                                self._changed.clear()
+                                subscribed = await self._update_subscriptions(subscribed)
+                            try:
+                                message = await asyncio.wait_for(ws.recv(), timeout=1)
+                            except asyncio.TimeoutError:
+                                continue
+                            self.last_message_at = time.time()
+                            self.stats.last_message_at = self.last_message_at
+                            msg = json.loads(message)
+                            data = msg.get("data")
+                            if not data or data.get("e") != "depth":
+                                continue
+                            symbol = data.get("s")
+                            if symbol not in subscribed:
+                                continue
+                            if not self._apply_event(symbol, data):
+                                self._schedule_resync(symbol)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    delay = self.backoff.next_delay()
+                    log(f"🔴 Depth websocket error: {e}, reconnecting in {delay:.1f}s", level="ERROR")
+                    self.stats.on_disconnect(e)
+                    self._ws = None
+                    self.books.clear()
+                    self._pending.clear()
+                    await asyncio.sleep(delay)
+        finally:
+            await self._session.close()
+
+# Instance partagée par le moteur live et l'exécution
+ORDER_BOOKS = OrderBookManager()
@@ -0,0 +1,198 @@
+#live/risk_engine.py
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from utils.logger import log
+from config.settings import get_config
+from utils.position_utils import safe_float, get_net_equity
+
+config = get_config()
+
+def utc_day(ts: float | None = None) -> str:
+    return datetime.fromtimestamp(ts if ts is not None else time.time(), tz=timezone.utc).date().isoformat()
+
+class DailyRiskEngine:
+    """
+    Disjoncteur de perte journalière (jour UTC) alimenté par les événements, sans interrogation dédiée.
+
+    Les listes de positions déjà récupérées par le bot (POSITION_LISTENERS) donnent quantité, prix
+    d'entrée et PnL réalisé de chaque position ; les prix de la boucle live mettent à jour le latent.
+    Le PnL du jour d'une position est son PnL total (réalisé + latent) moins sa valeur au début du
+    jour (baseline, 0 pour une position ouverte dans la journée) ; une position disparue transfère son
+    dernier PnL du jour dans `realized`. Une perte dépassant max_daily_loss_pct du capital de début de
+    journée bloque les nouvelles entrées jusqu'au jour suivant (et demande la fermeture de tout si
+    flatten_on_daily_loss). L'état est persisté pour survivre à un redémarrage.
+    """
+    def __init__(self, path: str | None = None, max_loss_pct: float | None = None, save_interval: float = 5.0):
+        self.path = path or config.risk.daily_loss_state_file
+        self.max_loss_pct = max_loss_pct if max_loss_pct is not None else config.risk.max_daily_loss_pct
+        self.save_interval = save_interval
+        self.day = utc_day()
+        self.start_equity = None
+        self.realized = 0.0
+        self.positions = {}  # symbol -> {net, entry, realized, mark, baseline}
+        self.halted = False
+        self.halted_at = None
+        self.flattened = False
+        self._last_save = 0.0
+        self.load()
+
+    # --- Événements ---
+
+    def on_positions(self, raw_positions: list, now: float | None = None):
+        """Synchronise les positions depuis une liste brute de l'API (netQuantity, entryPrice, pnlRealized...)."""
+        self._roll_day(now)
+        seen = set()
+        changed = False
+        for p in raw_positions:
+            symbol = p.get("symbol")
+            net = safe_float(p.get("netQuantity"))
+            if not symbol or net == 0:
+                continue
+            seen.add(symbol)
+            state = self.positions.get(symbol)
+            if state is None:
+                state = self.positions[symbol] = {"baseline": 0.0}
+                changed = True
+            state["net"] = net
+            state["entry"] = safe_float(p.get("entryPrice"))
+            state["realized"] = safe_float(p.get("pnlRealized"))
+            state["mark"] = safe_float(p.get("markPrice"), state.get("mark") or state["entry"])
+        for symbol in set(self.positions) - seen:
+            self.realized += self._position_pnl(self.positions.pop(symbol))
+            changed = True
+        self._evaluate(force_save=changed, now=now)
+
+    def on_price(self, symbol: str, price: float, now: float | None = None):
+        """Met à jour le prix de marque d'une position ouverte (latent en continu entre deux listes)."""
+        state = self.positions.get(symbol)
+        if state is None or not price or price <= 0:
+            return
+        state["mark"] = float(price)
+        self._roll_day(now)
+        self._evaluate(now=now)
+
+    # --- Calculs ---
+
+    @staticmethod
+    def _total(state: dict) -> float:
+        return state.get("realized", 0.0) + (state.get("mark", 0.0) - state.get("entry", 0.0)) * state.get("net", 0.0)
+
+    def _position_pnl(self, state: dict) -> float:
+        return self._total(state) - state.get("baseline", 0.0)
+
+    @property
+    def day_pnl(self) -> float:
+        return self.realized + sum(self._position_pnl(state) for state in self.positions.values())
+
+    @property
+    def loss_limit(self) -> float | None:
+        if not self.start_equity or self.start_equity <= 0 or self.max_loss_pct <= 0:
+            return None
+        return self.start_equity * self.max_loss_pct / 100
+
+    def can_open(self) -> bool:
+        self._roll_day()
+        return not self.halted
+
+    def _roll_day(self, now: float | None = None):
+        day = utc_day(now)
+        if day == self.day:
+            return
+        log(f"📅 Daily PnL {self.day}: {self.day_pnl:+.2f} USDC, new UTC day {day}", level="INFO")
+        self.day = day
+        self.realized = 0.0
+        for state in self.positions.values():
+            state["baseline"] = self._total(state)
+        self.start_equity = None  # recalculé par ensure_equity
+        self.halted = False
+        self.halted_at = None
+        self.flattened = False
+        self.save(force=True)
+
+    def _evaluate(self, force_save: bool = False, now: float | None = None):
+        limit = self.loss_limit
+        pnl = self.day_pnl
+        if not self.halted and limit is not None and pnl <= -limit:
+            self.halted = True
+            self.halted_at = int(now if now is not None else time.time())
+            self.flattened = False
+            log(f"🛑 Daily loss limit reached: {pnl:.2f} USDC <= -{limit:.2f} USDC "
+                f"({self.max_loss_pct}% of {self.start_equity:.2f}), new entries halted until next UTC day",
+                level="ERROR")
+            force_save = True
+        self.save(force=force_save)
+
+    async def ensure_equity(self) -> float | None:
+        """Capital de référence du jour : daily_loss_capital_usdc, sinon netEquity du compte, sinon taille × max_positions."""
+        self._roll_day()
+        if self.start_equity:
+            return self.start_equity
+        equity = config.risk.daily_loss_capital_usdc
+        if not equity or equity <= 0:
+            net_equity = await get_net_equity()
+            # Le capital de début de journée exclut le PnL déjà fait aujourd'hui
+            equity = net_equity - self.day_pnl if net_equity else None
+        if not equity or equity <= 0:
+            equity = config.trading.position_amount_usdc * config.trading.max_positions
+        self.start_equity = float(equity)
+        log(f"💰 Daily loss limit: {self.max_loss_pct}% of {self.start_equity:.2f} USDC", level="INFO")
+        self._evaluate(force_save=True)
+        return self.start_equity
+
+    def mark_flattened(self):
+        self.flattened = True
+        self.save(force=True)
+
+    # --- Persistance ---
+
+    def state(self) -> dict:
+        return {
+            "day": self.day,
+            "start_equity": self.start_equity,
+            "realized": self.realized,
+            "positions": self.positions,
+            "halted": self.halted,
+            "halted_at": self.halted_at,
+            "flattened": self.flattened,
+        }
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            log(f"⚠️ Daily risk state unreadable ({self.path}): {e}, starting fresh", level="WARNING")
+            return
+        self.day = state.get("day", self.day)
+        self.start_equity = state.get("start_equity")
+        self.realized = float(state.get("realized", 0.0))
+        self.positions = state.get("positions", {})
+        self.halted = bool(state.get("halted", False))
+        self.halted_at = state.get("halted_at")
+        self.flattened = bool(state.get("flattened", False))
+        self._roll_day()
+        if self.halted:
+            log(f"🛑 Daily loss limit already reached on {self.day}, new entries stay halted", level="WARNING")
+
+    def save(self, force: bool = False):
+        """Écriture atomique (fichier temporaire + os.replace), au plus une fois par save_interval hors changement d'état."""
+        if not force and time.monotonic() - self._last_save < self.save_interval:
+            return
+        self._last_save = time.monotonic()
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.state(), f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            log(f"⚠️ Cannot save daily risk state ({self.path}): {e}", level="WARNING")
+
+RISK_ENGINE = DailyRiskEngine()
@@ -0,0 +1,107 @@
+#live/trailing_store.py
+import asyncio
+import json
+import os
+import sqlite3
+import time
+
+from utils.logger import log
+from config.settings import get_config
+
+config = get_config()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trailing_state (
+    key TEXT PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+class TrailingStateStore:
+    """
+    Durable trailing-stop state (SQLite in WAL mode), keyed by the exchange position identity
+    (symbol + side), so that max-PnL watermarks survive a restart and a partial fill.
+
+    Writers only record the latest state of a key in memory (put / delete); a background task
+    (run) writes the pending changes in one transaction every flush_interval seconds, in a worker
+    thread, so the live loop never waits on the disk.
+    """
+    def __init__(self, path: str | None = None, flush_interval: float | None = None):
+        self.path = path or config.trading.trailing_state_file
+        self.flush_interval = flush_interval or config.trading.trailing_state_flush_sec
+        self.writes = 0
+        self._pending = {}  # key -> state dict, or None for a deletion
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(SCHEMA)
+            self._conn.commit()
+        return self._conn
+
+    def load(self) -> dict:
+        """Every stored state, key -> dict (called once at startup)."""
+        try:
+            rows = self._connect().execute("SELECT key, data FROM trailing_state").fetchall()
+        except Exception as e:
+            log(f"⚠️ Trailing state store unreadable ({self.path}): {e}", level="WARNING")
+            return {}
+        states = {}
+        for key, data in rows:
+            try:
+                states[key] = json.loads(data)
+            except ValueError:
+                continue
+        return states
+
+    def put(self, key: str, state: dict):
+        self._pending[key] = dict(state)
+
+    def delete(self, key: str):
+        self._pending[key] = None
+
+    def _write(self, batch: dict):
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.executemany(
+                "INSERT INTO trailing_state (key, symbol, side, data, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                [(key, state.get("symbol", ""), state.get("side", ""), json.dumps(state), now)
+                 for key, state in batch.items() if state is not None])
+            conn.executemany("DELETE FROM trailing_state WHERE key = ?",
+                             [(key,) for key, state in batch.items() if state is None])
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        try:
+            await asyncio.to_thread(self._write, batch)
+            self.writes += len(batch)
+        except Exception as e:
+            # Changes that arrived meanwhile win over the failed batch
+            self._pending = {**batch, **self._pending}
+            log(f"⚠️ Trailing state flush failed: {e}", level="WARNING")
+
+    async def run(self, stop_event: asyncio.Event | None = None):
+        while stop_event is None or not stop_event.is_set():
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+        await self.flush()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+TRAILING_STORE = TrailingStateStore()
@@ -11,66 +11,56 @@ import time
 
 from utils.logger import log
 from utils.public import check_table_and_fresh_data, get_last_timestamp, load_symbols_from_file
-from utils.fetch_top_n_volatility_volume import fetch_top_n_volatility_volume
 from backtest.backtest_engine import run_backtest_async, parse_backtest
 from config.settings import load_config
-from utils.update_symbols_periodically import update_symbols_periodically
+from utils.symbol_universe import SYMBOL_UNIVERSE
+from utils.symbol_scoring import SYMBOL_SCORER
+from utils.http_client import close_session
 from utils.watch_symbols_file import watch_symbols_file
-from live.live_engine import handle_live_symbol
+from live.live_engine import handle_live_symbol, on_universe_change, enforce_daily_loss_limit, load_trailing_state
+from live.trailing_store import TRAILING_STORE
+from execute.limit_execution import LIMIT_EXECUTOR
+from ScriptDatabase.pgsql_ohlcv import init_ohlcv_connection
+from live.order_book import ORDER_BOOKS
+from live.correlation import CORRELATIONS
 from utils.i18n import t
+from utils.latency import LATENCY
+from utils.profiler import CycleProfiler, PROFILE_MODES
 
 config = load_config()
 
-# ✅ RÉCUPÉRATION SÉCURISÉE DES SYMBOLES AUTO
-def get_auto_symbols():
-    """Récupère les symboles automatiques avec gestion d'erreur"""
-    try:
-        auto_symbols_result = fetch_top_n_volatility_volume(
-            n=config.strategy.auto_select_top_n
-        )
-        symbols = auto_symbols_result if auto_symbols_result is not None else []
-        log(f"Auto symbols récupérés avec succès: {symbols}", level="DEBUG")
-        return symbols
-    except Exception as e:
-        log(f"Erreur lors de la récupération des auto_symbols: {e}", level="ERROR")
-        return []
+# Profilage des N premiers cycles live (--profile) et rapport de latence périodique
+PROFILER = None
+_last_latency_report = time.time()
 
+def before_live_cycle():
+    if PROFILER is not None:
+        PROFILER.before_cycle()
 
-def calculate_final_symbols():
-    """Calcule la liste finale des symboles en appliquant include/exclude"""
-    auto_symbols = get_auto_symbols()
-    include_symbols = getattr(config.strategy, 'include', []) or []
-    exclude_symbols = getattr(config.strategy, 'exclude', []) or []
-    
-    log(f"Auto symbols: {auto_symbols}", level="DEBUG")
-    log(f"Include symbols: {include_symbols}", level="DEBUG")
-    log(f"Exclude symbols: {exclude_symbols}", level="DEBUG")
-    
-    # Fusion avec include (ajoute les symboles forcés)
-    all_symbols = list(set(auto_symbols + include_symbols))
-    
-    # Application du filtre exclude (retire les symboles interdits)
-    final_symbols = [s for s in all_symbols if s not in exclude_symbols]
-    
-    log(f"Final symbols: {final_symbols}", level="DEBUG")
-    return final_symbols
-
-# ✅ INITIALISATION PROPRE DES SYMBOLES
-symbols_container = {'list': calculate_final_symbols()}
+def after_live_cycle():
+    global _last_latency_report
+    if PROFILER is not None:
+        PROFILER.after_cycle()
+    interval = config.performance.latency_report_interval
+    if interval and time.time() - _last_latency_report >= interval:
+        _last_latency_report = time.time()
+        LATENCY.log_summary()
 
-# Lance le thread de mise à jour périodique des symboles (thread daemon)
-update_symbols_periodically(symbols_container)
-
-async def main_loop(symbols: list, pool, real_run: bool, dry_run: bool, auto_select=False, symbols_container=None, args=None):
+async def main_loop(symbols: list, pool, real_run: bool, dry_run: bool, auto_select=False, universe=None, args=None):
     """Version optimisée de la boucle principale classique"""
     last_symbols_check = 0
     last_api_calls = {}  # timestamp du dernier appel par symbole
     
     while True:
         current_time = time.time()
+        before_live_cycle()
+        try:
+            await enforce_daily_loss_limit(real_run)
+        except Exception as e:
+            log(f"[ERROR] Daily loss limit check failed: {e}", level="ERROR")
         
-        if auto_select and symbols_container:
-            symbols = symbols_container.get('list', [])
+        if auto_select and universe:
+            symbols = universe.symbols
             log(f"Symbols list updated in main_loop: {symbols}", level="DEBUG")
 
         # ✅ UTILISATION DIRECTE DE LA CONFIG au lieu de variables globales
@@ -85,6 +75,8 @@ async def main_loop(symbols: list, pool, real_run: bool, dry_run: bool, auto_sel
                     ignored_symbols.append(symbol)
             
             last_symbols_check = current_time
+            ORDER_BOOKS.set_symbols(active_symbols)
+            await CORRELATIONS.set_symbols(pool, active_symbols)
             
             if active_symbols:
                 log(f"Active symbols ({len(active_symbols)}): {active_symbols}", level="DEBUG")
@@ -122,6 +114,7 @@ async def main_loop(symbols: list, pool, real_run: bool, dry_run: bool, auto_sel
         
         if not active_symbols:
             log(f"No active symbols for this iteration", level="DEBUG")
+        after_live_cycle()
 
         # ✅ CALCUL DYNAMIQUE DE L'ATTENTE basé sur la config
         sleep_time = max(1, config.performance.api_call_interval // len(symbols) if symbols else 1)
@@ -184,26 +177,24 @@ async def get_trailing_stop_info(symbol, side, entry_price, mark_price, amount):
 async def force_close_critical_positions():
     """
     ✅ FONCTION D'URGENCE: Ferme toutes les positions avec PnL ≤ -2%
+    Les ordres partent en parallèle (close_positions_batch) depuis le même instantané des positions.
     """
     try:
         from utils.position_utils import get_real_positions
-        from execute.close_position_percent import close_position_percent
+        from execute.close_position_percent import close_positions_batch
         
         positions = await get_real_positions()
+        critical = [pos for pos in positions if pos['pnl_pct'] <= -2.0]
+        for pos in critical:
+            log(f"🚨 FORCE CLOSING: {pos['symbol']} with PnL {pos['pnl_pct']:.2f}%", level="WARNING")
+
         closed_count = 0
-        
-        for pos in positions:
-            symbol = pos['symbol']
-            pnl_pct = pos['pnl_pct']
-            
-            if pnl_pct <= -2.0:
-                try:
-                    log(f"🚨 FORCE CLOSING: {symbol} with PnL {pnl_pct:.2f}%", level="WARNING")
-                    result = await close_position_percent(symbol, 100.0)
-                    log(f"✅ {symbol} Force closed successfully", level="WARNING")
-                    closed_count += 1
-                except Exception as e:
-                    log(f"❌ {symbol} Force close failed: {e}", level="ERROR")
+        for result in await close_positions_batch(critical):
+            if result["status"] == "Filled":
+                log(f"✅ {result['symbol']} Force closed successfully ({result['latency_ms']:.0f} ms)", level="WARNING")
+                closed_count += 1
+            else:
+                log(f"❌ {result['symbol']} Force close failed: {result['error'] or result['status']}", level="ERROR")
         
         if closed_count > 0:
             log(f"🎯 Force closed {closed_count} critical positions", level="WARNING")
@@ -313,14 +304,20 @@ async def async_main(args):
     pool = await asyncpg.create_pool(
         dsn=config.pg_dsn or os.environ.get("PG_DSN"),
         min_size=config.database.pool_min_size,
-        max_size=config.database.pool_max_size
+        max_size=config.database.pool_max_size,
+        init=init_ohlcv_connection
     )
 
+    # Le scoring de l'auto-sélection lit l'historique 1s local
+    SYMBOL_SCORER.pool = pool
+
     from utils.scan_all_symbols import scan_all_symbols
 
     # Choix des symbols à scanner
     if args.auto_select:
-        initial_symbols = get_auto_symbols()
+        # Abonné avant le premier rafraîchissement : les symboles initiaux sont préparés comme les suivants
+        SYMBOL_UNIVERSE.subscribe(on_universe_change)
+        initial_symbols = list((await SYMBOL_UNIVERSE.refresh()).symbols)
     elif args.symbols:
         initial_symbols = args.symbols.split(",")
     else:
@@ -376,10 +373,15 @@ async def async_main(args):
                 
                 while not stop_event.is_set():
                     current_time = time.time()
+                    before_live_cycle()
+                    try:
+                        await enforce_daily_loss_limit(real_run)
+                    except Exception as e:
+                        log(f"[ERROR] Daily loss limit check failed: {e}", level="ERROR")
                     
                     # Détermination des symboles à traiter
                     if args.auto_select:
-                        current_symbols = symbols_container.get('list', [])
+                        current_symbols = SYMBOL_UNIVERSE.symbols
                     elif args.symbols:
                         current_symbols = args.symbols.split(",")
                     else:
@@ -404,6 +406,8 @@ async def async_main(args):
                         log(f"[DEBUG] Ignored symbols list: {ignored_symbols}", level="INFO")
                         
                         last_symbols_check = current_time
+                        ORDER_BOOKS.set_symbols(active_symbols)
+                        await CORRELATIONS.set_symbols(pool, active_symbols)
                         
                         if active_symbols:
                             log(f"Active symbols ({len(active_symbols)}): {active_symbols}", level="DEBUG")
@@ -440,9 +444,21 @@ async def async_main(args):
                             last_api_calls[symbol] = current_time
                         except Exception as e:
                             log(f"[ERROR] Erreur lors du traitement de {symbol}: {e}", level="ERROR")
+                    after_live_cycle()
                     
                     await asyncio.sleep(config.performance.dashboard_refresh_interval)
 
+            # Carnets L2 des symboles actifs (spread / profondeur pour l'exécution)
+            order_book_task = asyncio.create_task(ORDER_BOOKS.run(stop_event))
+
+            # État des trailing stops repris après un redémarrage, écrit par lots en tâche de fond
+            load_trailing_state()
+            trailing_store_task = asyncio.create_task(TRAILING_STORE.run(stop_event))
+
+            # Univers auto-select rafraîchi dans la boucle ; le live engine prépare / libère l'état des symboles du diff
+            if args.auto_select:
+                universe_task = asyncio.create_task(SYMBOL_UNIVERSE.run(stop_event))
+
             # Choix du mode textdashboard ou mode classique
             if getattr(args, "mode", None) == "textdashboard":
                 task = asyncio.create_task(dashboard_loop())
@@ -456,7 +472,7 @@ async def async_main(args):
                             real_run=real_run,
                             dry_run=dry_run,
                             auto_select=True,
-                            symbols_container=symbols_container,
+                            universe=SYMBOL_UNIVERSE,
                             args=args
                         )
                     )
@@ -476,6 +492,13 @@ async def async_main(args):
     except Exception:
         traceback.print_exc()
     finally:
+        if PROFILER is not None:
+            PROFILER.stop()
+        LATENCY.log_summary()
+        LIMIT_EXECUTOR.log_summary()
+        await TRAILING_STORE.flush()
+        TRAILING_STORE.close()
+        await close_session()
         await pool.close()
         log(f"Connection pool closed, program terminated", level="ERROR")
 
@@ -493,6 +516,9 @@ if __name__ == "__main__":
     parser.add_argument("--api-interval", type=int, default=None, help="API call interval in seconds")
     parser.add_argument("--dashboard-interval", type=int, default=None, help="Dashboard refresh interval in seconds")
     parser.add_argument("--symbols-check-interval", type=int, default=None, help="Symbols status check interval in seconds")
+    parser.add_argument("--profile", type=int, default=0, metavar="N", help="Profile the first N live loop cycles")
+    parser.add_argument("--profile-mode", type=str, default="sample", choices=PROFILE_MODES, help="Profiler: sample (folded stacks for flamegraph) or cprofile")
+    parser.add_argument("--profile-output", type=str, default=None, help="Profile output file (default: logs/profile_<date>.folded|.prof)")
     args = parser.parse_args()
 
     # ✅ RECHARGEMENT DE CONFIG SI FICHIER DIFFÉRENT SPÉCIFIÉ
@@ -506,6 +532,8 @@ if __name__ == "__main__":
         config.performance.dashboard_refresh_interval = args.dashboard_interval
     if args.symbols_check_interval:
         config.performance.symbols_check_interval = args.symbols_check_interval
+    if args.profile:
+        PROFILER = CycleProfiler(args.profile, args.profile_mode, args.profile_output)
 
     if args.strategie is None:
         args.strategie = config.strategy.default_strategy
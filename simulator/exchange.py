@@ -0,0 +1,493 @@
+# simulator/exchange.py
+"""
+État de l'exchange simulé : marchés, bougies, carnet synthétique autour du dernier prix,
+exécution des ordres (market, limit, post-only, reduce-only, déclenchement) et positions perp.
+Les charges utiles reprennent les champs de l'API Backpack lus par le bot.
+"""
+import itertools
+import time
+
+import numpy as np
+
+from simulator.tape import price_filters
+
+KLINE_INTERVALS_SEC = {
+    "1m": 60, "3m": 180, "5m": 300, "15m": 900, "30m": 1800,
+    "1h": 3600, "2h": 7200, "4h": 14400, "6h": 21600, "8h": 28800, "12h": 43200,
+    "1d": 86400, "3d": 259200, "1w": 604800,
+}
+
+class SimError(Exception):
+    """Refus d'ordre renvoyé en HTTP 400 avec le code d'erreur Backpack."""
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+def _fmt(value: float, step: float | None = None) -> str:
+    if step:
+        decimals = max(0, -int(np.floor(np.log10(step))))
+        return f"{value:.{decimals}f}"
+    return f"{value:.10g}"
+
+def _fmt_step(step: float) -> str:
+    """Pas au format de l'API ("0.00001", jamais "1e-05")."""
+    return np.format_float_positional(step, trim="-")
+
+class SimMarket:
+    """Un marché perp : dernier prix, bougies 1 min et carnet synthétique."""
+    def __init__(self, symbol: str, price: float, depth_levels: int = 20, spread_bps: float = 2.0,
+                 level_notional: float = 5000.0):
+        self.symbol = symbol
+        self.tick_size, self.step_size = price_filters(price)
+        self.last_price = price
+        self.last_trade_ms = None
+        self.depth_levels = depth_levels
+        self.spread_bps = spread_bps
+        self.level_notional = level_notional
+        self.candles = {}  # début de minute (ms) -> [open, high, low, close, volume, quote_volume, trades]
+        self.update_id = 0
+        self._book = None  # (bids, asks) du dernier prix
+
+    def round_price(self, price: float) -> float:
+        return round(round(price / self.tick_size) * self.tick_size, 12)
+
+    def add_trade(self, price: float, size: float, ts_ms: int):
+        minute = ts_ms - ts_ms % 60_000
+        candle = self.candles.get(minute)
+        if candle is None:
+            self.candles[minute] = [price, price, price, price, size, price * size, 1]
+        else:
+            if price > candle[1]:
+                candle[1] = price
+            if price < candle[2]:
+                candle[2] = price
+            candle[3] = price
+            candle[4] += size
+            candle[5] += price * size
+            candle[6] += 1
+        if price != self.last_price:
+            self._book = None
+            self.update_id += 1
+        self.last_price = price
+        self.last_trade_ms = ts_ms
+
+    def book(self) -> tuple[list, list]:
+        """Niveaux ([prix, qté] triés du meilleur au pire) autour du dernier prix, quantités croissantes."""
+        if self._book is None:
+            half_spread = max(self.tick_size, self.last_price * self.spread_bps / 20_000)
+            step = max(self.tick_size, self.last_price * 0.0002)
+            bids, asks = [], []
+            for i in range(self.depth_levels):
+                qty = self.level_notional * (1 + i * 0.5) / self.last_price
+                qty = max(self.step_size, round(qty / self.step_size) * self.step_size)
+                bids.append([self.round_price(self.last_price - half_spread - i * step), qty])
+                asks.append([self.round_price(self.last_price + half_spread + i * step), qty])
+            self._book = (bids, asks)
+        return self._book
+
+    def sweep(self, side: str, quantity: float, limit_price: float | None = None) -> tuple[float, float]:
+        """Consomme le carnet synthétique : (quantité exécutée, prix moyen), borné par limit_price."""
+        bids, asks = self.book()
+        levels = asks if side == "Bid" else bids
+        filled = 0.0
+        cost = 0.0
+        for price, qty in levels:
+            if limit_price is not None and ((side == "Bid" and price > limit_price) or (side == "Ask" and price < limit_price)):
+                break
+            take = min(qty, quantity - filled)
+            filled += take
+            cost += take * price
+            if filled >= quantity - 1e-12:
+                break
+        return filled, (cost / filled if filled else 0.0)
+
+    def seed_history(self, hours: float, end_ms: int, seed: int = 0, volatility: float = 0.0004):
+        """Bougies 1 min synthétiques sur `hours` heures finissant au dernier prix (klines, RSI, tickers 24h)."""
+        minutes = int(hours * 60)
+        if minutes <= 0:
+            return
+        rng = np.random.default_rng(seed)
+        closes = np.exp(np.cumsum(rng.normal(0.0, volatility * np.sqrt(60), minutes)))
+        closes *= self.last_price / closes[-1]
+        start = end_ms - end_ms % 60_000 - minutes * 60_000
+        prev = closes[0]
+        for i, close in enumerate(closes):
+            wick = abs(rng.normal(0.0, volatility)) * close
+            volume = rng.gamma(2.0, 50.0) * 100.0 / close
+            self.candles[start + i * 60_000] = [prev, max(prev, close) + wick, min(prev, close) - wick, close,
+                                               volume, volume * close, int(rng.integers(10, 200))]
+            prev = close
+
+class SimExchange:
+    """Marchés, ordres ouverts et positions d'un compte unique."""
+    def __init__(self, prices: dict, depth_levels: int = 20, spread_bps: float = 2.0, fee_bps: float = 5.0,
+                 level_notional: float = 5000.0, starting_balance: float = 10_000.0):
+        self.markets = {
+            symbol: SimMarket(symbol, price, depth_levels, spread_bps, level_notional)
+            for symbol, price in prices.items()
+        }
+        self.fee_bps = fee_bps
+        self.balance = starting_balance
+        self.positions = {}    # symbol -> {"net", "entry", "realized"}
+        self.open_orders = {}  # id -> ordre (limit au repos ou déclenchement en attente)
+        self.fills = 0
+        self.orders_received = 0
+        self.orders_rejected = 0
+        self._ids = itertools.count(int(time.time() * 1000))
+
+    def market(self, symbol: str) -> SimMarket:
+        market = self.markets.get(symbol)
+        if market is None:
+            raise SimError("INVALID_MARKET", f"Market not found: {symbol}")
+        return market
+
+    # --- Flux de marché ---
+
+    def on_trade(self, ts_ms: int, symbol: str, price: float, size: float) -> list[dict]:
+        """Applique un trade de la bande ; renvoie les ordres au repos exécutés ou déclenchés."""
+        market = self.markets.get(symbol)
+        if market is None:
+            return []
+        market.add_trade(price, size, ts_ms)
+        if not self.open_orders:
+            return []
+        touched = []
+        for order in list(self.open_orders.values()):
+            if order["symbol"] != symbol:
+                continue
+            if order["status"] == "TriggerPending":
+                trigger = order["_trigger"]
+                if (order["_trigger_above"] and price >= trigger) or (not order["_trigger_above"] and price <= trigger):
+                    del self.open_orders[order["id"]]
+                    order["status"] = "New"
+                    order["triggeredAt"] = ts_ms
+                    try:
+                        self._execute(market, order)
+                    except SimError:
+                        pass  # post-only déclenché qui croiserait : annulé par _execute
+                    touched.append(order)
+            elif order["orderType"] == "Limit":
+                limit = order["_limit"]
+                if (order["side"] == "Bid" and price <= limit) or (order["side"] == "Ask" and price >= limit):
+                    remaining = order["_quantity"] - order["_executed"]
+                    self._fill(market, order, remaining, limit)
+                    touched.append(order)
+        return touched
+
+    # --- Ordres ---
+
+    def execute_order(self, params: dict) -> dict:
+        self.orders_received += 1
+        try:
+            return self._place(params)
+        except SimError:
+            self.orders_rejected += 1
+            raise
+
+    def _place(self, params: dict) -> dict:
+        market = self.market(params.get("symbol"))
+        side = params.get("side")
+        if side not in ("Bid", "Ask"):
+            raise SimError("INVALID_ORDER", f"Invalid side: {side}")
+        order_type = params.get("orderType")
+        if order_type not in ("Market", "Limit"):
+            raise SimError("INVALID_ORDER", f"Invalid order type: {order_type}")
+
+        quantity = float(params.get("quantity") or 0)
+        quote_quantity = float(params.get("quoteQuantity") or 0)
+        if quantity <= 0 and quote_quantity > 0 and order_type == "Market":
+            quantity = quote_quantity / market.last_price
+        if quantity <= 0:
+            raise SimError("INVALID_ORDER", "Quantity must be positive")
+        if abs(quantity / market.step_size - round(quantity / market.step_size)) > 1e-6:
+            raise SimError("INVALID_ORDER", f"Quantity decimal too long (stepSize {_fmt(market.step_size)})")
+
+        reduce_only = bool(params.get("reduceOnly"))
+        if reduce_only:
+            net = self.positions.get(market.symbol, {}).get("net", 0.0)
+            reducing = (side == "Ask" and net > 0) or (side == "Bid" and net < 0)
+            if not reducing:
+                raise SimError("INVALID_ORDER", "Reduce only order not reduced")
+            quantity = min(quantity, abs(net))
+
+        limit = float(params["price"]) if params.get("price") else None
+        if order_type == "Limit" and limit is None:
+            raise SimError("INVALID_ORDER", "Limit order requires a price")
+        if limit is not None and abs(limit / market.tick_size - round(limit / market.tick_size)) > 1e-6:
+            raise SimError("INVALID_ORDER", f"Price decimal too long (tickSize {_fmt(market.tick_size)})")
+
+        order = {
+            "id": str(next(self._ids)),
+            "clientId": params.get("clientId"),
+            "symbol": market.symbol,
+            "side": side,
+            "orderType": order_type,
+            "quantity": _fmt(quantity, market.step_size),
+            "executedQuantity": "0",
+            "executedQuoteQuantity": "0",
+            "price": params.get("price"),
+            "triggerPrice": params.get("triggerPrice"),
+            "timeInForce": params.get("timeInForce", "GTC"),
+            "postOnly": bool(params.get("postOnly")),
+            "reduceOnly": reduce_only,
+            "selfTradePrevention": params.get("selfTradePrevention", "RejectTaker"),
+            "status": "New",
+            "createdAt": int(time.time() * 1000),
+            "_quantity": quantity,
+            "_executed": 0.0,
+            "_quote": 0.0,
+            "_limit": limit,
+        }
+
+        if params.get("triggerPrice"):
+            trigger = float(params["triggerPrice"])
+            order["status"] = "TriggerPending"
+            order["_trigger"] = trigger
+            order["_trigger_above"] = trigger > market.last_price
+            self.open_orders[order["id"]] = order
+            return self.public_order(order)
+
+        self._execute(market, order)
+        return self.public_order(order)
+
+    def _execute(self, market: SimMarket, order: dict):
+        side = order["side"]
+        limit = order["_limit"]
+        if order["orderType"] == "Limit":
+            bids, asks = market.book()
+            best = asks[0][0] if side == "Bid" else bids[0][0]
+            crosses = (side == "Bid" and limit >= best) or (side == "Ask" and limit <= best)
+            if order["postOnly"] and crosses:
+                order["status"] = "Cancelled"
+                raise SimError("INVALID_ORDER", "Order would immediately match and take")
+            if not crosses:
+                if order["timeInForce"] in ("IOC", "FOK"):
+                    order["status"] = "Cancelled"
+                else:
+                    self.open_orders[order["id"]] = order
+                return
+
+        filled, avg_price = market.sweep(side, order["_quantity"], limit)
+        if order["timeInForce"] == "FOK" and filled < order["_quantity"] - 1e-12:
+            order["status"] = "Cancelled"
+            return
+        if filled > 0:
+            self._fill(market, order, filled, avg_price)
+        remaining = order["_quantity"] - order["_executed"]
+        if remaining > 1e-12:
+            if order["orderType"] == "Limit" and order["timeInForce"] == "GTC":
+                self.open_orders[order["id"]] = order
+            else:
+                order["status"] = "Cancelled" if order["_executed"] == 0 else "Filled"
+
+    def _fill(self, market: SimMarket, order: dict, quantity: float, price: float):
+        if order["reduceOnly"]:
+            net = self.positions.get(market.symbol, {}).get("net", 0.0)
+            quantity = min(quantity, abs(net))
+        if quantity <= 0:
+            self.open_orders.pop(order["id"], None)
+            order["status"] = "Cancelled"
+            return
+        order["_executed"] += quantity
+        order["_quote"] += quantity * price
+        order["executedQuantity"] = _fmt(order["_executed"], market.step_size)
+        order["executedQuoteQuantity"] = _fmt(order["_quote"])
+        if order["_executed"] >= order["_quantity"] - 1e-12:
+            order["status"] = "Filled"
+            self.open_orders.pop(order["id"], None)
+        else:
+            order["status"] = "PartiallyFilled"
+        self._apply_fill(market.symbol, order["side"], quantity, price)
+        self.fills += 1
+
+    def _apply_fill(self, symbol: str, side: str, quantity: float, price: float):
+        position = self.positions.setdefault(symbol, {"net": 0.0, "entry": 0.0, "realized": 0.0})
+        signed = quantity if side == "Bid" else -quantity
+        net = position["net"]
+        if net == 0:
+            position["realized"] = 0.0  # comme Backpack, le PnL réalisé est propre à chaque position
+        fee = quantity * price * self.fee_bps / 10_000
+        position["realized"] -= fee
+        self.balance -= fee
+        if net == 0 or (net > 0) == (signed > 0):
+            position["entry"] = (position["entry"] * abs(net) + price * quantity) / (abs(net) + quantity)
+        else:
+            closed = min(quantity, abs(net))
+            pnl = closed * (price - position["entry"]) * (1 if net > 0 else -1)
+            position["realized"] += pnl
+            self.balance += pnl
+            if quantity > abs(net):
+                position["entry"] = price  # retournement : le reliquat ouvre une position inverse
+        position["net"] = round(net + signed, 12)
+        if position["net"] == 0:
+            position["entry"] = 0.0
+
+    def cancel_order(self, symbol: str, order_id: str | None = None, client_id=None) -> dict:
+        for order in list(self.open_orders.values()):
+            if order["symbol"] == symbol and (order["id"] == order_id or (client_id is not None and order["clientId"] == client_id)):
+                del self.open_orders[order["id"]]
+                order["status"] = "Cancelled"
+                return self.public_order(order)
+        raise SimError("RESOURCE_NOT_FOUND", "Order not found")
+
+    def cancel_all(self, symbol: str) -> list[dict]:
+        cancelled = []
+        for order in list(self.open_orders.values()):
+            if order["symbol"] == symbol:
+                del self.open_orders[order["id"]]
+                order["status"] = "Cancelled"
+                cancelled.append(self.public_order(order))
+        return cancelled
+
+    def get_open_orders(self, symbol: str | None = None) -> list[dict]:
+        return [self.public_order(o) for o in self.open_orders.values() if symbol is None or o["symbol"] == symbol]
+
+    @staticmethod
+    def public_order(order: dict) -> dict:
+        return {k: v for k, v in order.items() if not k.startswith("_")}
+
+    # --- Charges utiles REST ---
+
+    def positions_payload(self) -> list[dict]:
+        payload = []
+        for symbol, position in self.positions.items():
+            net = position["net"]
+            if net == 0:
+                continue
+            mark = self.markets[symbol].last_price
+            unrealized = (mark - position["entry"]) * net
+            payload.append({
+                "symbol": symbol,
+                "netQuantity": _fmt(net),
+                "netExposureQuantity": _fmt(abs(net)),
+                "netExposureNotional": _fmt(abs(net) * mark),
+                "entryPrice": _fmt(position["entry"]),
+                "breakEvenPrice": _fmt(position["entry"]),
+                "markPrice": _fmt(mark),
+                "pnlRealized": _fmt(position["realized"]),
+                "pnlUnrealized": _fmt(unrealized),
+                "netCost": _fmt(position["entry"] * net),
+            })
+        return payload
+
+    def markets_payload(self) -> list[dict]:
+        return [{
+            "symbol": m.symbol,
+            "baseSymbol": m.symbol.split("_")[0],
+            "quoteSymbol": "USDC",
+            "marketType": "PERP",
+            "orderBookState": "Open",
+            "filters": {
+                "price": {"tickSize": _fmt_step(m.tick_size), "minPrice": _fmt_step(m.tick_size)},
+                "quantity": {"stepSize": _fmt_step(m.step_size), "minQuantity": _fmt_step(m.step_size)},
+            },
+        } for m in self.markets.values()]
+
+    def ticker(self, symbol: str, now_ms: int | None = None) -> dict:
+        market = self.market(symbol)
+        now_ms = now_ms or int(time.time() * 1000)
+        window = [c for start, c in market.candles.items() if start >= now_ms - 86_400_000]
+        first = window[0][0] if window else market.last_price
+        change = market.last_price - first
+        return {
+            "symbol": symbol,
+            "firstPrice": _fmt(first),
+            "lastPrice": _fmt(market.last_price),
+            "priceChange": _fmt(change),
+            "priceChangePercent": _fmt(change / first if first else 0.0),
+            "high": _fmt(max((c[1] for c in window), default=market.last_price)),
+            "low": _fmt(min((c[2] for c in window), default=market.last_price)),
+            "volume": _fmt(sum(c[4] for c in window)),
+            "quoteVolume": _fmt(sum(c[5] for c in window)),
+            "trades": str(sum(c[6] for c in window)),
+        }
+
+    def tickers(self) -> list[dict]:
+        now_ms = int(time.time() * 1000)
+        return [self.ticker(symbol, now_ms) for symbol in self.markets]
+
+    def klines(self, symbol: str, interval: str, start_time: int, end_time: int | None = None) -> list[list]:
+        """
+        Bougies [start_ms, open, high, low, close, volume, close_ms, quote_volume, trades, 0, 0, 0],
+        format lu par backfill_pgsql, gap_index et rsi_calculator. start/end en secondes ou en ms.
+        """
+        market = self.market(symbol)
+        seconds = KLINE_INTERVALS_SEC.get(interval)
+        if seconds is None:
+            raise SimError("INVALID_CLIENT_REQUEST", f"Invalid interval: {interval}")
+        to_ms = lambda value: value * 1000 if value < 10**11 else value
+        start_ms = to_ms(int(start_time))
+        end_ms = to_ms(int(end_time)) if end_time else int(time.time() * 1000)
+        bucket_ms = seconds * 1000
+        first_bucket = start_ms - start_ms % bucket_ms
+        buckets = {}
+        for minute in sorted(market.candles):
+            if minute < first_bucket or minute > end_ms:
+                continue
+            o, h, l, c, v, q, n = market.candles[minute]
+            start = minute - minute % bucket_ms
+            bucket = buckets.get(start)
+            if bucket is None:
+                buckets[start] = [o, h, l, c, v, q, n]
+            else:
+                bucket[1] = max(bucket[1], h)
+                bucket[2] = min(bucket[2], l)
+                bucket[3] = c
+                bucket[4] += v
+                bucket[5] += q
+                bucket[6] += n
+        return [[start, _fmt(b[0]), _fmt(b[1]), _fmt(b[2]), _fmt(b[3]), _fmt(b[4]), start + bucket_ms - 1,
+                 _fmt(b[5]), b[6], "0", "0", "0"] for start, b in sorted(buckets.items())]
+
+    def depth(self, symbol: str) -> dict:
+        market = self.market(symbol)
+        bids, asks = market.book()
+        return {
+            "bids": [[_fmt(p), _fmt(q)] for p, q in reversed(bids)],
+            "asks": [[_fmt(p), _fmt(q)] for p, q in asks],
+            "lastUpdateId": str(market.update_id),
+            "timestamp": int(time.time() * 1000),
+        }
+
+    def capital(self) -> dict:
+        return {"USDC": {"available": _fmt(self.balance), "locked": "0", "staked": "0"}}
+
+    def collateral(self) -> dict:
+        unrealized = sum(float(p["pnlUnrealized"]) for p in self.positions_payload())
+        equity = self.balance + unrealized
+        return {"assetsValue": _fmt(self.balance), "netEquity": _fmt(equity), "netEquityAvailable": _fmt(equity),
+                "pnlUnrealized": _fmt(unrealized)}
+
+def trade_message(ts_ms: int, symbol: str, price: float, size: float, is_buyer_maker: bool, trade_id: int) -> dict:
+    """Événement du stream trade.<symbol>."""
+    return {
+        "stream": f"trade.{symbol}",
+        "data": {
+            "e": "trade", "E": ts_ms * 1000, "s": symbol,
+            "p": _fmt(price), "q": _fmt(size), "b": str(trade_id * 2), "a": str(trade_id * 2 + 1),
+            "t": trade_id, "T": ts_ms, "m": is_buyer_maker,
+        },
+    }
+
+def depth_message(market: SimMarket, previous: tuple | None, first_id: int) -> dict | None:
+    """Diff du stream depth.<symbol> entre deux carnets synthétiques (quantité "0" = niveau supprimé)."""
+    bids, asks = market.book()
+    if previous is not None and previous == (bids, asks):
+        return None
+
+    def diff(old, new):
+        new_prices = {p for p, _ in new}
+        changes = [[_fmt(p), "0"] for p, _ in (old or []) if p not in new_prices]
+        return changes + [[_fmt(p), _fmt(q)] for p, q in new]
+
+    now_us = int(time.time() * 1_000_000)
+    return {
+        "stream": f"depth.{market.symbol}",
+        "data": {
+            "e": "depth", "E": now_us, "s": market.symbol,
+            "a": diff(previous[1] if previous else None, asks),
+            "b": diff(previous[0] if previous else None, bids),
+            "U": first_id, "u": market.update_id, "T": now_us,
+        },
+    }
@@ -0,0 +1,326 @@
+# simulator/server.py
+"""
+Exchange simulé local (REST + websocket au format Backpack) pour tester le bot et l'ingester
+sans toucher l'API réelle. Les clients y sont redirigés par la config exchange.api_url / exchange.ws_url.
+
+Usage : python3 -m simulator.server --symbols SOL_USDC_PERP,BTC_USDC_PERP --speed 100
+"""
+import argparse
+import asyncio
+import base64
+import json
+import random
+import time
+
+from aiohttp import web, WSMsgType
+
+from utils.logger import log
+from utils.latency import LatencyHistogram
+from simulator.exchange import SimExchange, SimError, trade_message, depth_message
+from simulator.tape import TapeReplayer, load_tape_csv, synthetic_tape, tape_symbols, first_prices, DEFAULT_PRICES
+
+DEFAULT_SYMBOLS = "BTC_USDC_PERP,ETH_USDC_PERP,SOL_USDC_PERP"
+STATS_LOG_INTERVAL_SEC = 30
+
+class SimServer:
+    """Routes REST, diffusion websocket (trade.* et depth.*) et rejeu de la bande."""
+    def __init__(self, exchange: SimExchange, replayer: TapeReplayer, order_latency_ms: float = 0.0,
+                 latency_jitter_ms: float = 0.0, depth_interval: float = 0.1, client_queue: int = 10_000):
+        self.exchange = exchange
+        self.replayer = replayer
+        self.order_latency_ms = order_latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.depth_interval = depth_interval
+        self.client_queue = client_queue
+        self.subscribers = {}  # stream -> {queue}
+        self.clients = set()
+        self.ws_sent = 0
+        self.ws_dropped = 0
+        self.rest_requests = 0
+        self.order_latency = LatencyHistogram()
+        self._depth_state = {}  # symbol -> (carnet envoyé, dernier update id)
+
+    # --- Websocket ---
+
+    def _broadcast(self, stream: str, message: dict):
+        queues = self.subscribers.get(stream)
+        if not queues:
+            return
+        text = json.dumps(message, separators=(",", ":"))
+        for queue in queues:
+            try:
+                queue.put_nowait(text)
+            except asyncio.QueueFull:
+                self.ws_dropped += 1  # client trop lent : le message est perdu, comme une déconnexion côté Backpack
+
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse(autoping=True)
+        await ws.prepare(request)
+        queue = asyncio.Queue(maxsize=self.client_queue)
+        streams = set()
+        self.clients.add(queue)
+
+        async def writer():
+            while True:
+                text = await queue.get()
+                await ws.send_str(text)
+                self.ws_sent += 1
+
+        writer_task = asyncio.create_task(writer())
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    payload = json.loads(msg.data)
+                except ValueError:
+                    continue
+                method = payload.get("method")
+                params = payload.get("params") or []
+                if method == "SUBSCRIBE":
+                    for stream in params:
+                        streams.add(stream)
+                        self.subscribers.setdefault(stream, set()).add(queue)
+                elif method == "UNSUBSCRIBE":
+                    for stream in params:
+                        streams.discard(stream)
+                        self.subscribers.get(stream, set()).discard(queue)
+        finally:
+            writer_task.cancel()
+            for stream in streams:
+                self.subscribers.get(stream, set()).discard(queue)
+            self.clients.discard(queue)
+        return ws
+
+    async def on_batch(self, batch):
+        for ts_ms, symbol, price, size, is_buyer_maker, trade_id in batch:
+            self.exchange.on_trade(ts_ms, symbol, price, size)
+            if f"trade.{symbol}" in self.subscribers:
+                self._broadcast(f"trade.{symbol}", trade_message(ts_ms, symbol, price, size, is_buyer_maker, trade_id))
+
+    async def depth_loop(self, stop_event: asyncio.Event):
+        while not stop_event.is_set():
+            for symbol, market in self.exchange.markets.items():
+                if not self.subscribers.get(f"depth.{symbol}"):
+                    continue
+                state = self._depth_state.get(symbol)
+                if state is None:
+                    # Premier passage : référence seulement, les clients partent du snapshot REST
+                    self._depth_state[symbol] = (market.book(), market.update_id)
+                    continue
+                previous, last_id = state
+                if last_id == market.update_id:
+                    continue
+                message = depth_message(market, previous, last_id + 1)
+                if message is not None:
+                    self._broadcast(f"depth.{symbol}", message)
+                self._depth_state[symbol] = (market.book(), market.update_id)
+            await asyncio.sleep(self.depth_interval)
+
+    # --- REST ---
+
+    @staticmethod
+    def _error(e: SimError, status: int = 400):
+        return web.json_response({"code": e.code, "message": e.message}, status=status)
+
+    @web.middleware
+    async def count_requests(self, request, handler):
+        self.rest_requests += 1
+        try:
+            return await handler(request)
+        except SimError as e:
+            return self._error(e)
+
+    async def handle_markets(self, request):
+        return web.json_response(self.exchange.markets_payload())
+
+    async def handle_ticker(self, request):
+        return web.json_response(self.exchange.ticker(request.query.get("symbol", "")))
+
+    async def handle_tickers(self, request):
+        return web.json_response(self.exchange.tickers())
+
+    async def handle_klines(self, request):
+        q = request.query
+        try:
+            start_time = int(q.get("startTime", 0))
+            end_time = int(q["endTime"]) if q.get("endTime") else None
+        except ValueError:
+            raise SimError("INVALID_CLIENT_REQUEST", "startTime / endTime must be integers")
+        return web.json_response(self.exchange.klines(q.get("symbol", ""), q.get("interval", "1m"), start_time, end_time))
+
+    async def handle_depth(self, request):
+        return web.json_response(self.exchange.depth(request.query.get("symbol", "")))
+
+    async def handle_positions(self, request):
+        return web.json_response(self.exchange.positions_payload())
+
+    async def handle_capital(self, request):
+        return web.json_response(self.exchange.capital())
+
+    async def handle_collateral(self, request):
+        return web.json_response(self.exchange.collateral())
+
+    async def _order_delay(self):
+        delay_ms = self.order_latency_ms + random.uniform(0, self.latency_jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+    async def handle_execute_order(self, request):
+        started = time.perf_counter()
+        params = await request.json()
+        await self._order_delay()
+        try:
+            return web.json_response(self.exchange.execute_order(params))
+        finally:
+            self.order_latency.record((time.perf_counter() - started) * 1000)
+
+    async def handle_cancel_order(self, request):
+        params = await request.json()
+        await self._order_delay()
+        return web.json_response(self.exchange.cancel_order(params.get("symbol", ""), params.get("orderId"), params.get("clientId")))
+
+    async def handle_get_order(self, request):
+        q = request.query
+        for order in self.exchange.get_open_orders(q.get("symbol")):
+            if order["id"] == q.get("orderId") or (q.get("clientId") and str(order["clientId"]) == q.get("clientId")):
+                return web.json_response(order)
+        raise SimError("RESOURCE_NOT_FOUND", "Order not found")
+
+    async def handle_open_orders(self, request):
+        return web.json_response(self.exchange.get_open_orders(request.query.get("symbol")))
+
+    async def handle_cancel_all(self, request):
+        params = await request.json()
+        return web.json_response(self.exchange.cancel_all(params.get("symbol", "")))
+
+    def stats(self) -> dict:
+        h = self.order_latency
+        return {
+            "replayed_trades": self.replayer.replayed,
+            "laps": self.replayer.laps,
+            "replay_lag_ms": round(self.replayer.lag_ms, 1),
+            "speed": self.replayer.speed,
+            "ws_clients": len(self.clients),
+            "ws_sent": self.ws_sent,
+            "ws_dropped": self.ws_dropped,
+            "rest_requests": self.rest_requests,
+            "orders_received": self.exchange.orders_received,
+            "orders_rejected": self.exchange.orders_rejected,
+            "fills": self.exchange.fills,
+            "open_orders": len(self.exchange.open_orders),
+            "order_latency_ms": {"p50": h.percentile(50), "p95": h.percentile(95), "p99": h.percentile(99), "max": h.max_ms},
+            "positions": self.exchange.positions_payload(),
+        }
+
+    async def handle_stats(self, request):
+        return web.json_response(self.stats())
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.count_requests])
+        app.router.add_get("/ws", self.handle_ws)
+        app.router.add_get("/api/v1/markets", self.handle_markets)
+        app.router.add_get("/api/v1/ticker", self.handle_ticker)
+        app.router.add_get("/api/v1/tickers", self.handle_tickers)
+        app.router.add_get("/api/v1/klines", self.handle_klines)
+        app.router.add_get("/api/v1/depth", self.handle_depth)
+        app.router.add_get("/api/v1/position", self.handle_positions)
+        app.router.add_get("/api/v1/capital", self.handle_capital)
+        app.router.add_get("/api/v1/capital/collateral", self.handle_collateral)
+        app.router.add_post("/api/v1/order", self.handle_execute_order)
+        app.router.add_delete("/api/v1/order", self.handle_cancel_order)
+        app.router.add_get("/api/v1/order", self.handle_get_order)
+        app.router.add_get("/api/v1/orders", self.handle_open_orders)
+        app.router.add_delete("/api/v1/orders", self.handle_cancel_all)
+        app.router.add_get("/sim/stats", self.handle_stats)
+        return app
+
+    async def log_stats(self, stop_event: asyncio.Event):
+        while not stop_event.is_set():
+            await asyncio.sleep(STATS_LOG_INTERVAL_SEC)
+            s = self.stats()
+            log(f"🧪 Simulateur : {s['replayed_trades']} trades rejoués (retard {s['replay_lag_ms']} ms), "
+                f"{s['ws_clients']} clients ws, {s['ws_sent']} messages envoyés / {s['ws_dropped']} perdus, "
+                f"{s['orders_received']} ordres (p99 {s['order_latency_ms']['p99']:.1f} ms)", level="INFO")
+
+    async def serve(self, host: str, port: int):
+        stop_event = asyncio.Event()
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        log(f"🧪 Simulateur Backpack sur http://{host}:{port} (ws://{host}:{port}/ws), "
+            f"{len(self.exchange.markets)} marchés", level="INFO")
+        tasks = [
+            asyncio.create_task(self.replayer.run(self.on_batch, stop_event)),
+            asyncio.create_task(self.depth_loop(stop_event)),
+            asyncio.create_task(self.log_stats(stop_event)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            stop_event.set()
+            for task in tasks:
+                task.cancel()
+            await runner.cleanup()
+
+def generate_keys() -> tuple[str, str]:
+    """Paire ed25519 au format attendu par bpx-py (le simulateur ne vérifie pas les signatures)."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519
+
+    key = ed25519.Ed25519PrivateKey.generate()
+    secret = key.private_bytes(serialization.Encoding.Raw, serialization.PrivateFormat.Raw, serialization.NoEncryption())
+    public = key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    return base64.b64encode(public).decode(), base64.b64encode(secret).decode()
+
+def build_server(args) -> SimServer:
+    if args.tape:
+        trades = load_tape_csv(args.tape)
+        prices = first_prices(trades)
+        log(f"🎞️ Bande {args.tape} : {len(trades)} trades, {len(prices)} symboles", level="INFO")
+    else:
+        symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+        trades = synthetic_tape(symbols, args.duration, args.trades_per_sec, args.seed)
+        prices = {symbol: DEFAULT_PRICES.get(symbol, 1.0) for symbol in tape_symbols(trades)}
+
+    exchange = SimExchange(prices, spread_bps=args.spread_bps, fee_bps=args.fee_bps, starting_balance=args.balance)
+    now_ms = int(time.time() * 1000)
+    for i, market in enumerate(exchange.markets.values()):
+        market.seed_history(args.history_hours, now_ms, seed=args.seed + i)
+    replayer = TapeReplayer(trades, speed=args.speed, rebase=not args.no_rebase, loop=not args.no_loop)
+    return SimServer(exchange, replayer, args.order_latency_ms, args.latency_jitter_ms, args.depth_interval)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Backpack exchange simulator (REST + websocket)")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=9200, help="HTTP / websocket port")
+    parser.add_argument("--symbols", default=DEFAULT_SYMBOLS, help="Markets of the synthetic tape")
+    parser.add_argument("--tape", default=None, help="Recorded tape CSV (ts_ms,symbol,price,size,is_buyer_maker,trade_id)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed (1 = real time, up to 1000)")
+    parser.add_argument("--no-rebase", action="store_true", help="Keep the tape timestamps instead of the wall clock")
+    parser.add_argument("--no-loop", action="store_true", help="Stop after one pass over the tape")
+    parser.add_argument("--duration", type=int, default=3600, help="Synthetic tape length in seconds")
+    parser.add_argument("--trades-per-sec", type=float, default=5.0, help="Synthetic trades per second and symbol")
+    parser.add_argument("--seed", type=int, default=42, help="Synthetic tape seed")
+    parser.add_argument("--history-hours", type=float, default=24.0, help="Synthetic 1m kline history before the replay")
+    parser.add_argument("--order-latency-ms", type=float, default=0.0, help="Added latency on order endpoints")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="Uniform jitter added to the order latency")
+    parser.add_argument("--spread-bps", type=float, default=2.0, help="Synthetic book spread in basis points")
+    parser.add_argument("--fee-bps", type=float, default=5.0, help="Taker fee in basis points")
+    parser.add_argument("--depth-interval", type=float, default=0.1, help="Depth diff publication interval in seconds")
+    parser.add_argument("--balance", type=float, default=10_000.0, help="Starting USDC balance")
+    parser.add_argument("--gen-keys", action="store_true", help="Print a throwaway API key pair and exit")
+    args = parser.parse_args()
+
+    if args.gen_keys:
+        public_key, secret_key = generate_keys()
+        print(f"export bpx_bot_public_key={public_key}")
+        print(f"export bpx_bot_secret_key={secret_key}")
+        raise SystemExit(0)
+    if not 0 < args.speed <= 1000:
+        parser.error("--speed doit être compris entre 0 et 1000")
+
+    try:
+        asyncio.run(build_server(args).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        log(f"\n👋 Arrêt demandé, fin du simulateur.", level="INFO")
@@ -0,0 +1,140 @@
+# simulator/tape.py
+"""
+Bandes de trades rejouées par le simulateur : export CSV de la table trade_tape
+(COPY trade_tape TO 'tape.csv' CSV HEADER) ou bande synthétique reproductible.
+"""
+import asyncio
+import csv
+import math
+import time
+
+import numpy as np
+
+from utils.logger import log
+
+TAPE_CSV_COLUMNS = ("ts_ms", "symbol", "price", "size", "is_buyer_maker", "trade_id")
+
+# Prix de départ des bandes synthétiques (les autres symboles démarrent à 1.0)
+DEFAULT_PRICES = {
+    "BTC_USDC_PERP": 60000.0,
+    "ETH_USDC_PERP": 3000.0,
+    "SOL_USDC_PERP": 150.0,
+}
+
+def load_tape_csv(path: str) -> list[tuple]:
+    """Trades (ts_ms, symbol, price, size, is_buyer_maker, trade_id) triés par horodatage."""
+    trades = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            trades.append((
+                int(float(row["ts_ms"])),
+                row["symbol"],
+                float(row["price"]),
+                float(row["size"]),
+                str(row.get("is_buyer_maker", "")).lower() in ("t", "true", "1"),
+                int(row["trade_id"]) if row.get("trade_id") else 0,
+            ))
+    trades.sort(key=lambda trade: trade[0])
+    return trades
+
+def synthetic_tape(symbols, duration_sec: int = 3600, trades_per_sec: float = 5.0, seed: int = 42,
+                   start_ms: int = 1_700_000_000_000, volatility: float = 0.0004, prices: dict | None = None) -> list[tuple]:
+    """
+    Bande synthétique : arrivées de Poisson par symbole, prix en marche aléatoire log-normale
+    (volatilité par racine de seconde), tailles log-normales, sens aléatoire.
+    """
+    rng = np.random.default_rng(seed)
+    prices = {**DEFAULT_PRICES, **(prices or {})}
+    trades = []
+    for symbol in symbols:
+        count = max(1, int(duration_sec * trades_per_sec))
+        gaps = rng.exponential(1000.0 / trades_per_sec, count)
+        ts = start_ms + np.cumsum(gaps).astype(np.int64)
+        ts = ts[ts < start_ms + duration_sec * 1000]
+        steps = rng.normal(0.0, volatility * np.sqrt(np.diff(ts, prepend=start_ms) / 1000.0))
+        price = prices.get(symbol, 1.0) * np.exp(np.cumsum(steps))
+        size = rng.lognormal(0.0, 1.0, len(ts)) * 100.0 / prices.get(symbol, 1.0)
+        maker = rng.random(len(ts)) < 0.5
+        trades.extend(zip(ts.tolist(), [symbol] * len(ts), price.tolist(), size.tolist(), maker.tolist(),
+                          range(1, len(ts) + 1)))
+    trades.sort(key=lambda trade: trade[0])
+    return trades
+
+class TapeReplayer:
+    """
+    Rejoue une bande à `speed` fois le temps réel (1x à 1000x). Avec rebase=True, les horodatages
+    sont ramenés sur l'horloge murale (trades « frais » pour l'ingester et la boucle live) ;
+    la bande reboucle indéfiniment si loop=True.
+    """
+    def __init__(self, trades: list[tuple], speed: float = 1.0, rebase: bool = True, loop: bool = True,
+                 tick_sec: float = 0.01):
+        if not trades:
+            raise ValueError("Bande de trades vide")
+        self.trades = trades
+        self.speed = speed
+        self.rebase = rebase
+        self.loop = loop
+        self.tick_sec = tick_sec
+        self.tape_start = trades[0][0]
+        # Durée d'un tour : dernier trade + un écart moyen, pour ne pas superposer deux tours
+        span = trades[-1][0] - self.tape_start
+        self.duration_ms = span + max(1, span // max(1, len(trades) - 1))
+        self.replayed = 0
+        self.laps = 0
+        self.lag_ms = 0.0  # retard du rejeu sur son horaire (CPU saturé)
+
+    def emitted_ts(self, ts_ms: int, lap: int, wall_start_ms: float) -> int:
+        offset = ts_ms - self.tape_start + lap * self.duration_ms
+        if self.rebase:
+            return int(wall_start_ms + offset / self.speed)
+        return ts_ms + lap * self.duration_ms
+
+    async def run(self, on_batch, stop_event: asyncio.Event | None = None):
+        """
+        Appelle on_batch(trades) à chaque tick avec les trades échus
+        (ts_ms rebasé, symbol, price, size, is_buyer_maker, trade_id).
+        """
+        wall_start = time.time() * 1000
+        lap = 0
+        index = 0
+        log(f"🎞️ Rejeu de {len(self.trades)} trades à {self.speed:g}x "
+            f"({self.duration_ms / 1000 / self.speed:.0f}s par tour)", level="INFO")
+        while stop_event is None or not stop_event.is_set():
+            elapsed_ms = (time.time() * 1000 - wall_start) * self.speed
+            due_until = self.tape_start + elapsed_ms - lap * self.duration_ms
+            batch = []
+            first_index = index
+            while index < len(self.trades) and self.trades[index][0] <= due_until:
+                ts_ms, symbol, price, size, is_buyer_maker, trade_id = self.trades[index]
+                batch.append((self.emitted_ts(ts_ms, lap, wall_start), symbol, price, size, is_buyer_maker,
+                              trade_id + lap * len(self.trades)))
+                index += 1
+            if batch:
+                # Retard du plus ancien trade du lot sur son horaire de rejeu
+                self.lag_ms = (due_until - self.trades[first_index][0]) / self.speed
+                self.replayed += len(batch)
+                await on_batch(batch)
+            if index >= len(self.trades):
+                if not self.loop:
+                    break
+                lap += 1
+                self.laps = lap
+                index = 0
+            await asyncio.sleep(self.tick_sec)
+
+def tape_symbols(trades: list[tuple]) -> list[str]:
+    return sorted({trade[1] for trade in trades})
+
+def first_prices(trades: list[tuple]) -> dict:
+    prices = {}
+    for _, symbol, price, *_ in trades:
+        if symbol not in prices:
+            prices[symbol] = price
+    return prices
+
+def price_filters(price: float) -> tuple[float, float]:
+    """(tickSize, stepSize) plausibles pour un prix : ~5 chiffres significatifs, pas de quantité ~0.01-0.1 USDC."""
+    magnitude = math.floor(math.log10(price)) if price > 0 else 0
+    tick = 10.0 ** (magnitude - 4)
+    step = 10.0 ** min(0, -(magnitude + 1))
+    return tick, step
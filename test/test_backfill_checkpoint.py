@@ -0,0 +1,55 @@
+import sys
+import os
+import json
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("PG_DSN", "postgresql://offline/tests")
+
+import ScriptDatabase.backfill_pgsql as backfill
+from ScriptDatabase.backfill_pgsql import BackfillCheckpoint, BackfillIncomplete, ThroughputCounter
+
+def test_concurrent_flushes_do_not_collide(tmp_path):
+    checkpoint = BackfillCheckpoint(path=str(tmp_path / "checkpoint.json"), save_interval=0)
+
+    async def worker(i):
+        for ts in range(5):
+            await checkpoint.update(f"SYM{i}_USDC", 1_700_000_000 + ts, done=ts == 4)
+
+    async def run():
+        # Plusieurs workers qui flushent en même temps sur le même fichier .tmp
+        await asyncio.gather(*(worker(i) for i in range(20)))
+
+    asyncio.run(run())
+    with open(checkpoint.path, encoding="utf-8") as f:
+        state = json.load(f)
+    assert len(state) == 20 and all(entry["done"] for entry in state.values())
+    assert not os.path.exists(f"{checkpoint.path}.tmp")
+
+def test_failed_range_is_reported(tmp_path):
+    async def failing_klines(*args, **kwargs):
+        return None  # erreur API
+
+    original_fetch, original_delay = backfill.get_ohlcv_async, backfill.RETRY_DELAY
+    backfill.get_ohlcv_async, backfill.RETRY_DELAY = failing_klines, 0
+    checkpoint = BackfillCheckpoint(path=str(tmp_path / "checkpoint.json"), save_interval=0)
+    try:
+        asyncio.run(backfill.backfill_range(None, "SOL_USDC", 1_700_000_000, 1_700_086_400,
+                                            ThroughputCounter("SOL_USDC"), checkpoint))
+        raise AssertionError("BackfillIncomplete attendu")
+    except BackfillIncomplete as e:
+        # Plage abandonnée : rien n'est marqué comme chargé
+        assert e.failed_at == 1_700_000_000 and e.inserted == 0
+        assert checkpoint.get("SOL_USDC") is None and not checkpoint.is_done("SOL_USDC")
+    finally:
+        backfill.get_ohlcv_async, backfill.RETRY_DELAY = original_fetch, original_delay
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_concurrent_flushes_do_not_collide(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_failed_range_is_reported(Path(tmp))
+    print("✅ test_backfill_checkpoint OK")
@@ -0,0 +1,57 @@
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ScriptDatabase.trade_tape import TAPE_DTYPE, build_bars
+
+def make_tape(trades):
+    return np.array(
+        [(ts, price, size, maker, i) for i, (ts, price, size, maker) in enumerate(trades)],
+        dtype=TAPE_DTYPE,
+    )
+
+TAPE = make_tape([
+    (1_000, 100.0, 1.0, False),
+    (1_500, 102.0, 2.0, True),
+    (2_200, 101.0, 1.0, False),
+    (3_900, 99.0, 3.0, True),
+    (4_100, 103.0, 1.0, False),
+])
+
+def test_time_bars():
+    bars = build_bars(TAPE, "time", 2)
+    assert list(bars["ts_ms"]) == [0, 2_000, 4_000]
+    assert list(bars["trades"]) == [2, 2, 1]
+    assert bars["high"][0] == 102.0 and bars["low"][1] == 99.0
+    assert bars["volume"][1] == 4.0
+    assert bars["buy_volume"][0] == 1.0
+    assert np.isclose(bars["vwap"][0], (100.0 + 204.0) / 3.0)
+
+def test_tick_bars():
+    bars = build_bars(TAPE, "tick", 2)
+    assert list(bars["trades"]) == [2, 2, 1]
+    assert list(bars["close"]) == [102.0, 99.0, 103.0]
+
+def test_volume_bars_close_on_threshold_crossing():
+    bars = build_bars(TAPE, "volume", 3)
+    # cumul avant chaque trade : 0, 1, 3, 4, 7 -> barres [0,1], [2,3], [4]
+    assert list(bars["trades"]) == [2, 2, 1]
+    assert list(bars["volume"]) == [3.0, 4.0, 1.0]
+
+def test_dollar_bars():
+    bars = build_bars(TAPE, "dollar", 300)
+    assert bars["trades"].sum() == len(TAPE)
+    assert bars["dollar_volume"].sum() == np.sum(TAPE["price"] * TAPE["size"])
+
+def test_empty_tape():
+    assert len(build_bars(np.empty(0, dtype=TAPE_DTYPE), "time", 60)) == 0
+
+if __name__ == "__main__":
+    test_time_bars()
+    test_tick_bars()
+    test_volume_bars_close_on_threshold_crossing()
+    test_dollar_bars()
+    test_empty_tape()
+    print("✅ test_bar_builder OK")
@@ -0,0 +1,71 @@
+import sys
+import os
+import time
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+from simulator.exchange import SimExchange
+from simulator.server import SimServer, generate_keys
+from simulator.tape import TapeReplayer, synthetic_tape
+from utils.http_client import close_session
+from utils.market_cache import MARKETS, MarketFilters
+from execute.order_client import AsyncOrderClient
+from execute.close_position_percent import close_positions_batch
+
+PRICES = {"BTC_USDC_PERP": 60_000.0, "ETH_USDC_PERP": 3_000.0, "SOL_USDC_PERP": 150.0}
+
+async def run_batch(positions, order_latency_ms=50.0, percent=100.0):
+    exchange = SimExchange(PRICES, fee_bps=0.0)
+    for symbol, side, quantity in positions:
+        exchange.execute_order({"symbol": symbol, "side": side, "orderType": "Market", "quantity": quantity})
+    server = SimServer(exchange, TapeReplayer(synthetic_tape(list(PRICES), duration_sec=1)), order_latency_ms=order_latency_ms)
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    MARKETS.filters = {m["symbol"]: MarketFilters.from_market(m) for m in exchange.markets_payload()}
+    MARKETS.loaded_at = time.monotonic()
+    public, secret = generate_keys()
+    client = AsyncOrderClient(public, secret, api_url=f"http://127.0.0.1:{port}")
+    snapshot = [{"symbol": p["symbol"], "side": "long" if float(p["netQuantity"]) > 0 else "short",
+                 "amount": abs(float(p["netQuantity"]))} for p in exchange.positions_payload()]
+    try:
+        started = time.perf_counter()
+        results = await close_positions_batch(snapshot, percent=percent, client=client)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    finally:
+        await close_session()
+        await runner.cleanup()
+    return exchange, results, elapsed_ms
+
+def test_batch_close_is_concurrent():
+    exchange, results, elapsed_ms = asyncio.run(run_batch(
+        [("BTC_USDC_PERP", "Bid", "0.01"), ("ETH_USDC_PERP", "Ask", "0.5"), ("SOL_USDC_PERP", "Bid", "3")]))
+    assert [r["status"] for r in results] == ["Filled"] * 3
+    assert {r["symbol"]: r["side"] for r in results}["ETH_USDC_PERP"] == "Bid"
+    assert all(r["latency_ms"] >= 50 for r in results)
+    # Trois ordres de 50 ms en parallèle : bien moins que 150 ms en série
+    assert elapsed_ms < 140
+    assert exchange.positions_payload() == []
+
+def test_batch_close_partial_and_failure():
+    exchange, results, _ = asyncio.run(run_batch([("SOL_USDC_PERP", "Bid", "3")], order_latency_ms=0, percent=50))
+    assert results[0]["status"] == "Filled" and results[0]["quantity"] == "1.500"
+    assert float(exchange.positions_payload()[0]["netQuantity"]) == 1.5
+
+    async def unknown_symbol():
+        return await close_positions_batch([{"symbol": "NOPE_USDC_PERP", "side": "long", "amount": 1.0}])
+
+    MARKETS.loaded_at = time.monotonic()
+    results = asyncio.run(unknown_symbol())
+    assert results[0]["status"] == "Skipped" and results[0]["error"]
+
+if __name__ == "__main__":
+    test_batch_close_is_concurrent()
+    test_batch_close_partial_and_failure()
+    print("✅ test_batch_close OK")
@@ -0,0 +1,48 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+from benchmarks.synthetic import make_ohlcv, make_trade_messages
+from benchmarks.run_benchmarks import compare_results
+
+def test_synthetic_ohlcv_is_consistent():
+    df = make_ohlcv(5000)
+    assert len(df) == 5000
+    assert list(df.columns) == ["open", "high", "low", "close", "volume"]
+    assert df.index.is_monotonic_increasing and str(df.index.tz) == "UTC"
+    assert (df["high"] >= df[["open", "close"]].max(axis=1)).all()
+    assert (df["low"] <= df[["open", "close"]].min(axis=1)).all()
+    assert (df["open"].iloc[1:].values == df["close"].iloc[:-1].values).all()
+
+def test_synthetic_data_is_reproducible():
+    assert make_ohlcv(1000, seed=7).equals(make_ohlcv(1000, seed=7))
+    assert not make_ohlcv(1000, seed=7).equals(make_ohlcv(1000, seed=8))
+    messages = make_trade_messages(10)
+    assert messages == make_trade_messages(10)
+    assert json.loads(messages[0])["stream"] == "trade.SOL_USDC_PERP"
+
+def test_compare_results_flags_regressions():
+    baseline = {
+        "a": {"value": 100.0, "unit": "calls/s"},
+        "b": {"value": 100.0, "unit": "calls/s"},
+        "c": {"value": 100.0, "unit": "calls/s"},
+        "d": {"value": 100.0, "unit": "calls/s"},
+        "only_baseline": {"value": 1.0, "unit": "calls/s"},
+    }
+    current = {
+        "a": {"value": 80.0, "unit": "calls/s"},
+        "b": {"value": 105.0, "unit": "calls/s"},
+        "c": {"value": 150.0, "unit": "calls/s"},
+        "d": {"error": "TypeError: boom"},
+    }
+    statuses = {row[0]: row[-1] for row in compare_results(current, baseline, threshold=0.10)}
+    assert statuses == {"a": "regression", "b": "=", "c": "faster", "d": "error"}
+
+if __name__ == "__main__":
+    test_synthetic_ohlcv_is_consistent()
+    test_synthetic_data_is_reproducible()
+    test_compare_results_flags_regressions()
+    print("✅ test_benchmarks OK")
@@ -0,0 +1,84 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PG_DSN", "postgresql://offline/tests")
+
+import numpy as np
+
+from live.correlation import CorrelationMatrix
+
+SYMBOLS = ["A_USDC_PERP", "B_USDC_PERP", "C_USDC_PERP"]
+
+def correlated_returns(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(0, 0.001, rows)
+    return np.column_stack([
+        base + rng.normal(0, 0.0002, rows),   # A suit le marché
+        base + rng.normal(0, 0.0002, rows),   # B aussi
+        rng.normal(0, 0.001, rows),           # C indépendant
+    ])
+
+def make_matrix(window=50, min_periods=10):
+    matrix = CorrelationMatrix(window=window, min_periods=min_periods)
+    matrix.load_closes(SYMBOLS, np.zeros((3, 0)))
+    return matrix
+
+def test_incremental_matches_full_correlation():
+    matrix = make_matrix(window=50)
+    returns = correlated_returns(180)
+    for row in returns:
+        matrix.push_returns(row, np.ones(3, dtype=bool))
+    expected = np.corrcoef(returns[-50:].T)
+    assert np.allclose(matrix.matrix(), expected, atol=1e-9)
+    assert abs(matrix.correlation("A_USDC_PERP", "B_USDC_PERP") - expected[0, 1]) < 1e-9
+    assert matrix.correlation("A_USDC_PERP", "B_USDC_PERP") > 0.9
+    assert abs(matrix.correlation("A_USDC_PERP", "C_USDC_PERP")) < 0.5
+
+def test_min_periods_returns_none():
+    matrix = make_matrix(min_periods=10)
+    for row in correlated_returns(5):
+        matrix.push_returns(row, np.ones(3, dtype=bool))
+    assert matrix.correlation("A_USDC_PERP", "B_USDC_PERP") is None
+    assert np.isnan(matrix.matrix()[0, 1])
+
+def test_update_price_closes_minutes():
+    matrix = make_matrix(min_periods=3)
+    prices = 100 * np.exp(np.cumsum(correlated_returns(30, seed=3), axis=0))
+    start = 1_700_000_040_000
+    for minute, row in enumerate(prices):
+        for symbol, price in zip(SYMBOLS, row):
+            matrix.update_price(symbol, float(price), start + minute * 60_000 + 5_000)
+    # 29 minutes closes (la dernière est encore ouverte), la première sans rendement faute de prix précédent
+    assert matrix._count == 29
+    assert matrix._pairs[0, 1] == 28
+    assert matrix.correlation("A_USDC_PERP", "B_USDC_PERP") > 0.9
+
+def test_load_closes_with_short_history():
+    closes = 100 * np.exp(np.cumsum(correlated_returns(61, seed=5), axis=0)).T
+    closes[2, :40] = np.nan  # C listé récemment
+    matrix = CorrelationMatrix(window=60, min_periods=30)
+    matrix.load_closes(SYMBOLS, closes)
+    assert matrix.correlation("A_USDC_PERP", "B_USDC_PERP") > 0.9
+    assert matrix.correlation("A_USDC_PERP", "C_USDC_PERP") is None
+
+def test_check_correlation_limit_uses_direction(monkeypatch):
+    import live.live_engine as live_engine
+
+    matrix = make_matrix()
+    for row in correlated_returns(50, seed=7):
+        matrix.push_returns(row, np.ones(3, dtype=bool))
+    monkeypatch.setattr(live_engine, "CORRELATIONS", matrix)
+
+    async def positions():
+        return [{"symbol": "A_USDC_PERP", "side": "long"}]
+
+    monkeypatch.setattr(live_engine, "get_real_positions", positions)
+    assert asyncio.run(live_engine.check_correlation_limit("B_USDC_PERP", "long")) is False
+    assert asyncio.run(live_engine.check_correlation_limit("B_USDC_PERP", "short")) is True
+    assert asyncio.run(live_engine.check_correlation_limit("C_USDC_PERP", "long")) is True
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,181 @@
+import sys
+import os
+import time
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("PG_DSN", "postgresql://offline/tests")
+
+from aiohttp import web
+
+from config.settings import TradingConfig
+from simulator.exchange import SimExchange
+from simulator.server import SimServer, generate_keys
+from simulator.tape import TapeReplayer, synthetic_tape
+from utils.http_client import close_session
+from utils.market_cache import MARKETS, MarketFilters
+from execute.order_client import AsyncOrderClient
+from live.exchange_stops import ExchangeStopManager, align_trigger, trigger_for_pnl
+import bpx.public
+import live.live_engine as live_engine
+import utils.position_utils as position_utils
+import execute.close_position_percent as close_module
+from utils.table_display import handle_existing_position_with_table
+
+SYMBOL = "SOL_USDC_PERP"
+
+def test_trigger_prices():
+    assert abs(trigger_for_pnl("long", 100.0, -2.0) - 98.0) < 1e-9
+    assert abs(trigger_for_pnl("short", 100.0, 1.5) - 98.5) < 1e-9
+    assert align_trigger(98.017, 0.01, "long") == 98.01
+    assert abs(align_trigger(98.011, 0.01, "short") - 98.02) < 1e-9
+    assert align_trigger(98.0, 0.01, "long") == 98.0
+
+async def with_exchange(scenario, **settings):
+    exchange = SimExchange({SYMBOL: 100.0}, fee_bps=0.0)
+    server = SimServer(exchange, TapeReplayer(synthetic_tape([SYMBOL], duration_sec=1)))
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    MARKETS.filters = {m["symbol"]: MarketFilters.from_market(m) for m in exchange.markets_payload()}
+    MARKETS.loaded_at = time.monotonic()
+    public, secret = generate_keys()
+    client = AsyncOrderClient(public, secret, api_url=f"http://127.0.0.1:{port}")
+    manager = ExchangeStopManager(client=client, settings=TradingConfig(**settings))
+    try:
+        await scenario(exchange, manager)
+    finally:
+        await close_session()
+        await runner.cleanup()
+
+def stop_orders(exchange):
+    return sorted(float(o["triggerPrice"]) for o in exchange.get_open_orders(SYMBOL) if o.get("triggerPrice"))
+
+def test_place_ratchet_and_coalesce():
+    async def scenario(exchange, manager):
+        exchange.execute_order({"symbol": SYMBOL, "side": "Bid", "orderType": "Market", "quantity": "2"})
+        await manager.place(SYMBOL, "long", 100.0, 2.0, stop_pct=2.0)
+        assert stop_orders(exchange) == [98.0, 103.0]
+
+        # Rafale de mises à jour du trailing : un seul amend, vers la dernière valeur demandée
+        for trailing in (0.5, 0.8, 1.1):
+            manager.request_trailing(SYMBOL, trailing)
+        manager.request_trailing(SYMBOL, 0.2)  # desserrer : ignoré
+        await manager.stops[SYMBOL].task
+        assert manager.amends_sent == 1
+        assert stop_orders(exchange) == [101.1, 103.0]
+
+        # Mouvement trop petit : pas d'amend
+        manager.request_trailing(SYMBOL, 1.12)
+        assert manager.stops[SYMBOL].task.done() and manager.amends_sent == 1
+
+        await manager.cancel(SYMBOL)
+        assert stop_orders(exchange) == [] and SYMBOL not in manager.stops
+
+    asyncio.run(with_exchange(scenario, exchange_take_profit_pct=3.0, stop_amend_min_interval_sec=0.05,
+                              stop_amend_rate_per_sec=20.0, stop_amend_min_move_pct=0.05))
+
+def test_stop_fires_without_the_bot_and_restart_adopts():
+    async def scenario(exchange, manager):
+        exchange.execute_order({"symbol": SYMBOL, "side": "Ask", "orderType": "Market", "quantity": "1"})
+        await manager.place(SYMBOL, "short", 100.0, 1.0, stop_pct=1.0)
+        assert stop_orders(exchange) == [101.0]
+
+        # Redémarrage : le nouveau gestionnaire reprend l'ordre existant au lieu d'en poser un second
+        restarted = ExchangeStopManager(client=manager.client, settings=manager.settings)
+        await restarted.ensure(SYMBOL, "short", 100.0, 1.0)
+        assert restarted.stops[SYMBOL].order_id == manager.stops[SYMBOL].order_id
+        assert stop_orders(exchange) == [101.0]
+
+        exchange.on_trade(1_700_000_000_000, SYMBOL, 101.5, 1.0)
+        assert exchange.positions_payload() == []
+        restarted.on_positions(exchange.positions_payload())
+        await asyncio.sleep(0.1)  # laisse l'annulation (ordre déjà déclenché) aboutir avant l'arrêt du serveur
+        assert restarted.stops == {}
+
+    asyncio.run(with_exchange(scenario))
+
+def test_restart_tells_stop_from_take_profit():
+    async def scenario(exchange, manager):
+        exchange.execute_order({"symbol": SYMBOL, "side": "Bid", "orderType": "Market", "quantity": "2"})
+        await manager.place(SYMBOL, "long", 100.0, 2.0, stop_pct=2.0)
+        placed = manager.stops[SYMBOL]
+        # Le take-profit passe en tête des ordres ouverts : il ne doit pas être pris pour le stop
+        exchange.open_orders = dict(reversed(list(exchange.open_orders.items())))
+
+        restarted = ExchangeStopManager(client=manager.client, settings=manager.settings)
+        await restarted.ensure(SYMBOL, "long", 100.0, 2.0, mark_price=100.5)
+        adopted = restarted.stops[SYMBOL]
+        assert (adopted.order_id, adopted.tp_order_id) == (placed.order_id, placed.tp_order_id)
+        assert adopted.trigger_price == 98.0 and stop_orders(exchange) == [98.0, 103.0]
+
+        # Le stop adopté suit le trailing
+        restarted.request_trailing(SYMBOL, 1.1)
+        await adopted.task
+        assert stop_orders(exchange) == [101.1, 103.0]
+        await restarted.cancel(SYMBOL)
+        assert stop_orders(exchange) == []
+
+    asyncio.run(with_exchange(scenario, exchange_take_profit_pct=3.0, stop_amend_min_interval_sec=0.05,
+                              stop_amend_rate_per_sec=20.0, stop_amend_min_move_pct=0.05))
+
+def test_live_loop_keeps_the_exchange_stop():
+    """Chemin de la boucle live (handle_existing_position_with_table) : pose, resserrage, annulation."""
+    mark = {"price": 100.0}
+
+    class FakePublic:
+        def get_ticker(self, symbol):
+            return {"lastPrice": str(mark["price"])}
+
+    async def scenario(exchange, manager):
+        async def real_positions():
+            return [position_utils.parse_position(p) for p in exchange.positions_payload()]
+
+        async def close(symbol, percent):
+            return exchange.execute_order({"symbol": symbol, "side": "Ask", "orderType": "Market",
+                                           "quantity": "2", "reduceOnly": True})
+
+        patches = [(position_utils, "get_real_positions", real_positions), (bpx.public, "Public", FakePublic),
+                   (close_module, "close_position_percent", close), (live_engine, "EXCHANGE_STOPS", manager)]
+        originals = [(module, name, getattr(module, name)) for module, name, _ in patches]
+        exchange_stops = live_engine.config.trading.exchange_stops
+        for module, name, value in patches:
+            setattr(module, name, value)
+        live_engine.config.trading.exchange_stops = True
+        live_engine.TRAILING_STOPS.clear()
+        try:
+            exchange.execute_order({"symbol": SYMBOL, "side": "Bid", "orderType": "Market", "quantity": "2"})
+            # Position ouverte avant le démarrage : le stop est posé au premier passage
+            await handle_existing_position_with_table(SYMBOL, real_run=True, dry_run=False)
+            assert SYMBOL in manager.stops and stop_orders(exchange)
+
+            # Le trailing s'active : un resserrage est demandé
+            mark["price"] = 103.0
+            await handle_existing_position_with_table(SYMBOL, real_run=True, dry_run=False)
+            assert manager.amends_requested == 1
+
+            # Fermeture par le bot : les ordres côté exchange sont annulés
+            mark["price"] = 90.0
+            await handle_existing_position_with_table(SYMBOL, real_run=True, dry_run=False)
+            await asyncio.sleep(0.1)
+            assert exchange.positions_payload() == [] and manager.stops == {}
+            assert stop_orders(exchange) == []
+        finally:
+            for module, name, value in originals:
+                setattr(module, name, value)
+            live_engine.config.trading.exchange_stops = exchange_stops
+            live_engine.TRAILING_STOPS.clear()
+
+    asyncio.run(with_exchange(scenario))
+
+if __name__ == "__main__":
+    test_trigger_prices()
+    test_place_ratchet_and_coalesce()
+    test_stop_fires_without_the_bot_and_restart_adopts()
+    test_restart_tells_stop_from_take_profit()
+    test_live_loop_keeps_the_exchange_stop()
+    print("✅ test_exchange_stops OK")
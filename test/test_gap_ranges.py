@@ -0,0 +1,42 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ScriptDatabase.gap_index import missing_ranges, GapIndex
+
+def test_empty_table_loads_whole_range():
+    assert missing_ranges(None, None, [], 100, 1000, 60) == [(100, 1000)]
+
+def test_head_gaps_and_tail():
+    ranges = missing_ranges(400, 700, [(500, 560)], 100, 1000, 60)
+    assert ranges == [(100, 340), (500, 560), (760, 1000)]
+
+def test_complete_history():
+    assert missing_ranges(100, 1000, [], 100, 1000, 60) == []
+
+def test_gaps_are_clipped_to_range():
+    assert missing_ranges(0, 1000, [(-300, 200)], 100, 1000, 60) == [(100, 200)]
+
+def test_gap_index_completeness():
+    index = GapIndex()
+    assert index.is_complete("BTC_USDC_PERP", 60, now=1000)
+
+    index.record_open("BTC_USDC_PERP", 900)
+    assert not index.is_complete("BTC_USDC_PERP", 60, now=1000)
+
+    index.record_close("BTC_USDC_PERP", 950)
+    assert not index.is_complete("BTC_USDC_PERP", 60, now=1000)
+    assert index.is_complete("BTC_USDC_PERP", 40, now=1000)
+
+    index.record_repaired("BTC_USDC_PERP", 950)
+    assert index.is_complete("BTC_USDC_PERP", 60, now=1000)
+    assert not index.is_complete("BTC_USDC_PERP", 60, allow_repaired=False, now=1000)
+
+if __name__ == "__main__":
+    test_empty_table_loads_whole_range()
+    test_head_gaps_and_tail()
+    test_complete_history()
+    test_gaps_are_clipped_to_range()
+    test_gap_index_completeness()
+    print("✅ missing_ranges OK")
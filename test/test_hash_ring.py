@@ -0,0 +1,44 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.hash_ring import HashRing
+
+SYMBOLS = [f"TOKEN{i}_USDC_PERP" for i in range(400)]
+
+def test_every_symbol_is_assigned_once():
+    assignment = HashRing(range(4)).assign(SYMBOLS)
+    assert sorted(s for shard in assignment.values() for s in shard) == sorted(SYMBOLS)
+    assert set(assignment) == {0, 1, 2, 3}
+
+def test_distribution_is_balanced():
+    assignment = HashRing(range(4)).assign(SYMBOLS)
+    sizes = [len(s) for s in assignment.values()]
+    assert min(sizes) > len(SYMBOLS) / 4 * 0.6
+
+def test_assignment_is_stable():
+    assert HashRing(range(4)).assign(SYMBOLS) == HashRing(range(4)).assign(SYMBOLS)
+
+def test_adding_a_node_moves_few_keys():
+    ring = HashRing(range(4))
+    before = {s: ring.node_for(s) for s in SYMBOLS}
+    ring.add(4)
+    after = {s: ring.node_for(s) for s in SYMBOLS}
+    moved = [s for s in SYMBOLS if before[s] != after[s]]
+    # seules les clés reprises par le nouveau nœud bougent
+    assert all(after[s] == 4 for s in moved)
+    assert len(moved) < len(SYMBOLS) / 2
+
+def test_removing_a_node():
+    ring = HashRing(range(4))
+    ring.remove(3)
+    assert 3 not in ring.assign(SYMBOLS)
+
+if __name__ == "__main__":
+    test_every_symbol_is_assigned_once()
+    test_distribution_is_balanced()
+    test_assignment_is_stable()
+    test_adding_a_node_moves_few_keys()
+    test_removing_a_node()
+    print("✅ test_hash_ring OK")
@@ -0,0 +1,67 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ws_supervisor import get_connection_stats
+from ScriptDatabase.ingest_metrics import (
+    RateTracker, collect_symbol_metrics, render_prometheus, parse_prometheus,
+)
+
+class FakeWriter:
+    def __init__(self):
+        self.written_by_symbol = {"TEST_USDC_PERP": 120}
+        self.commit_lag_ms = {"TEST_USDC_PERP": 850.0}
+
+    def pending_by_symbol(self):
+        return {"TEST_USDC_PERP": 3}
+
+def make_stats():
+    stats = get_connection_stats("trade.TEST_USDC_PERP")
+    stats.on_connect()
+    stats.trades = 500
+    stats.last_event_ms = 1_000_000
+    stats.lag_ms = 42.0
+    return stats
+
+def test_rate_tracker():
+    rates = RateTracker(window=10)
+    assert rates.update("k", 0, now=0) == 0.0
+    assert rates.update("k", 50, now=5) == 0.0  # fenêtre pas encore écoulée
+    assert rates.update("k", 100, now=10) == 10.0
+    assert rates.update("k", 150, now=15) == 10.0
+
+def test_collect_and_render_roundtrip():
+    make_stats()
+    snapshot = collect_symbol_metrics(["TEST_USDC_PERP", "MISSING_USDC_PERP"], FakeWriter(), now=1_005)
+    assert set(snapshot) == {"TEST_USDC_PERP"}
+    metrics = snapshot["TEST_USDC_PERP"]
+    assert metrics["trades_total"] == 500
+    assert metrics["last_trade_age_ms"] == 5_000
+    assert metrics["queue_depth"] == 3
+
+    text = render_prometheus(snapshot, {"write_queue_depth_total": 3})
+    assert '# TYPE backpack_ingest_trades_total counter' in text
+    assert 'backpack_ingest_commit_lag_seconds{symbol="TEST_USDC_PERP"} 0.85' in text
+    assert 'backpack_ingest_write_queue_depth_total 3' in text
+
+    parsed = parse_prometheus(text)["TEST_USDC_PERP"]
+    assert parsed["candles_written_total"] == 120
+    assert parsed["receive_lag_seconds"] == 0.042
+    assert parsed["connected"] == 1
+
+def test_large_counters_keep_precision():
+    snapshot = {"TEST_USDC_PERP": {"trades_total": 1_234_567_891, "trades_per_sec": 1234.56789,
+                                   "commit_lag_ms": 1_234_567}}
+    text = render_prometheus(snapshot, {"rows_inserted_total": 98_765_432_101})
+    assert 'backpack_ingest_trades_total{symbol="TEST_USDC_PERP"} 1234567891' in text
+    assert 'backpack_ingest_rows_inserted_total 98765432101' in text
+    parsed = parse_prometheus(text)["TEST_USDC_PERP"]
+    assert parsed["trades_per_second"] == 1234.56789
+    assert parsed["commit_lag_seconds"] == 1234.567
+
+if __name__ == "__main__":
+    test_rate_tracker()
+    test_collect_and_render_roundtrip()
+    test_large_counters_keep_precision()
+    print("✅ test_ingest_metrics OK")
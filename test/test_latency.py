@@ -0,0 +1,71 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.latency import LatencyHistogram, LatencyRecorder
+
+def test_histogram_percentiles():
+    h = LatencyHistogram()
+    for ms in [1] * 90 + [40] * 9 + [700]:
+        h.record(ms)
+    assert h.count == 100
+    assert h.percentile(50) == 1
+    assert h.percentile(95) == 50
+    assert h.percentile(100) == 700
+    assert h.max_ms == 700
+    assert abs(h.mean_ms - (90 + 360 + 700) / 100) < 1e-9
+
+def test_percentile_capped_at_max():
+    h = LatencyHistogram()
+    h.record(3.0)
+    assert h.percentile(99) == 3.0
+    assert LatencyHistogram().percentile(99) == 0.0
+
+def test_cycle_timer_records_stages_with_strategy():
+    recorder = LatencyRecorder()
+    timer = recorder.start_cycle("SOL_USDC_PERP")
+    with timer.stage("fetch_ohlcv"):
+        pass
+    with timer.stage("signal"):
+        pass
+    timer.strategy = "Trix"
+    timer.finish()
+    assert set(recorder.histograms) == {
+        ("fetch_ohlcv", "SOL_USDC_PERP", "Trix"),
+        ("signal", "SOL_USDC_PERP", "Trix"),
+        ("total", "SOL_USDC_PERP", "Trix"),
+    }
+
+def test_stage_recorded_on_exception():
+    recorder = LatencyRecorder()
+    timer = recorder.start_cycle("BTC_USDC_PERP", "Combo")
+    try:
+        with timer.stage("order"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    timer.finish()
+    assert recorder.histograms[("order", "BTC_USDC_PERP", "Combo")].count == 1
+
+def test_aggregate_by_stage_and_symbol():
+    recorder = LatencyRecorder()
+    recorder.record("signal", "SOL_USDC_PERP", "Trix", 2.0)
+    recorder.record("signal", "BTC_USDC_PERP", "Trix", 4.0)
+    recorder.record("signal", "BTC_USDC_PERP", "Combo", 6.0)
+    by_stage = recorder.aggregate("stage")
+    assert by_stage["signal"].count == 3
+    by_symbol = recorder.aggregate("symbol")
+    assert by_symbol[("signal", "BTC_USDC_PERP")].count == 2
+    by_strategy = recorder.aggregate("strategy")
+    assert by_strategy[("signal", "Trix")].total_ms == 6.0
+    rows = recorder.summary_rows("strategy")
+    assert rows[0][0] == "signal / Trix"
+
+if __name__ == "__main__":
+    test_histogram_percentiles()
+    test_percentile_capped_at_max()
+    test_cycle_timer_records_stages_with_strategy()
+    test_stage_recorded_on_exception()
+    test_aggregate_by_stage_and_symbol()
+    print("✅ test_latency OK")
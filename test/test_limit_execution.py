@@ -0,0 +1,204 @@
+import sys
+import os
+import time
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+from aiohttp import web
+
+from config.settings import TradingConfig
+from simulator.exchange import SimExchange
+from simulator.server import SimServer, generate_keys
+from simulator.tape import TapeReplayer, synthetic_tape
+from utils.http_client import close_session
+from utils.market_cache import MarketFilters
+from live.order_book import OrderBook
+from execute.order_client import AsyncOrderClient, OrderRejected
+from execute.limit_execution import PostOnlyExecutor, passive_price
+
+SYMBOL = "SOL_USDC_PERP"
+
+class RateLimitedCancels:
+    """Client dont les premières annulations sont refusées (HTTP 429), le reste passant au vrai client."""
+    def __init__(self, client, failures: int):
+        self.client = client
+        self.failures = failures
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    async def cancel_order(self, symbol, order_id=None, client_id=None):
+        if self.failures:
+            self.failures -= 1
+            raise OrderRejected("TOO_MANY_REQUESTS", "Rate limit exceeded", status=429)
+        return await self.client.cancel_order(symbol, order_id=order_id, client_id=client_id)
+
+class UnreachableExchange:
+    """Client dont les réponses se perdent une fois `down` levé : les annulations partent (lost) ou non."""
+    def __init__(self, client, lost: bool):
+        self.client = client
+        self.lost = lost
+        self.down = False
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    async def cancel_order(self, symbol, order_id=None, client_id=None):
+        if self.down:
+            if self.lost:
+                await self.client.cancel_order(symbol, order_id=order_id)
+            raise aiohttp.ServerDisconnectedError()
+        return await self.client.cancel_order(symbol, order_id=order_id, client_id=client_id)
+
+    async def get_open_order(self, symbol, order_id):
+        if self.down and not self.lost:
+            raise aiohttp.ClientConnectionError("Connection reset")
+        return await self.client.get_open_order(symbol, order_id)
+
+class SimBooks:
+    """Carnet local relu directement depuis le simulateur (à la place du flux depth)."""
+    def __init__(self, exchange):
+        self.exchange = exchange
+
+    def get(self, symbol, max_age=None):
+        depth = self.exchange.depth(symbol)
+        book = OrderBook(symbol)
+        book.load_snapshot(depth["bids"], depth["asks"], int(depth["lastUpdateId"]))
+        return book
+
+def test_passive_price_is_tick_aligned():
+    book = OrderBook(SYMBOL)
+    book.load_snapshot([["99.987", "1"]], [["100.013", "1"]], 1)
+    assert passive_price(book, "Bid", MarketFilters(SYMBOL, tick_size="0.01")) == 99.98
+    assert passive_price(book, "Ask", MarketFilters(SYMBOL, tick_size="0.01")) == 100.02
+    assert passive_price(book, "Bid", MarketFilters(SYMBOL, tick_size="0.001")) == 99.987
+    assert passive_price(book, "Ask", MarketFilters(SYMBOL, tick_size="0.05")) == 100.05
+
+async def with_executor(scenario, cancel_failures: int = 0, wrapper=None, **settings):
+    exchange = SimExchange({SYMBOL: 100.0}, fee_bps=0.0)
+    server = SimServer(exchange, TapeReplayer(synthetic_tape([SYMBOL], duration_sec=1)))
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    filters = MarketFilters.from_market(exchange.markets_payload()[0])
+    public, secret = generate_keys()
+    client = AsyncOrderClient(public, secret, api_url=f"http://127.0.0.1:{port}")
+    if cancel_failures:
+        client = RateLimitedCancels(client, cancel_failures)
+    if wrapper is not None:
+        client = wrapper(client)
+    executor = PostOnlyExecutor(client=client, books=SimBooks(exchange), settings=TradingConfig(**settings))
+    try:
+        await scenario(exchange, executor, filters)
+    finally:
+        await close_session()
+        await runner.cleanup()
+
+SETTINGS = dict(limit_poll_sec=0.02, limit_reprice_sec=0.05, limit_timeout_sec=0.5)
+
+def test_maker_fill_at_the_touch():
+    async def scenario(exchange, executor, filters):
+        task = asyncio.create_task(executor.execute(SYMBOL, "Bid", 2.0, filters))
+        await asyncio.sleep(0.1)
+        [order] = exchange.get_open_orders(SYMBOL)
+        assert order["postOnly"] and order["price"] == "99.99"
+        exchange.on_trade(int(time.time() * 1000), SYMBOL, 99.99, 5.0)
+        response = await task
+        assert response["status"] == "Filled" and response["executedQuantity"] == "2.000"
+        report = executor.reports[-1]
+        assert report.maker_quantity == 2.0 and not report.fallback
+        # Achat au bid : gain d'un demi-spread par rapport au mid d'arrivée
+        assert response["slippagePct"] < 0 and response["timeToFillMs"] >= 100
+        assert float(exchange.positions_payload()[0]["netQuantity"]) == 2.0
+
+    asyncio.run(with_executor(scenario, **SETTINGS))
+
+def test_reprice_then_market_fallback():
+    async def scenario(exchange, executor, filters):
+        task = asyncio.create_task(executor.execute(SYMBOL, "Ask", 1.0, filters))
+        await asyncio.sleep(0.1)
+        assert exchange.get_open_orders(SYMBOL)[0]["price"] == "100.01"
+        # Le marché baisse sans toucher l'ordre : il suit le nouvel ask, puis le reliquat part au marché
+        exchange.on_trade(int(time.time() * 1000), SYMBOL, 99.5, 1.0)
+        await asyncio.sleep(0.15)
+        assert exchange.get_open_orders(SYMBOL)[0]["price"] == "99.51"
+        response = await task
+        report = executor.reports[-1]
+        assert report.reprices >= 1 and report.fallback and report.maker_quantity == 0
+        assert response["status"] == "Filled" and exchange.get_open_orders(SYMBOL) == []
+        assert float(exchange.positions_payload()[0]["netQuantity"]) == -1.0
+        assert executor.summary()["fallbacks"] == 1
+
+    asyncio.run(with_executor(scenario, **SETTINGS))
+
+def test_rejected_cancel_is_not_a_fill():
+    async def scenario(exchange, executor, filters):
+        # Aucun trade : au délai, la première annulation est refusée, l'ordre est relu puis annulé
+        response = await executor.execute(SYMBOL, "Bid", 1.0, filters)
+        report = executor.reports[-1]
+        assert report.maker_quantity == 0 and report.fallback
+        assert response["status"] == "Filled" and exchange.get_open_orders(SYMBOL) == []
+        assert float(exchange.positions_payload()[0]["netQuantity"]) == 1.0
+
+    asyncio.run(with_executor(scenario, cancel_failures=1, **SETTINGS))
+
+def test_cancelled_execution_leaves_no_resting_order():
+    async def scenario(exchange, executor, filters):
+        task = asyncio.create_task(executor.execute(SYMBOL, "Ask", 1.0, filters))
+        await asyncio.sleep(0.1)
+        assert len(exchange.get_open_orders(SYMBOL)) == 1
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert exchange.get_open_orders(SYMBOL) == [] and exchange.positions_payload() == []
+
+    asyncio.run(with_executor(scenario, **SETTINGS))
+
+def test_lost_cancel_response_is_not_a_fill():
+    async def scenario(exchange, executor, filters):
+        executor.client.down = True  # l'annulation passe, sa réponse se perd
+        response = await executor.execute(SYMBOL, "Bid", 1.0, filters)
+        assert response["executedQuantity"] == "0.000" and response["status"] == "Cancelled"
+        assert response["error"] and response["openOrderId"] is None
+        report = executor.reports[-1]
+        assert report.maker_quantity == 0 and not report.fallback
+        assert exchange.get_open_orders(SYMBOL) == [] and exchange.positions_payload() == []
+
+    asyncio.run(with_executor(scenario, wrapper=lambda c: UnreachableExchange(c, lost=True), **SETTINGS))
+
+def test_partial_fill_survives_an_unreachable_exchange():
+    async def scenario(exchange, executor, filters):
+        task = asyncio.create_task(executor.execute(SYMBOL, "Bid", 2.0, filters))
+        await asyncio.sleep(0.1)
+        # Remplissage partiel puis baisse : l'ordre est annulé (1.0 exécuté) et replacé au nouveau bid
+        [resting] = exchange.open_orders.values()
+        exchange._fill(exchange.markets[SYMBOL], resting, 1.0, resting["_limit"])
+        exchange.on_trade(int(time.time() * 1000), SYMBOL, 100.5, 0.001)
+        await asyncio.sleep(0.15)
+        [order] = exchange.get_open_orders(SYMBOL)
+        executor.client.down = True
+        response = await task
+        # Exchange injoignable : le partiel connu est rendu, sans market sur le reliquat
+        assert response["executedQuantity"] == "1.000" and response["status"] == "PartiallyFilled"
+        assert response["error"] and response["openOrderId"] == order["id"]
+        assert not executor.reports[-1].fallback
+        await executor.client.client.cancel_order(SYMBOL, order_id=order["id"])
+
+    asyncio.run(with_executor(scenario, wrapper=lambda c: UnreachableExchange(c, lost=False), **SETTINGS))
+
+if __name__ == "__main__":
+    test_passive_price_is_tick_aligned()
+    test_maker_fill_at_the_touch()
+    test_reprice_then_market_fallback()
+    test_rejected_cancel_is_not_a_fill()
+    test_cancelled_execution_leaves_no_resting_order()
+    test_lost_cancel_response_is_not_a_fill()
+    test_partial_fill_survives_an_unreachable_exchange()
+    print("✅ test_limit_execution OK")
@@ -0,0 +1,57 @@
+import sys
+import os
+import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.market_cache import MarketFilters
+from utils.order_validator import is_order_valid_for_market, adjust_to_step
+
+STEPS = ["1", "10", "0.1", "0.5", "0.01", "0.05", "0.001", "0.0001", "0.00010", "0.00001", "1e-05", "0.000001", "0.00000001"]
+
+def random_decimal(rng: random.Random) -> float:
+    """Décimal d'au plus 12 chiffres significatifs, comme les quantités et prix envoyés à l'API."""
+    decimals = rng.randint(0, 8)
+    return rng.randint(1, 10 ** rng.randint(1, 12)) / 10 ** decimals
+
+def random_on_step(rng: random.Random, step: str) -> float:
+    """Multiple exact d'un pas, obtenu par une division flottante (cas des quantités calculées)."""
+    filters = MarketFilters("X", step)
+    return rng.randint(1, 10 ** 6) * filters.step_units / filters.quantity_scale
+
+def test_rounding_matches_decimal_reference():
+    rng = random.Random(42)
+    for _ in range(20_000):
+        step, tick = rng.choice(STEPS), rng.choice(STEPS)
+        filters = MarketFilters("X", step, None, tick)
+        quantity, price = random_decimal(rng), random_decimal(rng)
+        assert filters.round_quantity(quantity) == adjust_to_step(quantity, step), (quantity, step)
+        assert filters.round_price(price) == adjust_to_step(price, tick), (price, tick)
+        assert filters.is_valid(quantity, price) == is_order_valid_for_market(quantity, price, step, tick), \
+            (quantity, price, step, tick)
+
+def test_values_on_step_are_kept():
+    rng = random.Random(7)
+    for _ in range(5_000):
+        step = rng.choice(STEPS)
+        filters = MarketFilters("X", step, None, step)
+        value = random_on_step(rng, step)
+        assert filters.round_quantity(value) == value == adjust_to_step(value, step)
+        assert filters.ceil_price(value) == value
+        assert filters.is_valid(value, value) == (True, True)
+
+def test_edge_cases():
+    filters = MarketFilters("X", "0.01", "0.01", "0.05")
+    assert filters.round_quantity(0.29) == 0.29  # 0.29 * 100 = 28.999999999999996
+    assert filters.round_quantity(0.2899) == 0.28
+    assert filters.round_price(100.07) == 100.05 and filters.ceil_price(100.01) == 100.05
+    assert filters.ceil_price(100.05) == 100.05
+    assert filters.round_quantity(0.0) == 0.0 and filters.round_quantity(0.001) == 0.0
+    assert filters.format_price(100.05) == "100.05"
+    assert MarketFilters("X", "10").round_quantity(99.9) == 90
+
+if __name__ == "__main__":
+    test_rounding_matches_decimal_reference()
+    test_values_on_step_are_kept()
+    test_edge_cases()
+    print("✅ test_market_rounding OK")
@@ -0,0 +1,134 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from live.order_book import OrderBook, OrderBookManager
+
+def make_book():
+    book = OrderBook("SOL_USDC_PERP")
+    book.load_snapshot(
+        bids=[["99.0", "2"], ["98.0", "5"], ["100.0", "1"]],
+        asks=[["101.0", "1"], ["102.0", "3"], ["104.0", "10"]],
+        last_update_id=10,
+    )
+    return book
+
+def test_top_of_book():
+    book = make_book()
+    assert book.best_bid == 100.0
+    assert book.best_ask == 101.0
+    assert book.spread == 1.0
+    assert book.mid == 100.5
+
+def test_diff_updates_and_removes_levels():
+    book = make_book()
+    book.apply(bids=[["100.0", "0"], ["100.5", "4"]], asks=[["101.0", "0"]], update_id=11)
+    assert book.best_bid == 100.5
+    assert book.best_ask == 102.0
+    assert book.depth("bid", 2) == (6.0, 100.5 * 4 + 99.0 * 2)
+
+def test_impact_price_and_slippage():
+    book = make_book()
+    # 1 @ 101 + 2 @ 102
+    assert book.impact_price("buy", 3) == (101.0 + 2 * 102.0) / 3
+    assert book.impact_price("buy", 100) is None
+    assert book.quantity_for_notional("buy", 101.0 + 102.0) == 2.0
+    assert book.slippage_pct("buy", 101.0) == 0.0
+    assert book.slippage_pct("sell", 100.0 + 99.0 * 2) > 0
+
+def test_manager_sequence_gap_requests_resync():
+    manager = OrderBookManager()
+    manager.books["SOL_USDC_PERP"] = make_book()
+    # déjà inclus dans le snapshot
+    assert manager._apply_event("SOL_USDC_PERP", {"U": 5, "u": 9, "b": [["50", "1"]], "a": []})
+    assert manager.books["SOL_USDC_PERP"].best_bid == 100.0
+    # continuité
+    assert manager._apply_event("SOL_USDC_PERP", {"U": 11, "u": 12, "b": [["100.2", "1"]], "a": []})
+    assert manager.books["SOL_USDC_PERP"].best_bid == 100.2
+    # trou de séquence
+    assert not manager._apply_event("SOL_USDC_PERP", {"U": 20, "u": 21, "b": [], "a": []})
+
+def test_resync_burst_fetches_one_snapshot():
+    class SnapshotManager(OrderBookManager):
+        fetches = 0
+
+        async def _fetch_snapshot(self, symbol):
+            self.fetches += 1
+            await asyncio.sleep(0.01)
+            return {"lastUpdateId": "22", "bids": [["100.0", "1"]], "asks": [["101.0", "1"]]}
+
+    async def scenario():
+        manager = SnapshotManager()
+        manager.symbols = {"SOL_USDC_PERP"}
+        manager.books["SOL_USDC_PERP"] = make_book()
+        # Rafale de diffs hors séquence : un seul snapshot, les diffs suivants sont mis en attente
+        for update_id in range(20, 26):
+            if not manager._apply_event("SOL_USDC_PERP", {"U": update_id, "u": update_id, "b": [], "a": []}):
+                manager._schedule_resync("SOL_USDC_PERP")
+        manager._schedule_resync("SOL_USDC_PERP")
+        assert len(manager._tasks) == 1
+        await asyncio.gather(*manager._tasks)
+        assert manager.fetches == 1 and not manager._tasks
+        assert manager.books["SOL_USDC_PERP"].last_update_id == 25
+
+    asyncio.run(scenario())
+
+def test_gap_after_snapshot_resyncs_again():
+    class SnapshotManager(OrderBookManager):
+        snapshots = [30, 22]
+
+        async def _fetch_snapshot(self, symbol):
+            await asyncio.sleep(0.01)
+            return {"lastUpdateId": str(self.snapshots.pop()), "bids": [["100.0", "1"]], "asks": [["101.0", "1"]]}
+
+    async def scenario():
+        manager = SnapshotManager()
+        manager.symbols = {"SOL_USDC_PERP"}
+        manager._schedule_resync("SOL_USDC_PERP")
+        # Diff mis en attente qui ne suit pas le premier snapshot (22 -> 25)
+        manager._apply_event("SOL_USDC_PERP", {"U": 25, "u": 26, "b": [], "a": []})
+        while manager._tasks:
+            await asyncio.gather(*manager._tasks)
+        assert manager.snapshots == []
+        assert manager.get("SOL_USDC_PERP").last_update_id == 30
+
+    asyncio.run(scenario())
+
+def test_failed_snapshot_is_retried_with_backoff():
+    class FlakyManager(OrderBookManager):
+        fetches = 0
+        last_sent = 0
+
+        async def _fetch_snapshot(self, symbol):
+            self.fetches += 1
+            if self.fetches < 3:
+                raise ConnectionError("depth endpoint unavailable")
+            return {"lastUpdateId": str(self.last_sent), "bids": [["100.0", "1"]], "asks": [["101.0", "1"]]}
+
+    async def scenario():
+        manager = FlakyManager(snapshot_retry_base=0.05, snapshot_retry_cap=0.05)
+        manager.symbols = {"SOL_USDC_PERP"}
+        manager._schedule_resync("SOL_USDC_PERP")
+        # Diffs reçus pendant les échecs : mis en attente, aucun snapshot supplémentaire
+        for update_id in range(5, 50):
+            manager.last_sent = update_id
+            if not manager._apply_event("SOL_USDC_PERP", {"U": update_id, "u": update_id, "b": [], "a": []}):
+                manager._schedule_resync("SOL_USDC_PERP")
+            assert len(manager._tasks) <= 1
+            await asyncio.sleep(0.002)
+        await asyncio.gather(*manager._tasks)
+        assert manager.fetches == 3 and manager.get("SOL_USDC_PERP") is not None
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    test_top_of_book()
+    test_diff_updates_and_removes_levels()
+    test_impact_price_and_slippage()
+    test_manager_sequence_gap_requests_resync()
+    test_resync_burst_fetches_one_snapshot()
+    test_gap_after_snapshot_resyncs_again()
+    test_failed_snapshot_is_retried_with_backoff()
+    print("✅ test_order_book OK")
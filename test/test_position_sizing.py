@@ -0,0 +1,84 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from config.settings import RiskConfig, TradingConfig
+from utils.market_cache import MarketFilters
+from execute.position_sizing import PositionSizer, atr_pct, kelly_fraction
+
+TRADING = TradingConfig(position_amount_usdc=50.0, leverage=2, max_positions=4, fixed_stop_loss_pct=-2.0)
+
+class FakeMarkets:
+    def __init__(self, filters):
+        self.filters = filters
+
+    async def get(self, symbol):
+        return self.filters.get(symbol)
+
+def make_sizer(method, **risk):
+    settings = RiskConfig(position_sizing_method=method, **risk)
+    markets = FakeMarkets({"SOL_USDC_PERP": MarketFilters("SOL_USDC_PERP", "0.01", "0.01", "0.01")})
+    return PositionSizer(settings=settings, trading=TRADING, markets=markets)
+
+def test_market_filters_round_down_to_step():
+    filters = MarketFilters.from_market({"symbol": "BTC_USDC_PERP", "filters": {
+        "price": {"tickSize": "0.1"}, "quantity": {"stepSize": "0.00010", "minQuantity": "0.0001"}}})
+    assert filters.quantity_decimals == 4 and filters.price_decimals == 1
+    assert filters.round_quantity(0.00039999) == 0.0003
+    assert filters.round_quantity(0.3) == 0.3  # 0.3 / 0.0001 = 2999.9999... en binaire
+    assert filters.format_quantity(0.0003) == "0.0003"
+    assert MarketFilters("X", "1").round_quantity(7.9) == 7
+
+def test_atr_and_kelly():
+    close = np.array([100.0, 101.0, 102.0, 101.0])
+    high, low = close + 0.5, close - 0.5
+    # true ranges : 1.5, 1.5, 1.5 -> ATR 1.5 sur un dernier prix de 101
+    assert abs(atr_pct(high, low, close, 14) - 1.5 / 101 * 100) < 1e-9
+    assert atr_pct(high[:1], low[:1], close[:1], 14) is None
+    assert abs(kelly_fraction(0.5, 1.5) - 1 / 6) < 1e-12
+    assert kelly_fraction(0.3, 1.0) == 0.0
+
+def test_fixed_method_uses_position_amount():
+    sizer = make_sizer("fixed")
+    plan = sizer.build_plan("SOL_USDC_PERP", 150.0, 0.0, None, MarketFilters("SOL_USDC_PERP", "0.01"))
+    assert plan.valid and plan.usdc_amount == 50.0
+    assert plan.quantity == 0.33 and plan.quantity_str == "0.33"
+
+def test_percentage_method_scales_with_volatility():
+    sizer = make_sizer("percentage", risk_per_trade_pct=1.0, atr_stop_multiplier=2.0)
+    calm, _ = sizer.usdc_amount(1000.0, 0.25)   # stop 0.5 % -> 10 / 0.005 = 2000, plafonné à 1000 × 2 / 4
+    wild, stop = sizer.usdc_amount(1000.0, 2.0)  # stop 4 % -> 10 / 0.04 = 250
+    assert calm == 500.0
+    assert wild == 250.0 and stop == 4.0
+    fallback, stop = sizer.usdc_amount(1000.0, None)  # pas d'ATR : stop fixe de 2 %
+    assert fallback == 500.0 and stop == 2.0
+
+def test_kelly_method():
+    sizer = make_sizer("kelly", kelly_win_rate=0.55, kelly_payoff_ratio=1.0, kelly_multiplier=0.5, atr_stop_multiplier=1.0)
+    amount, _ = sizer.usdc_amount(1000.0, 5.0)  # f* = 0.1, demi-Kelly 5 % de risque sur un stop de 5 %
+    assert abs(amount - 500.0) < 1e-9
+    losing = make_sizer("kelly", kelly_win_rate=0.4, kelly_payoff_ratio=1.0)
+    assert losing.usdc_amount(1000.0, 1.0)[0] == 0.0
+
+def test_prepare_precomputes_plan_without_rest():
+    sizer = make_sizer("fixed")
+    plan = asyncio.run(sizer.prepare("SOL_USDC_PERP", 100.0))
+    assert sizer.plans["SOL_USDC_PERP"] is plan
+    assert plan.valid and plan.quantity == 0.5
+    tiny = asyncio.run(sizer.prepare("SOL_USDC_PERP", 10_000.0))
+    assert not tiny.valid and "minimum" in tiny.reason
+    unknown = asyncio.run(sizer.prepare("NEW_USDC_PERP", 1.0))
+    assert not unknown.valid
+
+if __name__ == "__main__":
+    test_market_filters_round_down_to_step()
+    test_atr_and_kelly()
+    test_fixed_method_uses_position_amount()
+    test_percentage_method_scales_with_volatility()
+    test_kelly_method()
+    test_prepare_precomputes_plan_without_rest()
+    print("✅ test_position_sizing OK")
@@ -0,0 +1,33 @@
+import asyncio
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limiter import TokenBucket
+
+def test_burst_is_immediate():
+    async def run():
+        bucket = TokenBucket(rate=5, capacity=5)
+        start = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        return time.monotonic() - start
+    assert asyncio.run(run()) < 0.05
+
+def test_rate_is_enforced_across_tasks():
+    async def run():
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(11)))
+        return time.monotonic() - start, bucket.total_acquired
+    elapsed, acquired = asyncio.run(run())
+    # 1 jeton immédiat + 10 jetons à 50/s => ~0.2s
+    assert elapsed >= 0.18
+    assert acquired == 11
+
+if __name__ == "__main__":
+    test_burst_is_immediate()
+    test_rate_is_enforced_across_tasks()
+    print("✅ TokenBucket OK")
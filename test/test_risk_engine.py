@@ -0,0 +1,131 @@
+import sys
+import os
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("PG_DSN", "postgresql://offline/tests")
+
+import live.live_engine as live_engine
+import utils.position_utils as position_utils
+from live.risk_engine import DailyRiskEngine, utc_day
+
+DAY1 = datetime(2024, 3, 1, 12, tzinfo=timezone.utc).timestamp()
+DAY2 = datetime(2024, 3, 2, 0, 5, tzinfo=timezone.utc).timestamp()
+
+def position(symbol, net, entry, realized=0.0, mark=None):
+    return {"symbol": symbol, "netQuantity": str(net), "entryPrice": str(entry),
+            "pnlRealized": str(realized), "markPrice": str(mark if mark is not None else entry)}
+
+def make_engine(tmp_path, pct=10.0, equity=1000.0):
+    engine = DailyRiskEngine(path=str(tmp_path / "risk_state.json"), max_loss_pct=pct, save_interval=0)
+    engine.day = "2024-03-01"
+    engine.start_equity = equity
+    return engine
+
+def test_day_pnl_tracks_prices_and_closes(tmp_path):
+    engine = make_engine(tmp_path)
+    engine.on_positions([position("SOL_USDC_PERP", 2, 100.0, realized=-0.5)], now=DAY1)
+    engine.on_price("SOL_USDC_PERP", 103.0, now=DAY1)
+    assert abs(engine.day_pnl - 5.5) < 1e-9
+    # Position fermée : son dernier PnL passe dans le réalisé du jour
+    engine.on_positions([], now=DAY1)
+    assert engine.positions == {}
+    assert abs(engine.realized - 5.5) < 1e-9
+    assert abs(engine.day_pnl - 5.5) < 1e-9
+
+def test_breach_halts_new_entries(tmp_path):
+    engine = make_engine(tmp_path, pct=10.0, equity=1000.0)
+    engine.on_positions([position("BTC_USDC_PERP", -1, 50_000.0)], now=DAY1)
+    engine.on_price("BTC_USDC_PERP", 50_099.0, now=DAY1)
+    assert not engine.halted
+    engine.on_price("BTC_USDC_PERP", 50_101.0, now=DAY1)
+    assert engine.halted
+    # Le retour du prix ne lève pas le blocage avant le jour suivant
+    engine.on_price("BTC_USDC_PERP", 50_000.0, now=DAY1)
+    assert engine.halted
+
+def test_new_day_resets_with_baseline(tmp_path):
+    engine = make_engine(tmp_path, equity=100.0)
+    engine.on_positions([position("ETH_USDC_PERP", 1, 2000.0)], now=DAY1)
+    engine.on_price("ETH_USDC_PERP", 1980.0, now=DAY1)
+    assert engine.halted
+    engine.on_price("ETH_USDC_PERP", 1985.0, now=DAY2)
+    assert engine.day == "2024-03-02"
+    assert not engine.halted and engine.start_equity is None
+    assert engine.realized == 0.0
+    # La perte de la veille sert de base : seul le mouvement du jour compte
+    assert abs(engine.day_pnl) < 1e-9
+    engine.on_price("ETH_USDC_PERP", 1990.0, now=DAY2)
+    assert abs(engine.day_pnl - 5.0) < 1e-9
+
+def test_state_survives_restart(tmp_path):
+    engine = make_engine(tmp_path, equity=100.0)
+    engine.day = datetime.now(timezone.utc).date().isoformat()
+    engine.on_positions([position("SOL_USDC_PERP", 1, 100.0)])
+    engine.on_price("SOL_USDC_PERP", 80.0)
+    assert engine.halted
+    restored = DailyRiskEngine(path=engine.path, max_loss_pct=10.0)
+    assert restored.halted and not restored.can_open()
+    assert restored.start_equity == 100.0
+    assert abs(restored.day_pnl + 20.0) < 1e-9
+
+def test_net_equity_does_not_block_the_loop():
+    class FakeAccount:
+        def get_collateral(self):
+            threads.append(threading.get_ident())
+            return {"netEquity": "1234.5"}
+
+    async def run():
+        return await position_utils.get_net_equity()
+
+    threads = []
+    original = position_utils.account
+    position_utils.account = FakeAccount()
+    try:
+        assert asyncio.run(run()) == 1234.5
+    finally:
+        position_utils.account = original
+    # Appel SDK bloquant exécuté hors de la boucle d'événements
+    assert threads and threads[0] != threading.get_ident()
+
+def test_flatten_is_not_marked_when_positions_are_unknown(tmp_path):
+    class FailingAccount:
+        def get_open_positions(self):
+            raise ConnectionError("API unavailable")
+
+    class EmptyAccount:
+        def get_open_positions(self):
+            return []
+
+    engine = make_engine(tmp_path, equity=100.0)
+    engine.day = utc_day()
+    engine.halted = True
+    originals = (live_engine.RISK_ENGINE, position_utils.account, live_engine.config.risk.flatten_on_daily_loss)
+    live_engine.RISK_ENGINE = engine
+    live_engine.config.risk.flatten_on_daily_loss = True
+    try:
+        # Échec de lecture : pas de liste vide prise pour « tout est fermé »
+        position_utils.account = FailingAccount()
+        asyncio.run(live_engine.enforce_daily_loss_limit(real_run=True))
+        assert not engine.flattened
+        # Lecture réussie sans position : rien à fermer
+        position_utils.account = EmptyAccount()
+        asyncio.run(live_engine.enforce_daily_loss_limit(real_run=True))
+        assert engine.flattened
+    finally:
+        live_engine.RISK_ENGINE, position_utils.account, live_engine.config.risk.flatten_on_daily_loss = originals
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_day_pnl_tracks_prices_and_closes, test_breach_halts_new_entries,
+                 test_new_day_resets_with_baseline, test_state_survives_restart):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    test_net_equity_does_not_block_the_loop()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_flatten_is_not_marked_when_positions_are_unknown(Path(tmp))
+    print("✅ test_risk_engine OK")
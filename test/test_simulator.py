@@ -0,0 +1,131 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from simulator.exchange import SimExchange, SimError, depth_message
+from simulator.tape import TapeReplayer, synthetic_tape
+
+SYMBOL = "SOL_USDC_PERP"
+
+def make_exchange():
+    return SimExchange({SYMBOL: 150.0}, fee_bps=0.0)
+
+def position(exchange):
+    positions = {p["symbol"]: p for p in exchange.positions_payload()}
+    return positions.get(SYMBOL)
+
+def test_market_order_opens_and_closes_position():
+    exchange = make_exchange()
+    order = exchange.execute_order({"symbol": SYMBOL, "side": "Bid", "orderType": "Market", "quantity": "2"})
+    assert order["status"] == "Filled"
+    assert float(order["executedQuantity"]) == 2
+    assert float(position(exchange)["netQuantity"]) == 2
+
+    exchange.on_trade(1_700_000_000_000, SYMBOL, 160.0, 1.0)
+    close = exchange.execute_order({"symbol": SYMBOL, "side": "Ask", "orderType": "Market", "quantity": "5",
+                                    "reduceOnly": True})
+    assert float(close["executedQuantity"]) == 2  # reduce-only plafonné à la position
+    assert position(exchange) is None
+    assert exchange.balance > 10_000
+
+def test_reduce_only_without_position_is_rejected():
+    exchange = make_exchange()
+    with pytest.raises(SimError):
+        exchange.execute_order({"symbol": SYMBOL, "side": "Ask", "orderType": "Market", "quantity": "1",
+                                "reduceOnly": True})
+    assert exchange.orders_rejected == 1
+
+def test_quantity_must_match_step_size():
+    exchange = make_exchange()
+    with pytest.raises(SimError):
+        exchange.execute_order({"symbol": SYMBOL, "side": "Bid", "orderType": "Market", "quantity": "0.0001"})
+
+def test_limit_order_rests_then_fills_on_trade():
+    exchange = make_exchange()
+    order = exchange.execute_order({"symbol": SYMBOL, "side": "Bid", "orderType": "Limit", "quantity": "1",
+                                    "price": "145", "postOnly": True})
+    assert order["status"] == "New"
+    assert len(exchange.get_open_orders(SYMBOL)) == 1
+
+    exchange.on_trade(1_700_000_000_000, SYMBOL, 146.0, 1.0)
+    assert len(exchange.get_open_orders(SYMBOL)) == 1
+    exchange.on_trade(1_700_000_001_000, SYMBOL, 144.9, 1.0)
+    assert exchange.get_open_orders(SYMBOL) == []
+    assert float(position(exchange)["entryPrice"]) == 145
+
+def test_crossing_post_only_is_rejected():
+    exchange = make_exchange()
+    with pytest.raises(SimError):
+        exchange.execute_order({"symbol": SYMBOL, "side": "Bid", "orderType": "Limit", "quantity": "1",
+                                "price": "155", "postOnly": True})
+
+def test_trigger_order_fires():
+    exchange = make_exchange()
+    exchange.execute_order({"symbol": SYMBOL, "side": "Bid", "orderType": "Market", "quantity": "1"})
+    stop = exchange.execute_order({"symbol": SYMBOL, "side": "Ask", "orderType": "Market", "quantity": "1",
+                                   "triggerPrice": "140", "reduceOnly": True})
+    assert stop["status"] == "TriggerPending"
+
+    exchange.on_trade(1_700_000_000_000, SYMBOL, 141.0, 1.0)
+    assert position(exchange) is not None
+    exchange.on_trade(1_700_000_001_000, SYMBOL, 139.5, 1.0)
+    assert position(exchange) is None
+    assert exchange.get_open_orders() == []
+
+def test_klines_aggregate_minutes():
+    exchange = make_exchange()
+    start = 1_700_000_100_000 - 1_700_000_100_000 % 300_000
+    for minute, price in enumerate([150.0, 152.0, 149.0, 151.0, 150.5, 153.0]):
+        exchange.on_trade(start + minute * 60_000, SYMBOL, price, 1.0)
+    candles = exchange.klines(SYMBOL, "5m", start // 1000, (start + 600_000) // 1000)
+    assert len(candles) == 2
+    first = candles[0]
+    assert first[0] == start
+    assert [float(v) for v in first[1:6]] == [150.0, 152.0, 149.0, 150.5, 5.0]
+
+def test_depth_messages_are_contiguous():
+    exchange = make_exchange()
+    market = exchange.markets[SYMBOL]
+    previous, last_id = market.book(), market.update_id
+    for i, price in enumerate([151.0, 152.0, 150.0]):
+        exchange.on_trade(1_700_000_000_000 + i, SYMBOL, price, 1.0)
+        message = depth_message(market, previous, last_id + 1)["data"]
+        assert message["U"] == last_id + 1
+        assert message["u"] == market.update_id
+        previous, last_id = market.book(), market.update_id
+
+def test_synthetic_tape_is_deterministic():
+    a = synthetic_tape([SYMBOL, "BTC_USDC_PERP"], duration_sec=60, trades_per_sec=5, seed=7)
+    b = synthetic_tape([SYMBOL, "BTC_USDC_PERP"], duration_sec=60, trades_per_sec=5, seed=7)
+    assert a == b
+    assert [t[0] for t in a] == sorted(t[0] for t in a)
+
+def test_replayer_rebases_to_wall_clock():
+    trades = synthetic_tape([SYMBOL], duration_sec=10, trades_per_sec=20, seed=1)
+    replayer = TapeReplayer(trades, speed=1000, loop=False, tick_sec=0.001)
+    received = []
+
+    async def on_batch(batch):
+        received.extend(batch)
+
+    asyncio.run(replayer.run(on_batch))
+    assert len(received) == len(trades) == replayer.replayed
+    assert received[0][0] > trades[0][0]
+    assert [t[0] for t in received] == sorted(t[0] for t in received)
+
+if __name__ == "__main__":
+    test_market_order_opens_and_closes_position()
+    test_reduce_only_without_position_is_rejected()
+    test_quantity_must_match_step_size()
+    test_limit_order_rests_then_fills_on_trade()
+    test_crossing_post_only_is_rejected()
+    test_trigger_order_fires()
+    test_klines_aggregate_minutes()
+    test_depth_messages_are_contiguous()
+    test_synthetic_tape_is_deterministic()
+    test_replayer_rebases_to_wall_clock()
+    print("✅ test_simulator OK")
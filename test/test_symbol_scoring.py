@@ -0,0 +1,109 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.symbol_scoring import (
+    MINUTE_BAR_DTYPE, MINUTE_MS, SymbolScorer, build_matrices, compute_metrics, forward_fill, percentile_ranks,
+)
+from config.settings import SymbolScoringConfig
+
+END_MS = 1_700_000_000_000 - 1_700_000_000_000 % MINUTE_MS
+
+def make_bars(closes, spread=0.001, active=30, end_ms=END_MS):
+    closes = np.asarray(closes, dtype=np.float64)
+    bars = np.zeros(len(closes), dtype=MINUTE_BAR_DTYPE)
+    bars["ts_ms"] = end_ms - (len(closes) - 1 - np.arange(len(closes))) * MINUTE_MS
+    bars["open"] = np.concatenate([[closes[0]], closes[:-1]])
+    bars["close"] = closes
+    bars["high"] = np.maximum(bars["open"], closes) * (1 + spread)
+    bars["low"] = np.minimum(bars["open"], closes) * (1 - spread)
+    bars["volume"] = 1.0
+    bars["active_sec"] = active
+    return bars
+
+def random_walk(n, vol, seed, drift=0.0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(drift, vol, n)))
+
+def test_forward_fill_keeps_leading_nan():
+    a = np.array([[np.nan, 1.0, np.nan, 3.0], [2.0, np.nan, np.nan, np.nan]])
+    filled = forward_fill(a)
+    assert np.isnan(filled[0, 0])
+    assert filled[0].tolist()[1:] == [1.0, 1.0, 3.0]
+    assert filled[1].tolist() == [2.0] * 4
+
+def test_build_matrices_aligns_on_grid():
+    bars = make_bars([1.0, 2.0, 3.0])
+    gappy = make_bars([5.0, 6.0, 7.0])[[0, 2]]
+    symbols, m = build_matrices({"A": bars, "B": gappy}, END_MS, 5)
+    assert symbols == ["A", "B"]
+    assert np.isnan(m["close"][0, :2]).all() and m["close"][0, 2:].tolist() == [1.0, 2.0, 3.0]
+    assert np.isnan(m["close"][1, 3]) and m["close"][1, 4] == 7.0
+
+def test_metrics_rank_volatility_trend_and_spread():
+    n = 240
+    calm = make_bars(random_walk(n, 0.0005, 1), spread=0.0002)
+    wild = make_bars(random_walk(n, 0.004, 2), spread=0.002)
+    trend = make_bars(100 * np.exp(np.linspace(0, 0.05, n)), spread=0.0002)
+    symbols, m = build_matrices({"calm": calm, "wild": wild, "trend": trend}, END_MS, n)
+    metrics = compute_metrics(m["high"], m["low"], m["close"], m["active_sec"])
+    vol = dict(zip(symbols, metrics["realized_vol"]))
+    atr = dict(zip(symbols, metrics["atr_pct"]))
+    spread = dict(zip(symbols, metrics["spread_pct"]))
+    er = dict(zip(symbols, metrics["trend_strength"]))
+    assert vol["wild"] > vol["calm"]
+    assert atr["wild"] > atr["calm"]
+    assert spread["wild"] > spread["calm"] >= 0
+    assert er["trend"] > 0.99 > er["calm"]
+    assert metrics["trade_count"].tolist() == [30 * n] * 3
+
+def test_percentile_ranks_neutral_for_missing():
+    ranks = percentile_ranks(np.array([3.0, np.nan, 1.0, 2.0]))
+    assert ranks.tolist() == [1.0, 0.5, 0.0, 0.5]
+
+def test_scorer_orders_and_filters_short_history():
+    settings = SymbolScoringConfig(lookback_hours=4, min_bars=60,
+                                   weights={"realized_vol": 1.0, "atr_pct": 0.0, "spread_pct": 0.0,
+                                            "trade_count": 0.0, "trend_strength": 0.0})
+    scorer = SymbolScorer(settings=settings)
+    scorer._bars = {
+        "LOW_USDC_PERP": make_bars(random_walk(240, 0.0005, 3)),
+        "HIGH_USDC_PERP": make_bars(random_walk(240, 0.005, 4)),
+        "NEW_USDC_PERP": make_bars(random_walk(30, 0.01, 5)),
+    }
+    ranking = scorer.score(now_ms=END_MS)
+    assert [symbol for symbol, _ in ranking] == ["HIGH_USDC_PERP", "LOW_USDC_PERP"]
+    assert scorer.last_metrics["HIGH_USDC_PERP"]["realized_vol"] > scorer.last_metrics["LOW_USDC_PERP"]["realized_vol"]
+
+def test_rank_uses_cached_ranking():
+    settings = SymbolScoringConfig(min_quote_volume=1000, cache_ttl_sec=60)
+    scorer = SymbolScorer(settings=settings)
+    calls = []
+
+    async def fake_update(symbols, now_ms=None):
+        calls.append(list(symbols))
+
+    scorer.update_history = fake_update
+    tickers = [{"symbol": "A_USDC_PERP", "quoteVolume": "5000", "trades": "10"},
+               {"symbol": "B_USDC_PERP", "quoteVolume": "10"},
+               {"symbol": "C_USDC", "quoteVolume": "9000"}]
+
+    async def scenario():
+        await scorer.rank(tickers, 5)
+        await scorer.rank(tickers, 5)
+
+    asyncio.run(scenario())
+    assert calls == [["A_USDC_PERP"]]
+
+if __name__ == "__main__":
+    test_forward_fill_keeps_leading_nan()
+    test_build_matrices_aligns_on_grid()
+    test_metrics_rank_volatility_trend_and_spread()
+    test_percentile_ranks_neutral_for_missing()
+    test_scorer_orders_and_filters_short_history()
+    test_rank_uses_cached_ranking()
+    print("✅ test_symbol_scoring OK")
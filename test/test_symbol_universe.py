@@ -0,0 +1,98 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from utils.symbol_universe import SymbolUniverse, UniverseSnapshot, diff_symbols
+from utils.fetch_top_n_volatility_volume import rank_tickers
+from utils.public import merge_symbols_with_config
+
+class FakeRanking:
+    """Classements successifs renvoyés à la place de /api/v1/tickers."""
+    def __init__(self, *rankings):
+        self.rankings = list(rankings)
+
+    async def __call__(self, n):
+        ranking = self.rankings.pop(0)
+        if isinstance(ranking, Exception):
+            raise ranking
+        return ranking[:n]
+
+def test_diff_symbols_keeps_order():
+    added, removed = diff_symbols(["A", "B", "C"], ["C", "D", "A", "E"])
+    assert added == ["D", "E"]
+    assert removed == ["B"]
+
+def test_snapshot_is_immutable():
+    snapshot = UniverseSnapshot(1, ["A", "B"], added=["A", "B"])
+    assert "A" in snapshot and len(snapshot) == 2
+    with pytest.raises(AttributeError):
+        snapshot.symbols = ("C",)
+
+def test_refresh_publishes_versioned_diffs():
+    universe = SymbolUniverse(top_n=3, fetch=FakeRanking(["A_PERP", "B_PERP", "C_PERP"],
+                                                         ["B_PERP", "C_PERP", "A_PERP"],
+                                                         ["C_PERP", "D_PERP", "A_PERP"]))
+    seen = []
+
+    async def listener(snapshot):
+        seen.append(snapshot)
+
+    universe.subscribe(listener)
+
+    async def scenario():
+        first = await universe.refresh()
+        unchanged = await universe.refresh()
+        third = await universe.refresh()
+        return first, unchanged, third
+
+    first, unchanged, third = asyncio.run(scenario())
+    assert first.version == 1
+    assert unchanged is first  # même ensemble : pas de nouvelle version
+    assert third.version == 2
+    assert "D_PERP" in third.added
+    assert "B_PERP" in third.removed
+    assert third.symbols == tuple(merge_symbols_with_config(["C_PERP", "D_PERP", "A_PERP"]))
+    assert [s.version for s in seen] == [1, 2]
+
+def test_failed_or_empty_refresh_keeps_universe():
+    universe = SymbolUniverse(top_n=2, fetch=FakeRanking(["A_PERP", "B_PERP"], ConnectionError("down"), []))
+
+    async def scenario():
+        return [await universe.refresh() for _ in range(3)]
+
+    snapshots = asyncio.run(scenario())
+    assert snapshots[1] is snapshots[0] and snapshots[2] is snapshots[0]
+    assert universe.failures == 2
+
+def test_listener_error_does_not_block_publication():
+    universe = SymbolUniverse(top_n=1, fetch=FakeRanking(["A_PERP"]))
+
+    async def broken(snapshot):
+        raise RuntimeError("boom")
+
+    universe.subscribe(broken)
+    snapshot = asyncio.run(universe.refresh())
+    assert universe.snapshot is snapshot and snapshot.version == 1
+
+def test_rank_tickers_orders_by_score():
+    tickers = [
+        {"symbol": "A_USDC_PERP", "priceChangePercent": "0.05", "volume": "2000000"},
+        {"symbol": "B_USDC_PERP", "priceChangePercent": "-0.20", "volume": "4000000"},
+        {"symbol": "C_USDC_PERP", "priceChangePercent": "0.50", "volume": "10"},
+        {"symbol": "D_USDC", "priceChangePercent": "0.90", "volume": "9000000"},
+    ]
+    assert rank_tickers(tickers) == ["B_USDC_PERP", "A_USDC_PERP"]
+    assert rank_tickers(tickers, 1) == ["B_USDC_PERP"]
+
+if __name__ == "__main__":
+    test_diff_symbols_keeps_order()
+    test_snapshot_is_immutable()
+    test_refresh_publishes_versioned_diffs()
+    test_failed_or_empty_refresh_keeps_universe()
+    test_listener_error_does_not_block_publication()
+    test_rank_tickers_orders_by_score()
+    print("✅ test_symbol_universe OK")
@@ -0,0 +1,58 @@
+import sys
+import os
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ScriptDatabase.trade_decoder import TradeDecoder, DECODER_BACKENDS
+
+TRADE = json.dumps({
+    "stream": "trade.SOL_USDC_PERP",
+    "data": {"e": "trade", "s": "SOL_USDC_PERP", "p": "18.68", "q": "0.122",
+             "t": 12345, "T": 1694687692989, "m": True},
+})
+ACK = json.dumps({"result": None, "id": 1})
+NO_PRICE = json.dumps({"data": {"e": "trade", "q": "1", "T": 1}})
+TRUNCATED = TRADE[:40]
+BAD_PRICE = json.dumps({"data": {"e": "trade", "p": "n/a", "q": "1", "T": 1}})
+
+def available_decoders():
+    decoders = []
+    for backend in DECODER_BACKENDS:
+        try:
+            decoders.append(TradeDecoder(backend))
+        except ImportError:
+            pass
+    return decoders
+
+def test_backends_agree():
+    for decoder in available_decoders():
+        assert decoder.decode(TRADE) == (18.68, 0.122, 1694687692989, True, 12345), decoder.backend
+        assert decoder.decode(TRADE.encode()) == (18.68, 0.122, 1694687692989, True, 12345), decoder.backend
+
+def test_non_trade_messages_are_ignored():
+    for decoder in available_decoders():
+        assert decoder.decode(ACK) is None, decoder.backend
+        assert decoder.decode(NO_PRICE) is None, decoder.backend
+
+def test_malformed_frames_are_dropped():
+    for decoder in available_decoders():
+        assert decoder.decode(TRUNCATED) is None, decoder.backend
+        assert decoder.decode(TRUNCATED.encode()) is None, decoder.backend
+        assert decoder.decode(BAD_PRICE) is None, decoder.backend
+
+def test_auto_and_unknown_backend():
+    assert TradeDecoder("auto").backend in DECODER_BACKENDS
+    try:
+        TradeDecoder("ujson")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("ValueError attendu")
+
+if __name__ == "__main__":
+    test_backends_agree()
+    test_non_trade_messages_are_ignored()
+    test_malformed_frames_are_dropped()
+    test_auto_and_unknown_backend()
+    print("✅ test_trade_decoder OK")
@@ -0,0 +1,63 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import live.live_engine as live_engine
+from live.trailing_store import TrailingStateStore
+
+def make_store(tmp_path):
+    return TrailingStateStore(path=str(tmp_path / "trailing_state.sqlite"), flush_interval=0.01)
+
+def test_batched_writes_round_trip(tmp_path):
+    store = make_store(tmp_path)
+    for max_pnl in (0.5, 0.8, 1.2):
+        store.put("SOL_USDC_PERP:long", {"symbol": "SOL_USDC_PERP", "side": "long", "max_pnl": max_pnl})
+    store.put("BTC_USDC_PERP:short", {"symbol": "BTC_USDC_PERP", "side": "short", "max_pnl": 0.1})
+    # Rien n'est écrit avant le flush, et seule la dernière valeur d'une clé part
+    assert make_store(tmp_path).load() == {}
+    asyncio.run(store.flush())
+    assert store.writes == 2
+    store.delete("BTC_USDC_PERP:short")
+    asyncio.run(store.flush())
+    store.close()
+    assert make_store(tmp_path).load() == {
+        "SOL_USDC_PERP:long": {"symbol": "SOL_USDC_PERP", "side": "long", "max_pnl": 1.2}}
+
+def test_tracker_survives_restart_and_partial_fill(tmp_path):
+    store = make_store(tmp_path)
+    original = live_engine.TRAILING_STORE
+    live_engine.TRAILING_STORE = store
+    live_engine.TRAILING_STOPS.clear()
+    try:
+        asyncio.run(live_engine.get_position_trailing_stop("SOL_USDC_PERP", "long", 100.0, 102.0, 2.0, 2.0))
+        # Remplissage partiel : même position, même tracker
+        value = asyncio.run(live_engine.get_position_trailing_stop("SOL_USDC_PERP", "long", 100.4, 101.0, 3.0, 0.6))
+        assert len(live_engine.TRAILING_STOPS) == 1
+        assert value == 2.0 - live_engine.TRAILING_STOP_TRIGGER
+        asyncio.run(store.flush())
+
+        # Redémarrage : le max PnL et le trailing reviennent du store
+        live_engine.TRAILING_STOPS.clear()
+        live_engine.TRAILING_STORE = make_store(tmp_path)
+        live_engine.load_trailing_state()
+        tracker = live_engine.TRAILING_STOPS["SOL_USDC_PERP:long"]
+        assert tracker["max_pnl"] == 2.0 and tracker["active"] and tracker["amount"] == 3.0
+
+        # Position disparue de l'exchange : état évincé de la mémoire et du store
+        live_engine.evict_trailing_state([{"symbol": "SOL_USDC_PERP", "netQuantity": "-1"}])
+        assert live_engine.TRAILING_STOPS == {}
+        asyncio.run(live_engine.TRAILING_STORE.flush())
+        assert make_store(tmp_path).load() == {}
+    finally:
+        live_engine.TRAILING_STORE = original
+        live_engine.TRAILING_STOPS.clear()
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_batched_writes_round_trip, test_tracker_survives_restart_and_partial_fill):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("✅ test_trailing_store OK")
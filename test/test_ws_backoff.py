@@ -0,0 +1,44 @@
+import sys
+import os
+import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ws_supervisor import ReconnectBackoff, ConnectionStats
+
+def test_backoff_grows_and_is_capped():
+    backoff = ReconnectBackoff(base=1.0, cap=8.0, rng=random.Random(42))
+    delays = [backoff.next_delay() for _ in range(10)]
+    ceilings = [1, 2, 4, 8, 8, 8, 8, 8, 8, 8]
+    assert all(0 <= d <= c for d, c in zip(delays, ceilings))
+    assert backoff.attempts == 10
+
+def test_backoff_is_jittered():
+    delays = {ReconnectBackoff(base=1.0, cap=60.0).next_delay() for _ in range(20)}
+    assert len(delays) > 1
+
+def test_backoff_resets_after_stable_connection():
+    backoff = ReconnectBackoff(base=1.0, cap=60.0, reset_after=0.0)
+    for _ in range(5):
+        backoff.next_delay()
+    backoff.connected()
+    assert backoff.next_delay() <= 1.0
+    assert backoff.attempts == 1
+
+def test_connection_stats_counts_reconnects():
+    stats = ConnectionStats("trade.SOL_USDC_PERP")
+    stats.on_connect()
+    stats.on_disconnect(RuntimeError("boom"))
+    stats.on_connect()
+    snapshot = stats.as_dict()
+    assert snapshot["connects"] == 2
+    assert snapshot["reconnects"] == 1
+    assert snapshot["failures"] == 1
+    assert snapshot["connected"]
+
+if __name__ == "__main__":
+    test_backoff_grows_and_is_capped()
+    test_backoff_is_jittered()
+    test_backoff_resets_after_stable_connection()
+    test_connection_stats_counts_reconnects()
+    print("✅ test_ws_backoff OK")
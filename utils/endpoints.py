@@ -0,0 +1,18 @@
+# utils/endpoints.py
+from bpx.base.base_account import BaseAccount
+from bpx.base.base_public import BasePublic
+
+from config.settings import get_config
+
+config = get_config()
+
+# URLs de l'exchange (config exchange.api_url / exchange.ws_url, ou EXCHANGE__API_URL / EXCHANGE__WS_URL)
+API_URL = config.exchange.api_url.rstrip("/")
+WS_URL = config.exchange.ws_url
+
+def api_url(path: str) -> str:
+    return f"{API_URL}/{path.lstrip('/')}"
+
+# Le SDK bpx-py lit son URL de base sur la classe à chaque requête : Public() et Account() suivent la config
+BasePublic.BASE_URL = f"{API_URL}/"
+BaseAccount.BPX_API_URL = f"{API_URL}/"
@@ -3,8 +3,9 @@ import requests
 import sys
 from utils.logger import log
 from utils.i18n import t
+from utils.endpoints import api_url
 
-API_URL = "https://api.backpack.exchange/api/v1/tickers"
+API_URL = api_url("api/v1/tickers")
 OUTPUT_FILE = "symbol.lst"
 
 def fetch_top_n_volatility_volume(n=None):
@@ -34,6 +35,20 @@ def fetch_top_n_volatility_volume(n=None):
         log(f"❌ Erreur lors du parsing JSON : {e}", level="ERROR")
         return []
 
+    return rank_tickers(data, n)
+
+
+def rank_tickers(data, n=None):
+    """
+    Classe les tickers /api/v1/tickers (contrats perpétuels, volume >= 1M) par score décroissant.
+    
+    Args:
+        data (list): Réponse JSON de /api/v1/tickers
+        n (int, optional): Nombre de symboles à retourner. Si None, retourne tous.
+    
+    Returns:
+        list: Liste des symboles triés par score (volatilité * volume normalisé)
+    """
     if not isinstance(data, list):
         log(f"❌ Format de données inattendu. Attendu: liste, reçu: {type(data)}", level="ERROR")
         return []
@@ -1,10 +1,9 @@
 #utils/get_market.py
 import os
 import asyncpg
-import pandas as pd
 from datetime import datetime, timedelta, timezone
 from utils.position_utils import get_open_positions
-from ScriptDatabase.pgsql_ohlcv import fetch_ohlcv_1s
+from ScriptDatabase.pgsql_ohlcv import fetch_ohlcv_1s, init_ohlcv_connection
 from utils.logger import log
 
 PG_DSN = os.environ.get("PG_DSN")
@@ -17,7 +16,7 @@ _pool = None  # pool global
 async def get_pool():
     global _pool
     if _pool is None:
-        _pool = await asyncpg.create_pool(dsn=PG_DSN)
+        _pool = await asyncpg.create_pool(dsn=PG_DSN, init=init_ohlcv_connection)
     return _pool
 
 
@@ -58,17 +57,11 @@ async def get_market(symbol: str):
         # Récupérer le prix actuel depuis la BDD OHLCV (bougie 1s)
         end_ts = datetime.now(timezone.utc)
         start_ts = end_ts - timedelta(seconds=10)
-        df = await fetch_ohlcv_1s(symbol, start_ts, end_ts)
+        df = await fetch_ohlcv_1s(symbol, start_ts, end_ts, pool=pool)
 
         if df is not None and not df.empty:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            if df['timestamp'].dt.tz is None:
-                df['timestamp'] = df['timestamp'].dt.tz_localize('UTC')
-            df.set_index('timestamp', inplace=True)
-            df = df.sort_index()
-            df[['open', 'high', 'low', 'close']] = df[['open', 'high', 'low', 'close']].astype(float)
-
-            current_price = float(df.iloc[-1]["close"])
+            # fetch_ohlcv_1s renvoie déjà des float64 triés par timestamp
+            current_price = float(df["close"].iat[-1])
             result["price"] = current_price
 
             if position:
@@ -0,0 +1,47 @@
+# utils/hash_ring.py
+import bisect
+import hashlib
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+class HashRing:
+    """
+    Anneau de hachage cohérent : ajouter ou retirer un nœud ne déplace qu'environ 1/N des clés.
+
+    :param nodes: identifiants des nœuds (shards)
+    :param vnodes: points virtuels par nœud (lisse la répartition)
+    """
+    def __init__(self, nodes=(), vnodes: int = 64):
+        self.vnodes = vnodes
+        self._points = []
+        self._owners = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+                self._owners[point] = node
+
+    def remove(self, node):
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            if self._owners.get(point) == node:
+                del self._owners[point]
+                del self._points[bisect.bisect_left(self._points, point)]
+
+    def node_for(self, key: str):
+        if not self._points:
+            raise ValueError("Anneau vide")
+        i = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[i]]
+
+    def assign(self, keys) -> dict:
+        """{nœud: set(clés)} pour tous les nœuds de l'anneau."""
+        assignment = {node: set() for node in set(self._owners.values())}
+        for key in keys:
+            assignment[self.node_for(key)].add(key)
+        return assignment
@@ -0,0 +1,31 @@
+# utils/http_client.py
+import asyncio
+
+import aiohttp
+
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=30)
+
+_session = None
+_session_loop = None
+
+def get_session() -> aiohttp.ClientSession:
+    """Session aiohttp partagée par le process (une par boucle asyncio), créée à la demande."""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = aiohttp.ClientSession(timeout=DEFAULT_TIMEOUT)
+        _session_loop = loop
+    return _session
+
+async def get_json(url: str, params: dict | None = None):
+    """GET JSON via la session partagée ; lève aiohttp.ClientResponseError sur un statut HTTP d'erreur."""
+    async with get_session().get(url, params=params) as resp:
+        resp.raise_for_status()
+        return await resp.json()
+
+async def close_session():
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
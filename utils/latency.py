@@ -0,0 +1,129 @@
+# utils/latency.py
+import bisect
+import time
+from contextlib import contextmanager
+
+from utils.logger import log
+
+# Bornes des buckets en millisecondes (échelle 1-2.5-5), la dernière case est +inf
+LATENCY_BUCKETS_MS = (
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+)
+
+class LatencyHistogram:
+    """Histogramme de latences à buckets fixes : enregistrement O(log buckets), mémoire constante."""
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float):
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def merge(self, other: "LatencyHistogram"):
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Borne haute du bucket contenant le quantile q (0-100), plafonnée au maximum observé."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                upper = self.buckets[i] if i < len(self.buckets) else self.max_ms
+                return min(upper, self.max_ms)
+        return self.max_ms
+
+class CycleTimer:
+    """
+    Chronomètre d'un passage dans la boucle live pour un symbole. Les étapes sont
+    enregistrées à finish(), avec la stratégie connue à ce moment-là.
+    """
+    def __init__(self, recorder: "LatencyRecorder", symbol: str, strategy: str | None = None):
+        self.recorder = recorder
+        self.symbol = symbol
+        self.strategy = strategy
+        self.stages = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, (time.perf_counter() - started) * 1000))
+
+    def finish(self):
+        total_ms = (time.perf_counter() - self.started) * 1000
+        strategy = self.strategy or "-"
+        for name, ms in self.stages:
+            self.recorder.record(name, self.symbol, strategy, ms)
+        self.recorder.record("total", self.symbol, strategy, total_ms)
+
+class LatencyRecorder:
+    """Histogrammes de latence par (étape, symbole, stratégie)."""
+    def __init__(self):
+        self.histograms = {}
+
+    def record(self, stage: str, symbol: str, strategy: str, ms: float):
+        key = (stage, symbol, strategy)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.record(ms)
+
+    def start_cycle(self, symbol: str, strategy: str | None = None) -> CycleTimer:
+        return CycleTimer(self, symbol, strategy)
+
+    def aggregate(self, by: str = "stage") -> dict:
+        """
+        Fusionne les histogrammes : by="stage" (toutes paires symbole / stratégie),
+        "symbol" ou "strategy" (clé (étape, symbole|stratégie)).
+        """
+        merged = {}
+        for (stage, symbol, strategy), histogram in self.histograms.items():
+            key = stage if by == "stage" else (stage, symbol if by == "symbol" else strategy)
+            target = merged.get(key)
+            if target is None:
+                target = merged[key] = LatencyHistogram(histogram.buckets)
+            target.merge(histogram)
+        return merged
+
+    def summary_rows(self, by: str = "stage") -> list:
+        rows = []
+        for key, h in sorted(self.aggregate(by).items(), key=lambda kv: kv[1].total_ms, reverse=True):
+            label = key if isinstance(key, str) else " / ".join(key)
+            rows.append([label, h.count, f"{h.mean_ms:.1f}", f"{h.percentile(50):.1f}",
+                         f"{h.percentile(95):.1f}", f"{h.percentile(99):.1f}", f"{h.max_ms:.1f}"])
+        return rows
+
+    def log_summary(self, by: str = "stage"):
+        from tabulate import tabulate
+        rows = self.summary_rows(by)
+        if not rows:
+            return
+        table = tabulate(rows, headers=["Stage", "N", "Mean ms", "p50", "p95", "p99", "Max"], tablefmt="simple")
+        log(f"⏱️ Live loop latency by {by}:\n{table}", level="INFO")
+
+    def reset(self):
+        self.histograms.clear()
+
+# Enregistreur partagé par la boucle live
+LATENCY = LatencyRecorder()
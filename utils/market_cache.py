@@ -0,0 +1,141 @@
+# utils/market_cache.py
+import math
+import time
+from decimal import Decimal
+
+from utils.logger import log
+from utils.endpoints import api_url
+from utils.http_client import get_json
+
+# Écart relatif toléré entre value * scale et l'entier le plus proche : couvre l'erreur binaire
+# du produit (~2e-16) sans confondre deux décimaux distincts de moins de 14 chiffres significatifs
+UNIT_TOLERANCE = 1e-14
+# Au-delà, value * scale n'est plus exact en double : conversion par la représentation décimale
+MAX_FLOAT_UNITS = 1e15
+
+def decimals_of(step: str) -> int:
+    """Nombre de décimales d'un pas de l'API ("0.010" -> 2, "1" -> 0, "1e-05" -> 5)."""
+    return max(0, -Decimal(str(step)).normalize().as_tuple().exponent)
+
+def floor_units(value: float, scale: int) -> int:
+    """value en unités entières de 1/scale, arrondie vers le bas (0.29 * 100 -> 29 et non 28)."""
+    scaled = value * scale
+    if abs(scaled) >= MAX_FLOAT_UNITS:
+        return math.floor(Decimal(repr(value)) * scale)
+    nearest = round(scaled)
+    if abs(scaled - nearest) <= abs(scaled) * UNIT_TOLERANCE:
+        return nearest
+    return math.floor(scaled)
+
+def ceil_units(value: float, scale: int) -> int:
+    scaled = value * scale
+    if abs(scaled) >= MAX_FLOAT_UNITS:
+        return math.ceil(Decimal(repr(value)) * scale)
+    nearest = round(scaled)
+    if abs(scaled - nearest) <= abs(scaled) * UNIT_TOLERANCE:
+        return nearest
+    return math.ceil(scaled)
+
+def exact_units(value: float, scale: int) -> int | None:
+    """value en unités entières de 1/scale si elle tombe exactement sur une unité, sinon None."""
+    scaled = value * scale
+    if abs(scaled) >= MAX_FLOAT_UNITS:
+        exact = Decimal(repr(value)) * scale
+        return int(exact) if exact == exact.to_integral_value() else None
+    nearest = round(scaled)
+    return nearest if abs(scaled - nearest) <= abs(scaled) * UNIT_TOLERANCE else None
+
+class MarketFilters:
+    """
+    Filtres d'un marché (pas de quantité, quantité minimale, pas de prix) et arrondis associés.
+    Les pas sont convertis une fois en entiers (step_units / quantity_scale, tick_units / price_scale) :
+    les arrondis se font ensuite en arithmétique entière, sans Decimal à chaque ordre.
+    """
+    __slots__ = ("symbol", "step_size", "min_qty", "tick_size", "quantity_decimals", "price_decimals",
+                 "quantity_scale", "step_units", "price_scale", "tick_units")
+
+    def __init__(self, symbol: str, step_size: str = "1", min_qty: str | None = None, tick_size: str = "0.01"):
+        self.symbol = symbol
+        self.step_size = float(step_size)
+        self.min_qty = float(min_qty) if min_qty else self.step_size
+        self.tick_size = float(tick_size)
+        self.quantity_decimals = decimals_of(step_size)
+        self.price_decimals = decimals_of(tick_size)
+        self.quantity_scale = 10 ** self.quantity_decimals
+        self.price_scale = 10 ** self.price_decimals
+        self.step_units = int(Decimal(str(step_size)) * self.quantity_scale)
+        self.tick_units = int(Decimal(str(tick_size)) * self.price_scale)
+
+    @classmethod
+    def from_market(cls, market: dict) -> "MarketFilters":
+        filters = market.get("filters", {})
+        quantity = filters.get("quantity", {})
+        return cls(
+            market.get("symbol"),
+            quantity.get("stepSize", "1"),
+            quantity.get("minQuantity") or quantity.get("minQty"),
+            filters.get("price", {}).get("tickSize", "0.01"),
+        )
+
+    def round_quantity(self, quantity: float) -> float:
+        """Arrondi vers le bas au pas de quantité (même résultat que order_validator.adjust_to_step)."""
+        units = floor_units(quantity, self.quantity_scale)
+        return (units - units % self.step_units) / self.quantity_scale
+
+    def round_price(self, price: float) -> float:
+        """Arrondi vers le bas au tick."""
+        units = floor_units(price, self.price_scale)
+        return (units - units % self.tick_units) / self.price_scale
+
+    def ceil_price(self, price: float) -> float:
+        """Arrondi vers le haut au tick."""
+        units = ceil_units(price, self.price_scale)
+        return (units + (-units) % self.tick_units) / self.price_scale
+
+    def is_valid(self, quantity: float, price: float) -> tuple[bool, bool]:
+        """Quantité / prix déjà multiples du pas et du tick (équivalent de order_validator.is_order_valid_for_market)."""
+        q = exact_units(quantity, self.quantity_scale)
+        p = exact_units(price, self.price_scale)
+        return q is not None and q % self.step_units == 0, p is not None and p % self.tick_units == 0
+
+    def format_quantity(self, quantity: float) -> str:
+        return f"{quantity:.{self.quantity_decimals}f}"
+
+    def format_price(self, price: float) -> str:
+        return f"{price:.{self.price_decimals}f}"
+
+    def __repr__(self) -> str:
+        return f"MarketFilters({self.symbol}, step={self.step_size}, min={self.min_qty}, tick={self.tick_size})"
+
+class MarketCache:
+    """
+    Filtres de tous les marchés (/api/v1/markets), rechargés au plus toutes les `ttl` secondes :
+    les ordres n'ont plus besoin d'un appel get_markets chacun.
+    """
+    def __init__(self, ttl: float = 3600.0):
+        self.ttl = ttl
+        self.filters = {}
+        self.loaded_at = 0.0
+
+    async def refresh(self) -> dict:
+        try:
+            markets = await get_json(api_url("api/v1/markets"))
+        except Exception as e:
+            log(f"⚠️ Cannot load markets: {e}", level="WARNING")
+            return self.filters
+        if isinstance(markets, list) and markets:
+            self.filters = {m["symbol"]: MarketFilters.from_market(m) for m in markets if m.get("symbol")}
+            self.loaded_at = time.monotonic()
+        return self.filters
+
+    async def get(self, symbol: str) -> MarketFilters | None:
+        if not self.filters or time.monotonic() - self.loaded_at >= self.ttl or symbol not in self.filters:
+            # Un symbole inconnu (nouveau listing) force un rechargement, limité à un par minute
+            if not self.filters or time.monotonic() - self.loaded_at >= min(self.ttl, 60.0):
+                await self.refresh()
+        return self.filters.get(symbol)
+
+    def get_cached(self, symbol: str) -> MarketFilters | None:
+        return self.filters.get(symbol)
+
+MARKETS = MarketCache()
@@ -2,7 +2,9 @@
 from config.settings import get_config
 from utils.logger import log
 import os
+import asyncio
 from bpx.account import Account
+import utils.endpoints  # URL de base du SDK bpx-py (config exchange)
 from utils.logger import log
 from config.settings import get_config
 from typing import List, Dict
@@ -13,8 +15,8 @@ secret_key = config.bpx_bot_secret_key or os.getenv("bpx_bot_secret_key")
 
 log(f"Using public_key={public_key}, secret_key={'***' if secret_key else None}", level="DEBUG")
 
-# Création de l'objet Account central
-account = Account(public_key=public_key, secret_key=secret_key, window=5000, debug=False)
+# Création de l'objet Account central (absent sans clés : backtest et benchmarks hors ligne)
+account = Account(public_key=public_key, secret_key=secret_key, window=5000, debug=False) if public_key and secret_key else None
 
 # Load configuration 
 
@@ -196,6 +198,19 @@ def parse_position(raw_pos: dict) -> dict:
         return {}
 
 
+# Abonnés notifiés de chaque liste de positions reçue de l'API (moteur de risque journalier)
+POSITION_LISTENERS = []
+
+def notify_positions(raw_positions):
+    if not isinstance(raw_positions, list):
+        return
+    for listener in POSITION_LISTENERS:
+        try:
+            listener(raw_positions)
+        except Exception as e:
+            log(f"[ERROR] Position listener failed: {e}", level="ERROR")
+
+
 # ------------------------------------------------------------
 # Fonctions principales
 # ------------------------------------------------------------
@@ -203,6 +218,7 @@ async def get_raw_positions():
     """Récupère toutes les positions depuis l'API Backpack (asynchrone)."""
     try:
         positions = account.get_open_positions()
+        notify_positions(positions)
         return positions or []
     except Exception as e:
         log(f"[ERROR] Failed to fetch positions: {e}", level="ERROR")
@@ -327,16 +343,17 @@ async def debug_pnl_calculation(symbol, side, entry_price, amount, leverage, mar
         }
     }
 
-async def get_real_positions() -> List[dict]:
+async def fetch_real_positions() -> List[dict]:
     """
-    Récupère les positions ouvertes réelles depuis Backpack Exchange
-    et les retourne sous forme de liste de dictionnaires.
+    Comme get_real_positions, mais une erreur de l'API est relevée au lieu d'être prise
+    pour une absence de position (décisions qui ne doivent pas reposer sur une liste vide par défaut).
     """
-    try:
-        raw_positions = account.get_open_positions()
-    except Exception as e:
-        log(f"[ERROR] Cannot fetch positions: {e}", level="ERROR")
-        return []
+    raw_positions = await asyncio.to_thread(account.get_open_positions)
+    if raw_positions is None:
+        raw_positions = []
+    if not isinstance(raw_positions, list):
+        raise RuntimeError(f"Unexpected positions payload: {raw_positions}")
+    notify_positions(raw_positions)
 
     positions_list = []
 
@@ -346,3 +363,23 @@ async def get_real_positions() -> List[dict]:
             positions_list.append(parsed)
 
     return positions_list
+
+async def get_real_positions() -> List[dict]:
+    """
+    Récupère les positions ouvertes réelles depuis Backpack Exchange
+    et les retourne sous forme de liste de dictionnaires.
+    """
+    try:
+        return await fetch_real_positions()
+    except Exception as e:
+        log(f"[ERROR] Cannot fetch positions: {e}", level="ERROR")
+        return []
+
+async def get_net_equity():
+    """Valeur nette du compte (netEquity du collatéral Backpack), None si indisponible."""
+    try:
+        collateral = await asyncio.to_thread(account.get_collateral)
+        return safe_float(collateral.get("netEquity"), None)
+    except Exception as e:
+        log(f"[ERROR] Cannot fetch account equity: {e}", level="ERROR")
+        return None
\ No newline at end of file
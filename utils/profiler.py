@@ -0,0 +1,121 @@
+# utils/profiler.py
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+from utils.logger import log
+
+PROFILE_MODES = ("sample", "cprofile")
+
+class SamplingProfiler:
+    """
+    Profileur par échantillonnage des piles de tous les threads (boucle asyncio + threads de
+    asyncio.to_thread), ou d'un seul si thread_id est donné. Écrit des piles « repliées »
+    (une ligne `thread;f1;f2;f3 N` par pile) lisibles par flamegraph.pl, speedscope ou inferno.
+    """
+    def __init__(self, interval: float = 0.005, thread_id: int | None = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (self.thread_id is not None and ident != self.thread_id):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class CycleProfiler:
+    """
+    Profile les N premiers cycles de la boucle live puis écrit le résultat :
+    - sample : piles repliées (.folded) pour flamegraph
+    - cprofile : stats cProfile (.prof, pour snakeviz / flameprof) + top 25 dans le log
+    """
+    def __init__(self, cycles: int, mode: str = "sample", output: str | None = None):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Mode de profilage inconnu : {mode} (attendu : {', '.join(PROFILE_MODES)})")
+        self.cycles = cycles
+        self.mode = mode
+        suffix = "folded" if mode == "sample" else "prof"
+        self.output = output or f"logs/profile_{time.strftime('%Y%m%d_%H%M%S')}.{suffix}"
+        self.done = 0
+        self.active = False
+        self.finished = False
+        self._profiler = None
+        self._started = None
+
+    def before_cycle(self):
+        if self.finished or self.active:
+            return
+        self._profiler = SamplingProfiler() if self.mode == "sample" else cProfile.Profile()
+        if self.mode == "sample":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+        self._started = time.perf_counter()
+        self.active = True
+        log(f"🔬 Profiling {self.cycles} live cycles ({self.mode})", level="INFO")
+
+    def after_cycle(self):
+        if not self.active:
+            return
+        self.done += 1
+        if self.done >= self.cycles:
+            self.stop()
+
+    def stop(self):
+        if not self.active:
+            return
+        elapsed = time.perf_counter() - self._started
+        self.active = False
+        self.finished = True
+        os.makedirs(os.path.dirname(self.output) or ".", exist_ok=True)
+        if self.mode == "sample":
+            self._profiler.stop()
+            self._profiler.dump(self.output)
+            log(f"🔬 Profile written to {self.output} ({self._profiler.samples} samples over {self.done} cycles, "
+                f"{elapsed:.1f}s) — flamegraph.pl {self.output} > profile.svg", level="INFO")
+        else:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.output)
+            top = io.StringIO()
+            stats = pstats.Stats(self._profiler, stream=top)
+            stats.sort_stats("cumulative")
+            stats.print_stats(25)
+            log(f"🔬 Profile written to {self.output} ({self.done} cycles, {elapsed:.1f}s)\n{top.getvalue()}", level="INFO")
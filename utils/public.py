@@ -4,6 +4,7 @@ import time
 import os
 import asyncpg
 from utils.i18n import t
+from utils.endpoints import api_url
 
 def get_ohlcv(symbol: str, interval: str = "1m", limit: int = 21, startTime: int = None, endTime: int = None):
     if startTime is not None:
@@ -28,7 +29,7 @@ def get_ohlcv(symbol: str, interval: str = "1m", limit: int = 21, startTime: int
         params["endTime"] = endTime_ms
 
     try:
-        response = requests.get("https://api.backpack.exchange/api/v1/klines", params=params)
+        response = requests.get(api_url("api/v1/klines"), params=params)
         response.raise_for_status()
         return response.json()
     except requests.RequestException as e:
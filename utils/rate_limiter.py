@@ -0,0 +1,46 @@
+# utils/rate_limiter.py
+import asyncio
+import time
+
+class TokenBucket:
+    """
+    Limiteur de débit global (token bucket) partagé par toutes les coroutines d'un process.
+
+    :param rate: jetons régénérés par seconde (requêtes/s soutenues)
+    :param capacity: taille du seau (rafale maximale)
+    """
+    def __init__(self, rate: float, capacity: int | None = None):
+        if rate <= 0:
+            raise ValueError("rate doit être > 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1, int(rate)))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.total_acquired = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Attend qu'assez de jetons soient disponibles puis les consomme."""
+        if tokens > self.capacity:
+            raise ValueError("tokens ne peut pas dépasser la capacité du seau")
+        # Le verrou garantit un ordre FIFO entre les coroutines en attente
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    self.total_acquired += tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
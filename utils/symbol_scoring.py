@@ -0,0 +1,232 @@
+# utils/symbol_scoring.py
+"""
+Score d'auto-sélection calculé pour tout le marché à la fois (matrices NumPy symboles × minutes)
+à partir des bougies 1s stockées localement, agrégées en 1m par PostgreSQL :
+volatilité réalisée, ATR%, spread estimé (Corwin-Schultz), nombre de trades et force de tendance.
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import asyncpg
+import numpy as np
+
+from utils.logger import log
+from config.settings import get_config
+from utils.public import format_table_name
+
+config = get_config()
+
+MINUTE_MS = 60_000
+SCORE_METRICS = ("realized_vol", "atr_pct", "spread_pct", "trade_count", "trend_strength")
+
+# Bougie 1m agrégée : active_sec = nombre de bougies 1s (secondes avec au moins un trade)
+MINUTE_BAR_DTYPE = np.dtype([
+    ("ts_ms", np.int64),
+    ("open", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("close", np.float64),
+    ("volume", np.float64),
+    ("active_sec", np.int64),
+])
+
+_CS_K = 3 - 2 * np.sqrt(2)
+
+def minute_bars_query(table_name: str) -> str:
+    """Agrégation 1m des bougies 1s depuis $1 (la minute en cours est incluse, même partielle)."""
+    return f"""
+    SELECT (EXTRACT(EPOCH FROM date_trunc('minute', timestamp)) * 1000)::bigint AS ts_ms,
+           (array_agg(open::float8 ORDER BY timestamp ASC))[1] AS open,
+           max(high)::float8 AS high,
+           min(low)::float8 AS low,
+           (array_agg(close::float8 ORDER BY timestamp DESC))[1] AS close,
+           sum(volume)::float8 AS volume,
+           count(*) AS active_sec
+    FROM {table_name}
+    WHERE interval_sec = 1 AND timestamp >= $1
+    GROUP BY 1
+    ORDER BY 1
+    """
+
+def build_matrices(bars_by_symbol: dict, end_ms: int, minutes: int) -> tuple[list, dict]:
+    """Aligne les bougies 1m de chaque symbole sur une grille commune (NaN = minute sans trade)."""
+    symbols = list(bars_by_symbol)
+    start_ms = end_ms - end_ms % MINUTE_MS - (minutes - 1) * MINUTE_MS
+    matrices = {name: np.full((len(symbols), minutes), np.nan)
+                for name in ("open", "high", "low", "close", "volume", "active_sec")}
+    for row, symbol in enumerate(symbols):
+        bars = bars_by_symbol[symbol]
+        idx = (bars["ts_ms"] - start_ms) // MINUTE_MS
+        mask = (idx >= 0) & (idx < minutes)
+        for name, matrix in matrices.items():
+            matrix[row, idx[mask]] = bars[name][mask]
+    return symbols, matrices
+
+def forward_fill(a: np.ndarray) -> np.ndarray:
+    """Report de la dernière valeur connue le long des colonnes (les NaN de tête restent NaN)."""
+    idx = np.where(np.isnan(a), 0, np.arange(a.shape[1]))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return a[np.arange(a.shape[0])[:, None], idx]
+
+def compute_metrics(high: np.ndarray, low: np.ndarray, close: np.ndarray, active_sec: np.ndarray) -> dict:
+    """Métriques par symbole (une valeur par ligne) ; NaN si l'historique ne permet pas le calcul."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        filled = forward_fill(close)
+        previous = filled[:, :-1]
+
+        # Volatilité réalisée journalisée des rendements log 1m, en %
+        returns = np.diff(np.log(filled), axis=1)
+        realized_vol = np.nanstd(returns, axis=1) * np.sqrt(1440) * 100
+
+        # ATR% : true range moyen rapporté au prix
+        h, l = high[:, 1:], low[:, 1:]
+        true_range = np.fmax(h - l, np.fmax(np.abs(h - previous), np.abs(l - previous)))
+        atr_pct = np.nanmean(true_range / previous, axis=1) * 100
+
+        # Spread estimé par Corwin-Schultz sur deux minutes consécutives, en %
+        hl = np.log(high / low) ** 2
+        beta = hl[:, :-1] + hl[:, 1:]
+        gamma = np.log(np.maximum(high[:, :-1], high[:, 1:]) / np.minimum(low[:, :-1], low[:, 1:])) ** 2
+        alpha = (np.sqrt(2 * beta) - np.sqrt(beta)) / _CS_K - np.sqrt(gamma / _CS_K)
+        spread = np.clip(2 * (np.exp(alpha) - 1) / (1 + np.exp(alpha)), 0, None)
+        spread_pct = np.nanmean(spread, axis=1) * 100
+
+        # Efficacité de Kaufman : déplacement net / chemin parcouru (0 = range, 1 = tendance pure)
+        first = filled[np.arange(filled.shape[0]), np.argmax(~np.isnan(filled), axis=1)]
+        path = np.nansum(np.abs(np.diff(filled, axis=1)), axis=1)
+        trend_strength = np.where(path > 0, np.abs(filled[:, -1] - first) / path, 0.0)
+
+    return {
+        "realized_vol": realized_vol,
+        "atr_pct": atr_pct,
+        "spread_pct": spread_pct,
+        "trade_count": np.nansum(active_sec, axis=1),
+        "trend_strength": trend_strength,
+    }
+
+def percentile_ranks(values: np.ndarray) -> np.ndarray:
+    """Rang centile transversal dans [0, 1] ; une valeur manquante reçoit le rang neutre 0.5."""
+    ranks = np.full(values.shape, 0.5)
+    valid = ~np.isnan(values)
+    count = int(valid.sum())
+    if count > 1:
+        ranks[valid] = values[valid].argsort().argsort() / (count - 1)
+    return ranks
+
+def combine_scores(metrics: dict, weights: dict) -> np.ndarray:
+    """Somme pondérée des rangs centiles des métriques (poids négatif = pénalité)."""
+    size = len(next(iter(metrics.values())))
+    scores = np.zeros(size)
+    for name, weight in weights.items():
+        if name in metrics and weight:
+            scores += weight * percentile_ranks(np.asarray(metrics[name], dtype=np.float64))
+    return scores
+
+class SymbolScorer:
+    """
+    Classement des candidats de l'auto-sélection sur l'historique local.
+    Les bougies 1m sont gardées en cache entre deux rafraîchissements (seule la dernière
+    minute connue et les suivantes sont relues) et le classement est réutilisé cache_ttl_sec.
+    """
+    def __init__(self, pool=None, settings=None, concurrency: int = 8):
+        self.pool = pool
+        self.settings = settings or config.strategy.scoring
+        self.concurrency = concurrency
+        self.last_metrics = {}  # symbol -> {métrique: valeur} du dernier calcul
+        self.last_fetch_ms = 0.0
+        self.last_compute_ms = 0.0
+        self._bars = {}  # symbol -> bougies 1m (MINUTE_BAR_DTYPE)
+        self._ranking = None  # (clé des candidats, horodatage, symboles classés)
+
+    async def _fetch_bars(self, symbol: str, since_ms: int) -> np.ndarray:
+        since = datetime.fromtimestamp(since_ms / 1000, tz=timezone.utc)
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(minute_bars_query(format_table_name(symbol)), since)
+        return np.fromiter((tuple(r) for r in rows), dtype=MINUTE_BAR_DTYPE, count=len(rows))
+
+    async def update_history(self, symbols, now_ms: int | None = None):
+        """Met à jour le cache de bougies 1m des symboles (requêtes concurrentes, incrémentales)."""
+        now_ms = now_ms or int(time.time() * 1000)
+        start_ms = now_ms - int(self.settings.lookback_hours * 3_600_000)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def load(symbol):
+            cached = self._bars.get(symbol)
+            since_ms = int(cached["ts_ms"][-1]) if cached is not None and len(cached) else start_ms
+            async with semaphore:
+                try:
+                    fresh = await self._fetch_bars(symbol, since_ms)
+                except asyncpg.exceptions.UndefinedTableError:
+                    self._bars.pop(symbol, None)  # symbole jamais ingéré localement
+                    return
+                except Exception as e:
+                    log(f"⚠️ [{symbol}] Lecture de l'historique de scoring impossible : {e}", level="WARNING")
+                    return
+            if cached is not None and len(cached):
+                fresh = np.concatenate([cached[cached["ts_ms"] < since_ms], fresh])
+            self._bars[symbol] = fresh[fresh["ts_ms"] >= start_ms]
+
+        started = time.perf_counter()
+        await asyncio.gather(*(load(symbol) for symbol in symbols))
+        for symbol in set(self._bars) - set(symbols):
+            del self._bars[symbol]
+        self.last_fetch_ms = (time.perf_counter() - started) * 1000
+
+    def score(self, now_ms: int | None = None, trades: dict | None = None) -> list[tuple[str, float]]:
+        """
+        Classe les symboles en cache ayant au moins min_bars minutes d'historique.
+        trades : nombre de trades 24h par symbole (tickers) ; à défaut, secondes actives locales.
+        """
+        started = time.perf_counter()
+        now_ms = now_ms or int(time.time() * 1000)
+        minutes = max(2, int(self.settings.lookback_hours * 60))
+        symbols, m = build_matrices(self._bars, now_ms, minutes)
+        if not symbols:
+            return []
+
+        keep = np.count_nonzero(~np.isnan(m["close"]), axis=1) >= self.settings.min_bars
+        if not keep.any():
+            return []
+        symbols = [s for s, k in zip(symbols, keep) if k]
+        metrics = compute_metrics(m["high"][keep], m["low"][keep], m["close"][keep], m["active_sec"][keep])
+        if trades:
+            metrics["trade_count"] = np.array([trades.get(s, np.nan) for s in symbols], dtype=np.float64)
+
+        scores = combine_scores(metrics, self.settings.weights)
+        order = np.argsort(-scores, kind="stable")
+        self.last_metrics = {
+            symbols[i]: {**{name: float(metrics[name][i]) for name in SCORE_METRICS}, "score": float(scores[i])}
+            for i in order
+        }
+        self.last_compute_ms = (time.perf_counter() - started) * 1000
+        return [(symbols[i], float(scores[i])) for i in order]
+
+    async def rank(self, tickers: list, n: int | None = None) -> list:
+        """Top N des contrats perpétuels assez liquides (/api/v1/tickers), classés sur l'historique local."""
+        candidates, trades = [], {}
+        for ticker in tickers if isinstance(tickers, list) else []:
+            symbol = ticker.get("symbol", "") if isinstance(ticker, dict) else ""
+            try:
+                quote_volume = float(ticker.get("quoteVolume") or 0)
+            except (TypeError, ValueError):
+                continue
+            if "_PERP" in symbol and quote_volume >= self.settings.min_quote_volume:
+                candidates.append(symbol)
+                if ticker.get("trades") is not None:
+                    trades[symbol] = float(ticker["trades"])
+
+        key = (tuple(sorted(candidates)), n)
+        if self._ranking is not None and self._ranking[0] == key \
+                and time.time() - self._ranking[1] < self.settings.cache_ttl_sec:
+            return self._ranking[2]
+
+        await self.update_history(candidates)
+        ranking = self.score(trades=trades if len(trades) == len(candidates) else None)
+        symbols = [symbol for symbol, _ in ranking][:n] if n else [symbol for symbol, _ in ranking]
+        self._ranking = (key, time.time(), symbols)
+        log(f"📊 Scoring de {len(ranking)}/{len(candidates)} candidats : lecture {self.last_fetch_ms:.0f} ms, "
+            f"calcul {self.last_compute_ms:.1f} ms, top {symbols[:5]}", level="INFO")
+        return symbols
+
+SYMBOL_SCORER = SymbolScorer()
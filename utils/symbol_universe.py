@@ -0,0 +1,145 @@
+# utils/symbol_universe.py
+import asyncio
+import time
+
+from utils.logger import log
+from config.settings import get_config
+from utils.http_client import get_json
+from utils.fetch_top_n_volatility_volume import API_URL, rank_tickers
+from utils.public import merge_symbols_with_config
+from utils.symbol_scoring import SYMBOL_SCORER
+
+config = get_config()
+
+class UniverseSnapshot:
+    """
+    Univers de symboles figé (non modifiable) : version, symboles dans l'ordre du classement
+    et diff avec la version précédente.
+    """
+    __slots__ = ("version", "symbols", "added", "removed", "created_at", "_members")
+
+    def __init__(self, version: int, symbols, added=(), removed=(), created_at: float | None = None):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "symbols", tuple(symbols))
+        object.__setattr__(self, "added", tuple(added))
+        object.__setattr__(self, "removed", tuple(removed))
+        object.__setattr__(self, "created_at", created_at if created_at is not None else time.time())
+        object.__setattr__(self, "_members", frozenset(self.symbols))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UniverseSnapshot est immuable")
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self._members
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __repr__(self) -> str:
+        return f"UniverseSnapshot(v{self.version}, {len(self.symbols)} symboles, +{list(self.added)} -{list(self.removed)})"
+
+def diff_symbols(previous, current) -> tuple[list, list]:
+    """(ajoutés, retirés) entre deux listes de symboles, dans leur ordre d'origine."""
+    previous_set, current_set = set(previous), set(current)
+    return [s for s in current if s not in previous_set], [s for s in previous if s not in current_set]
+
+async def fetch_auto_symbols(n: int | None = None) -> list:
+    """
+    Top N via la session HTTP partagée : score sur l'historique local (SYMBOL_SCORER) quand un pool
+    lui est attaché, classement des tickers 24h (rank_tickers) sinon ou si aucun candidat n'a d'historique.
+    """
+    tickers = await get_json(API_URL)
+    if SYMBOL_SCORER.pool is not None:
+        ranked = await SYMBOL_SCORER.rank(tickers, n)
+        if ranked:
+            return ranked
+        log("⚠️ Aucun candidat avec historique local, classement sur les tickers 24h", level="WARNING")
+    return rank_tickers(tickers, n)
+
+class SymbolUniverse:
+    """
+    Univers de symboles de l'auto-sélection, rafraîchi dans la boucle asyncio.
+
+    Chaque changement publie un nouvel UniverseSnapshot (version + 1) et notifie les abonnés
+    (`async def listener(snapshot)`) avec les symboles ajoutés et retirés ; les lecteurs
+    utilisent `universe.snapshot` sans verrou puisque l'instantané n'est jamais modifié.
+    """
+    def __init__(self, top_n: int | None = None, interval: float | None = None, fetch=fetch_auto_symbols):
+        self.top_n = top_n
+        self.interval = interval
+        self._fetch = fetch
+        self._snapshot = UniverseSnapshot(0, ())
+        self._listeners = []
+        self._lock = asyncio.Lock()
+        self.refreshes = 0
+        self.failures = 0
+
+    @property
+    def snapshot(self) -> UniverseSnapshot:
+        return self._snapshot
+
+    @property
+    def symbols(self) -> list:
+        return list(self._snapshot.symbols)
+
+    def subscribe(self, listener):
+        """Ajoute un abonné notifié à chaque nouvelle version de l'univers."""
+        self._listeners.append(listener)
+
+    async def refresh(self) -> UniverseSnapshot:
+        """Récupère le classement, applique include/exclude et publie le diff s'il n'est pas vide."""
+        async with self._lock:
+            self.refreshes += 1
+            top_n = self.top_n or config.strategy.auto_select_top_n
+            try:
+                auto_symbols = list(await self._fetch(top_n) or [])
+            except Exception as e:
+                self.failures += 1
+                log(f"❌ Univers de symboles : échec de la récupération des tickers ({e}), "
+                    f"version {self._snapshot.version} conservée", level="ERROR")
+                return self._snapshot
+
+            # Un classement vide (API dégradée) ne doit pas vider un univers déjà établi
+            if not auto_symbols and self._snapshot.version > 0:
+                self.failures += 1
+                log(f"⚠️ Univers de symboles : classement vide, version {self._snapshot.version} conservée",
+                    level="WARNING")
+                return self._snapshot
+
+            return await self._publish(merge_symbols_with_config(auto_symbols))
+
+    async def _publish(self, symbols: list) -> UniverseSnapshot:
+        previous = self._snapshot
+        added, removed = diff_symbols(previous.symbols, symbols)
+        if previous.version > 0 and not added and not removed:
+            return previous
+
+        snapshot = UniverseSnapshot(previous.version + 1, symbols, added, removed)
+        self._snapshot = snapshot
+        log(f"🔄 Univers de symboles v{snapshot.version} ({len(snapshot)}) : +{added} -{removed}", level="INFO")
+        for listener in list(self._listeners):
+            try:
+                await listener(snapshot)
+            except Exception as e:
+                log(f"❌ Univers de symboles : erreur d'un abonné ({getattr(listener, '__name__', listener)}) : {e}",
+                    level="ERROR")
+        return snapshot
+
+    async def run(self, stop_event: asyncio.Event | None = None):
+        """Rafraîchit l'univers toutes les `interval` secondes (auto_select_update_interval par défaut)."""
+        interval = self.interval or config.strategy.auto_select_update_interval
+        log(f"🕐 Mise à jour de l'univers de symboles toutes les {interval}s", level="DEBUG")
+        while stop_event is None or not stop_event.is_set():
+            await self.refresh()
+            if stop_event is None:
+                await asyncio.sleep(interval)
+                continue
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+SYMBOL_UNIVERSE = SymbolUniverse()
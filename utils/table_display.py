@@ -117,7 +117,9 @@ async def handle_existing_position_with_table(symbol, real_run=True, dry_run=Fal
             should_close_position,
             get_position_hash,
             cleanup_trailing_stop,
-            TRAILING_STOPS
+            sync_exchange_stop,
+            TRAILING_STOPS,
+            EXCHANGE_STOPS
         )
         
         config = get_config()
@@ -188,6 +190,10 @@ async def handle_existing_position_with_table(symbol, real_run=True, dry_run=Fal
             current_pnl_pct=pnl_pct  # ← Le PnL déjà calculé
         )
 
+        # 7b. Stop côté exchange : posé si absent, resserré quand le trailing monte
+        if real_run:
+            await sync_exchange_stop(symbol, side, entry_price, amount, trailing_stop, mark_price)
+
         # 8. Logs détaillés
         log(f"📊 [{symbol}] {side.upper()} | Entry: ${entry_price:.4f} | Mark: ${mark_price:.4f} | "
             f"PnL: {pnl_pct:+.2f}% (${pnl_usdc:+.2f}) | Trailing: {trailing_stop} | Duration: {duration_str}", 
@@ -238,6 +244,7 @@ async def handle_existing_position_with_table(symbol, real_run=True, dry_run=Fal
                     
                     # Nettoyage avec le BON hash
                     cleanup_trailing_stop(symbol, side, entry_price, amount)
+                    await EXCHANGE_STOPS.cancel(symbol)
                     
                     # Retirer du tableau
                     if symbol in position_table.positions_data:
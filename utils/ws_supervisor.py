@@ -0,0 +1,86 @@
+# utils/ws_supervisor.py
+import random
+import time
+
+class ReconnectBackoff:
+    """
+    Délai de reconnexion exponentiel avec jitter complet : après une coupure de l'exchange,
+    les connexions ne se reconnectent pas toutes en même temps.
+
+    :param base: délai de la première tentative (secondes)
+    :param cap: délai maximal (secondes)
+    :param reset_after: une connexion restée ouverte au moins ce temps remet le compteur à zéro
+    """
+    def __init__(self, base: float = 1.0, cap: float = 60.0, reset_after: float = 60.0, rng=None):
+        self.base = base
+        self.cap = cap
+        self.reset_after = reset_after
+        self.attempts = 0
+        self.connected_at = None
+        self._rng = rng or random.Random()
+
+    def connected(self):
+        self.connected_at = time.monotonic()
+
+    def next_delay(self) -> float:
+        if self.connected_at is not None and time.monotonic() - self.connected_at >= self.reset_after:
+            self.attempts = 0
+        self.connected_at = None
+        ceiling = min(self.cap, self.base * (2 ** self.attempts))
+        self.attempts += 1
+        return self._rng.uniform(0, ceiling)
+
+class ConnectionStats:
+    """Compteurs d'une connexion websocket (un symbole de l'ingester, le flux depth, ...)."""
+    def __init__(self, name: str):
+        self.name = name
+        self.connects = 0
+        self.reconnects = 0
+        self.failures = 0
+        self.stale_reconnects = 0
+        self.backfilled_rows = 0
+        self.trades = 0
+        self.last_error = None
+        self.connected_since = None
+        self.last_message_at = None
+        self.last_event_ms = None
+        self.lag_ms = None
+        self.ping_latency = None
+
+    def on_connect(self):
+        if self.connects:
+            self.reconnects += 1
+        self.connects += 1
+        self.connected_since = time.time()
+
+    def on_disconnect(self, error=None):
+        self.connected_since = None
+        if error is not None:
+            self.failures += 1
+            self.last_error = str(error)
+
+    def as_dict(self) -> dict:
+        return {
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "failures": self.failures,
+            "stale_reconnects": self.stale_reconnects,
+            "backfilled_rows": self.backfilled_rows,
+            "trades": self.trades,
+            "connected": self.connected_since is not None,
+            "last_error": self.last_error,
+            "ping_latency": self.ping_latency,
+            "last_event_ms": self.last_event_ms,
+            "lag_ms": self.lag_ms,
+        }
+
+CONNECTION_STATS = {}
+
+def get_connection_stats(name: str) -> ConnectionStats:
+    stats = CONNECTION_STATS.get(name)
+    if stats is None:
+        stats = CONNECTION_STATS[name] = ConnectionStats(name)
+    return stats
+
+def connection_stats_snapshot() -> dict:
+    return {name: stats.as_dict() for name, stats in CONNECTION_STATS.items()}